@@ -1,11 +1,39 @@
-import requests
+import atexit
+import functools
+import hmac
+import math
 import os
-import pandas as pd
-from flask import Flask, request, render_template_string, session, redirect, url_for
+import secrets
+import threading
+import time
+from flask import Flask, Response, request, render_template, session, redirect, url_for, make_response, jsonify
 import logging
-import math
 from urllib.parse import unquote
-from typing import Tuple, List, Dict
+from typing import TYPE_CHECKING, Tuple, List, Dict, Mapping, NamedTuple, Optional
+
+from markupsafe import Markup, escape
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from bandeja_salida import BANDEJA_SALIDA_PATH, SMTP_HOST, BandejaSalida, Correo, EnvioRechazado, direccion_valida
+from cache_fragmentos import CacheFragmentos
+from cache_http import CacheHttp, etag_para
+from catalogo import DatosCatalogo, catalogo_vacio
+from catalogo_mapeado import CATALOGO_MAPEADO_PATH
+from cotizaciones_guardadas import COTIZACIONES_PATH, AlmacenCotizaciones, CotizacionGuardada, cursor_desde_texto, nueva_cotizacion
+from historial_precio_oro import HISTORIAL_PATH, HistorialPrecioOro, instante_desde_texto
+from facetas_catalogo import FACETAS_BUSQUEDA, ConsultaFacetas, ResultadoFacetas
+from imagenes import SIZES_CATALOGO, ManifestImagenes
+from indice_catalogo import SIN_OPCIONES, IndiceCatalogo, OpcionesModelo
+from metricas import Metricas
+from precio_oro import ProveedorGoldApi, ServicioPrecioOro
+from precios import FACTOR_KILATES, buscar_variante, calcular_monto_aproximado, cotizar_anillo, cotizar_lote
+from recarga_catalogo import CatalogoVersionado, RecargadorCatalogo
+from sesiones import InterfazSesionServidor, crear_interfaz_sesion
+from utilidades import es_nulo
+from vitrina_catalogo import EntradaVitrina, VitrinaCatalogo, construir_vitrina
+
+if TYPE_CHECKING: # pandas solo se importa al compilar el libro, no en los workers
+    import pandas as pd
 
 # Configuración de Logging
 logging.basicConfig(level=logging.INFO)
@@ -14,196 +42,249 @@ logging.basicConfig(level=logging.INFO)
 app = Flask(__name__)
 # Es CRUCIAL que la clave secreta se establezca para que las sesiones funcionen.
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "una_clave_secreta_fuerte_aqui_para_testing") 
+# Detrás de N proxies (p. ej. 1 en Render) la IP del cliente sale de X-Forwarded-For; la usa el límite de correos por IP
+PROXIES_CONFIABLES = int(os.getenv("PROXIES_CONFIABLES", "0"))
+if PROXIES_CONFIABLES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXIES_CONFIABLES)
+# Sesión del lado del servidor (SESION_BACKEND=sqlite|memoria|cookie): la cookie solo lleva un identificador opaco
+app.session_interface = crear_interfaz_sesion(app)
+# URLs estáticas con huella, ETag/304 y compresión gzip/brotli
+cache_http = CacheHttp(app)
+# Tramos por petición (cabecera Server-Timing) e histogramas/medidores para /metrics
+metricas = Metricas(app)
+# Credencial de /cotizaciones y /metrics (Basic con esta clave como contraseña, o Bearer); vacía las desactiva (404)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Versión del código desplegado (entra en los ETag para invalidarlos tras un deploy)
+VERSION_APP = os.getenv("RENDER_GIT_COMMIT", str(os.path.getmtime(__file__)))
 
 EXCEL_PATH = "Formulario Catalogo.xlsm" 
-# Factores de pureza (Kilates / 24)
-FACTOR_KILATES = {"22": 0.9167, "18": 0.75, "14": 0.5833, "10": 0.4167}
-DEFAULT_GOLD_PRICE = 5600.00 # USD por Onza (Valor por defecto/fallback)
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "Formulario Catalogo.snapshot") # Compilado con snapshot_catalogo.py
+KILATES_OPCIONES = sorted(FACTOR_KILATES.keys(), key=int, reverse=True)
+DIAMANTE_OPCIONES = ["Laboratorio", "Natural"]
+MAX_LOTE_COTIZACION = 5000 # Configuraciones por llamada a /api/quote
+CATALOGO_POR_PAGINA = int(os.getenv("CATALOGO_POR_PAGINA", "24")) # Cards por página del catálogo
+MAX_BUSQUEDA_POR_PAGINA = 200 # Cards por página de /api/catalogo/buscar
+COTIZACIONES_POR_PAGINA = 25 # Filas por página de /cotizaciones
+AVISOS_CORREO = ("sin_email", "duplicado", "limite") # ?correo= tras un envío no encolado
+LIMITES_ENTREGA_CORREO = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 14400.0) # Segundos
+
+# Precio del oro servido desde memoria y refrescado en segundo plano; arranca desde el historial, sin red
+historial_precio_oro = HistorialPrecioOro(HISTORIAL_PATH) if HISTORIAL_PATH else None
+servicio_precio_oro = ServicioPrecioOro(ProveedorGoldApi(), historial=historial_precio_oro)
+
+# Cotizaciones del botón "Guardar": se encolan y un hilo por worker las escribe en SQLite por lotes
+cotizaciones_guardadas = AlmacenCotizaciones(COTIZACIONES_PATH) if COTIZACIONES_PATH else None
+if cotizaciones_guardadas is not None:
+    atexit.register(cotizaciones_guardadas.detener) # Al reciclar un worker no se pierde lo que quede en cola
+
+# Presupuestos por email (con SMTP_HOST): se encolan ya renderizados y un hilo por worker los entrega con reintentos
+entrega_correos = metricas.histograma("correo_entrega_segundos", "Tiempo entre encolar un correo y que el servidor SMTP lo acepte.",
+                                      LIMITES_ENTREGA_CORREO)
+bandeja_salida = BandejaSalida(BANDEJA_SALIDA_PATH, al_entregar=entrega_correos.observar) if SMTP_HOST and BANDEJA_SALIDA_PATH else None
+
+# Catálogo versionado (Caché): se recarga en segundo plano cuando cambia el Excel
+# Con CATALOGO_MAPEADO_PATH cada worker mapea el mismo archivo de arrays en lugar de tener su copia
+recargador_catalogo = RecargadorCatalogo(EXCEL_PATH, SNAPSHOT_PATH, ruta_mapeado=CATALOGO_MAPEADO_PATH or None)
+# Versiones WebP/JPEG de las fotos generadas con imagenes.py
+manifest_imagenes = ManifestImagenes(app.static_folder)
+# Cards del catálogo por (generación, idioma); se vacía en cada recarga del Excel
+cache_fragmentos_catalogo = CacheFragmentos(max_entradas=8)
+recargador_catalogo.suscribir(lambda _catalogo: cache_fragmentos_catalogo.invalidar())
+# Orden de las cards e índice de facetas de sus variantes por generación; se construye al publicarse cada versión
+cache_vitrina = CacheFragmentos(max_entradas=2)
+
+def _preparar_vitrina(catalogo_version: CatalogoVersionado):
+    cache_vitrina.invalidar()
+    vitrina_actual(catalogo_version)
+
+recargador_catalogo.suscribir(_preparar_vitrina)
+# Resultados de la búsqueda facetada por (generación, consulta[, precio]); las páginas de una misma búsqueda lo comparten
+cache_busquedas = CacheFragmentos(max_entradas=64)
+recargador_catalogo.suscribir(lambda _catalogo: cache_busquedas.invalidar())
+
+def _estado_precio_oro() -> Dict:
+    lectura = servicio_precio_oro.lectura()
+    return {(("status", status),): float(status == lectura.status) for status in ("live", "stale", "fallback")}
+
+def _estadisticas_caches(campo: str) -> Dict:
+    return {
+        (("cache", "fragmentos"),): cache_fragmentos_catalogo.estadisticas()[campo],
+        (("cache", "http"),): cache_http.estadisticas()[campo],
+        (("cache", "busquedas"),): cache_busquedas.estadisticas()[campo],
+    }
+
+def _tasa_aciertos() -> Dict:
+    tasas = {}
+    for nombre, estadisticas in (("fragmentos", cache_fragmentos_catalogo.estadisticas()), ("http", cache_http.estadisticas()),
+                                    ("busquedas", cache_busquedas.estadisticas())):
+        total = estadisticas["aciertos"] + estadisticas["fallos"]
+        tasas[(("cache", nombre),)] = estadisticas["aciertos"] / total if total else 0.0
+    return tasas
+
+metricas.medidor("precio_oro_usd", "Precio de la onza de oro servido (USD).", lambda: servicio_precio_oro.lectura().precio)
+metricas.medidor("precio_oro_edad_segundos", "Antigüedad del precio del oro en memoria.", lambda: servicio_precio_oro.lectura().edad)
+metricas.medidor("precio_oro_estado", "Estado del precio del oro (1 en el estado actual).", _estado_precio_oro)
+metricas.medidor("precio_oro_circuito_abierto", "1 si el circuito de la API del oro está abierto.", lambda: float(servicio_precio_oro.circuito_abierto()))
+metricas.medidor("precio_oro_refrescos_total", "Consultas al proveedor del precio del oro por resultado.",
+                 lambda: {(("resultado", "ok"),): servicio_precio_oro.refrescos_ok, (("resultado", "error"),): servicio_precio_oro.refrescos_fallidos}, tipo="counter")
+metricas.medidor("catalogo_generacion", "Generación publicada del catálogo.", lambda: recargador_catalogo.actual().generacion)
+metricas.medidor("catalogo_variantes", "Variantes en el índice del catálogo publicado.", lambda: len(recargador_catalogo.actual().datos.indice))
+metricas.medidor("catalogo_cargado_timestamp_segundos", "Momento (epoch) en que se publicó la generación actual.", lambda: recargador_catalogo.actual().cargado_en)
+metricas.medidor("cache_aciertos_total", "Aciertos por caché.", lambda: _estadisticas_caches("aciertos"), tipo="counter")
+metricas.medidor("cache_fallos_total", "Fallos por caché.", lambda: _estadisticas_caches("fallos"), tipo="counter")
+metricas.medidor("cache_tasa_aciertos", "Aciertos / (aciertos + fallos) desde el arranque del proceso.", _tasa_aciertos)
+metricas.medidor("cache_http_304_total", "Respuestas 304 Not Modified.", lambda: cache_http.respuestas_304, tipo="counter")
+
+def _operaciones_sesion() -> Optional[Dict]:
+    if not isinstance(app.session_interface, InterfazSesionServidor):
+        return None
+    return {(("operacion", nombre),): valor for nombre, valor in app.session_interface.estadisticas().items()}
 
-# Variables globales para los DataFrames (Caché)
-df_global = pd.DataFrame()
-df_adicional_global = pd.DataFrame()
-costos_diamantes_global = {} 
-ct_cache = {} # Nuevo caché para guardar el valor de CT por modelo para su uso en la UI
+def _operaciones_cotizaciones() -> Optional[Dict]:
+    if cotizaciones_guardadas is None:
+        return None
+    return {(("operacion", nombre),): valor for nombre, valor in cotizaciones_guardadas.estadisticas().items()}
+
+metricas.medidor("cotizaciones_guardadas_total", "Cotizaciones encoladas, escritas, lotes confirmados, errores de escritura y escrituras en la propia petición.",
+                 _operaciones_cotizaciones, tipo="counter")
+metricas.medidor("cotizaciones_pendientes", "Cotizaciones en cola aún no escritas en este worker.",
+                 lambda: cotizaciones_guardadas.pendientes() if cotizaciones_guardadas is not None else None)
+
+metricas.medidor("correo_bandeja", "Correos en la bandeja de salida compartida por estado (pendiente, reintentando, fallido).",
+                 lambda: {(("estado", estado),): cantidad for estado, cantidad in bandeja_salida.conteos().items()} if bandeja_salida is not None else None)
+metricas.medidor("correo_envios_total", "Intentos de entrega de este worker por resultado.",
+                 lambda: {(("resultado", r),): v for r, v in bandeja_salida.estadisticas().items()} if bandeja_salida is not None else None,
+                 tipo="counter")
+
+metricas.medidor("sesion_operaciones_total", "Lecturas y escrituras del almacén de sesiones y escrituras omitidas por no haber cambios.",
+                 _operaciones_sesion, tipo="counter")
+
+@app.template_filter("dinero")
+def formato_dinero(valor: float) -> str:
+    """Formato monetario usado en las plantillas (1,234.56)."""
+    return f"{valor:,.2f}"
 
 # --------------------- FUNCIONES DE UTILIDAD ---------------------
 
 def obtener_precio_oro() -> Tuple[float, str]:
-    """Obtiene el precio actual del oro (XAU/USD) por onza o usa un fallback."""
-    API_KEY = "goldapi-4g9e8p719mgvhodho-io" 
-    url = "https://www.goldapi.io/api/XAU/USD"
-    headers = {"x-access-token": API_KEY, "Content-Type": "application/json"}
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        price = data.get("price")
-        
-        if price is not None and not math.isnan(price):
-            return float(price), "live"
-        return DEFAULT_GOLD_PRICE, "fallback"
-        
-    except (requests.exceptions.RequestException, Exception) as e:
-        logging.error(f"Error al obtener precio del oro: {e}. Usando fallback ({DEFAULT_GOLD_PRICE}).")
-        return DEFAULT_GOLD_PRICE, "fallback"
+    """Obtiene el último precio conocido del oro (XAU/USD) por onza sin bloquear la petición."""
+    with metricas.tramo("precio_oro"):
+        lectura = servicio_precio_oro.lectura()
+    return lectura.precio, lectura.status
 
-def calcular_valor_gramo(valor_onza: float, pureza_factor: float, peso_gramos: float) -> Tuple[float, float]:
+def catalogo_actual() -> CatalogoVersionado:
+    """Versión publicada del catálogo (DataFrames, costos, CTs e índice de una misma generación)."""
+    with metricas.tramo("cargar_datos"):
+        return recargador_catalogo.actual()
+
+def generacion_catalogo() -> int:
+    """Número de generación del catálogo; cambia con cada recarga para invalidar cachés derivados."""
+    return catalogo_actual().generacion
+
+def cargar_datos() -> Tuple[Optional["pd.DataFrame"], Optional["pd.DataFrame"], Dict[str, float], Mapping[str, float]]:
+    """Costos de diamante y CTs por modelo (con caché). Los DataFrames son None: el catálogo publicado solo trae el modelo tipado."""
+    datos = catalogo_actual().datos
+    return datos.df, datos.df_adicional, datos.costos_diamantes, datos.ct_cache
+
+
+def obtener_peso_y_costo(modelo: str, metal: str, ancho: str, kilates: str, talla: str, genero: str, select_text: str, indice: Optional[IndiceCatalogo] = None) -> Tuple[float, float, float, float]: 
     """
-    Calcula el valor del gramo de la aleación y el monto total de oro de la joya.
+    Busca peso BASE, costos fijo/adicional (por talla) y CT en el índice precalculado.
     """
-    if valor_onza <= 0 or peso_gramos <= 0 or pureza_factor <= 0:
-        return 0.0, 0.0
     
-    valor_gramo_puro = valor_onza / 31.1035 # Onza Troy (31.1035 gramos)
-    valor_gramo_aleacion = valor_gramo_puro * pureza_factor
-    monto_total = valor_gramo_aleacion * peso_gramos
+    if modelo == select_text:
+        return 0.0, 0.0, 0.0, 0.0 
     
-    return valor_gramo_aleacion, monto_total
+    if indice is None:
+        indice = catalogo_actual().datos.indice
+    with metricas.tramo("peso_y_costo"):
+        return buscar_variante(indice, modelo, metal, ancho, kilates, talla, genero)
 
-def calcular_monto_aproximado(monto_bruto: float) -> float:
-    """Aproxima (redondea hacia arriba) el monto al múltiplo de 10 más cercano."""
-    if monto_bruto <= 0:
-        return 0.0
-    aproximado = math.ceil(monto_bruto / 10.0) * 10.0
-    return aproximado
+# --------------------- CARDS DEL CATÁLOGO ---------------------
 
-def safe_float(value) -> float:
-    """Intenta convertir un valor a float de manera segura, retornando 0.0 en caso de error."""
-    try:
-        if pd.notna(value) and str(value).strip():
-            return float(str(value).strip())
-    except:
-        pass
-    return 0.0
+# Marcas que se sustituyen por petición en las cards cacheadas (borde y etiqueta de selección)
+MARCA_BORDE = "__MARCA_BORDE__"
+MARCA_ETIQUETA = "__MARCA_ETIQUETA__"
+MARCA_ACCION = "__MARCA_ACCION__" # action de los formularios de selección (lleva la consulta y el cursor de la página)
 
-def cargar_datos() -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, float], Dict[str, float]]:
-    """Carga los DataFrames, costos de diamante y CTs por modelo (con caché)."""
-    global df_global, df_adicional_global, costos_diamantes_global, ct_cache
-    
-    if not df_global.empty and not df_adicional_global.empty and costos_diamantes_global and ct_cache:
-        return df_global, df_adicional_global, costos_diamantes_global, ct_cache
+class TarjetaCatalogo(NamedTuple):
+    """Card renderizada de una variante NAME/METAL, partida donde van el borde, la etiqueta de selección y el action."""
+    modelo: str
+    metal: str
+    partes: Tuple[str, ...] # (antes del borde, antes de la etiqueta, *tramos separados por el action)
 
-    costos_diamantes = {"laboratorio": 0.0, "natural": 0.0}
-    ct_cache_temp = {}
-    try:
-        # 1. Cargar la hoja WEDDING BANDS
-        df_raw = pd.read_excel(EXCEL_PATH, sheet_name="WEDDING BANDS", engine="openpyxl", header=None)
-        new_columns_df = df_raw.iloc[1].astype(str).str.strip().str.upper()
-        df = df_raw.iloc[2:].copy()
-        df.columns = new_columns_df
-        if 'WIDTH' in df.columns:
-            df.rename(columns={'WIDTH': 'ANCHO'}, inplace=True)
-            
-        # 2. Cargar la hoja SIZE
-        df_adicional_raw = pd.read_excel(EXCEL_PATH, sheet_name="SIZE", engine="openpyxl", header=None)
-        df_adicional_headers = df_adicional_raw.iloc[0].astype(str).str.strip().str.upper()
-        df_adicional = df_adicional_raw.iloc[1:].copy()
-        df_adicional.columns = df_adicional_headers
-        
-        # 3. Extracción de Costos de Diamantes
-        
-        if "MONTO F3" in df_adicional_headers:
-             df_adicional.rename(columns={'MONTO F3': 'MONTO'}, inplace=True)
-        
-        monto_laboratorio_raw = None
-        if "MONTO" in df_adicional.columns and len(df_adicional) > 1:
-            monto_laboratorio_raw = df_adicional["MONTO"].iloc[1]
-            
-        monto_natural_raw = None
-        if len(df_adicional_raw) > 2 and len(df_adicional_raw.columns) > 5:
-            monto_natural_raw = df_adicional_raw.iloc[1, 5] 
-        
-        costos_diamantes["laboratorio"] = safe_float(monto_laboratorio_raw)
-        costos_diamantes["natural"] = safe_float(monto_natural_raw)
-        
-        # 4. Limpieza y estandarización
-        cols_to_strip = ["NAME", "METAL", "RUTA FOTO", "PESO", "GENERO", "CT", "ANCHO", "CARAT"] 
-        for col in cols_to_strip:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-        if "ANCHO" in df.columns:
-            df["ANCHO"] = df["ANCHO"].str.replace('MM', '', regex=False).str.strip()
-            
-        # 5. Cachear CT por modelo para decidir si mostrar el selector
-        if "NAME" in df.columns and "CT" in df.columns:
-             ct_group = df.groupby(["NAME", "ANCHO", "METAL", "CARAT", "GENERO"])["CT"].first().reset_index()
-             for _, row in ct_group.iterrows():
-                 key = f"{row['NAME']}|{row['ANCHO']}|{row['METAL']}|{row['CARAT']}|{row['GENERO']}"
-                 ct_cache_temp[key.upper()] = safe_float(row["CT"])
-        
-        df_global = df
-        df_adicional_global = df_adicional
-        costos_diamantes_global = costos_diamantes
-        ct_cache = ct_cache_temp
-        
-        return df, df_adicional, costos_diamantes, ct_cache
-        
-    except Exception as e:
-        logging.error(f"Error CRÍTICO al leer el archivo Excel: {e}") 
-        return pd.DataFrame(), pd.DataFrame(), costos_diamantes, ct_cache_temp
+def obtener_nombre_archivo_imagen(ruta_completa: str) -> str:
+    if es_nulo(ruta_completa):
+        return "placeholder.png" 
+    ruta_limpia = str(ruta_completa).replace('\\', '/')
+    nombre_archivo = os.path.basename(ruta_limpia).strip()
+    return unquote(nombre_archivo)
 
+def datos_imagen_catalogo(nombre_foto: str) -> Dict[str, str]:
+    """srcset WebP/JPEG si la foto fue procesada con imagenes.py; si no, la imagen original."""
+    versiones = manifest_imagenes.versiones(nombre_foto)
+    if not versiones:
+        return {"src": url_for("static", filename=nombre_foto)}
+    
+    def srcset(lista):
+        return ", ".join(f"{url_for('static', filename=ruta)} {ancho}w" for ruta, ancho in lista)
+    
+    jpeg = versiones["jpeg"]
+    return {
+        "src": url_for('static', filename=jpeg[len(jpeg) // 2][0]),
+        "webp": srcset(versiones["webp"]),
+        "jpeg": srcset(jpeg),
+        "sizes": SIZES_CATALOGO,
+        "ancho": versiones["ancho"],
+        "alto": versiones["alto"],
+    }
 
-def obtener_peso_y_costo(df_adicional_local: pd.DataFrame, modelo: str, metal: str, ancho: str, kilates: str, talla: str, genero: str, select_text: str) -> Tuple[float, float, float, float]: 
+class TarjetasCatalogo:
     """
-    Busca peso BASE, costos fijo/adicional (por talla) y CT.
+    Cards de una (generación, idioma, versión de imágenes), renderizadas la primera vez que se piden y guardadas.
+    Así la primera página del catálogo solo renderiza sus propias cards, sea cual sea el tamaño del libro.
     """
-    
-    global df_global 
-    
-    if df_global.empty or not all([modelo, metal, ancho, kilates, talla, genero]) or modelo == select_text:
-        return 0.0, 0.0, 0.0, 0.0 
-        
-    # 1. Buscar el PESO (BASE), COSTO FIJO y CT en df_global (WEDDING BANDS)
-    filtro_base = (df_global["NAME"] == modelo) & \
-                  (df_global["ANCHO"] == ancho) & \
-                  (df_global["METAL"] == metal) & \
-                  (df_global["CARAT"] == kilates) & \
-                  (df_global["GENERO"] == genero) 
-    
-    peso = 0.0 
-    price_cost = 0.0 
-    ct = 0.0 
-    
-    if not df_global.loc[filtro_base].empty:
-        base_fila = df_global.loc[filtro_base].iloc[0]
-        peso = safe_float(base_fila.get("PESO", 0))
-        price_cost = safe_float(base_fila.get("PRICE COST", 0))
-        ct = safe_float(base_fila.get("CT", 0))
-
-    # 2. Buscar el COSTO ADICIONAL por TALLA en df_adicional_local (Hoja SIZE)
-    cost_adicional = 0.0
-    if not df_adicional_local.empty and "SIZE" in df_adicional_local.columns and "ADICIONAL" in df_adicional_local.columns:
-        
-        if "SIZE_STRIP" not in df_adicional_local.columns:
-            df_adicional_local["SIZE_STRIP"] = df_adicional_local["SIZE"].astype(str).str.strip()
-            
-        filtro_adicional = (df_adicional_local["SIZE_STRIP"] == talla) 
-        
-        if not df_adicional_local.loc[filtro_adicional].empty:
-            adicional_fila = df_adicional_local.loc[filtro_adicional].iloc[0]
-            cost_adicional = safe_float(adicional_fila.get("ADICIONAL"))
 
-    return peso, price_cost, cost_adicional, ct 
+    def __init__(self, vitrina: VitrinaCatalogo, t: Dict[str, str]):
+        self.vitrina = vitrina
+        self.t = t
+        self._tarjetas: Dict[int, TarjetaCatalogo] = {}
 
-# --------------------- RUTAS FLASK ---------------------
+    def tarjeta(self, posicion: int) -> TarjetaCatalogo:
+        """Card de la entrada `posicion` de la vitrina (requiere contexto de petición)."""
+        tarjeta = self._tarjetas.get(posicion)
+        if tarjeta is None:
+            tarjeta = self._tarjetas[posicion] = self._renderizar(self.vitrina.entradas[posicion])
+        return tarjeta
 
-@app.route("/", methods=["GET", "POST"])
-def formulario():
-    """Ruta principal: maneja datos de cliente, selección de Kilates, Ancho, Talla y cálculo."""
-    
-    df, df_adicional, costos_diamantes, ct_cache_local = cargar_datos()
-    precio_onza, status = obtener_precio_oro()
-    monto_total_bruto = 0.0
-    
-    monto_f3_diamante_laboratorio = costos_diamantes.get("laboratorio", 0.0)
-    monto_f3_diamante_natural = costos_diamantes.get("natural", 0.0)
-    
-    # --- Carga de Idioma y Textos ---
-    idioma = request.form.get("idioma", session.get("idioma", "Español"))
-    session["idioma"] = idioma 
-    es = idioma == "Español"
+    def _renderizar(self, entrada: EntradaVitrina) -> TarjetaCatalogo:
+        item = {
+            "modelo": entrada.modelo,
+            "metal": entrada.metal,
+            "imagen": datos_imagen_catalogo(obtener_nombre_archivo_imagen(entrada.ruta_foto)),
+            "borde_clase": MARCA_BORDE,
+            "etiqueta": MARCA_ETIQUETA,
+        }
+        html = app.jinja_env.get_template("_tarjeta_modelo.html").render(
+            item=item,
+            t=self.t,
+            catalogo_url=MARCA_ACCION,
+            placeholder_url=url_for('static', filename='placeholder.png'),
+        )
+        antes, resto = html.split(MARCA_BORDE, 1)
+        medio, despues = resto.split(MARCA_ETIQUETA, 1)
+        return TarjetaCatalogo(entrada.modelo, entrada.metal, (antes, medio, *despues.split(MARCA_ACCION)))
+
+# --------------------- SECCIONES DEL FORMULARIO ---------------------
+
+# tipo de sección -> (género en el catálogo, clave del título en los textos, color)
+SECCIONES_FORMULARIO = {
+    "dama": ("DAMA", "dama", "pink"),
+    "cab": ("CABALLERO", "cab", "blue"),
+}
 
+def textos_formulario(idioma: str) -> Dict[str, str]:
+    """Textos del formulario en el idioma elegido."""
     t = {
         "titulo": "PRESUPUESTO",
         "seleccionar": "Seleccione una opción de catálogo",
@@ -222,10 +303,20 @@ def formulario():
         "nombre": "Nombre del Cliente",
         "email": "Email de Contacto",
         "cambiar_idioma": "Cambiar Idioma",
-        "ir_catalogo": "Ir al Catálogo"
+        "ir_catalogo": "Ir al Catálogo",
+        "guardada": "Cotización guardada. Referencia:",
+        "ver_guardadas": "Ver cotizaciones guardadas",
+        "enviar": "Enviar por Email",
+        "correo_pendiente": "Presupuesto en cola para {destinatario} ({pendientes} en la bandeja de salida).",
+        "correo_reintentando": "Reintentando el envío a {destinatario} (intento {intentos}): {error}",
+        "correo_enviado": "Presupuesto enviado a {destinatario}.",
+        "correo_fallido": "No se pudo enviar el presupuesto a {destinatario}: {error}",
+        "correo_sin_email": "Indique un email válido para enviar el presupuesto.",
+        "correo_duplicado": "Este presupuesto ya se envió a ese email.",
+        "correo_limite": "Se alcanzó el límite de envíos por hora. Inténtelo más tarde."
     }
     
-    if not es:
+    if idioma != "Español":
         t.update({
             "titulo": "ESTIMATE",
             "seleccionar": "Select a catalog option",
@@ -240,436 +331,551 @@ def formulario():
             "nombre": "Client Name",
             "email": "Contact Email",
             "cambiar_idioma": "Change Language",
-            "ir_catalogo": "Go to Catalog"
+            "ir_catalogo": "Go to Catalog",
+            "guardada": "Estimate saved. Reference:",
+            "ver_guardadas": "View saved estimates",
+            "enviar": "Email Estimate",
+            "correo_pendiente": "Estimate queued for {destinatario} ({pendientes} in the outbox).",
+            "correo_reintentando": "Retrying delivery to {destinatario} (attempt {intentos}): {error}",
+            "correo_enviado": "Estimate sent to {destinatario}.",
+            "correo_fallido": "The estimate could not be sent to {destinatario}: {error}",
+            "correo_sin_email": "Enter a valid email to send the estimate.",
+            "correo_duplicado": "This estimate was already sent to that email.",
+            "correo_limite": "The hourly email limit was reached. Please try again later."
         })
+    return t
 
+def obtener_opciones(datos: DatosCatalogo, modelo: str, metal: str, select_text: str) -> OpcionesModelo:
+    """Anchos disponibles para el modelo/metal y tallas del catálogo; precalculados en el índice de cada versión."""
+    if modelo == select_text or not metal:
+        return SIN_OPCIONES
+    with metricas.tramo("opciones"):
+        return datos.indice.opciones(modelo, metal)
+
+def leer_valores_seccion(tipo: str, t: Dict[str, str]) -> Dict[str, str]:
+    """Selección actual de una sección: lo enviado en el formulario tiene prioridad sobre la sesión."""
+    # Usamos el texto de 'seleccionar' en mayúsculas como valor por defecto/no seleccionado
+    return {
+        "modelo": session.get(f"modelo_{tipo}", t['seleccionar']).upper(),
+        "metal": session.get(f"metal_{tipo}", "").upper(),
+        "kilates": request.form.get(f"kilates_{tipo}", session.get(f"kilates_{tipo}", "14")),
+        "ancho": request.form.get(f"ancho_{tipo}", session.get(f"ancho_{tipo}", "")),
+        "talla": request.form.get(f"talla_{tipo}", session.get(f"talla_{tipo}", "")),
+        "tipo_diamante": request.form.get(f"tipo_diamante_{tipo}", session.get(f"tipo_diamante_{tipo}", "Laboratorio")),
+    }
+
+def guardar_valores_seccion(tipo: str, valores: Dict[str, str]):
+    for campo in ("kilates", "ancho", "talla", "tipo_diamante"):
+        session[f"{campo}_{tipo}"] = valores[campo]
+
+def calcular_seccion(tipo: str, datos: DatosCatalogo, precio_onza: float, t: Dict[str, str], valores: Dict[str, str]) -> Dict:
+    """
+    Opciones, autoselección y cotización de una sección (dama o cab).
+    Actualiza `valores` con el ancho/talla autoseleccionados y el tipo de diamante efectivo.
+    """
+    genero, clave_titulo, color = SECCIONES_FORMULARIO[tipo]
+    texto_seleccionado = t['seleccionar'].upper()
+    modelo, metal = valores["modelo"], valores["metal"]
+    opciones = obtener_opciones(datos, modelo, metal, texto_seleccionado)
+    anchos, tallas = opciones.anchos, opciones.tallas
+
+    # --- Autoselección ---
+    if modelo != texto_seleccionado:
+        valores["ancho"] = valores["ancho"] or opciones.ancho_defecto
+        valores["talla"] = valores["talla"] or opciones.talla_defecto
+
+    # --- Cálculo ---
+    kilates, ancho = valores["kilates"], valores["ancho"]
+    peso_base, cost_fijo, cost_adicional, ct = obtener_peso_y_costo(modelo, metal, ancho, kilates, valores["talla"], genero, texto_seleccionado, datos.indice)
+    cotizacion = cotizar_anillo(precio_onza, datos.costos_diamantes, kilates, valores["tipo_diamante"], peso_base, cost_fijo, cost_adicional, ct)
+    valores["tipo_diamante"] = cotizacion.tipo_diamante
+    
+    detalle = (
+        f' (Peso: {peso_base:,.2f}g ({kilates}K), '
+        f'Add: ${cost_adicional:,.2f}, CT: {ct:,.3f}, '
+        f'Diamante: {cotizacion.tipo_diamante}, Costo/CT: ${cotizacion.costo_diamante:,.2f}, '
+        f'Subtotal Diamantes: ${cotizacion.monto_diamantes:,.2f})'
+    )
+
+    # --- Selectores ---
+    if modelo == texto_seleccionado or not metal:
+        estado = "sin_modelo"
+    elif not anchos or not tallas:
+        estado = "sin_opciones"
+    else:
+        estado = "completo"
+    
+    mostrar_diamante = False
+    if modelo != texto_seleccionado and metal and ancho and kilates:
+        key = f"{modelo}|{ancho}|{metal}|{kilates}|{genero}"
+        mostrar_diamante = datos.ct_cache.get(key.upper(), 0.0) > 0.0
+
+    return {
+        "tipo": tipo, "visible": modelo != texto_seleccionado,
+        "titulo": t[clave_titulo], "color": color, "modelo": modelo, "metal": metal,
+        "selectores": {
+            "tipo": tipo,
+            "estado": estado,
+            "kilates_opciones": KILATES_OPCIONES,
+            "kilates_actual": kilates,
+            "anchos": anchos,
+            "tallas": tallas,
+            "ancho_actual": ancho,
+            "talla_actual": valores["talla"],
+            "mostrar_diamante": mostrar_diamante,
+            "diamante_opciones": DIAMANTE_OPCIONES,
+            "tipo_diamante_actual": cotizacion.tipo_diamante,
+        },
+        "monto": cotizacion.monto, "ct": ct, "detalle": detalle,
+        "cotizacion": cotizacion,
+    }
+
+def cotizacion_mostrada(nombre_cliente: str, email_cliente: str, idioma: str, precio_onza: float, status: str, generacion: int,
+                       valores: Dict[str, Dict[str, str]], secciones: List[Dict], monto_bruto: float, monto_total: float) -> CotizacionGuardada:
+    """La cotización que ve el cliente (secciones visibles), para guardarla o enviarla por email."""
+    anillos = [{"tipo": s["tipo"], "genero": SECCIONES_FORMULARIO[s["tipo"]][0], **valores[s["tipo"]], **s["cotizacion"]._asdict()}
+               for s in secciones if s["visible"]]
+    return nueva_cotizacion(nombre_cliente, email_cliente, idioma, precio_onza, status, generacion, anillos, monto_bruto, monto_total)
+
+def textos_correo(idioma: str) -> Dict[str, str]:
+    """Textos del correo del presupuesto en el idioma del cliente."""
+    t = {
+        "asunto": "Su presupuesto de anillos ({referencia})",
+        "saludo": "Hola {nombre},",
+        "introduccion": "Este es el presupuesto que preparamos para usted:",
+        "anillo": "Anillo",
+        "talla": "Talla",
+        "oro": "Oro",
+        "costo_fijo": "Costo fijo",
+        "adicional": "Adicional por talla",
+        "diamantes": "Diamantes",
+        "subtotal": "Subtotal",
+        "total": "Monto total del presupuesto",
+        "nota": "Calculado con el oro a ${precio} USD la onza. Los precios pueden variar con el precio del oro.",
+        "referencia": "Referencia",
+        "dama": "Dama",
+        "cab": "Caballero",
+    }
+    if idioma != "Español":
+        t.update({
+            "asunto": "Your ring estimate ({referencia})",
+            "saludo": "Hello {nombre},",
+            "introduccion": "Here is the estimate we prepared for you:",
+            "anillo": "Ring",
+            "talla": "Size",
+            "oro": "Gold",
+            "costo_fijo": "Fixed cost",
+            "adicional": "Size surcharge",
+            "diamantes": "Diamonds",
+            "total": "Total estimate amount",
+            "nota": "Calculated with gold at ${precio} USD per ounce. Prices may change with the price of gold.",
+            "referencia": "Reference",
+            "dama": "Lady",
+            "cab": "Gentleman",
+        })
+    return t
+
+def enviar_cotizacion(cotizacion: CotizacionGuardada, sesion: str, ip: Optional[str]) -> Optional[int]:
+    """
+    Renderiza una sola vez el correo del presupuesto y lo deja en la bandeja de salida; None sin un email válido.
+    Lanza EnvioRechazado si ya se envió ese presupuesto a ese email o si la sesión o la IP llegaron a su límite.
+    """
+    destinatario = direccion_valida(cotizacion.email_cliente)
+    if bandeja_salida is None or destinatario is None:
+        return None
+    t = textos_correo(cotizacion.idioma)
+    with metricas.tramo("correo"):
+        html = render_template("correo_cotizacion.html", t=t, c=cotizacion)
+        texto = render_template("correo_cotizacion.txt", t=t, c=cotizacion)
+        return bandeja_salida.encolar(destinatario, t["asunto"].format(referencia=cotizacion.referencia), texto, html,
+                                      cotizacion.referencia, cotizacion.huella(), sesion, ip)
+
+def estado_correo(correo: Optional[Correo], t: Dict[str, str]) -> Optional[Dict]:
+    """Estado del último presupuesto enviado desde esta sesión, con el texto a mostrar."""
+    if correo is None:
+        return None
+    estado = correo.estado_visible()
+    pendientes = sum(v for k, v in bandeja_salida.conteos().items() if k != "fallido") if estado == "pendiente" else 0
+    texto = t[f"correo_{estado}"].format(destinatario=correo.destinatario, pendientes=pendientes,
+                                         intentos=correo.intentos, error=correo.ultimo_error or "")
+    return {"id": correo.id, "estado": estado, "texto": texto, "intentos": correo.intentos}
+
+# --------------------- RUTAS FLASK ---------------------
+
+@app.route("/", methods=["GET", "POST"])
+def formulario():
+    """Ruta principal: maneja datos de cliente, selección de Kilates, Ancho, Talla y cálculo."""
+    
+    catalogo_version = catalogo_actual()
+    datos = catalogo_version.datos
+    precio_onza, status = obtener_precio_oro()
+    
+    # --- Carga de Idioma y Textos ---
+    idioma = request.form.get("idioma", session.get("idioma", "Español"))
+    session["idioma"] = idioma 
+    t = textos_formulario(idioma)
 
     # --- Carga/Persistencia de Variables ---
     nombre_cliente = request.form.get("nombre_cliente", session.get("nombre_cliente", "")) 
     email_cliente = request.form.get("email_cliente", session.get("email_cliente", "")) 
-    kilates_dama = request.form.get("kilates_dama", session.get("kilates_dama", "14"))
-    ancho_dama = request.form.get("ancho_dama", session.get("ancho_dama", ""))
-    talla_dama = request.form.get("talla_dama", session.get("talla_dama", ""))
-    tipo_diamante_dama = request.form.get("tipo_diamante_dama", session.get("tipo_diamante_dama", "Laboratorio"))
-    # Usamos el texto de 'seleccionar' en mayúsculas como valor por defecto/no seleccionado
-    modelo_dama = session.get("modelo_dama", t['seleccionar']).upper()
-    metal_dama = session.get("metal_dama", "").upper()
-    
-    kilates_cab = request.form.get("kilates_cab", session.get("kilates_cab", "14"))
-    ancho_cab = request.form.get("ancho_cab", session.get("ancho_cab", ""))
-    talla_cab = request.form.get("talla_cab", session.get("talla_cab", ""))
-    tipo_diamante_cab = request.form.get("tipo_diamante_cab", session.get("tipo_diamante_cab", "Laboratorio"))
-    modelo_cab = session.get("modelo_cab", t['seleccionar']).upper()
-    metal_cab = session.get("metal_cab", "").upper()
+    valores = {tipo: leer_valores_seccion(tipo, t) for tipo in SECCIONES_FORMULARIO}
 
     # Actualizar sesión (se mantiene la lógica)
     session["nombre_cliente"] = nombre_cliente 
     session["email_cliente"] = email_cliente 
-    session["kilates_dama"] = kilates_dama
-    session["ancho_dama"] = ancho_dama
-    session["talla_dama"] = talla_dama
-    session["tipo_diamante_dama"] = tipo_diamante_dama
-    session["kilates_cab"] = kilates_cab
-    session["ancho_cab"] = ancho_cab
-    session["talla_cab"] = talla_cab
-    session["tipo_diamante_cab"] = tipo_diamante_cab
-    
-    if request.method == "POST" and "idioma" in request.form and "volver_btn" not in request.form:
+    for tipo, valores_tipo in valores.items():
+        guardar_valores_seccion(tipo, valores_tipo)
+    
+    guardar = request.method == "POST" and "guardar_btn" in request.form
+    enviar = request.method == "POST" and "enviar_btn" in request.form
+    if request.method == "POST" and "idioma" in request.form and "volver_btn" not in request.form and not (guardar or enviar):
          return redirect(url_for("formulario"))
         
     fresh_selection = request.args.get("fresh_selection")
     if fresh_selection:
-        session["ancho_dama"] = "" 
-        session["talla_dama"] = ""
-        session["ancho_cab"] = ""
-        session["talla_cab"] = ""
-        ancho_dama = ""
-        talla_dama = ""
-        ancho_cab = ""
-        talla_cab = ""
-
-    # --- Opciones disponibles y Autoselección ---
-    def get_options(modelo, metal):
-        if df.empty or df_adicional.empty or modelo == t['seleccionar'].upper() or not metal:
-            return [], []
-        
-        filtro_base_options = (df["NAME"] == modelo) & (df["METAL"] == metal)
-        
-        def sort_numeric_key(value_str):
-            try: return float(value_str)
-            except ValueError: return float('inf') 
-                
-        anchos_raw = df.loc[filtro_base_options, "ANCHO"].astype(str).str.strip().unique().tolist() if "ANCHO" in df.columns else []
-        anchos = sorted(anchos_raw, key=sort_numeric_key)
-        
-        tallas_raw = df_adicional["SIZE"].astype(str).str.strip().unique().tolist() if "SIZE" in df_adicional.columns else []
-        tallas = sorted(tallas_raw, key=sort_numeric_key)
-
-        return anchos, tallas
-
-    anchos_d, tallas_d = get_options(modelo_dama, metal_dama)
-    anchos_c, tallas_c = get_options(modelo_cab, metal_cab)
-
-    def auto_select(tipo, modelo, anchos, tallas):
-        nonlocal ancho_dama, talla_dama, ancho_cab, talla_cab
-        if modelo != t['seleccionar'].upper():
-            if tipo == "dama":
-                if not ancho_dama and anchos:
-                    ancho_dama = anchos[0]
-                    session["ancho_dama"] = ancho_dama 
-                if not talla_dama and tallas:
-                    talla_dama = tallas[0]
-                    session["talla_dama"] = talla_dama 
-            elif tipo == "cab":
-                if not ancho_cab and anchos:
-                    ancho_cab = anchos[0]
-                    session["ancho_cab"] = ancho_cab 
-                if not talla_cab and tallas:
-                    talla_cab = tallas[0]
-                    session["talla_cab"] = talla_cab 
-
-    auto_select("dama", modelo_dama, anchos_d, tallas_d)
-    auto_select("cab", modelo_cab, anchos_c, tallas_c) 
-
-    # --- 2. Cálculos (Se mantiene la lógica de cálculo) ---
-    
-    # --- Dama ---
-    peso_base_dama, cost_fijo_dama, cost_adicional_dama, ct_dama = obtener_peso_y_costo(df_adicional, modelo_dama, metal_dama, ancho_dama, kilates_dama, talla_dama, "DAMA", t['seleccionar'].upper())
-    monto_dama = 0.0
-    monto_diamantes_dama = 0.0 
-    costo_diamante_dama_final = 0.0
-
-    if peso_base_dama > 0 and precio_onza is not None and kilates_dama in FACTOR_KILATES:
-        
-        factor_pureza_dama = FACTOR_KILATES.get(kilates_dama, 0.0)
-        
-        if tipo_diamante_dama == "Natural":
-            costo_diamante_dama_final = monto_f3_diamante_natural
-        else:
-            costo_diamante_dama_final = monto_f3_diamante_laboratorio
-
-        _, monto_oro_dama = calcular_valor_gramo(precio_onza, factor_pureza_dama, peso_base_dama)
-        
-        if ct_dama > 0 and costo_diamante_dama_final > 0:
-            monto_diamantes_dama = ct_dama * costo_diamante_dama_final
-        else:
-            monto_diamantes_dama = 0.0
-            tipo_diamante_dama = "Laboratorio"
-            session["tipo_diamante_dama"] = "Laboratorio"
-
-        monto_dama = monto_oro_dama + cost_fijo_dama + cost_adicional_dama + monto_diamantes_dama 
-        monto_total_bruto += monto_dama
-
-    # --- Caballero ---
-    peso_base_cab, cost_fijo_cab, cost_adicional_cab, ct_cab = obtener_peso_y_costo(df_adicional, modelo_cab, metal_cab, ancho_cab, kilates_cab, talla_cab, "CABALLERO", t['seleccionar'].upper())
-    monto_cab = 0.0
-    monto_diamantes_cab = 0.0 
-    costo_diamante_cab_final = 0.0
-    
-    if peso_base_cab > 0 and precio_onza is not None and kilates_cab in FACTOR_KILATES:
-        
-        factor_pureza_cab = FACTOR_KILATES.get(kilates_cab, 0.0)
+        for valores_tipo in valores.values():
+            valores_tipo["ancho"] = ""
+            valores_tipo["talla"] = ""
 
-        if tipo_diamante_cab == "Natural":
-            costo_diamante_cab_final = monto_f3_diamante_natural
-        else:
-            costo_diamante_cab_final = monto_f3_diamante_laboratorio
-        
-        _, monto_oro_cab = calcular_valor_gramo(precio_onza, factor_pureza_cab, peso_base_cab)
+    # --- Opciones, autoselección y cálculos por sección ---
+    secciones = [calcular_seccion(tipo, datos, precio_onza, t, valores[tipo]) for tipo in SECCIONES_FORMULARIO]
+    for tipo, valores_tipo in valores.items():
+        guardar_valores_seccion(tipo, valores_tipo)
         
-        if ct_cab > 0 and costo_diamante_cab_final > 0:
-            monto_diamantes_cab = ct_cab * costo_diamante_cab_final
-        else:
-            monto_diamantes_cab = 0.0
-            tipo_diamante_cab = "Laboratorio"
-            session["tipo_diamante_cab"] = "Laboratorio"
-
-        monto_cab = monto_oro_cab + cost_fijo_cab + cost_adicional_cab + monto_diamantes_cab 
-        monto_total_bruto += monto_cab
-        
-    monto_total_aprox = calcular_monto_aproximado(monto_total_bruto)
+    monto_bruto = sum(s["monto"] for s in secciones)
+    monto_total_aprox = calcular_monto_aproximado(monto_bruto)
     
-    detalle_dama = (
-        f' (Peso: {peso_base_dama:,.2f}g ({kilates_dama}K), '
-        f'Add: ${cost_adicional_dama:,.2f}, CT: {ct_dama:,.3f}, '
-        f'Diamante: {tipo_diamante_dama}, Costo/CT: ${costo_diamante_dama_final:,.2f}, '
-        f'Subtotal Diamantes: ${monto_diamantes_dama:,.2f})'
-    )
-        
-    detalle_cab = (
-        f' (Peso: {peso_base_cab:,.2f}g ({kilates_cab}K), '
-        f'Add: ${cost_adicional_cab:,.2f}, CT: {ct_cab:,.3f}, '
-        f'Diamante: {tipo_diamante_cab}, Costo/CT: ${costo_diamante_cab_final:,.2f}, '
-        f'Subtotal Diamantes: ${monto_diamantes_cab:,.2f})'
-    )
+    if guardar or enviar:
+        # Post/Redirect/Get: la cotización (y el correo) quedan en cola y la página recargada muestra su estado
+        cotizacion = cotizacion_mostrada(nombre_cliente, email_cliente, idioma, precio_onza, status, catalogo_version.generacion,
+                                         valores, secciones, monto_bruto, monto_total_aprox)
+        argumentos = {}
+        if cotizaciones_guardadas is not None:
+            with metricas.tramo("guardar"):
+                argumentos["guardada"] = cotizaciones_guardadas.guardar(cotizacion)
+        if enviar:
+            # Identificador de la sesión para el límite de envíos (la cookie de sesión puede no tener uno propio)
+            sesion_envios = session.setdefault("sesion_envios", secrets.token_urlsafe(12))
+            try:
+                correo_id = enviar_cotizacion(cotizacion, sesion_envios, request.remote_addr)
+            except EnvioRechazado as e:
+                logging.warning(f"Envío de presupuesto rechazado ({e.motivo}) para la IP {request.remote_addr}.")
+                argumentos["correo"] = e.motivo
+                correo_id = e.correo_id or session.get("correo_id")
+            else:
+                if correo_id is None:
+                    argumentos["correo"] = "sin_email"
+            session["correo_id"] = correo_id
+        return redirect(url_for("formulario", **argumentos))
     
-    def should_show_diamond_selector(modelo, metal, ancho, kilates, genero):
-        if modelo == t['seleccionar'].upper() or not metal or not ancho or not kilates:
-            return False
-        
-        key = f"{modelo}|{ancho}|{metal}|{kilates}|{genero}"
-        return ct_cache_local.get(key.upper(), 0.0) > 0.0
+    correo = bandeja_salida.correo(session["correo_id"]) if bandeja_salida is not None and session.get("correo_id") else None
+    aviso_correo = request.args.get("correo")
+    
+    with metricas.tramo("render"):
+        return render_template(
+            "formulario.html",
+            t=t,
+            idioma=idioma,
+            logo_url=url_for('static', filename='logo.png'),
+            precio_oro_status=f"Precio Oro Onza: ${precio_onza:,.2f} USD ({status.upper()})",
+            precio_oro_color="text-green-600 font-medium" if status == "live" else "text-yellow-700 font-bold bg-yellow-100 p-2 rounded",
+            nombre_cliente=nombre_cliente,
+            email_cliente=email_cliente,
+            secciones=[s for s in secciones if s["visible"]],
+            monto_total_aprox=monto_total_aprox,
+            referencia_guardada=request.args.get("guardada"),
+            listado_activo=cotizaciones_guardadas is not None and bool(ADMIN_TOKEN),
+            envio_activo=bandeja_salida is not None,
+            estado_correo=estado_correo(correo, t),
+            aviso_correo=t[f"correo_{aviso_correo}"] if aviso_correo in AVISOS_CORREO else None,
+        )
 
+# ------------------------------------------------------------------------------------------------
 
-    # --------------------- Generación del HTML para el Formulario ---------------------
-        
-    def generate_selectors(tipo, modelo, metal, kilates_actual, anchos, tallas, ancho_actual, talla_actual, tipo_diamante_actual):
-        
-        kilates_opciones = sorted(FACTOR_KILATES.keys(), key=int, reverse=True)
-        diamante_opciones = ["Laboratorio", "Natural"]
-        genero = "DAMA" if tipo == "dama" else "CABALLERO"
-        
-        mostrar_selector_diamante = should_show_diamond_selector(modelo, metal, ancho_actual, kilates_actual, genero)
-        
-        kilates_selector = f"""
-            <div class="w-full md:w-1/4">
-                <label for="kilates_{tipo}" class="block text-sm font-medium text-gray-700 mb-1">{t['kilates']}</label>
-                <select id="kilates_{tipo}" name="kilates_{tipo}" class="w-full p-2 border border-gray-300 rounded-lg" onchange="this.form.submit()">
-                    {''.join([f'<option value="{k}" {"selected" if k == kilates_actual else ""}>{k}K</option>' for k in kilates_opciones])}
-                </select>
-            </div>
-        """
-        
-        diamante_selector = ""
-        if mostrar_selector_diamante:
-            diamante_selector = f"""
-                <div class="w-full md:w-1/4">
-                    <label for="tipo_diamante_{tipo}" class="block text-sm font-medium text-gray-700 mb-1">{t['diamante']}</label>
-                    <select id="tipo_diamante_{tipo}" name="tipo_diamante_{tipo}" class="w-full p-2 border border-gray-300 rounded-lg" onchange="this.form.submit()">
-                        {''.join([f'<option value="{d}" {"selected" if d == tipo_diamante_actual else ""}>{t[d.lower()]}</option>' for d in diamante_opciones])}
-                    </select>
-                </div>
-            """
-        else:
-             diamante_selector = f'<input type="hidden" name="tipo_diamante_{tipo}" value="Laboratorio">'
-        
-        if modelo == t['seleccionar'].upper() or not metal:
-            warning_msg = f'<p class="text-red-500 pt-3">Seleccione un modelo y metal en el Catálogo para habilitar opciones.</p>'
-            return f"""
-                <div class="flex flex-col md:flex-row md:space-x-4 space-y-4 md:space-y-0 pt-4">
-                    {kilates_selector}
-                    {diamante_selector if not mostrar_selector_diamante else ''}
-                </div>
-                {warning_msg}
-            """
-
-        if not anchos or not tallas:
-            html_ancho_talla = f'<div class="w-full md:w-1/2"><p class="text-red-500 pt-3">No hay opciones de Ancho/Talla disponibles para esta combinación de Metal.</p></div>'
-            return f"""
-                <div class="flex flex-col md:flex-row md:space-x-4 space-y-4 md:space-y-0 pt-4">
-                    {kilates_selector}
-                    {diamante_selector if not mostrar_selector_diamante else ''}
-                </div>
-                <div class="flex flex-col md:flex-row md:space-x-4 space-y-4 md:space-y-0 pt-4">
-                    {html_ancho_talla}
-                </div>
-            """
-
-        html = f"""
-        <div class="flex flex-col md:flex-row md:space-x-4 space-y-4 md:space-y-0 pt-4">
-            {kilates_selector}
-            <div class="w-full md:w-1/4">
-                <label for="ancho_{tipo}" class="block text-sm font-medium text-gray-700 mb-1">{t['ancho']}</label>
-                <select id="ancho_{tipo}" name="ancho_{tipo}" class="w-full p-2 border border-gray-300 rounded-lg" onchange="this.form.submit()">
-                    {''.join([f'<option value="{a}" {"selected" if str(a) == str(ancho_actual) else ""}>{a}</option>' for a in anchos])}
-                </select>
-            </div>
-            <div class="w-full md:w-1/4">
-                <label for="talla_{tipo}" class="block text-sm font-medium text-gray-700 mb-1">{t['talla']}</label>
-                <select id="talla_{tipo}" name="talla_{tipo}" class="w-full p-2 border border-gray-300 rounded-lg" onchange="this.form.submit()">
-                    {''.join([f'<option value="{s}" {"selected" if str(s) == str(talla_actual) else ""}>{s}</option>' for s in tallas])}
-                </select>
-            </div>
-            {diamante_selector}
-        </div>
-        """
-        return html
-
-    selectores_dama = generate_selectors("dama", modelo_dama, metal_dama, kilates_dama, anchos_d, tallas_d, ancho_dama, talla_dama, tipo_diamante_dama)
-    selectores_cab = generate_selectors("cab", modelo_cab, metal_cab, kilates_cab, anchos_c, tallas_c, ancho_cab, talla_cab, tipo_diamante_cab)
-    
-    precio_oro_status = f"Precio Oro Onza: ${precio_onza:,.2f} USD ({status.upper()})"
-    precio_oro_color = "text-green-600 font-medium" if status == "live" else "text-yellow-700 font-bold bg-yellow-100 p-2 rounded"
-    logo_url = url_for('static', filename='logo.png')
-    
-    # --- Lógica de Visibilidad de Secciones ---
-    texto_seleccionado = t['seleccionar'].upper()
-    
-    modelo_dama_visible = modelo_dama != texto_seleccionado
-    modelo_cab_visible = modelo_cab != texto_seleccionado
-    
-    seccion_dama_html = ""
-    if modelo_dama_visible:
-        seccion_dama_html = f"""
-            <h2 class="text-xl font-semibold pt-4 text-pink-700">Modelo {t['dama']}</h2>
-            <div class="bg-pink-50 p-4 rounded-lg space-y-3">
-                <p class="text-sm font-medium text-gray-700">
-                    Modelo: <span class="font-bold text-gray-900">{modelo_dama}</span>
-                    {' (' + metal_dama + ')' if metal_dama else ''}
-                </p>
-                {selectores_dama}
-                <span class="text-xs text-gray-500 block pt-2">
-                    {'Monto Estimado BRUTO: $' + f'{monto_dama:,.2f}' + ' USD' + detalle_dama if monto_dama > 0 or ct_dama > 0 else 'Seleccione todos los detalles para calcular.'}
-                </span>
-            </div>
-        """
-        
-    seccion_cab_html = ""
-    if modelo_cab_visible:
-        seccion_cab_html = f"""
-            <h2 class="text-xl font-semibold pt-4 text-blue-700">Modelo {t['cab']}</h2>
-            <div class="bg-blue-50 p-4 rounded-lg space-y-3">
-                <p class="text-sm font-medium text-gray-700">
-                    Modelo: <span class="font-bold text-gray-900">{modelo_cab}</span>
-                    {' (' + metal_cab + ')' if metal_cab else ''}
-                </p>
-                {selectores_cab}
-                <span class="text-xs text-gray-500 block pt-2">
-                    {'Monto Estimado BRUTO: $' + f'{monto_cab:,.2f}' + ' USD' + detalle_cab if monto_cab > 0 or ct_cab > 0 else 'Seleccione todos los detalles para calcular.'}
-                </span>
-            </div>
-        """
-    
-    # El botón "Guardar" solo debe aparecer si al menos un modelo está visible
-    boton_guardar_html = ""
-    if modelo_dama_visible or modelo_cab_visible:
-        boton_guardar_html = f"""
-            <div class="pt-6">
-                <button type="submit" class="w-full px-6 py-3 bg-green-600 text-white font-bold rounded-lg shadow-lg hover:bg-green-700 transition duration-150 focus:outline-none focus:ring-4 focus:ring-green-500 focus:ring-opacity-50">
-                    {t['guardar']} (Aplicar Cambios y Guardar)
-                </button>
-            </div>
-        """
-    
-    html_form = f"""
-    <!DOCTYPE html>
-    <html lang="{idioma.lower()}">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{t['titulo']}</title>
-        <script src="https://cdn.tailwindcss.com"></script>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-            body {{ font-family: 'Inter', sans-serif; background-color: #f3f4f6; }}
-            .card {{ background-color: #ffffff; border-radius: 12px; box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1), 0 4px 6px -2px rgba(0, 0, 0, 0.05); }}
-            .header-content {{ 
-                display: flex; 
-                align-items: center; 
-                justify-content: space-between; 
-                width: 100%;
-                margin-bottom: 1rem;
-            }}
-            .title-group {{
-                display: flex;
-                align-items: center;
-                flex-grow: 1; 
-            }}
-            .logo-img {{ 
-                height: 60px; 
-                margin-right: 15px; 
-            }}
-            @media (max-width: 640px) {{
-                .logo-img {{ height: 40px; }}
-            }}
-            h1 {{ 
-                flex-grow: 1; 
-                text-align: center; 
-                margin: 0; 
-            }} 
-            .language-selector-container {{
-                min-width: 120px; 
-                text-align: right;
-            }}
-        </style>
-    </head>
-    <body class="p-4 md:p-8 flex justify-center items-start min-h-screen">
-        <div class="w-full max-w-4xl card p-6 md:p-10 mt-6">
-            
-            <form method="POST" action="/" class="space-y-4"> 
-                <div class="header-content">
-                    <img src="{url_for('static', filename='logo.png')}" alt="Logo" class="logo-img" onerror="this.style.display='none';" />
-                    <div class="title-group">
-                        <h1 class="text-3xl font-extrabold text-gray-800">{t['titulo']}</h1>
-                    </div>
-                    <div class="language-selector-container">
-                        <label for="idioma" class="sr-only">{t['cambiar_idioma']}</label>
-                        <select id="idioma" name="idioma" class="p-2 border border-gray-300 rounded-lg text-sm" onchange="this.form.submit()">
-                            <option value="Español" {"selected" if idioma == 'Español' else ""}>Español</option>
-                            <option value="English" {"selected" if idioma == 'English' else ""}>English</option>
-                        </select>
-                    </div>
-                </div>
-                
-                <p class="text-center text-sm mb-6 {precio_oro_color}">{precio_oro_status}</p>
-
-                <h2 class="text-xl font-semibold pt-4 text-gray-700">{t['cliente_datos']}</h2>
-                <div class="bg-gray-100 p-4 rounded-lg space-y-4 mb-6">
-                    <div>
-                        <label for="nombre_cliente" class="block text-sm font-medium text-gray-700 mb-1">{t['nombre']}</label>
-                        <input type="text" id="nombre_cliente" name="nombre_cliente" value="{nombre_cliente}" 
-                               class="w-full p-2 border border-gray-300 rounded-lg" required>
-                    </div>
-                    <div>
-                        <label for="email_cliente" class="block text-sm font-medium text-gray-700 mb-1">{t['email']}</label>
-                        <input type="email" id="email_cliente" name="email_cliente" value="{email_cliente}"
-                               class="w-full p-2 border border-gray-300 rounded-lg">
-                    </div>
-                </div>
-                
-                <div class="pb-6 flex justify-center w-full"> 
-                    <a href="{url_for('catalogo')}" class="w-full max-w-md px-8 py-4 text-lg text-white bg-indigo-600 rounded-lg shadow-xl hover:bg-indigo-700 transition duration-150 font-bold text-center">
-                        {t['ir_catalogo']}
-                    </a>
-                </div>
+def textos_cotizaciones(idioma: str) -> Dict[str, str]:
+    """Textos del listado de cotizaciones guardadas en el idioma elegido."""
+    t = {
+        "titulo": "Cotizaciones Guardadas",
+        "volver": "Volver al Formulario",
+        "email": "Email del cliente",
+        "desde": "Desde",
+        "hasta": "Hasta",
+        "filtrar": "Filtrar",
+        "fecha": "Fecha (UTC)",
+        "referencia": "Referencia",
+        "cliente": "Cliente",
+        "anillos": "Anillos",
+        "talla": "Talla",
+        "oro": "Oro (onza)",
+        "total": "Total",
+        "siguiente": "Siguientes",
+        "sin_resultados": "No hay cotizaciones guardadas con esos filtros.",
+        "desactivado": "El guardado de cotizaciones está desactivado.",
+    }
+    if idioma != "Español":
+        t.update({
+            "titulo": "Saved Estimates",
+            "volver": "Back to Form",
+            "email": "Client email",
+            "desde": "From",
+            "hasta": "To",
+            "filtrar": "Filter",
+            "fecha": "Date (UTC)",
+            "referencia": "Reference",
+            "cliente": "Client",
+            "anillos": "Rings",
+            "talla": "Size",
+            "oro": "Gold (ounce)",
+            "siguiente": "Next",
+            "sin_resultados": "No saved estimates match those filters.",
+            "desactivado": "Saving estimates is disabled.",
+        })
+    return t
 
-                {seccion_dama_html}
+def credencial_admin() -> bool:
+    """La petición trae ADMIN_TOKEN: como contraseña de Basic (cualquier usuario) o como token Bearer."""
+    autorizacion = request.authorization
+    if not ADMIN_TOKEN or autorizacion is None:
+        return False
+    clave = autorizacion.password if autorizacion.type == "basic" else autorizacion.token if autorizacion.type == "bearer" else None
+    return clave is not None and hmac.compare_digest(clave.encode(), ADMIN_TOKEN.encode())
 
-                {seccion_cab_html}
+def requiere_admin(vista):
+    """Rutas con datos de clientes o internos: 404 sin ADMIN_TOKEN configurado, 401 sin la credencial."""
+    @functools.wraps(vista)
+    def protegida(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return Response("No encontrado.", status=404, content_type="text/plain; charset=utf-8")
+        if not credencial_admin():
+            return Response("Credencial requerida.", status=401, content_type="text/plain; charset=utf-8",
+                            headers={"WWW-Authenticate": 'Basic realm="Administracion", charset="UTF-8"'})
+        return vista(*args, **kwargs)
+    return protegida
 
-                <div class="pt-6">
-                    <label class="block text-lg font-bold text-gray-800 mb-2">{t['monto']}</label>
-                    <p class="text-4xl font-extrabold text-indigo-600">${monto_total_aprox:,.2f} USD</p>
-                </div>
-                
-                {boton_guardar_html}
-            </form> 
-        </div>
-        
-        <script>
-            // Lógica de guardado en localStorage (Mantener)
-            const nombreInput = document.getElementById('nombre_cliente');
-            const emailInput = document.getElementById('email_cliente');
-            document.addEventListener('DOMContentLoaded', () => {{
-                if (!nombreInput.value && localStorage.getItem('nombre_cliente')) {{
-                    nombreInput.value = localStorage.getItem('nombre_cliente');
-                }}
-                if (!emailInput.value && localStorage.getItem('email_cliente')) {{
-                    emailInput.value = localStorage.getItem('email_cliente');
-                }}
-            }});
-            nombreInput.addEventListener('input', (e) => {{
-                localStorage.setItem('nombre_cliente', e.target.value);
-            }});
-            emailInput.addEventListener('input', (e) => {{
-                localStorage.setItem('email_cliente', e.target.value);
-            }});
-        </script>
-    </body>
-    </html>
-    """
-    return render_template_string(html_form)
+def _instante_filtro(texto: str, fin_de_dia: bool = False) -> Optional[float]:
+    """Fecha de un filtro (ISO 8601 o epoch); una fecha sin hora como límite superior incluye todo ese día."""
+    texto = texto.strip()
+    if not texto:
+        return None
+    instante = instante_desde_texto(texto)
+    return instante + 86400 if fin_de_dia and len(texto) == 10 else instante
+
+@app.route("/cotizaciones")
+@requiere_admin
+def cotizaciones():
+    """Cotizaciones guardadas, de la más reciente a la más antigua: filtros ?email=, ?desde= y ?hasta=, paginadas con ?despues=."""
+    idioma = session.get("idioma", "Español")
+    t = textos_cotizaciones(idioma)
+    filtros = {campo: request.args.get(campo, "").strip() for campo in ("email", "desde", "hasta")}
+    if cotizaciones_guardadas is None:
+        return render_template("cotizaciones.html", t=t, idioma=idioma, filtros=filtros, cotizaciones=[], siguiente=None,
+                               error=t["desactivado"]), 404
+    try:
+        desde = _instante_filtro(filtros["desde"])
+        hasta = _instante_filtro(filtros["hasta"], fin_de_dia=True)
+        despues_de = cursor_desde_texto(request.args["despues"]) if request.args.get("despues") else None
+    except ValueError as e:
+        return render_template("cotizaciones.html", t=t, idioma=idioma, filtros=filtros, cotizaciones=[], siguiente=None,
+                               error=f"Parámetro no válido: {e}"), 400
+    
+    # Lo encolado por este worker (p. ej. la cotización recién guardada) se escribe antes de leer
+    cotizaciones_guardadas.vaciar(timeout=0.5)
+    with metricas.tramo("cotizaciones"):
+        pagina = cotizaciones_guardadas.buscar(filtros["email"] or None, desde, hasta, despues_de, COTIZACIONES_POR_PAGINA + 1)
+    siguiente = None
+    if len(pagina) > COTIZACIONES_POR_PAGINA:
+        pagina = pagina[:COTIZACIONES_POR_PAGINA]
+        siguiente = url_for("cotizaciones", **{k: v for k, v in filtros.items() if v}, despues=pagina[-1].cursor())
+    with metricas.tramo("render"):
+        return render_template("cotizaciones.html", t=t, idioma=idioma, filtros=filtros, cotizaciones=pagina, siguiente=siguiente, error=None)
 
 # ------------------------------------------------------------------------------------------------
 
+def textos_catalogo(idioma: str) -> Dict[str, str]:
+    """Textos del catálogo en el idioma elegido."""
+    t = {
+        "titulo": "Catálogo de Anillos de Boda", 
+        "volver": "Volver al Formulario",
+        "dama": "Dama",
+        "caballero": "Caballero",
+        "metal": "Metal",
+        "genero": "Género",
+        "ancho": "Ancho (mm)",
+        "kilates": "Kilates",
+        "diamantes": "Diamantes",
+        "con_diamantes": "Con diamantes",
+        "sin_diamantes": "Sin diamantes",
+        "buscar": "Modelo",
+        "precio": "Precio (USD)",
+        "precio_min": "Desde",
+        "precio_max": "Hasta",
+        "todos": "Todos",
+        "filtrar": "Filtrar",
+        "resultados": "modelos",
+        "variantes": "variantes",
+        "cargar_mas": "Cargar más modelos",
+        "inicio": "Volver al inicio del catálogo",
+    }
+    
+    if idioma != "Español":
+        t.update({
+            "titulo": "WEDDING RING CATALOG", 
+            "volver": "Back to Form",
+            "dama": "Lady",
+            "caballero": "Gentleman",
+            "genero": "Gender",
+            "ancho": "Width (mm)",
+            "kilates": "Karat",
+            "diamantes": "Diamonds",
+            "con_diamantes": "With diamonds",
+            "sin_diamantes": "Without diamonds",
+            "buscar": "Model",
+            "precio": "Price (USD)",
+            "precio_min": "From",
+            "precio_max": "To",
+            "todos": "All",
+            "filtrar": "Filter",
+            "resultados": "models",
+            "variantes": "variants",
+            "cargar_mas": "Load more models",
+            "inicio": "Back to the start of the catalog",
+        })
+    return t
+
+def vitrina_actual(catalogo_version: CatalogoVersionado) -> VitrinaCatalogo:
+    """Orden de las cards e índice de facetas, construidos una vez por generación del catálogo."""
+    return cache_vitrina.obtener(catalogo_version.generacion, lambda: construir_vitrina(catalogo_version.datos))
+
+def _normalizar_faceta(nombre: str, valor: str) -> str:
+    """Valor de faceta de la query string como en el índice (18K -> 18, 4mm -> 4, rosa -> ROSA)."""
+    valor = valor.strip().upper()
+    if nombre == "kilates":
+        return valor.replace("K", "").strip()
+    if nombre == "ancho":
+        return valor.replace("MM", "").strip()
+    return valor
+
+def _numero_parametro(nombre: str) -> Optional[float]:
+    try:
+        valor = float(request.args.get(nombre, ""))
+    except ValueError:
+        return None
+    return valor if math.isfinite(valor) else None
+
+def consulta_catalogo() -> ConsultaFacetas:
+    """Búsqueda de la query string: facetas (repetibles, OR entre valores), texto `q` y rangos de ancho y precio."""
+    facetas = {}
+    for nombre in FACETAS_BUSQUEDA:
+        valores = {_normalizar_faceta(nombre, v) for v in request.args.getlist(nombre)} - {""}
+        if valores:
+            facetas[nombre] = tuple(sorted(valores))
+    return ConsultaFacetas(
+        facetas, request.args.get("q", "").strip()[:100],
+        _numero_parametro("ancho_min"), _numero_parametro("ancho_max"),
+        _numero_parametro("precio_min"), _numero_parametro("precio_max"),
+    )
+
+def parametros_consulta(consulta: ConsultaFacetas) -> Dict[str, object]:
+    """Los filtros activos de la consulta como argumentos de url_for."""
+    parametros: Dict[str, object] = {nombre: list(valores) for nombre, valores in consulta.facetas.items()}
+    if consulta.texto:
+        parametros["q"] = consulta.texto
+    for nombre in ("ancho_min", "ancho_max", "precio_min", "precio_max"):
+        valor = getattr(consulta, nombre)
+        if valor is not None:
+            parametros[nombre] = f"{valor:g}"
+    return parametros
+
+def buscar_catalogo(catalogo_version: CatalogoVersionado, consulta: ConsultaFacetas) -> ResultadoFacetas:
+    """Variantes y cards que cumplen la consulta, con conteos por faceta, al precio del oro actual."""
+    vitrina = vitrina_actual(catalogo_version)
+    precio_onza, _ = obtener_precio_oro()
+    # El precio solo entra en la clave si la consulta filtra por él
+    clave = (catalogo_version.generacion, consulta.clave(), precio_onza if consulta.con_precio() else None)
+    with metricas.tramo("facetas"):
+        return cache_busquedas.obtener(clave, lambda: vitrina.facetas.buscar(consulta, precio_onza))
+
+def cursor_catalogo() -> int:
+    try:
+        return max(int(request.args.get("cursor", "0")), 0)
+    except ValueError:
+        return 0
+
+def pagina_catalogo(catalogo_version: CatalogoVersionado, idioma: str, t: Dict[str, str], consulta: ConsultaFacetas, cursor: int) -> Dict:
+    """Cards de una página del catálogo con la selección de la sesión superpuesta, y los enlaces a la siguiente."""
+    vitrina = vitrina_actual(catalogo_version)
+    resultado = buscar_catalogo(catalogo_version, consulta)
+    with metricas.tramo("pagina"):
+        pagina = vitrina.pagina(resultado.bits_tarjetas(), cursor, CATALOGO_POR_PAGINA)
+
+    # Cards cacheadas por (generación, idioma, imágenes); la selección se superpone por petición
+    clave_fragmentos = (catalogo_version.generacion, idioma, manifest_imagenes.version())
+    tarjetas = cache_fragmentos_catalogo.obtener(clave_fragmentos, lambda: TarjetasCatalogo(vitrina, t))
+    
+    modelo_dama_actual = session.get("modelo_dama", "")
+    metal_dama_actual = session.get("metal_dama", "")
+    modelo_cab_actual = session.get("modelo_cab", "")
+    metal_cab_actual = session.get("metal_cab", "")
+    
+    # Elegir una card vuelve a esta misma página: se conservan los filtros y el cursor
+    parametros = parametros_consulta(consulta)
+    accion = str(escape(url_for("catalogo", cursor=cursor or None, **parametros)))
+
+    etiquetas = {}
+    def etiqueta(borde_clase: str) -> str:
+        if borde_clase not in etiquetas:
+            color, texto = {
+                "selected-both": ("green", f'Ambos ({t["dama"]}/{t["caballero"]})'),
+                "selected-dama": ("pink", t["dama"]),
+                "selected-cab": ("blue", t["caballero"]),
+            }[borde_clase]
+            etiquetas[borde_clase] = render_template("_etiqueta_seleccion.html", color=color, texto=texto)
+        return etiquetas[borde_clase]
+    
+    partes_html = []
+    with metricas.tramo("tarjetas"):
+        for posicion in pagina.posiciones:
+            tarjeta = tarjetas.tarjeta(posicion)
+            seleccionado_dama = (tarjeta.modelo == modelo_dama_actual and tarjeta.metal == metal_dama_actual)
+            seleccionado_cab = (tarjeta.modelo == modelo_cab_actual and tarjeta.metal == metal_cab_actual)
+            
+            borde_clase = ""
+            if seleccionado_dama and seleccionado_cab:
+                borde_clase = "selected-both"
+            elif seleccionado_dama:
+                borde_clase = "selected-dama"
+            elif seleccionado_cab:
+                borde_clase = "selected-cab"
+            
+            antes, medio, *despues = tarjeta.partes
+            partes_html.extend((antes, borde_clase, medio, etiqueta(borde_clase) if borde_clase else "", accion.join(despues)))
+    
+    siguiente = None
+    if pagina.siguiente is not None:
+        siguiente = {
+            "url": url_for("catalogo", cursor=pagina.siguiente, **parametros),
+            "fragmento": url_for("catalogo_pagina", cursor=pagina.siguiente, **parametros),
+        }
+    return {"tarjetas_html": Markup("".join(partes_html)), "siguiente": siguiente, "total": pagina.total, "resultado": resultado, "vitrina": vitrina}
+
+def etag_catalogo(catalogo_version: CatalogoVersionado, idioma: str, consulta: ConsultaFacetas, cursor: int) -> str:
+    """ETag de una página/fragmento GET: catálogo, idioma, selección, imágenes, consulta y cursor (y el precio si filtra por él)."""
+    return etag_para(
+        VERSION_APP, catalogo_version.generacion, catalogo_version.firma, idioma,
+        session.get("modelo_dama", ""), session.get("metal_dama", ""), session.get("modelo_cab", ""), session.get("metal_cab", ""),
+        manifest_imagenes.version(), consulta, obtener_precio_oro()[0] if consulta.con_precio() else "", cursor, CATALOGO_POR_PAGINA,
+    )
+
 @app.route("/catalogo", methods=["GET", "POST"])
 def catalogo():
-    """Ruta del catálogo: selecciona Modelo y Metal."""
+    """Ruta del catálogo: selecciona Modelo y Metal, con filtros y paginación por cursor."""
     try:
-        df, _, _, _ = cargar_datos() 
+        catalogo_version = catalogo_actual()
+        sin_catalogo = catalogo_vacio(catalogo_version.datos)
     except Exception as e:
         logging.error(f"Error cargando datos en catálogo: {e}")
-        df = pd.DataFrame()
+        catalogo_version = None
+        sin_catalogo = True
         
     mensaje_exito = None
     
@@ -697,179 +903,293 @@ def catalogo():
 
 
     idioma = session.get("idioma", "Español")
-    es = idioma == "Español"
+    t = textos_catalogo(idioma)
+    consulta = consulta_catalogo()
+    cursor = cursor_catalogo()
     
-    t = {
-        "titulo": "Catálogo de Anillos de Boda", 
-        "volver": "Volver al Formulario",
-        "dama": "Dama",
-        "caballero": "Caballero",
-        "metal": "Metal",
-    }
+    # ETag: la página GET solo depende del catálogo, el idioma, la selección, las imágenes, la consulta y el cursor
+    etag = None
+    if request.method == "GET" and not sin_catalogo:
+        etag = etag_catalogo(catalogo_version, idioma, consulta, cursor)
+        respuesta_cacheada = cache_http.respuesta_cacheada(etag)
+        if respuesta_cacheada is not None:
+            return respuesta_cacheada
     
-    if not es:
-        t.update({
-            "titulo": "WEDDING RING CATALOG", 
-            "volver": "Back to Form",
-            "dama": "Lady",
-            "caballero": "Gentleman",
-        })
+    if sin_catalogo:
+        return render_template("catalogo_error.html", excel_path=EXCEL_PATH)
+
+    pagina = pagina_catalogo(catalogo_version, idioma, t, consulta, cursor)
+    vitrina = pagina.pop("vitrina")
+    resultado = pagina.pop("resultado")
     
-    modelo_dama_actual = session.get("modelo_dama", "")
-    metal_dama_actual = session.get("metal_dama", "")
-    modelo_cab_actual = session.get("modelo_cab", "")
-    metal_cab_actual = session.get("metal_cab", "")
-    logo_url = url_for('static', filename='logo.png')
-    
-    if df.empty:
-          html_catalogo = f"""
-        <!DOCTYPE html>
-        <html><body><div style="text-align: center; padding: 50px;">
-        <h1 style="color: red;">Error de Carga de Datos</h1>
-        <p>No se pudo cargar el archivo Excel o la hoja "WEDDING BANDS" está vacía.</p>
-        <p>Asegúrese de que '{EXCEL_PATH}' existe y tiene datos.</p>
-        <a href="{url_for('formulario')}">Volver al Formulario</a>
-        </div></body></html>
-        """
-          return render_template_string(html_catalogo)
-
-    df_catalogo = df[["NAME", "METAL", "RUTA FOTO"]].dropna(subset=["NAME", "METAL", "RUTA FOTO"])
-    variantes_unicas = df_catalogo.drop_duplicates(subset=['NAME', 'METAL'])
-    
-    def obtener_nombre_archivo_imagen(ruta_completa: str) -> str:
-        if pd.isna(ruta_completa) or not str(ruta_completa).strip():
-            return "placeholder.png" 
-        ruta_limpia = str(ruta_completa).replace('\\', '/')
-        nombre_archivo = os.path.basename(ruta_limpia).strip()
-        return unquote(nombre_archivo)
-        
-    catalogo_items = []
-    for _, fila in variantes_unicas.iterrows():
-        modelo = str(fila["NAME"]).strip().upper()
-        metal = str(fila["METAL"]).strip().upper()
-        ruta_foto = str(fila["RUTA FOTO"]).strip()
-        
-        catalogo_items.append({
-            "modelo": modelo,
-            "metal": metal,
-            "nombre_foto": obtener_nombre_archivo_imagen(ruta_foto)
+    with metricas.tramo("render"):
+        html_catalogo = render_template(
+            "catalogo.html",
+            t=t,
+            idioma=idioma,
+            logo_url=url_for('static', filename='logo.png'),
+            catalogo_url=url_for('catalogo'),
+            mensaje_exito=mensaje_exito,
+            consulta=consulta,
+            facetas={nombre: [(valor, resultado.conteos[nombre][valor]) for valor in vitrina.facetas.valores(nombre)] for nombre in FACETAS_BUSQUEDA},
+            total_variantes=resultado.total_variantes,
+            url_inicio=url_for("catalogo", **parametros_consulta(consulta)) if cursor > 0 else None,
+            **pagina,
+        )
+    respuesta = make_response(html_catalogo)
+    if etag:
+        cache_http.marcar_cacheable(respuesta, etag)
+    return respuesta
+
+@app.route("/catalogo/pagina")
+def catalogo_pagina():
+    """Fragmento HTML con las cards de la página siguiente (scroll infinito); cacheable con ETag."""
+    catalogo_version = catalogo_actual()
+    idioma = session.get("idioma", "Español")
+    t = textos_catalogo(idioma)
+    consulta = consulta_catalogo()
+    cursor = cursor_catalogo()
+    
+    etag = etag_catalogo(catalogo_version, idioma, consulta, cursor)
+    respuesta_cacheada = cache_http.respuesta_cacheada(etag)
+    if respuesta_cacheada is not None:
+        return respuesta_cacheada
+    
+    pagina = pagina_catalogo(catalogo_version, idioma, t, consulta, cursor)
+    pagina.pop("vitrina")
+    pagina.pop("resultado")
+    with metricas.tramo("render"):
+        respuesta = make_response(render_template("_pagina_catalogo.html", t=t, **pagina))
+    return cache_http.marcar_cacheable(respuesta, etag)
+
+# --------------------- API JSON ---------------------
+
+@app.route("/api/catalogo/buscar")
+def api_buscar_catalogo():
+    """
+    Búsqueda facetada del catálogo con los mismos parámetros que /catalogo (metal, kilates, genero, ancho,
+    diamantes=SI/NO, q, ancho_min/ancho_max, precio_min/precio_max) más `limite`. Devuelve los conteos por
+    faceta, los totales y una página de cards con su precio desde (talla base, diamante de laboratorio).
+    """
+    catalogo_version = catalogo_actual()
+    vitrina = vitrina_actual(catalogo_version)
+    consulta = consulta_catalogo()
+    cursor = cursor_catalogo()
+    try:
+        limite = min(max(int(request.args.get("limite", CATALOGO_POR_PAGINA)), 1), MAX_BUSQUEDA_POR_PAGINA)
+    except ValueError:
+        limite = CATALOGO_POR_PAGINA
+    
+    precio_onza, precio_status = obtener_precio_oro()
+    resultado = buscar_catalogo(catalogo_version, consulta)
+    pagina = vitrina.pagina(resultado.bits_tarjetas(), cursor, limite)
+    tarjetas = []
+    precios_desde = vitrina.facetas.precio_desde(resultado, pagina.posiciones, precio_onza)
+    for posicion, precio_desde in zip(pagina.posiciones, precios_desde):
+        entrada = vitrina.entradas[posicion]
+        tarjetas.append({
+            "modelo": entrada.modelo,
+            "metal": entrada.metal,
+            "precio_desde": round(precio_desde, 2) if precio_desde is not None else None,
         })
+    return jsonify({
+        "generacion": catalogo_version.generacion,
+        "precio_onza": precio_onza,
+        "precio_status": precio_status,
+        "total_tarjetas": pagina.total,
+        "total_variantes": resultado.total_variantes,
+        "facetas": {nombre: {valor: resultado.conteos[nombre][valor] for valor in vitrina.facetas.valores(nombre)} for nombre in FACETAS_BUSQUEDA},
+        "tarjetas": tarjetas,
+        "siguiente": pagina.siguiente,
+    })
 
-    html_items = ""
-    for item in catalogo_items:
-        modelo = item["modelo"]
-        metal = item["metal"]
-        nombre_foto = item["nombre_foto"]
-        ruta_web_foto = url_for('static', filename=nombre_foto)
-
-        borde_clase = ""
-        etiqueta = ""
-        seleccionado_dama = (modelo == modelo_dama_actual and metal == metal_dama_actual)
-        seleccionado_cab = (modelo == modelo_cab_actual and metal == metal_cab_actual)
-
-        if seleccionado_dama and seleccionado_cab:
-            borde_clase = "selected-both"
-            etiqueta = f'<span class="absolute top-2 left-2 bg-green-500 text-white px-2 py-1 rounded-full text-xs font-bold">Ambos ({t["dama"]}/{t["caballero"]})</span>'
-        elif seleccionado_dama:
-            borde_clase = "selected-dama"
-            etiqueta = f'<span class="absolute top-2 left-2 bg-pink-500 text-white px-2 py-1 rounded-full text-xs font-bold">{t["dama"]}</span>'
-        elif seleccionado_cab:
-            borde_clase = "selected-cab"
-            etiqueta = f'<span class="absolute top-2 left-2 bg-blue-500 text-white px-2 py-1 rounded-full text-xs font-bold">{t["caballero"]}</span>'
-
-        html_items += f"""
-        <div class="card p-4 flex flex-col items-center text-center relative {borde_clase}">
-            {etiqueta}
-            <img src="{ruta_web_foto}" alt="{modelo} - {metal}" 
-                 class="w-full h-auto max-h-48 object-contain rounded-lg mb-3" 
-                 onerror="this.onerror=null;this.src='{url_for('static', filename='placeholder.png')}';"
-            >
-            <h2 class="text-lg font-semibold text-gray-800">{modelo}</h2>
-            <p class="text-sm text-gray-600">{t['metal']}: {metal}</p>
-            <div class="mt-4 flex flex-col space-y-2 w-full">
-                <form method="POST" action="{url_for('catalogo')}" class="w-full">
-                    <input type="hidden" name="seleccion" value="{modelo};{metal}">
-                    <input type="hidden" name="tipo" value="dama">
-                    <button type="submit" class="w-full px-3 py-2 text-white bg-pink-600 rounded-lg hover:bg-pink-700 transition duration-150 text-sm font-semibold">
-                        Seleccionar {t['dama']}
-                    </button>
-                </form>
-                <form method="POST" action="{url_for('catalogo')}" class="w-full">
-                    <input type="hidden" name="seleccion" value="{modelo};{metal}">
-                    <input type="hidden" name="tipo" value="cab">
-                    <button type="submit" class="w-full px-3 py-2 text-white bg-blue-600 rounded-lg hover:bg-blue-700 transition duration-150 text-sm font-semibold">
-                        Seleccionar {t['caballero']}
-                    </button>
-                </form>
-            </div>
-        </div>
-        """
-    
-    html_catalogo = f"""
-    <!DOCTYPE html>
-    <html lang="{idioma.lower()}">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{t['titulo']}</title>
-        <script src="https://cdn.tailwindcss.com"></script>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-            body {{ font-family: 'Inter', sans-serif; background-color: #f3f4f6; }}
-            .card {{ background-color: #ffffff; border-radius: 12px; box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1), 0 4px 6px -2px rgba(0, 0, 0, 0.05); }}
-            .title-container {{
-                display: flex; 
-                align-items: center; 
-                justify-content: center;
-                margin-bottom: 2rem; 
-            }}
-            .logo-img {{ 
-                height: 60px; 
-                margin-right: 15px; 
-            }}
-            .selected-dama {{ border: 4px solid #EC4899; }} 
-            .selected-cab {{ border: 4px solid #3B82F6; }} 
-            .selected-both {{ border: 4px solid #10B981; }} 
-        </style>
-    </head>
-    <body class="p-4 md:p-8">
-        <div class="max-w-7xl mx-auto">
-            
-            <div class="title-container">
-                <img src="{logo_url}" alt="Logo" class="logo-img" onerror="this.style.display='none';" />
-                <h1 class="text-3xl font-extrabold text-gray-800">{t['titulo']}</h1>
-                <div style="width: 60px; margin-left: 15px;"></div> 
-            </div>
-            
-            {f'<div class="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded relative mb-6 text-center" role="alert">{mensaje_exito}</div>' if mensaje_exito else ''}
-
-            <form method="POST" action="{url_for('catalogo')}">
-                <div class="mb-8 text-center">
-                    <input type="hidden" name="volver_btn" value="true">
-                    <button type="submit" class="px-6 py-3 bg-indigo-600 text-white font-bold rounded-lg shadow-md hover:bg-indigo-700 transition duration-150 focus:outline-none focus:ring-4 focus:ring-indigo-500 focus:ring-opacity-50">
-                        {t['volver']}
-                    </button>
-                </div>
-            </form>
-            
-            <div class="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-6">
-                {html_items}
-            </div>
-            
-            <form method="POST" action="{url_for('catalogo')}">
-                <div class="my-8 text-center">
-                    <input type="hidden" name="volver_btn" value="true">
-                    <button type="submit" class="px-6 py-3 bg-indigo-600 text-white font-bold rounded-lg shadow-md hover:bg-indigo-700 transition duration-150 focus:outline-none focus:ring-4 focus:ring-indigo-500 focus:ring-opacity-50">
-                        {t['volver']}
-                    </button>
-                </div>
-            </form>
-
-        </div>
-    </body>
-    </html>
+@app.route("/api/quote", methods=["POST"])
+def api_cotizacion():
+    """
+    Cotiza en lote, sin sesión, con la misma fórmula que el formulario.
+    Acepta un objeto, una lista, o {"configuraciones": [...]} con modelo, metal, ancho, kilates, talla, genero y tipo_diamante
+    (sin ancho o talla, los que autoselecciona el formulario); en la última forma, "fecha" cotiza con el precio del oro
+    del historial en esa fecha.
+    """
+    cuerpo = request.get_json(silent=True)
+    if isinstance(cuerpo, dict) and "configuraciones" in cuerpo:
+        configuraciones = cuerpo["configuraciones"]
+    elif isinstance(cuerpo, dict):
+        configuraciones = [cuerpo]
+    else:
+        configuraciones = cuerpo
+    
+    if not isinstance(configuraciones, list) or not configuraciones:
+        return jsonify({"error": "Envíe un JSON con una o más configuraciones."}), 400
+    if len(configuraciones) > MAX_LOTE_COTIZACION:
+        return jsonify({"error": f"Máximo {MAX_LOTE_COTIZACION} configuraciones por llamada."}), 413
+    
+    # "fecha" (ISO 8601 o epoch) cotiza con el precio vigente entonces según el historial, para reproducir una cotización
+    fecha = cuerpo.get("fecha") if isinstance(cuerpo, dict) and "configuraciones" in cuerpo else None
+    if fecha is not None:
+        try:
+            instante = instante_desde_texto(str(fecha))
+        except ValueError:
+            return jsonify({"error": f"Fecha no válida: {fecha!r}"}), 400
+        punto = historial_precio_oro.precio_en(instante) if historial_precio_oro is not None else None
+        if punto is None:
+            return jsonify({"error": "No hay precio del oro registrado para esa fecha."}), 404
+        precio_onza, status, edad = punto.precio, "historico", instante - punto.instante
+    else:
+        lectura = servicio_precio_oro.lectura()
+        precio_onza, status, edad = lectura.precio, lectura.status, lectura.edad
+    
+    catalogo_version = catalogo_actual()
+    datos = catalogo_version.datos
+    with metricas.tramo("cotizacion"):
+        resultados = cotizar_lote(datos.indice, datos.costos_diamantes, precio_onza, configuraciones)
+    total_bruto = sum(r.get("monto", 0.0) for r in resultados)
+    
+    return jsonify({
+        "precio_onza": precio_onza,
+        "status": status,
+        "edad_precio_segundos": edad,
+        "generacion_catalogo": catalogo_version.generacion,
+        "resultados": resultados,
+        "total_bruto": total_bruto,
+        "total_aproximado": calcular_monto_aproximado(total_bruto),
+    })
+
+@app.route("/api/precio_oro/historial")
+def api_historial_precio_oro():
+    """
+    Historial del precio del oro: ?en=<fecha> devuelve el precio vigente en ese instante;
+    si no, la serie entre ?desde= y ?hasta= (ISO 8601 o epoch), hasta `limite` puntos.
+    """
+    if historial_precio_oro is None:
+        return jsonify({"error": "Historial del precio del oro desactivado."}), 404
+    try:
+        if request.args.get("en"):
+            punto = historial_precio_oro.precio_en(instante_desde_texto(request.args["en"]))
+            if punto is None:
+                return jsonify({"error": "No hay precio del oro registrado para esa fecha."}), 404
+            return jsonify({"instante": punto.instante, "fecha": punto.fecha(), "precio": punto.precio})
+        desde = instante_desde_texto(request.args["desde"]) if request.args.get("desde") else None
+        hasta = instante_desde_texto(request.args["hasta"]) if request.args.get("hasta") else None
+        limite = min(max(int(request.args.get("limite", "1000")), 1), 10000)
+    except ValueError as e:
+        return jsonify({"error": f"Parámetro no válido: {e}"}), 400
+    puntos = historial_precio_oro.serie(desde, hasta, limite)
+    return jsonify({"puntos": [{"instante": p.instante, "fecha": p.fecha(), "precio": p.precio} for p in puntos]})
+
+@app.route("/api/seccion/<tipo>", methods=["POST"])
+def api_seccion(tipo: str):
+    """
+    Actualización parcial del formulario: aplica los selectores enviados de una sección (dama o cab),
+    los guarda en la sesión y devuelve solo esa sección (opciones, desglose y HTML) y el total.
+    """
+    if tipo not in SECCIONES_FORMULARIO:
+        return jsonify({"error": f"Sección desconocida: {tipo}"}), 404
+    
+    datos = catalogo_actual().datos
+    precio_onza, _ = obtener_precio_oro()
+    idioma = session.get("idioma", "Español")
+    t = textos_formulario(idioma)
+    
+    # La otra sección se lee de la sesión; hace falta para el total del presupuesto
+    valores = {otro: leer_valores_seccion(otro, t) for otro in SECCIONES_FORMULARIO}
+    secciones = {otro: calcular_seccion(otro, datos, precio_onza, t, valores[otro]) for otro in SECCIONES_FORMULARIO}
+    guardar_valores_seccion(tipo, valores[tipo])
+    
+    seccion = secciones[tipo]
+    monto_total_aprox = calcular_monto_aproximado(sum(s["monto"] for s in secciones.values()))
+    selectores = seccion["selectores"]
+    with metricas.tramo("render"):
+        html = render_template("_seccion_modelo.html", seccion=seccion, t=t) if seccion["visible"] else ""
+    return jsonify({
+        "tipo": tipo,
+        "estado": selectores["estado"],
+        "anchos": selectores["anchos"],
+        "tallas": selectores["tallas"],
+        "valores": valores[tipo],
+        "mostrar_diamante": selectores["mostrar_diamante"],
+        "cotizacion": seccion["cotizacion"]._asdict(),
+        "monto_total_aprox": monto_total_aprox,
+        "monto_total_texto": f"${monto_total_aprox:,.2f} USD",
+        "html": html,
+    })
+
+@app.route("/api/correo")
+def api_correo():
+    """Estado del último presupuesto enviado por email desde esta sesión (el formulario lo consulta mientras está en cola)."""
+    if bandeja_salida is None:
+        return jsonify({"error": "Envío de correos desactivado."}), 404
+    correo = bandeja_salida.correo(session["correo_id"]) if session.get("correo_id") else None
+    estado = estado_correo(correo, textos_formulario(session.get("idioma", "Español")))
+    if estado is None:
+        return jsonify({"error": "No hay presupuestos enviados en esta sesión."}), 404
+    return jsonify(estado)
+
+@app.route("/metrics")
+@requiere_admin
+def metrics():
+    """Métricas del proceso en formato de exposición de Prometheus (con ADMIN_TOKEN, p. ej. `bearer_token` en el scrape)."""
+    return Response(metricas.exponer(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# --------------------- ARRANQUE Y SALUD ---------------------
+
+precalentado = threading.Event()
+_lock_precalentar = threading.Lock()
+PLANTILLAS_PRINCIPALES = ("formulario.html", "catalogo.html", "_seccion_modelo.html", "_tarjeta_modelo.html",
+                          "_pagina_catalogo.html", "_mas_catalogo.html", "_etiqueta_seleccion.html", "catalogo_error.html",
+                          "cotizaciones.html", "correo_cotizacion.html", "correo_cotizacion.txt")
+
+def precalentar(antes_de_fork: bool = False):
+    """
+    Deja la app lista para servir sin trabajo en frío: catálogo publicado (snapshot), vitrina e índice de
+    facetas, plantillas compiladas y la primera página del catálogo renderizada en cada idioma. El precio
+    del oro ya viene del historial. No escribe sesiones ni hace peticiones HTTP.
+    Con `antes_de_fork` (gunicorn con preload) detiene después los hilos de fondo del proceso maestro;
+    cada worker los arranca de nuevo en su primera petición.
+    """
+    with _lock_precalentar:
+        if precalentado.is_set():
+            return
+        inicio = time.perf_counter()
+        catalogo_version = catalogo_actual()
+        for nombre in PLANTILLAS_PRINCIPALES:
+            app.jinja_env.get_template(nombre)
+        if not catalogo_vacio(catalogo_version.datos):
+            with app.test_request_context("/catalogo"):
+                for idioma in ("Español", "English"):
+                    pagina_catalogo(catalogo_version, idioma, textos_catalogo(idioma), ConsultaFacetas(), 0)
+        if antes_de_fork:
+            servicio_precio_oro.detener()
+            recargador_catalogo.detener()
+            if cotizaciones_guardadas is not None:
+                cotizaciones_guardadas.detener()
+            if bandeja_salida is not None:
+                bandeja_salida.detener()
+        precalentado.set()
+        logging.info(f"App precalentada en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+                     f"(generación {catalogo_version.generacion}, {len(catalogo_version.datos.indice)} variantes).")
+
+@app.route("/salud")
+def salud():
+    """
+    Readiness para el health check de Render: 200 solo con las cachés calientes. Si ningún hook de
+    arranque precalentó la app (p. ej. gunicorn sin gunicorn.conf.py), la primera llamada lo hace.
     """
-    return render_template_string(html_catalogo)
+    if not precalentado.is_set():
+        try:
+            precalentar()
+        except Exception as e:
+            logging.error(f"Error precalentando la app: {e}")
+            return jsonify({"estado": "iniciando", "error": str(e)}), 503
+    catalogo_version = catalogo_actual()
+    lectura = servicio_precio_oro.lectura()
+    return jsonify({
+        "estado": "listo",
+        "pid": os.getpid(),
+        "generacion_catalogo": catalogo_version.generacion,
+        "variantes": len(catalogo_version.datos.indice),
+        "precio_oro_status": lectura.status,
+    })
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,460 @@
+"""
+Bandeja de salida de correos (presupuestos enviados al email del cliente) en SQLite. La petición solo
+inserta el correo ya renderizado; un hilo por proceso lo entrega por SMTP, reutilizando la conexión para
+todo lo que esté listo, y reintenta los errores temporales con espera exponencial. Los workers comparten
+el archivo: cada uno reserva sus correos antes de enviarlos (entrega al menos una vez; el Message-ID se
+fija al encolar, así que un reintento repite el mismo mensaje).
+
+Como cualquier visitante puede pedir un envío, `encolar` solo admite una dirección simple, no repite el
+mismo presupuesto al mismo destinatario y limita los envíos por hora de cada sesión y de cada IP.
+
+Configuración por entorno: SMTP_HOST (vacío desactiva el envío), SMTP_PORT, SMTP_SEGURIDAD
+(starttls|ssl|ninguna), SMTP_USUARIO, SMTP_CLAVE, CORREO_REMITENTE, BANDEJA_SALIDA_PATH, CORREO_MAX_POR_SESION
+y CORREO_MAX_POR_IP.
+Para probar sin entregar nada, smtp_prueba.py hace de servidor SMTP local.
+
+Uso (desde la raíz del repo):
+    python bandeja_salida.py estado
+    python bandeja_salida.py procesar     # Un pase de envío sin la app
+"""
+import argparse
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formatdate, getaddresses, make_msgid, parseaddr
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+BANDEJA_SALIDA_PATH = os.getenv("BANDEJA_SALIDA_PATH", "bandeja_salida.sqlite3")
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_SEGURIDAD = os.getenv("SMTP_SEGURIDAD", "starttls")
+SMTP_USUARIO = os.getenv("SMTP_USUARIO", "")
+SMTP_CLAVE = os.getenv("SMTP_CLAVE", "")
+CORREO_REMITENTE = os.getenv("CORREO_REMITENTE", SMTP_USUARIO or "presupuestos@localhost")
+MAX_POR_SESION = int(os.getenv("CORREO_MAX_POR_SESION", "5")) # Correos por VENTANA_LIMITE; 0 sin límite
+MAX_POR_IP = int(os.getenv("CORREO_MAX_POR_IP", "20"))
+VENTANA_LIMITE = 3600.0
+
+INTERVALO_SONDEO = 5.0 # Segundos entre pases si no se encola nada (reintentos y correos de otros workers)
+MAX_LOTE = 50 # Correos por conexión SMTP
+MAX_INTENTOS = 8
+ESPERA_BASE = 30.0 # Primer reintento; se dobla en cada uno hasta ESPERA_MAXIMA
+ESPERA_MAXIMA = 3600.0
+RESERVA = 300.0 # Un correo reservado por un worker que muere vuelve a estar listo pasado este tiempo
+RETENCION_DIAS = 30.0 # Enviados y fallidos más antiguos se borran
+PURGA_CADA = 500 # Pases entre purgas
+
+PENDIENTE, ENVIADO, FALLIDO = "pendiente", "enviado", "fallido"
+REINTENTANDO = "reintentando" # Pendiente con algún intento fallido; no se guarda, se deriva de `intentos`
+DUPLICADO, LIMITE = "duplicado", "limite" # Motivos de EnvioRechazado
+CARACTERES_NO_ADMITIDOS = frozenset('"(),:;<>[\\]')
+
+
+class EnvioRechazado(Exception):
+    """`encolar` no admitió el correo: `motivo` es DUPLICADO (`correo_id` es el ya encolado) o LIMITE."""
+
+    def __init__(self, motivo: str, correo_id: Optional[int] = None):
+        super().__init__(motivo)
+        self.motivo = motivo
+        self.correo_id = correo_id
+
+
+class Correo(NamedTuple):
+    id: int
+    creado: float # Epoch UTC en segundos
+    referencia: str # Cotización que se envía
+    destinatario: str
+    asunto: str
+    estado: str
+    intentos: int
+    proximo_intento: float
+    enviado: Optional[float]
+    ultimo_error: Optional[str]
+
+    def estado_visible(self) -> str:
+        return REINTENTANDO if self.estado == PENDIENTE and self.intentos else self.estado
+
+
+class _Reservado(NamedTuple):
+    id: int
+    creado: float
+    destinatario: str
+    asunto: str
+    mensaje_id: str
+    texto: str
+    html: Optional[str]
+    intentos: int
+
+
+ESQUEMA = (
+    "CREATE TABLE IF NOT EXISTS correos ("
+    " id INTEGER PRIMARY KEY, creado REAL NOT NULL, referencia TEXT NOT NULL, destinatario TEXT NOT NULL,"
+    " asunto TEXT NOT NULL, mensaje_id TEXT NOT NULL, texto TEXT NOT NULL, html TEXT,"
+    " estado TEXT NOT NULL, intentos INTEGER NOT NULL DEFAULT 0, proximo_intento REAL NOT NULL,"
+    " enviado REAL, ultimo_error TEXT, huella TEXT, sesion TEXT, ip TEXT)",
+    # Lo listo para enviar se busca por estado y momento del próximo intento
+    "CREATE INDEX IF NOT EXISTS correos_cola ON correos (estado, proximo_intento)",
+)
+# Columnas añadidas después de la primera versión de la tabla (se agregan a las bandejas existentes)
+COLUMNAS_AGREGADAS = (("huella", "TEXT"), ("sesion", "TEXT"), ("ip", "TEXT"))
+INDICES_ADMISION = (
+    "CREATE INDEX IF NOT EXISTS correos_huella ON correos (huella)",
+    "CREATE INDEX IF NOT EXISTS correos_sesion ON correos (sesion, creado)",
+    "CREATE INDEX IF NOT EXISTS correos_ip ON correos (ip, creado)",
+)
+COLUMNAS_CORREO = "id, creado, referencia, destinatario, asunto, estado, intentos, proximo_intento, enviado, ultimo_error"
+
+
+def direccion_valida(texto: str) -> Optional[str]:
+    """
+    La dirección si `texto` es exactamente una dirección simple (usuario@dominio, ASCII, sin nombre visible,
+    lista ni caracteres con significado en las cabeceras); None si no.
+    """
+    texto = texto.strip()
+    if not texto or len(texto) > 254 or not texto.isascii() or any(c.isspace() or not c.isprintable() or c in CARACTERES_NO_ADMITIDOS for c in texto):
+        return None
+    nombre, direccion = parseaddr(texto)
+    if nombre or direccion != texto or len(getaddresses([texto])) != 1:
+        return None
+    usuario, _, dominio = direccion.partition("@")
+    etiquetas = dominio.split(".")
+    if not usuario or len(etiquetas) < 2 or not all(e and e.replace("-", "").isalnum() and not e.startswith("-") and not e.endswith("-") for e in etiquetas):
+        return None
+    return direccion
+
+
+def espera_reintento(intentos: int) -> float:
+    """Segundos hasta el siguiente intento tras `intentos` fallidos: exponencial con ±20% de dispersión."""
+    return min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA) * random.uniform(0.8, 1.2)
+
+
+def error_permanente(error: Exception) -> bool:
+    """Errores que no se arreglan reintentando: destinatario o mensaje rechazados (5xx). La autenticación sí se reintenta."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(codigo >= 500 for codigo, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return isinstance(error, (smtplib.SMTPNotSupportedError, ValueError))
+
+
+def texto_error(error: Exception) -> str:
+    """Error de SMTP legible para el registro y la página (sin los bytes crudos de la respuesta)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return "; ".join(f"{destinatario}: {codigo} {mensaje.decode(errors='replace')}" for destinatario, (codigo, mensaje) in error.recipients.items())
+    if isinstance(error, smtplib.SMTPResponseException):
+        mensaje = error.smtp_error.decode(errors="replace") if isinstance(error.smtp_error, bytes) else str(error.smtp_error)
+        return f"{error.smtp_code} {mensaje}"
+    return str(error) or type(error).__name__
+
+
+class EnviadorSmtp:
+    """Envía una tanda de mensajes por una sola conexión SMTP."""
+
+    def __init__(self, host: str = SMTP_HOST, puerto: int = SMTP_PORT, seguridad: str = SMTP_SEGURIDAD,
+                 usuario: str = SMTP_USUARIO, clave: str = SMTP_CLAVE, remitente: str = CORREO_REMITENTE, timeout: float = 20.0):
+        self.host = host
+        self.puerto = puerto
+        self.seguridad = seguridad
+        self.usuario = usuario
+        self.clave = clave
+        self.remitente = remitente
+        self.timeout = timeout
+
+    def _conectar(self) -> smtplib.SMTP:
+        if self.seguridad == "ssl":
+            conexion = smtplib.SMTP_SSL(self.host, self.puerto, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            conexion = smtplib.SMTP(self.host, self.puerto, timeout=self.timeout)
+            if self.seguridad == "starttls":
+                conexion.starttls(context=ssl.create_default_context())
+        if self.usuario:
+            conexion.login(self.usuario, self.clave)
+        return conexion
+
+    def enviar(self, mensajes: List[EmailMessage]) -> List[Optional[Exception]]:
+        """Resultado por mensaje: None si el servidor lo aceptó, o el error. Un fallo de conexión alcanza a los que faltan."""
+        resultados: List[Optional[Exception]] = []
+        try:
+            conexion = self._conectar()
+        except (smtplib.SMTPException, OSError) as e:
+            return [e] * len(mensajes)
+        try:
+            for mensaje in mensajes:
+                try:
+                    conexion.send_message(mensaje)
+                    resultados.append(None)
+                except smtplib.SMTPServerDisconnected as e:
+                    resultados.extend([e] * (len(mensajes) - len(resultados)))
+                    break
+                # SMTPException hereda de OSError: va antes que el OSError de la conexión caída
+                except (smtplib.SMTPException, ValueError) as e: # smtplib ya hizo RSET: la conexión sigue servible
+                    resultados.append(e)
+                except OSError as e:
+                    resultados.extend([e] * (len(mensajes) - len(resultados)))
+                    break
+        finally:
+            try:
+                conexion.quit()
+            except (smtplib.SMTPException, OSError):
+                conexion.close()
+        return resultados
+
+
+class BandejaSalida:
+    """
+    Cola persistente de correos en SQLite (WAL) compartida por los workers; una conexión por hilo y proceso.
+    `encolar` guarda el correo ya renderizado y despierta al hilo de envío (uno por proceso, se relanza
+    tras un fork). `al_entregar` recibe los segundos entre encolar y entregar de cada correo enviado.
+    """
+
+    def __init__(self, ruta: str = BANDEJA_SALIDA_PATH, enviador: Optional[EnviadorSmtp] = None,
+                 intervalo: float = INTERVALO_SONDEO, max_intentos: int = MAX_INTENTOS,
+                 al_entregar: Optional[Callable[[float], None]] = None, segundo_plano: bool = True,
+                 max_por_sesion: int = MAX_POR_SESION, max_por_ip: int = MAX_POR_IP, ventana: float = VENTANA_LIMITE):
+        self.ruta = ruta
+        self.enviador = enviador or EnviadorSmtp()
+        self.intervalo = intervalo
+        self.max_intentos = max_intentos
+        self.max_por_sesion = max_por_sesion
+        self.max_por_ip = max_por_ip
+        self.ventana = ventana
+        self.al_entregar = al_entregar
+        self.segundo_plano = segundo_plano # False: sin hilo de envío, solo `procesar` explícito
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._aviso = threading.Event()
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._pases_desde_purgar = 0
+        self.enviados = 0
+        self.reintentos = 0
+        self.fallidos = 0
+        conexion = self._conexion()
+        for sentencia in ESQUEMA:
+            conexion.execute(sentencia)
+        existentes = {fila[1] for fila in conexion.execute("PRAGMA table_info(correos)")}
+        for columna, tipo in COLUMNAS_AGREGADAS:
+            if columna not in existentes:
+                try:
+                    conexion.execute(f"ALTER TABLE correos ADD COLUMN {columna} {tipo}")
+                except sqlite3.OperationalError: # Otro worker la agregó a la vez
+                    pass
+        for sentencia in INDICES_ADMISION:
+            conexion.execute(sentencia)
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    # --- Encolado (petición) ---
+
+    def encolar(self, destinatario: str, asunto: str, texto: str, html: Optional[str] = None, referencia: str = "",
+                huella: Optional[str] = None, sesion: Optional[str] = None, ip: Optional[str] = None) -> int:
+        """
+        Guarda un correo listo para enviar y retorna su id; no espera al SMTP. Lanza ValueError si el destinatario
+        no es una dirección simple y EnvioRechazado si `huella` ya se encoló para ese destinatario o si `sesion` o
+        `ip` llegaron a su límite de envíos en la ventana. La comprobación y el alta van en una transacción.
+        """
+        direccion = direccion_valida(destinatario)
+        if direccion is None:
+            raise ValueError(f"Destinatario no válido: {destinatario!r}")
+        ahora = time.time()
+        dominio = self.enviador.remitente.rpartition("@")[2] or None
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            if huella is not None:
+                fila = conexion.execute("SELECT id FROM correos WHERE huella = ? AND lower(destinatario) = ? LIMIT 1",
+                                        (huella, direccion.lower())).fetchone()
+                if fila is not None:
+                    raise EnvioRechazado(DUPLICADO, fila[0])
+            for columna, valor, maximo in (("sesion", sesion, self.max_por_sesion), ("ip", ip, self.max_por_ip)):
+                if valor and maximo > 0:
+                    recientes = conexion.execute(f"SELECT COUNT(*) FROM correos WHERE {columna} = ? AND creado >= ?",
+                                                 (valor, ahora - self.ventana)).fetchone()[0]
+                    if recientes >= maximo:
+                        raise EnvioRechazado(LIMITE)
+            cursor = conexion.execute(
+                "INSERT INTO correos (creado, referencia, destinatario, asunto, mensaje_id, texto, html, estado, proximo_intento,"
+                " huella, sesion, ip) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ahora, referencia, direccion, asunto, make_msgid(domain=dominio), texto, html, PENDIENTE, ahora, huella, sesion, ip),
+            )
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+        self.iniciar()
+        self._aviso.set()
+        return cursor.lastrowid
+
+    # --- Envío (hilo de fondo) ---
+
+    def _reservar(self, limite: int) -> List[_Reservado]:
+        """Marca como reservados (próximo intento tras RESERVA) los correos listos, para que otro worker no los envíe."""
+        ahora = time.time()
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            filas = conexion.execute(
+                "SELECT id, creado, destinatario, asunto, mensaje_id, texto, html, intentos FROM correos"
+                " WHERE estado = ? AND proximo_intento <= ? ORDER BY proximo_intento LIMIT ?", (PENDIENTE, ahora, limite),
+            ).fetchall()
+            if filas:
+                conexion.executemany("UPDATE correos SET proximo_intento = ? WHERE id = ?", [(ahora + RESERVA, f[0]) for f in filas])
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+        return [_Reservado(*f) for f in filas]
+
+    def _mensaje(self, correo: _Reservado) -> EmailMessage:
+        mensaje = EmailMessage()
+        mensaje["From"] = self.enviador.remitente
+        mensaje["To"] = correo.destinatario
+        mensaje["Subject"] = correo.asunto
+        mensaje["Date"] = formatdate(correo.creado, localtime=False, usegmt=True)
+        mensaje["Message-ID"] = correo.mensaje_id
+        mensaje.set_content(correo.texto)
+        if correo.html:
+            mensaje.add_alternative(correo.html, subtype="html")
+        return mensaje
+
+    def procesar(self, limite: int = MAX_LOTE) -> int:
+        """Un pase: envía los correos listos (hasta `limite`) y registra el resultado. Retorna cuántos intentó."""
+        reservados = self._reservar(limite)
+        if not reservados:
+            return 0
+        mensajes, invalidos = [], []
+        for correo in reservados:
+            try:
+                mensajes.append(self._mensaje(correo))
+            except (ValueError, TypeError) as e: # Dirección o cabecera inválida: no llega a la conexión
+                mensajes.append(None)
+                invalidos.append(e)
+        enviados = iter(self.enviador.enviar([m for m in mensajes if m is not None]))
+        errores = iter(invalidos)
+        ahora = time.time()
+        actualizaciones = []
+        for correo, mensaje in zip(reservados, mensajes):
+            error = next(enviados) if mensaje is not None else next(errores)
+            intentos = correo.intentos + 1
+            if error is None:
+                actualizaciones.append((ENVIADO, intentos, ahora, ahora, None, correo.id))
+                self.enviados += 1
+                if self.al_entregar is not None:
+                    self.al_entregar(ahora - correo.creado)
+            elif error_permanente(error) or intentos >= self.max_intentos:
+                actualizaciones.append((FALLIDO, intentos, ahora, None, texto_error(error)[:500], correo.id))
+                self.fallidos += 1
+                logging.error(f"Correo {correo.id} a {correo.destinatario} descartado tras {intentos} intentos: {texto_error(error)}")
+            else:
+                actualizaciones.append((PENDIENTE, intentos, ahora + espera_reintento(intentos), None, texto_error(error)[:500], correo.id))
+                self.reintentos += 1
+                logging.warning(f"Correo {correo.id} a {correo.destinatario}: intento {intentos} fallido, se reintentará: {texto_error(error)}")
+        self._conexion().executemany(
+            "UPDATE correos SET estado = ?, intentos = ?, proximo_intento = ?, enviado = ?, ultimo_error = ? WHERE id = ?", actualizaciones)
+        return len(reservados)
+
+    def purgar(self, dias: float = RETENCION_DIAS) -> int:
+        """Borra los enviados y fallidos de hace más de `dias`; retorna cuántos."""
+        limite = time.time() - dias * 86400
+        return self._conexion().execute("DELETE FROM correos WHERE estado != ? AND creado < ?", (PENDIENTE, limite)).rowcount
+
+    # --- Hilo de fondo ---
+
+    def iniciar(self):
+        """Arranca el hilo de envío (una vez por proceso; se relanza tras un fork)."""
+        pid = os.getpid()
+        if not self.segundo_plano or self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+                return
+            self._pid = pid
+            self._despertar = threading.Event()
+            self._aviso = threading.Event()
+            self._hilo = threading.Thread(target=self._bucle, name="bandeja-salida", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        despertar, hilo = self._despertar, self._hilo
+        self._hilo = None
+        despertar.set()
+        self._aviso.set()
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout=1)
+
+    def _bucle(self):
+        despertar, aviso = self._despertar, self._aviso
+        while not despertar.is_set():
+            aviso.clear()
+            try:
+                # Un pase lleno indica que quedan más listos: se sigue sin esperar
+                if self.procesar() >= MAX_LOTE:
+                    continue
+                self._pases_desde_purgar += 1
+                if self._pases_desde_purgar >= PURGA_CADA:
+                    self._pases_desde_purgar = 0
+                    self.purgar()
+            except Exception as e:
+                logging.error(f"Error en la bandeja de salida: {e}")
+            aviso.wait(self.intervalo)
+
+    # --- Consultas ---
+
+    def correo(self, id_: int) -> Optional[Correo]:
+        self.iniciar()
+        fila = self._conexion().execute(f"SELECT {COLUMNAS_CORREO} FROM correos WHERE id = ?", (id_,)).fetchone()
+        return Correo(*fila) if fila else None
+
+    def conteos(self) -> Dict[str, int]:
+        """Correos por estado visible (pendiente, reintentando, fallido) en la bandeja de todos los workers."""
+        self.iniciar()
+        conteos = {PENDIENTE: 0, REINTENTANDO: 0, FALLIDO: 0}
+        for estado, reintento, cantidad in self._conexion().execute(
+                "SELECT estado, intentos > 0, COUNT(*) FROM correos WHERE estado IN (?, ?) GROUP BY 1, 2", (PENDIENTE, FALLIDO)):
+            clave = REINTENTANDO if estado == PENDIENTE and reintento else estado
+            conteos[clave] += cantidad
+        return conteos
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {"enviado": self.enviados, "reintento": self.reintentos, "fallido": self.fallidos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estado y envío manual de la bandeja de salida de correos.")
+    parser.add_argument("comando", choices=["estado", "procesar", "purgar"])
+    parser.add_argument("--ruta", default=BANDEJA_SALIDA_PATH or "bandeja_salida.sqlite3")
+    args = parser.parse_args()
+
+    bandeja = BandejaSalida(args.ruta, segundo_plano=False)
+    if args.comando == "procesar":
+        if not bandeja.enviador.host:
+            parser.error("Defina SMTP_HOST para enviar.")
+        total = 0
+        while (intentados := bandeja.procesar()):
+            total += intentados
+        print(f"{total} correos intentados: {bandeja.estadisticas()}")
+    elif args.comando == "purgar":
+        print(f"{bandeja.purgar()} correos borrados.")
+    else:
+        for estado, cantidad in bandeja.conteos().items():
+            print(f"{estado:<13} {cantidad}")
+
+
+if __name__ == "__main__":
+    main()
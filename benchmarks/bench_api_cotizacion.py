@@ -0,0 +1,51 @@
+"""
+Throughput de la cotización en lote: función cotizar_lote sobre el índice y /api/quote vía cliente de pruebas.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_api_cotizacion.py [--filas 10000] [--lote 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import configuraciones_aleatorias, datos_sinteticos
+
+import Formulario
+from precio_oro import ProveedorFijo
+from precios import cotizar_lote
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--lote", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    datos = datos_sinteticos(args.filas)
+    configuraciones = configuraciones_aleatorias(datos, args.lote)
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticiones):
+        cotizar_lote(datos.indice, datos.costos_diamantes, 5600.0, configuraciones)
+    directo = args.repeticiones * args.lote / (time.perf_counter() - inicio)
+
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(5600.0))
+    Formulario.recargador_catalogo.publicar(datos)
+    cliente = Formulario.app.test_client()
+    inicio = time.perf_counter()
+    for _ in range(args.repeticiones):
+        respuesta = cliente.post("/api/quote", json={"configuraciones": configuraciones})
+        assert respuesta.status_code == 200, respuesta.data
+    http = args.repeticiones * args.lote / (time.perf_counter() - inicio)
+
+    print(f"Catálogo: {args.filas} filas, lotes de {args.lote} configuraciones")
+    print(f"cotizar_lote():  {directo:12,.0f} cotizaciones/s")
+    print(f"POST /api/quote: {http:12,.0f} cotizaciones/s ({http / args.lote:,.1f} llamadas/s)")
+
+
+if __name__ == "__main__":
+    main()
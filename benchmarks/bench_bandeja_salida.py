@@ -0,0 +1,90 @@
+"""
+Envío de presupuestos por email con un servidor SMTP lento (smtp_prueba.py con demora por mensaje): latencia
+que ve la petición al enviar directamente por SMTP frente a encolar en la bandeja de salida, y tiempo hasta
+que el servidor aceptó todos los correos. Varios hilos envían a la vez, como las peticiones de un worker.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_bandeja_salida.py [--correos 200] [--hilos 8] [--demora 0.02]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.message import EmailMessage
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from bandeja_salida import BandejaSalida, EnviadorSmtp
+from smtp_prueba import ServidorSmtpPrueba
+
+REMITENTE = "presupuestos@ejemplo.com"
+TEXTO = "Hola Ana,\n\nEste es el presupuesto que preparamos para usted:\n" + "LS141 · ROSA · 18K · 4 mm · Talla 6: $1,119.85\n" * 4
+HTML = "<html><body>" + "<p>LS141 · ROSA · 18K · 4 mm · Talla 6: $1,119.85</p>" * 4 + "</body></html>"
+
+
+def mensaje(destinatario: str) -> EmailMessage:
+    m = EmailMessage()
+    m["From"], m["To"], m["Subject"] = REMITENTE, destinatario, "Su presupuesto"
+    m.set_content(TEXTO)
+    m.add_alternative(HTML, subtype="html")
+    return m
+
+
+def medir(modo: str, correos: int, hilos: int, demora: float, directorio: str) -> dict:
+    servidor = ServidorSmtpPrueba(demora=demora).iniciar()
+    enviador = EnviadorSmtp(servidor.host, servidor.puerto, "ninguna", "", "", REMITENTE)
+    bandeja = BandejaSalida(os.path.join(directorio, f"{modo}.sqlite3"), enviador) if modo == "bandeja" else None
+    por_hilo = correos // hilos
+    latencias, lock = [], threading.Lock()
+
+    def peticiones(hilo: int):
+        propias = []
+        for i in range(por_hilo):
+            destinatario = f"cliente{hilo}_{i}@ejemplo.com"
+            t = time.perf_counter()
+            if bandeja is None:
+                error = enviador.enviar([mensaje(destinatario)])[0] # La petición espera al servidor SMTP
+                if error is not None:
+                    raise error
+            else:
+                bandeja.encolar(destinatario, "Su presupuesto", TEXTO, HTML)
+            propias.append(time.perf_counter() - t)
+        with lock:
+            latencias.extend(propias)
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=peticiones, args=(n,)) for n in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    servidor.esperar(por_hilo * hilos, timeout=600)
+    total = time.perf_counter() - inicio
+    if bandeja is not None:
+        bandeja.detener()
+    servidor.detener()
+    latencias.sort()
+    return {"p50_ms": latencias[len(latencias) // 2] * 1000, "p99_ms": latencias[int(len(latencias) * 0.99)] * 1000,
+            "total_s": total, "recibidos": len(servidor.recibidos), "esperados": por_hilo * hilos}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--correos", type=int, default=200)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--demora", type=float, default=0.02, help="Segundos que tarda el servidor SMTP en aceptar cada mensaje")
+    args = parser.parse_args()
+
+    print(f"{args.correos} correos, {args.hilos} hilos, servidor SMTP con {args.demora * 1000:.0f} ms por mensaje")
+    print(f"{'envío':<9} {'petición p50 (ms)':>18} {'petición p99 (ms)':>18} {'todos entregados (s)':>21} {'recibidos':>10}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for modo in ("directo", "bandeja"):
+            r = medir(modo, args.correos, args.hilos, args.demora, directorio)
+            print(f"{modo:<9} {r['p50_ms']:>18.2f} {r['p99_ms']:>18.2f} {r['total_s']:>21.2f} {r['recibidos']:>5}/{r['esperados']}")
+
+
+if __name__ == "__main__":
+    main()
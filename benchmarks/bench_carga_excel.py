@@ -0,0 +1,73 @@
+"""
+Lectura del libro Excel: tiempo de leer_excel() y memoria pico del proceso sobre libros sintéticos de
+distintos tamaños. Cada medida corre en un proceso nuevo (el pico de memoria es el ru_maxrss del proceso
+menos su RSS antes de leer, con los módulos ya importados). Con --raiz se mide además otra copia del repo,
+p. ej. el lector anterior con pandas:
+    git worktree add /tmp/antes HEAD~1
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_carga_excel.py [--filas 10000 50000 100000] [--repeticiones 3] [--raiz /tmp/antes]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sintetico import escribir_libro
+
+HIJO = """
+import json, resource, sys, time
+sys.path.insert(0, {raiz!r})
+import catalogo
+import openpyxl # Importado antes de medir en ambos lectores
+try:
+    import pandas # El lector anterior lo importaba dentro de leer_excel
+except ImportError:
+    pass
+
+def rss_kib():
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+
+antes = rss_kib()
+inicio = time.perf_counter()
+datos = catalogo.leer_excel({ruta!r})
+segundos = time.perf_counter() - inicio
+pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - antes
+print(json.dumps({{"s": segundos, "pico_kib": pico, "variantes": len(datos.indice)}}))
+"""
+
+
+def medir(raiz: str, ruta: str) -> dict:
+    salida = subprocess.run([sys.executable, "-c", HIJO.format(raiz=raiz, ruta=ruta)], capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--raiz", action="append", help="Copia del repo a medir (repetible); por defecto solo esta")
+    args = parser.parse_args()
+    raices = (args.raiz or []) + [RAIZ]
+
+    print(f"{'filas':>7} {'código':<16} {'tamaño (KiB)':>13} {'lectura (s)':>12} {'pico (MiB)':>11} {'variantes':>10}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in args.filas:
+            ruta = os.path.join(directorio, f"libro_{filas}.xlsx")
+            escribir_libro(ruta, filas)
+            for raiz in raices:
+                corridas = [medir(raiz, ruta) for _ in range(args.repeticiones)]
+                mejor = min(c["s"] for c in corridas)
+                pico = min(c["pico_kib"] for c in corridas) / 1024
+                nombre = os.path.basename(os.path.normpath(raiz))
+                print(f"{filas:>7} {nombre:<16} {os.path.getsize(ruta) / 1024:>13.0f} {mejor:>12.2f} {pico:>11.1f} {corridas[0]['variantes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
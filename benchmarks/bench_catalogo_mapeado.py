@@ -0,0 +1,110 @@
+"""
+Catálogo mapeado en memoria frente al snapshot (pickle con DataFrames e índice de diccionarios): tiempo de
+apertura, coste de buscar() y memoria de varios procesos con el catálogo cargado a la vez, como los
+workers de gunicorn. Cada proceso carga el catálogo, recorre todas las variantes con buscar() y queda
+vivo mientras se leen su USS (memoria privada) y PSS de /proc/<pid>/smaps_rollup. Solo Linux.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_catalogo_mapeado.py [--filas 100000] [--procesos 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sintetico import datos_sinteticos
+
+from catalogo_mapeado import abrir_catalogo_mapeado, escribir_catalogo_mapeado
+from snapshot_catalogo import escribir_snapshot, leer_snapshot
+
+# Proceso hijo: carga el catálogo en el modo pedido, lo recorre y espera a que el padre lo mida
+HIJO = """
+import sys
+sys.path.insert(0, {raiz!r})
+from catalogo_mapeado import abrir_catalogo_mapeado
+from snapshot_catalogo import leer_snapshot
+
+def uss():
+    valores = dict(l.split()[:2] for l in open("/proc/self/smaps_rollup") if l.split()[0].endswith(":"))
+    return int(valores["Private_Clean:"]) + int(valores["Private_Dirty:"])
+
+antes = uss()
+if {modo!r} == "mapeado":
+    indice = abrir_catalogo_mapeado({excel!r}, {ruta!r})
+else:
+    indice = leer_snapshot({excel!r}, {ruta!r}).indice
+for modelo, ancho, metal, kilates, genero in indice.variantes:
+    indice.buscar(modelo, metal, ancho, kilates, "6", genero)
+print(antes, flush=True)
+sys.stdin.read()
+"""
+
+
+def memoria(pid: int) -> dict:
+    valores = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[0].endswith(":") and partes[1].isdigit():
+                valores[partes[0][:-1]] = int(partes[1])
+    return {"pss": valores.get("Pss", 0), "uss": valores.get("Private_Clean", 0) + valores.get("Private_Dirty", 0)}
+
+
+def medir_procesos(modo: str, excel: str, ruta: str, procesos: int) -> dict:
+    codigo = HIJO.format(raiz=RAIZ, modo=modo, excel=excel, ruta=ruta)
+    hijos = [subprocess.Popen([sys.executable, "-c", codigo], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(procesos)]
+    try:
+        base = [int(h.stdout.readline()) for h in hijos] # Espera a que todos hayan cargado y recorrido el catálogo
+        medidas = [memoria(h.pid) for h in hijos]
+    finally:
+        for h in hijos:
+            h.stdin.close()
+            h.wait()
+    n = len(hijos)
+    return {"uss": sum(m["uss"] - b for m, b in zip(medidas, base)) / n / 1024, "pss": sum(m["pss"] for m in medidas) / 1024}
+
+
+def mejor_ms(funcion, repeticiones: int = 5) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100000)
+    parser.add_argument("--procesos", type=int, default=3)
+    args = parser.parse_args()
+
+    datos = datos_sinteticos(args.filas)
+    with tempfile.TemporaryDirectory() as directorio:
+        excel = os.path.join(directorio, "no-existe.xlsm") # Sin libro no se comprueba la firma
+        rutas = {"snapshot": os.path.join(directorio, "catalogo.snapshot"), "mapeado": os.path.join(directorio, "catalogo.catmap")}
+        escribir_snapshot(datos, excel, rutas["snapshot"])
+        escribir_catalogo_mapeado(datos, excel, rutas["mapeado"])
+
+        abrir = {"snapshot": lambda: leer_snapshot(excel, rutas["snapshot"]).indice,
+                 "mapeado": lambda: abrir_catalogo_mapeado(excel, rutas["mapeado"])}
+        claves = list(datos.indice.variantes)[:: max(len(datos.indice) // 2000, 1)]
+
+        print(f"{len(datos.indice)} variantes, {args.procesos} procesos")
+        print(f"{'modo':<9} {'archivo (KiB)':>14} {'apertura (ms)':>14} {'buscar (µs)':>12} {'USS/proceso (MiB)':>18} {'PSS total (MiB)':>16}")
+        for modo, ruta in rutas.items():
+            indice = abrir[modo]()
+            t_buscar = mejor_ms(lambda: [indice.buscar(m, me, a, k, "6", g) for m, a, me, k, g in claves]) * 1000 / len(claves)
+            memoria_procesos = medir_procesos(modo, excel, ruta, args.procesos)
+            print(f"{modo:<9} {os.path.getsize(ruta) / 1024:>14.0f} {mejor_ms(abrir[modo]):>14.2f} {t_buscar:>12.2f} "
+                  f"{memoria_procesos['uss']:>18.1f} {memoria_procesos['pss']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
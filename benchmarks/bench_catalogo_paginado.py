@@ -0,0 +1,50 @@
+"""
+Primera página del catálogo paginado frente al tamaño del libro: la vitrina (orden + índice de filtros) se
+construye al publicar el catálogo, así que la petición solo renderiza las cards de su página.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_catalogo_paginado.py [--filas 100 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import datos_sinteticos
+
+import Formulario
+from precio_oro import ProveedorFijo
+
+
+def tiempo_ms(funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(5600.0))
+    print(f"{'filas':>8} {'cards':>7} {'publicar (ms)':>14} {'1ª página fría (ms)':>20} {'1ª página (ms)':>15} {'filtrada (ms)':>14} {'bytes':>8}")
+    for n in args.filas:
+        datos = datos_sinteticos(n)
+        t_publicar = tiempo_ms(lambda: Formulario.recargador_catalogo.publicar(datos))
+        cards = len(Formulario.vitrina_actual(Formulario.catalogo_actual()))
+
+        cliente = Formulario.app.test_client()
+        respuesta = {}
+        t_fria = tiempo_ms(lambda: respuesta.update(r=cliente.get("/catalogo")))
+        assert respuesta["r"].status_code == 200
+        t_caliente = min(tiempo_ms(lambda: cliente.get("/catalogo")) for _ in range(args.repeticiones))
+        t_filtrada = min(tiempo_ms(lambda: cliente.get("/catalogo?metal=ROSA&genero=DAMA&ancho=4")) for _ in range(args.repeticiones))
+        print(f"{n:>8} {cards:>7} {t_publicar:>14.1f} {t_fria:>20.2f} {t_caliente:>15.2f} {t_filtrada:>14.2f} {len(respuesta['r'].data):>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Guardado de cotizaciones bajo carga concurrente: varios procesos (como los workers de gunicorn) con varios
+hilos cada uno guardan cotizaciones a la vez en el mismo archivo SQLite. Compara la escritura diferida
+(cola y lotes, la de la app) con la directa (una transacción por guardado, dentro de la petición): latencia
+de guardar() vista por la petición y cotizaciones por segundo hasta estar todas en disco. Al final
+comprueba que el archivo tiene todas las filas.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_cotizaciones.py [--procesos 2] [--hilos 8] [--guardados 500]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from cotizaciones_guardadas import AlmacenCotizaciones, nueva_cotizacion
+
+ANILLOS = [
+    {"tipo": "dama", "genero": "DAMA", "modelo": "LS141", "metal": "ROSA", "kilates": "18", "ancho": "4", "talla": "6",
+     "tipo_diamante": "Natural", "peso": 4.62, "cost_fijo": 121.0, "cost_adicional": 0.0, "ct": 0.25, "costo_diamante": 1500.0,
+     "monto_oro": 623.85, "monto_diamantes": 375.0, "monto": 1119.85},
+    {"tipo": "cab", "genero": "CABALLERO", "modelo": "LS0048", "metal": "BLANCO", "kilates": "14", "ancho": "6", "talla": "10",
+     "tipo_diamante": "Laboratorio", "peso": 7.05, "cost_fijo": 95.0, "cost_adicional": 12.0, "ct": 0.0, "costo_diamante": 800.0,
+     "monto_oro": 753.39, "monto_diamantes": 0.0, "monto": 860.39},
+]
+
+
+def proceso(ruta: str, diferida: bool, hilos: int, guardados: int, inicio: multiprocessing.Event, resultados: multiprocessing.Queue):
+    almacen = AlmacenCotizaciones(ruta, diferida=diferida)
+    latencias = []
+    lock = threading.Lock()
+
+    def hilo(numero: int):
+        propias = []
+        for i in range(guardados):
+            cotizacion = nueva_cotizacion(f"Cliente {numero}", f"cliente{(os.getpid() + numero + i) % 997}@ejemplo.com", "Español",
+                                          2650.0, "live", 1, ANILLOS, 1980.24, 1990.0)
+            t = time.perf_counter()
+            almacen.guardar(cotizacion)
+            propias.append(time.perf_counter() - t)
+        with lock:
+            latencias.extend(propias)
+
+    inicio.wait()
+    t = time.perf_counter()
+    trabajadores = [threading.Thread(target=hilo, args=(n,)) for n in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    almacen.vaciar()
+    resultados.put((time.perf_counter() - t, latencias, almacen.estadisticas()))
+
+
+def medir(diferida: bool, procesos: int, hilos: int, guardados: int) -> dict:
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "cotizaciones.sqlite3")
+        AlmacenCotizaciones(ruta) # Crea el esquema antes de que compitan los procesos
+        contexto = multiprocessing.get_context("fork")
+        inicio, resultados = contexto.Event(), contexto.Queue()
+        hijos = [contexto.Process(target=proceso, args=(ruta, diferida, hilos, guardados, inicio, resultados)) for _ in range(procesos)]
+        for hijo in hijos:
+            hijo.start()
+        inicio.set()
+        medidas = [resultados.get() for _ in hijos]
+        for hijo in hijos:
+            hijo.join()
+        filas = len(AlmacenCotizaciones(ruta, diferida=False))
+
+    latencias = sorted(l for _, ls, _ in medidas for l in ls)
+    total = procesos * hilos * guardados
+    return {
+        "por_segundo": total / max(s for s, _, _ in medidas),
+        "p50_us": latencias[len(latencias) // 2] * 1e6,
+        "p99_us": latencias[int(len(latencias) * 0.99)] * 1e6,
+        "max_ms": latencias[-1] * 1000,
+        "lotes": sum(e["lotes"] for _, _, e in medidas),
+        "completo": filas == total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--procesos", type=int, default=2)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--guardados", type=int, default=500, help="Guardados por hilo")
+    args = parser.parse_args()
+
+    print(f"{args.procesos} procesos x {args.hilos} hilos x {args.guardados} guardados")
+    print(f"{'escritura':<10} {'cotiz./s':>10} {'p50 (µs)':>10} {'p99 (µs)':>10} {'máx (ms)':>10} {'lotes':>8} {'filas':>6}")
+    for nombre, diferida in (("directa", False), ("diferida", True)):
+        r = medir(diferida, args.procesos, args.hilos, args.guardados)
+        print(f"{nombre:<10} {r['por_segundo']:>10.0f} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f} {r['max_ms']:>10.1f} "
+              f"{r['lotes']:>8} {'ok' if r['completo'] else 'FALTAN':>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Búsqueda facetada del catálogo sobre el índice de variantes (mapas de bits por valor de faceta) frente a
+filtrar el DataFrame con pandas, que es lo que habría que hacer por petición sin el índice.
+Cada consulta del índice incluye los conteos de todas las facetas y el colapso a cards.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_facetas.py [--filas 100000] [--repeticiones 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import datos_sinteticos
+
+from facetas_catalogo import ConsultaFacetas
+from vitrina_catalogo import construir_vitrina
+
+PRECIO_FIJO = 5600.0
+
+CONSULTAS = {
+    "sin filtros": ConsultaFacetas(),
+    "metal": ConsultaFacetas({"metal": ("ROSA",)}),
+    "18K rosa 4-6mm diamantes": ConsultaFacetas({"metal": ("ROSA",), "kilates": ("18",), "diamantes": ("SI",)}, ancho_min=4, ancho_max=6),
+    "texto": ConsultaFacetas(texto="LS00"),
+    "precio < 1500": ConsultaFacetas(precio_max=1500),
+    "todo": ConsultaFacetas({"metal": ("ROSA", "BLANCO"), "kilates": ("14", "18"), "genero": ("DAMA",), "diamantes": ("SI",)},
+                            texto="LS", ancho_min=4, ancho_max=6, precio_min=300, precio_max=1500),
+}
+
+
+def medir_us(funcion, repeticiones: int):
+    """(mediana, mínimo) en microsegundos por llamada."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2], tiempos[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[100000])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.filas:
+        datos = datos_sinteticos(n)
+        inicio = time.perf_counter()
+        vitrina = construir_vitrina(datos)
+        t_construir = (time.perf_counter() - inicio) * 1000
+        facetas = vitrina.facetas
+        print(f"--- {n} filas: {len(facetas)} variantes, {len(vitrina)} cards, {len(facetas.tokens)} tokens; índice en {t_construir:.0f} ms")
+
+        df = datos.df
+        metal = df["METAL"].astype(str).str.upper()
+        ancho = pd.to_numeric(df["ANCHO"], errors="coerce")
+        ct = pd.to_numeric(df["CT"], errors="coerce")
+        print(f"  {'consulta':<26} {'variantes':>9} {'cards':>7} {'índice p50 (µs)':>16} {'mín (µs)':>9}")
+        for nombre, consulta in CONSULTAS.items():
+            resultado = facetas.buscar(consulta, PRECIO_FIJO)
+            p50, minimo = medir_us(lambda: facetas.buscar(consulta, PRECIO_FIJO).bits_tarjetas(), args.repeticiones)
+            print(f"  {nombre:<26} {resultado.total_variantes:>9} {resultado.total_tarjetas:>7} {p50:>16.1f} {minimo:>9.1f}")
+
+        # Referencia: la consulta "18K rosa 4-6mm" con máscaras de pandas, sin conteos ni cards
+        def con_pandas():
+            filas = df[(metal == "ROSA") & (df["CARAT"].astype(str) == "18") & (ancho >= 4) & (ancho <= 6) & (ct > 0)]
+            return filas[["NAME", "METAL"]].drop_duplicates()
+        p50, minimo = medir_us(con_pandas, max(1, args.repeticiones // 10))
+        print(f"  {'pandas (solo filtrar)':<26} {'':>9} {'':>7} {p50:>16.1f} {minimo:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
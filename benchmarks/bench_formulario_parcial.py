@@ -0,0 +1,97 @@
+"""
+Repetición de una sesión de clics en los selectores: envío completo del formulario (POST / + redirect + GET /)
+frente a la actualización parcial (POST /api/seccion/<tipo>). Mide CPU del servidor y bytes por interacción.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_formulario_parcial.py [--filas 10000] [--clics 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import KILATES, TALLAS, datos_sinteticos
+
+import Formulario
+from precio_oro import ProveedorFijo
+
+CABECERAS = {"Accept-Encoding": "gzip"}
+
+
+def clics(datos, n: int, semilla: int = 3):
+    """Secuencia de cambios de un selector (tipo, campo, valor) sobre los modelos elegidos."""
+    rnd = random.Random(semilla)
+    anchos = sorted({a for (_, a, _, _, _) in datos.indice.variantes})
+    campos = {
+        "kilates": KILATES,
+        "ancho": anchos,
+        "talla": TALLAS,
+        "tipo_diamante": ["Laboratorio", "Natural"],
+    }
+    secuencia = []
+    for _ in range(n):
+        tipo = rnd.choice(["dama", "cab"])
+        campo = rnd.choice(list(campos))
+        secuencia.append((tipo, campo, rnd.choice(campos[campo])))
+    return secuencia
+
+
+def preparar_cliente(modelo: str, metal: str):
+    cliente = Formulario.app.test_client()
+    cliente.post("/catalogo", data={"seleccion": f"{modelo};{metal}", "tipo": "dama"})
+    cliente.post("/catalogo", data={"seleccion": f"{modelo};{metal}", "tipo": "cab"})
+    cliente.get("/")
+    return cliente
+
+
+def repetir(cliente, secuencia, parcial: bool):
+    """(segundos de CPU, bytes recibidos) de toda la secuencia."""
+    estado = {"dama": {}, "cab": {}}
+    total_bytes = 0
+    inicio = time.process_time()
+    for tipo, campo, valor in secuencia:
+        estado[tipo][f"{campo}_{tipo}"] = valor
+        if parcial:
+            respuesta = cliente.post(f"/api/seccion/{tipo}", data=estado[tipo], headers=CABECERAS)
+            total_bytes += len(respuesta.data)
+        else:
+            # Lo que envía el navegador con onchange="this.form.submit()": el formulario completo
+            formulario = {"idioma": "Español", "nombre_cliente": "Cliente", "email_cliente": "c@ejemplo.com"}
+            formulario.update(estado["dama"])
+            formulario.update(estado["cab"])
+            respuesta = cliente.post("/", data=formulario, headers=CABECERAS)
+            total_bytes += len(respuesta.data)
+            respuesta = cliente.get(respuesta.headers["Location"], headers=CABECERAS)
+            total_bytes += len(respuesta.data)
+        assert respuesta.status_code == 200, respuesta.status_code
+    return time.process_time() - inicio, total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--clics", type=int, default=200)
+    args = parser.parse_args()
+
+    datos = datos_sinteticos(args.filas)
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(5600.0))
+    Formulario.recargador_catalogo.publicar(datos)
+    modelo, _, metal, _, _ = next(iter(datos.indice.variantes))
+    secuencia = clics(datos, args.clics)
+
+    print(f"Catálogo: {args.filas} filas, {args.clics} cambios de selector")
+    resultados = {}
+    for nombre, parcial in (("formulario completo", False), ("actualización parcial", True)):
+        cpu, total_bytes = repetir(preparar_cliente(modelo, metal), secuencia, parcial)
+        resultados[nombre] = (cpu, total_bytes)
+        print(f"{nombre:<22} {cpu * 1000 / args.clics:8.2f} ms CPU/clic {total_bytes / args.clics:10,.0f} bytes/clic (gzip)")
+
+    (cpu_a, bytes_a), (cpu_d, bytes_d) = resultados.values()
+    print(f"Reducción: CPU {100 * (1 - cpu_d / cpu_a):.0f}%, bytes {100 * (1 - bytes_d / bytes_a):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
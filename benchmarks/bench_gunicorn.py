@@ -0,0 +1,135 @@
+"""
+Arranque de gunicorn con un libro sintético: el comando de antes (gunicorn Formulario:app, sin
+configuración), gunicorn.conf.py sin preload y con preload. Mide el tiempo hasta que /salud responde,
+la latencia de la primera petición al catálogo y la memoria por worker (RSS, PSS y USS de
+/proc/<pid>/smaps_rollup: PSS/USS muestran lo que de verdad comparten los workers). Solo Linux.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_gunicorn.py [--filas 20000] [--workers 2]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sintetico import escribir_libro
+
+from catalogo import leer_excel
+from snapshot_catalogo import escribir_snapshot
+
+MODOS = {
+    "antes": None, # gunicorn Formulario:app con los valores por defecto
+    "sin preload": "0",
+    "preload": "1",
+}
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def pedir(url: str, timeout: float = 60) -> Optional[float]:
+    """Milisegundos de una petición GET (None si falla)."""
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as respuesta:
+            respuesta.read()
+            if respuesta.status != 200:
+                return None
+    except OSError:
+        return None
+    return (time.perf_counter() - inicio) * 1000
+
+
+def memoria(pid: int) -> Dict[str, int]:
+    """Rss, Pss y USS (Private_Clean + Private_Dirty) en KiB."""
+    valores = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[0].endswith(":"):
+                valores[partes[0][:-1]] = int(partes[1]) if partes[1].isdigit() else 0
+    return {"rss": valores.get("Rss", 0), "pss": valores.get("Pss", 0),
+            "uss": valores.get("Private_Clean", 0) + valores.get("Private_Dirty", 0)}
+
+
+def hijos(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def medir_modo(modo: str, preload: Optional[str], directorio: str, workers: int) -> Dict:
+    puerto = puerto_libre()
+    base = f"http://127.0.0.1:{puerto}"
+    entorno = dict(os.environ, PORT=str(puerto), WEB_CONCURRENCY=str(workers), PYTHONPATH=RAIZ,
+                   PRECIO_ORO_HISTORIAL=os.path.join(directorio, "precio_oro.sqlite3"),
+                   SESIONES_PATH=os.path.join(directorio, "sesiones.sqlite3"))
+    comando = [sys.executable, "-m", "gunicorn", "--chdir", directorio]
+    if preload is None:
+        comando += ["-b", f"127.0.0.1:{puerto}", "-w", str(workers)]
+    else:
+        entorno["GUNICORN_PRELOAD"] = preload
+        comando += ["-c", os.path.join(RAIZ, "gunicorn.conf.py")]
+    comando.append("Formulario:app")
+
+    inicio = time.perf_counter()
+    # cwd = directorio: gunicorn carga ./gunicorn.conf.py del directorio actual si existe (el comando de antes no debe)
+    proceso = subprocess.Popen(comando, cwd=directorio, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # Listo: el comando de antes no tiene /salud, así que basta con que acepte conexiones
+        ruta_listo = "/static/logo.png" if preload is None else "/salud"
+        while pedir(base + ruta_listo, timeout=5) is None:
+            if proceso.poll() is not None:
+                raise RuntimeError(f"gunicorn terminó ({modo})")
+            time.sleep(0.05)
+        t_listo = (time.perf_counter() - inicio) * 1000
+
+        primera = pedir(base + "/catalogo")
+        siguientes = sorted(pedir(base + "/catalogo") or 0 for _ in range(20))
+        for _ in range(10 * workers): # Que todos los workers hayan servido las páginas principales
+            pedir(base + "/")
+            pedir(base + "/catalogo")
+        por_worker = [memoria(pid) for pid in hijos(proceso.pid)]
+        maestro = memoria(proceso.pid)
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=30)
+    return {"listo_ms": t_listo, "primera_ms": primera, "p50_ms": siguientes[len(siguientes) // 2],
+            "workers": por_worker, "maestro": maestro}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_excel = os.path.join(directorio, "Formulario Catalogo.xlsm")
+        escribir_libro(ruta_excel, args.filas)
+        escribir_snapshot(leer_excel(ruta_excel), ruta_excel, os.path.join(directorio, "Formulario Catalogo.snapshot"))
+
+        print(f"{args.filas} filas, {args.workers} workers")
+        print(f"{'modo':<12} {'listo (ms)':>11} {'1ª /catalogo (ms)':>18} {'p50 (ms)':>9} "
+              f"{'RSS/worker (MiB)':>17} {'PSS/worker':>11} {'USS/worker':>11} {'PSS total':>10}")
+        for modo, preload in MODOS.items():
+            r = medir_modo(modo, preload, directorio, args.workers)
+            n = max(len(r["workers"]), 1)
+            media = {k: sum(w[k] for w in r["workers"]) / n / 1024 for k in ("rss", "pss", "uss")}
+            pss_total = (sum(w["pss"] for w in r["workers"]) + r["maestro"]["pss"]) / 1024
+            print(f"{modo:<12} {r['listo_ms']:>11.0f} {r['primera_ms'] or float('nan'):>18.1f} {r['p50_ms']:>9.1f} "
+                  f"{media['rss']:>17.1f} {media['pss']:>11.1f} {media['uss']:>11.1f} {pss_total:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Coste de arranque de un worker y de la ruta de petición: tiempo de `import Formulario`, RSS tras importar
+y tras cargar el catálogo (snapshot o archivo mapeado ya compilados), módulos pesados importados
+(pandas, openpyxl, requests) y latencia por llamada de obtener_peso_y_costo(). Cada medida se hace en un
+proceso nuevo sobre un libro sintético; con --raiz se mide otra copia del repo (p. ej. un
+`git worktree add /tmp/antes HEAD~1`) para comparar con el código anterior.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_importacion.py [--filas 20000] [--repeticiones 5] [--raiz /tmp/antes]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sintetico import escribir_libro
+
+HIJO = """
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+
+def rss_kib():
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+
+inicio = time.perf_counter()
+import Formulario
+t_import = (time.perf_counter() - inicio) * 1000
+rss_import = rss_kib()
+modulos_import = [m for m in ("pandas", "openpyxl", "requests") if m in sys.modules]
+
+inicio = time.perf_counter()
+datos = Formulario.catalogo_actual().datos
+t_catalogo = (time.perf_counter() - inicio) * 1000
+rss_catalogo = rss_kib()
+
+claves = list(datos.indice.variantes)[:2000]
+inicio = time.perf_counter()
+for modelo, ancho, metal, kilates, genero in claves:
+    Formulario.obtener_peso_y_costo(modelo, metal, ancho, kilates, "6", genero, "--", datos.indice)
+t_busqueda = (time.perf_counter() - inicio) * 1e6 / max(len(claves), 1)
+print(json.dumps({{"import_ms": t_import, "rss_import": rss_import, "catalogo_ms": t_catalogo, "rss_catalogo": rss_catalogo,
+                  "busqueda_us": t_busqueda, "modulos": modulos_import,
+                  "modulos_catalogo": [m for m in ("pandas", "openpyxl", "requests") if m in sys.modules]}}))
+"""
+
+
+def medir(raiz: str, directorio: str) -> dict:
+    entorno = dict(os.environ, PRECIO_ORO_HISTORIAL=os.path.join(directorio, "precio_oro.sqlite3"),
+                   SESIONES_PATH=os.path.join(directorio, "sesiones.sqlite3"), CATALOGO_INTERVALO_RECARGA="3600")
+    salida = subprocess.run([sys.executable, "-c", HIJO.format(raiz=raiz)], cwd=directorio, env=entorno,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--raiz", action="append", help="Copia del repo a medir (repetible); por defecto esta")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        escribir_libro(os.path.join(directorio, "Formulario Catalogo.xlsm"), args.filas)
+        print(f"{args.filas} filas; mediana de {args.repeticiones} procesos")
+        print(f"{'código':<24} {'import (ms)':>12} {'RSS import (MiB)':>17} {'catálogo (ms)':>14} {'RSS catálogo (MiB)':>19} "
+              f"{'búsqueda (µs)':>14}  módulos tras importar / tras cargar")
+        for raiz in args.raiz or [RAIZ]:
+            medir(raiz, directorio) # Compila el snapshot / archivo mapeado de esa versión
+            corridas = [medir(raiz, directorio) for _ in range(args.repeticiones)]
+            mediana = {k: sorted(c[k] for c in corridas)[len(corridas) // 2] for k in corridas[0] if not k.startswith("modulos")}
+            nombre = os.path.basename(os.path.normpath(raiz))
+            print(f"{nombre:<24} {mediana['import_ms']:>12.0f} {mediana['rss_import'] / 1024:>17.1f} {mediana['catalogo_ms']:>14.1f} "
+                  f"{mediana['rss_catalogo'] / 1024:>19.1f} {mediana['busqueda_us']:>14.2f}  "
+                  f"{','.join(corridas[0]['modulos']) or '-'} / {','.join(corridas[0]['modulos_catalogo']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
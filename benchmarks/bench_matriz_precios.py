@@ -0,0 +1,73 @@
+"""
+Matriz completa de precios (NumPy) frente al cálculo escalar buscar_variante() + cotizar_anillo() por combinación.
+
+El camino escalar se mide sobre una muestra de como mucho --muestra combinaciones y se extrapola,
+porque a 100k filas la matriz completa supera los cuatro millones de combinaciones.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_matriz_precios.py [--filas 100 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import datos_sinteticos
+
+from matriz_precios import MatrizPrecios
+from precios import buscar_variante, cotizar_anillo
+
+PRECIO = 5600.0
+
+
+def escalar(datos, matriz, filas: np.ndarray) -> np.ndarray:
+    """Monto de las filas indicadas calculado una a una, como lo hace el formulario."""
+    montos = np.empty(len(filas))
+    modelo, metal, ancho = matriz.columna_texto("modelo"), matriz.columna_texto("metal"), matriz.columna_texto("ancho")
+    kilates, genero, talla = matriz.columna_texto("kilates"), matriz.columna_texto("genero"), matriz.columna_texto("talla")
+    diamante = matriz.tablas["tipo_diamante"][matriz["i_diamante"]]
+    for j, i in enumerate(filas):
+        peso, cost_fijo, cost_adicional, ct = buscar_variante(datos.indice, modelo[i], metal[i], ancho[i], kilates[i], talla[i], genero[i])
+        montos[j] = cotizar_anillo(PRECIO, datos.costos_diamantes, kilates[i], diamante[i], peso, cost_fijo, cost_adicional, ct).monto
+    return montos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--muestra", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'filas':>8} {'combinaciones':>14} {'matriz (s)':>11} {'oro (s)':>9} {'escalar (s)':>12} {'aceleración':>12}")
+    for n in args.filas:
+        datos = datos_sinteticos(n)
+
+        inicio = time.perf_counter()
+        matriz = MatrizPrecios.construir(datos, PRECIO)
+        t_matriz = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        matriz.recalcular_oro(PRECIO + 1.0)
+        matriz.recalcular_oro(PRECIO)
+        t_oro = (time.perf_counter() - inicio) / 2
+
+        total = len(matriz)
+        filas = np.arange(total)
+        if total > args.muestra:
+            filas = np.random.default_rng(0).choice(total, args.muestra, replace=False)
+        inicio = time.perf_counter()
+        montos = escalar(datos, matriz, filas)
+        t_escalar = (time.perf_counter() - inicio) * total / len(filas)
+
+        assert np.allclose(montos, matriz["monto"][filas]), "la matriz no coincide con el cálculo escalar"
+        estimado = "*" if len(filas) < total else " "
+        print(f"{n:>8} {total:>14,} {t_matriz:>11.3f} {t_oro:>9.3f} {t_escalar:>11.2f}{estimado} {t_escalar / t_matriz:>11.0f}x")
+    print("* extrapolado desde una muestra de combinaciones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark de render de las páginas: plantilla compilada y cacheada (render_template)
+frente a compilarla en cada petición (render_template_string, como antes).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_plantillas.py [--repeticiones 200] [--tarjetas 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template, render_template_string
+from markupsafe import Markup
+
+import Formulario
+from facetas_catalogo import ConsultaFacetas
+
+
+def contexto_formulario():
+    selectores = {
+        "tipo": "dama", "estado": "completo", "kilates_opciones": Formulario.KILATES_OPCIONES,
+        "kilates_actual": "14", "anchos": ["2", "4", "6"], "tallas": [str(x / 2) for x in range(8, 27)],
+        "ancho_actual": "4", "talla_actual": "6", "mostrar_diamante": True,
+        "diamante_opciones": Formulario.DIAMANTE_OPCIONES, "tipo_diamante_actual": "Natural",
+    }
+    seccion = {"titulo": "Dama", "color": "pink", "modelo": "LS0048", "metal": "ROSA", "selectores": selectores,
+               "monto": 1234.5, "ct": 0.25, "detalle": " (Peso: 4.00g (14K))"}
+    return {
+        "t": {"titulo": "PRESUPUESTO", "kilates": "Kilates", "ancho": "Ancho", "talla": "Talla", "diamante": "Diamante",
+              "laboratorio": "Laboratorio", "natural": "Natural", "guardar": "Guardar", "monto": "Monto",
+              "cliente_datos": "Cliente", "nombre": "Nombre", "email": "Email", "cambiar_idioma": "Idioma",
+              "ir_catalogo": "Catálogo"},
+        "idioma": "Español", "logo_url": "/static/logo.png", "precio_oro_status": "Precio", "precio_oro_color": "",
+        "nombre_cliente": "Cliente", "email_cliente": "c@example.com",
+        "secciones": [seccion, dict(seccion, color="blue", selectores=dict(selectores, tipo="cab"))],
+        "monto_total_aprox": 2470.0,
+    }
+
+
+def contexto_catalogo(tarjetas: int):
+    t = Formulario.textos_catalogo("Español")
+    tarjeta = render_template(
+        "_tarjeta_modelo.html", t=t, catalogo_url="/catalogo", placeholder_url="/static/placeholder.png",
+        item={"modelo": "LS0048", "metal": "ROSA", "borde_clase": "", "etiqueta": "", "imagen": {"src": "/static/LS0048.bmp"}},
+    )
+    return {
+        "t": t, "idioma": "Español", "logo_url": "/static/logo.png", "catalogo_url": "/catalogo",
+        "mensaje_exito": None, "tarjetas_html": Markup(tarjeta * tarjetas),
+        "consulta": ConsultaFacetas(),
+        "facetas": {"metal": [("AMARILLO", 40), ("BLANCO", 40), ("ROSA", 40)], "kilates": [("10", 30), ("14", 30), ("18", 30), ("22", 30)],
+                    "genero": [("CABALLERO", 60), ("DAMA", 60)], "ancho": [("4", 60), ("6", 60)], "diamantes": [("NO", 80), ("SI", 40)]},
+        "total": tarjetas, "total_variantes": tarjetas * 12, "siguiente": None, "url_inicio": None,
+    }
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Milisegundos por render (mediana)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--tarjetas", type=int, default=200)
+    args = parser.parse_args()
+
+    app = Formulario.app
+    with app.test_request_context("/"):
+        for nombre, contexto in (("formulario.html", contexto_formulario()), ("catalogo.html", contexto_catalogo(args.tarjetas))):
+            fuente = app.jinja_env.loader.get_source(app.jinja_env, nombre)[0]
+            compilada = medir(lambda: render_template(nombre, **contexto), args.repeticiones)
+            por_peticion = medir(lambda: render_template_string(fuente, **contexto), args.repeticiones)
+            print(f"{nombre:<16} compilando por petición: {por_peticion:8.3f} ms   "
+                  f"plantilla cacheada: {compilada:8.3f} ms   ({por_peticion / compilada:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Generación de presupuestos en lote (presupuestos_lote.py) sobre un catálogo sintético mapeado: presupuestos
+por segundo según procesos del pool y filas por tanda, y coste de reanudar una salida ya completa. Cada
+medida escribe en una carpeta nueva. Con una sola CPU el pool no puede escalar; la columna de procesos
+muestra entonces solo el coste de repartir.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_presupuestos_lote.py [--filas 10000] [--procesos 1 2 4] [--tandas 50 200 1000]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sintetico import configuraciones_aleatorias, datos_sinteticos
+
+from catalogo_mapeado import escribir_catalogo_mapeado
+from presupuestos_lote import generar
+
+
+def escribir_csv(ruta: str, configuraciones):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["cliente", "email", "idioma", "modelo", "metal", "ancho", "kilates", "talla", "genero", "tipo_diamante"])
+        for i, c in enumerate(configuraciones):
+            escritor.writerow([f"Cliente {i}", f"cliente{i}@ejemplo.com", "English" if i % 2 else "Español",
+                               c["modelo"], c["metal"], c["ancho"], c["kilates"], c["talla"], c["genero"], c["tipo_diamante"]])
+
+
+def medir(ruta_csv: str, salida: str, excel: str, mapeado: str, procesos: int, tanda: int) -> float:
+    inicio = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()): # Sin la línea de progreso
+        generar(ruta_csv, salida, 2650.0, ("html",), procesos, tanda, excel, excel + ".snapshot", mapeado)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--tandas", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    datos = datos_sinteticos(20000)
+    with tempfile.TemporaryDirectory() as directorio:
+        excel = os.path.join(directorio, "no-existe.xlsm") # Sin libro no se comprueba la firma
+        mapeado = os.path.join(directorio, "catalogo.catmap")
+        escribir_catalogo_mapeado(datos, excel, mapeado)
+        ruta_csv = os.path.join(directorio, "filas.csv")
+        escribir_csv(ruta_csv, configuraciones_aleatorias(datos, args.filas))
+
+        print(f"{args.filas} presupuestos HTML, {os.cpu_count()} CPUs")
+        print(f"{'procesos':>8} {'tanda':>6} {'tiempo (s)':>11} {'presup./s':>10}")
+        for procesos in args.procesos:
+            for tanda in args.tandas:
+                salida = os.path.join(directorio, f"salida_{procesos}_{tanda}")
+                segundos = medir(ruta_csv, salida, excel, mapeado, procesos, tanda)
+                print(f"{procesos:>8} {tanda:>6} {segundos:>11.2f} {args.filas / segundos:>10.0f}")
+        reanudar = medir(ruta_csv, salida, excel, mapeado, args.procesos[-1], args.tandas[-1])
+        print(f"Reanudar una salida completa: {reanudar * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Sesión en cookie firmada (como antes) frente a la sesión del lado del servidor (memoria y SQLite):
+tamaño de la cookie que el navegador sube en cada petición, bytes de Set-Cookie por respuesta y coste
+de abrir/guardar la sesión (firma y serialización frente a lectura del almacén).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_sesiones.py [--filas 1000] [--repeticiones 300]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import datos_sinteticos
+
+import Formulario
+from precio_oro import ProveedorFijo
+from sesiones import crear_interfaz_sesion
+
+
+def formulario_completo(datos):
+    """Un POST / con cliente y ambas secciones elegidas, como el de un usuario que ya cotizó."""
+    (modelo_d, ancho_d, metal_d, kilates_d, _), (modelo_c, ancho_c, metal_c, kilates_c, _) = list(datos.indice.variantes)[:2]
+    return {
+        "nombre_cliente": "María Fernanda González", "email_cliente": "maria.fernanda@example.com",
+        "kilates_dama": kilates_d, "ancho_dama": ancho_d, "talla_dama": "6", "tipo_diamante_dama": "Natural",
+        "kilates_cab": kilates_c, "ancho_cab": ancho_c, "talla_cab": "10", "tipo_diamante_cab": "Laboratorio",
+    }, (modelo_d, metal_d), (modelo_c, metal_c)
+
+
+def mediana_us(funcion, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=300)
+    args = parser.parse_args()
+
+    app = Formulario.app
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(5600.0))
+    datos = datos_sinteticos(args.filas)
+    Formulario.recargador_catalogo.publicar(datos)
+    formulario, dama, cab = formulario_completo(datos)
+    nombre_cookie = app.config["SESSION_COOKIE_NAME"]
+
+    print(f"{'backend':<8} {'cookie (B)':>10} {'Set-Cookie/resp (B)':>20} {'abrir+guardar (µs)':>19} {'GET / (ms)':>11}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for backend in ("cookie", "memoria", "sqlite"):
+            app.session_interface = crear_interfaz_sesion(app, backend, os.path.join(directorio, "sesiones.sqlite3"))
+            cliente = app.test_client()
+            cliente.post("/catalogo", data={"seleccion": f"{dama[0]};{dama[1]}", "tipo": "dama"})
+            cliente.post("/catalogo", data={"seleccion": f"{cab[0]};{cab[1]}", "tipo": "cab"})
+            cliente.post("/", data=formulario)
+            cookie = cliente.get_cookie(nombre_cookie).value
+
+            # Peticiones habituales: el formulario reescribe las mismas claves en cada GET /
+            bytes_set_cookie = 0
+            for _ in range(20):
+                respuesta = cliente.get("/")
+                bytes_set_cookie += sum(len(v) for v in respuesta.headers.getlist("Set-Cookie"))
+            t_get = mediana_us(lambda: cliente.get("/"), max(1, args.repeticiones // 10)) / 1000
+
+            # Solo la interfaz de sesión: abrir, reasignar una clave con el mismo valor y guardar
+            interfaz = app.session_interface
+            def abrir_y_guardar():
+                with app.test_request_context("/", headers={"Cookie": f"{nombre_cookie}={cookie}"}):
+                    sesion = interfaz.open_session(app, Formulario.request)
+                    sesion["idioma"] = sesion.get("idioma", "Español")
+                    interfaz.save_session(app, sesion, app.response_class())
+            t_sesion = mediana_us(abrir_y_guardar, args.repeticiones)
+            print(f"{backend:<8} {len(nombre_cookie) + 1 + len(cookie):>10} {bytes_set_cookie / 20:>20.0f} {t_sesion:>19.1f} {t_get:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
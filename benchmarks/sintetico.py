@@ -0,0 +1,96 @@
+"""Datos sintéticos con la forma de "Formulario Catalogo.xlsm" para los benchmarks."""
+import random
+from typing import Dict, List
+
+import pandas as pd
+
+from catalogo import DatosCatalogo
+from indice_catalogo import construir_indice
+
+METALES = ["AMARILLO", "BLANCO", "ROSA"]
+ANCHOS = ["2", "3", "4", "5", "6", "7", "8"]
+KILATES = ["10", "14", "18", "22"]
+GENEROS = ["DAMA", "CABALLERO"]
+TALLAS = [str(t / 2).replace(".0", "") for t in range(6, 27)] # 3 a 13 en medios puntos
+COLUMNAS_BANDS = ["NAME", "METAL", "RUTA FOTO", "PESO", "GENERO", "CT", "WIDTH", "CARAT", "PRICE COST"]
+COLUMNAS_SIZE = ["SIZE", "ADICIONAL", "X", "MONTO", "Y", "NATURAL"]
+
+
+def filas_wedding_bands(n: int, semilla: int = 42) -> List[list]:
+    """n filas de WEDDING BANDS (en el orden de COLUMNAS_BANDS), agrupadas por modelo como en el libro real."""
+    rnd = random.Random(semilla)
+    combinaciones = len(METALES) * len(ANCHOS[:3]) * len(KILATES) * len(GENEROS)
+    filas = []
+    modelo = 0
+    while len(filas) < n:
+        nombre = f"LS{modelo:04d}"
+        ct = rnd.choice([0, 0, 0.1, 0.25, 0.5])
+        anchos = rnd.sample(ANCHOS, 3)
+        for i in range(combinaciones):
+            metal = METALES[i % len(METALES)]
+            ancho = anchos[(i // len(METALES)) % 3]
+            kilates = KILATES[(i // (len(METALES) * 3)) % len(KILATES)]
+            genero = GENEROS[i // (combinaciones // len(GENEROS))]
+            foto = f"C:\\Fotos\\{nombre}_{metal[:3].lower()}_cam001.bmp"
+            filas.append([nombre, metal, foto, round(rnd.uniform(2, 12), 2), genero, ct, f"{ancho}MM", kilates, rnd.randint(80, 300)])
+            if len(filas) >= n:
+                break
+        modelo += 1
+    return filas
+
+
+def filas_size() -> List[list]:
+    """Hoja SIZE: SIZE, ADICIONAL, ..., MONTO F3 (laboratorio en la 2ª fila) y costo natural en F2."""
+    filas = []
+    for i, talla in enumerate(TALLAS):
+        natural = 1500 if i == 0 else None
+        filas.append([talla, max(0, i - 10) * 5, None, 800, None, natural])
+    return filas
+
+
+def escribir_libro(ruta: str, n: int, semilla: int = 42):
+    """
+    Escribe un libro con la forma de "Formulario Catalogo.xlsm": WEDDING BANDS con una fila de título y los
+    encabezados en la fila 2, y SIZE con encabezados en la fila 1 (MONTO laboratorio en la 2ª fila de datos).
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    bands = libro.create_sheet("WEDDING BANDS")
+    bands.append(["WEDDING BANDS"])
+    bands.append(COLUMNAS_BANDS)
+    for fila in filas_wedding_bands(n, semilla):
+        bands.append(fila)
+    size = libro.create_sheet("SIZE")
+    size.append(COLUMNAS_SIZE)
+    for fila in filas_size():
+        size.append(fila)
+    libro.save(ruta)
+
+
+def datos_sinteticos(n: int, semilla: int = 42) -> DatosCatalogo:
+    """DatosCatalogo equivalente a leer un libro sintético de n filas (sin pasar por Excel)."""
+    df = pd.DataFrame(filas_wedding_bands(n, semilla), columns=COLUMNAS_BANDS).astype(str)
+    df = df.rename(columns={"WIDTH": "ANCHO"})
+    df["ANCHO"] = df["ANCHO"].str.replace("MM", "", regex=False)
+    df_adicional = pd.DataFrame(filas_size(), columns=COLUMNAS_SIZE)
+    costos: Dict[str, float] = {"laboratorio": 800.0, "natural": 1500.0}
+    ct_cache = {
+        f"{n}|{a}|{m}|{k}|{g}".upper(): float(ct)
+        for n, a, m, k, g, ct in zip(df["NAME"], df["ANCHO"], df["METAL"], df["CARAT"], df["GENERO"], df["CT"])
+    }
+    return DatosCatalogo(df, df_adicional, costos, ct_cache, construir_indice(df, df_adicional))
+
+
+def configuraciones_aleatorias(datos: DatosCatalogo, n: int, semilla: int = 7) -> List[Dict[str, str]]:
+    """n configuraciones válidas (existen en el catálogo) para cotizar."""
+    rnd = random.Random(semilla)
+    claves = list(datos.indice.variantes)
+    configuraciones = []
+    for _ in range(n):
+        modelo, ancho, metal, kilates, genero = rnd.choice(claves)
+        configuraciones.append({
+            "modelo": modelo, "metal": metal, "ancho": ancho, "kilates": kilates,
+            "talla": rnd.choice(TALLAS), "genero": genero, "tipo_diamante": rnd.choice(["Laboratorio", "Natural"]),
+        })
+    return configuraciones
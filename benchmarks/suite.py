@@ -0,0 +1,169 @@
+"""
+Suite de benchmarks de la app sobre libros sintéticos de distintos tamaños, con el precio del oro fijo
+(ProveedorFijo: sin red y determinista). Escribe los resultados en JSON para comparar entre commits.
+
+Mide por tamaño de catálogo:
+  - carga: lectura del Excel, lectura del snapshot y cargar_datos() con el catálogo ya publicado
+  - obtener_peso_y_costo() y las opciones de los selectores (get_options) por llamada
+  - GET / (formulario con dos modelos elegidos) y GET /catalogo a través del cliente de pruebas
+
+Uso (desde la raíz del repo):
+    python benchmarks/suite.py [--filas 100 1000 10000 100000] [--salida benchmarks/resultados.json]
+    python benchmarks/suite.py --comparar benchmarks/base.json   # marca regresiones frente a otra ejecución
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sintetico import TALLAS, escribir_libro
+
+import Formulario
+from catalogo import leer_excel
+from precio_oro import ProveedorFijo
+from snapshot_catalogo import escribir_snapshot, leer_snapshot
+
+PRECIO_FIJO = 5600.0
+UMBRAL_REGRESION = 0.10 # 10% más lento que la referencia
+
+
+def medir(funcion: Callable, repeticiones: int, por_llamada: int = 1) -> Dict[str, float]:
+    """Estadísticas en milisegundos por llamada de `repeticiones` mediciones de `por_llamada` llamadas cada una."""
+    tiempos: List[float] = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(por_llamada):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000 / por_llamada)
+    tiempos.sort()
+    return {
+        "media_ms": sum(tiempos) / len(tiempos),
+        "p50_ms": tiempos[len(tiempos) // 2],
+        "p95_ms": tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        "min_ms": tiempos[0],
+        "repeticiones": repeticiones,
+    }
+
+
+def medir_tamano(n: int, directorio: str, repeticiones: int) -> Dict[str, Dict]:
+    ruta_excel = os.path.join(directorio, f"catalogo_{n}.xlsm")
+    ruta_snapshot = os.path.join(directorio, f"catalogo_{n}.snapshot")
+    resultados = {}
+
+    inicio = time.perf_counter()
+    escribir_libro(ruta_excel, n)
+    resultados["generar_libro"] = {"media_ms": (time.perf_counter() - inicio) * 1000, "repeticiones": 1} # Solo informativo
+
+    # --- Carga ---
+    repeticiones_excel = max(1, min(repeticiones, 3 if n <= 10000 else 1))
+    resultados["cargar_excel"] = medir(lambda: leer_excel(ruta_excel), repeticiones_excel)
+    datos = leer_excel(ruta_excel)
+    escribir_snapshot(datos, ruta_excel, ruta_snapshot)
+    resultados["cargar_snapshot"] = medir(lambda: leer_snapshot(ruta_excel, ruta_snapshot), repeticiones_excel)
+    Formulario.recargador_catalogo.publicar(datos)
+    resultados["cargar_datos"] = medir(Formulario.cargar_datos, repeticiones, por_llamada=1000)
+
+    # --- Búsquedas ---
+    rnd = random.Random(n)
+    claves = list(datos.indice.variantes)
+    consultas = [(rnd.choice(claves), rnd.choice(TALLAS)) for _ in range(1000)]
+    seleccionar = "SELECCIONE UNA OPCIÓN DE CATÁLOGO"
+
+    def buscar_todas():
+        for (modelo, ancho, metal, kilates, genero), talla in consultas:
+            Formulario.obtener_peso_y_costo(modelo, metal, ancho, kilates, talla, genero, seleccionar, datos.indice)
+
+    def opciones_todas():
+        for (modelo, _, metal, _, _), _ in consultas:
+            Formulario.obtener_opciones(datos, modelo, metal, seleccionar)
+
+    resultados["obtener_peso_y_costo"] = {k: (v / len(consultas) if k.endswith("_ms") else v) for k, v in medir(buscar_todas, repeticiones).items()}
+    resultados["get_options"] = {k: (v / len(consultas) if k.endswith("_ms") else v) for k, v in medir(opciones_todas, repeticiones).items()}
+
+    # --- Páginas completas ---
+    modelo, _, metal, _, _ = claves[0]
+    cliente = Formulario.app.test_client()
+    cliente.post("/catalogo", data={"seleccion": f"{modelo};{metal}", "tipo": "dama"})
+    cliente.post("/catalogo", data={"seleccion": f"{modelo};{metal}", "tipo": "cab"})
+
+    def pagina(ruta: str):
+        respuesta = cliente.get(ruta)
+        assert respuesta.status_code == 200, (ruta, respuesta.status_code)
+
+    resultados["formulario"] = medir(lambda: pagina("/"), repeticiones)
+    Formulario.cache_fragmentos_catalogo.invalidar()
+    resultados["catalogo_primera"] = medir(lambda: pagina("/catalogo"), 1)
+    resultados["catalogo"] = medir(lambda: pagina("/catalogo"), repeticiones)
+    return resultados
+
+
+def metadatos() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "precio_fijo": PRECIO_FIJO,
+    }
+
+
+def comparar(actual: Dict, referencia: Dict) -> List[str]:
+    """Líneas de las mediciones cuyo mínimo empeoró más que UMBRAL_REGRESION respecto a la referencia."""
+    regresiones = []
+    for n, medidas in actual["resultados"].items():
+        for nombre, valores in medidas.items():
+            base = referencia.get("resultados", {}).get(n, {}).get(nombre)
+            # El mínimo es menos sensible al ruido que la media; generar_libro no se compara (no es código de la app)
+            if not base or not base.get("min_ms") or "min_ms" not in valores:
+                continue
+            cambio = valores["min_ms"] / base["min_ms"] - 1
+            if cambio > UMBRAL_REGRESION:
+                regresiones.append(f"{n:>7} filas {nombre:<22} {base['min_ms']:10.4f} -> {valores['min_ms']:10.4f} ms (+{cambio:.0%})")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--salida", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados.json"))
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior para detectar regresiones")
+    args = parser.parse_args()
+
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(PRECIO_FIJO))
+
+    informe = {"meta": metadatos(), "resultados": {}}
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.filas:
+            resultados = medir_tamano(n, directorio, args.repeticiones)
+            informe["resultados"][str(n)] = resultados
+            print(f"--- {n} filas")
+            for nombre, valores in resultados.items():
+                print(f"  {nombre:<22} {valores['media_ms']:12.4f} ms")
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"Resultados escritos en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(informe, json.load(f))
+        print("\n".join(["Regresiones:"] + regresiones) if regresiones else "Sin regresiones.")
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class CacheFragmentos:
+    """Caché LRU acotada de fragmentos HTML (u otros valores derivados del catálogo) con contadores de aciertos/fallos."""
+
+    def __init__(self, max_entradas: int = 16):
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave: Hashable, construir: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado para `clave` o lo construye (fuera del lock) y lo guarda."""
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+            self.fallos += 1
+
+        valor = construir()
+        with self._lock:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def invalidar(self):
+        """Vacía la caché (p. ej. al publicarse una nueva generación del catálogo)."""
+        with self._lock:
+            self._entradas.clear()
+            self.invalidaciones += 1
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "invalidaciones": self.invalidaciones,
+            }
@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError: # Opcional: sin brotli se comprime solo con gzip
+    brotli = None
+
+UN_ANIO = 31536000
+TIPOS_COMPRIMIBLES = {"text/html", "text/css", "application/javascript", "application/json", "text/plain"}
+TAMANO_MINIMO = 512 # bytes; por debajo no compensa comprimir
+
+
+def etag_para(*partes) -> str:
+    """ETag fuerte (sin comillas) derivado de las partes que determinan el contenido de una página."""
+    return hashlib.sha1("\x1f".join(str(p) for p in partes).encode("utf-8")).hexdigest()[:24]
+
+
+def _comprimir(cuerpo: bytes, codificacion: str) -> bytes:
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=5)
+    return gzip.compress(cuerpo, compresslevel=6, mtime=0)
+
+
+class CacheHttp:
+    """
+    Capa de caché HTTP de la app:
+      - URLs de static/ con huella (?v=hash) servidas con Cache-Control inmutable de un año.
+      - ETag fuerte y 304 para páginas marcadas como cacheables.
+      - Compresión gzip/brotli de HTML, guardando en memoria las variantes comprimidas cacheables.
+    """
+
+    def __init__(self, app: Optional[Flask] = None, max_entradas: int = 64):
+        self.max_entradas = max_entradas
+        self._huellas: Dict[str, Optional[str]] = {}
+        self._comprimidas: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.respuestas_304 = 0
+        self.aciertos = 0 # Variante comprimida servida desde memoria
+        self.fallos = 0 # Hubo que renderizar
+        self.static_folder = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.static_folder = app.static_folder
+        app.url_defaults(self._agregar_huella)
+        app.after_request(self._despues_de_peticion)
+
+    # --- URLs estáticas con huella ---
+
+    def huella_estatica(self, filename: str) -> Optional[str]:
+        """Hash corto del contenido de un archivo de static/ (None si no existe). Se calcula una vez por proceso."""
+        huella = self._huellas.get(filename, False)
+        if huella is not False:
+            return huella
+        ruta = os.path.join(self.static_folder, filename)
+        try:
+            h = hashlib.sha1()
+            with open(ruta, "rb") as f:
+                for bloque in iter(lambda: f.read(1 << 20), b""):
+                    h.update(bloque)
+            huella = h.hexdigest()[:12]
+        except OSError:
+            huella = None
+        self._huellas[filename] = huella
+        return huella
+
+    def _agregar_huella(self, endpoint: str, values: dict):
+        if endpoint == "static" and "filename" in values and "v" not in values:
+            huella = self.huella_estatica(values["filename"])
+            if huella:
+                values["v"] = huella
+
+    # --- ETag / 304 y variantes precomprimidas ---
+
+    def _negociar(self) -> Optional[str]:
+        aceptadas = request.accept_encodings
+        if brotli is not None and aceptadas["br"]:
+            return "br"
+        if aceptadas["gzip"]:
+            return "gzip"
+        return None
+
+    def respuesta_cacheada(self, etag: str) -> Optional[Response]:
+        """304 si el cliente ya tiene la página, o la variante comprimida guardada en memoria; None si hay que renderizar."""
+        for valor in request.if_none_match.as_set():
+            if valor.split("-")[0] == etag:
+                respuesta = Response(status=304)
+                self._cabeceras_cacheables(respuesta, etag, None)
+                respuesta.set_etag(valor)
+                self.respuestas_304 += 1
+                return respuesta
+
+        codificacion = self._negociar()
+        cuerpo = None
+        with self._lock:
+            if codificacion is not None:
+                cuerpo = self._comprimidas.get((etag, codificacion))
+            if cuerpo is not None:
+                self._comprimidas.move_to_end((etag, codificacion))
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+        if cuerpo is None:
+            return None
+        respuesta = Response(cuerpo, mimetype="text/html")
+        respuesta.headers["Content-Encoding"] = codificacion
+        self._cabeceras_cacheables(respuesta, etag, codificacion)
+        return respuesta
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entradas": len(self._comprimidas),
+                "respuestas_304": self.respuestas_304,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+            }
+
+    def marcar_cacheable(self, respuesta: Response, etag: str) -> Response:
+        """Marca una respuesta con su ETag para que after_request guarde su variante comprimida."""
+        respuesta.headers["X-Etag-Base"] = etag
+        self._cabeceras_cacheables(respuesta, etag, None)
+        return respuesta
+
+    def _cabeceras_cacheables(self, respuesta: Response, etag: str, codificacion: Optional[str]):
+        # Cada codificación es una representación distinta: su ETag fuerte lleva sufijo
+        respuesta.set_etag(f"{etag}-{codificacion}" if codificacion else etag)
+        respuesta.headers["Cache-Control"] = "private, no-cache"
+        respuesta.vary.add("Accept-Encoding")
+        respuesta.vary.add("Cookie")
+
+    def _guardar(self, clave: Tuple[str, str], cuerpo: bytes):
+        with self._lock:
+            self._comprimidas[clave] = cuerpo
+            self._comprimidas.move_to_end(clave)
+            while len(self._comprimidas) > self.max_entradas:
+                self._comprimidas.popitem(last=False)
+
+    # --- after_request ---
+
+    def _despues_de_peticion(self, respuesta: Response) -> Response:
+        if request.endpoint == "static" and "v" in request.args and respuesta.status_code in (200, 304):
+            respuesta.headers["Cache-Control"] = f"public, max-age={UN_ANIO}, immutable"
+            return respuesta
+
+        etag_base = respuesta.headers.pop("X-Etag-Base", None)
+        if (respuesta.status_code != 200 or respuesta.direct_passthrough
+                or "Content-Encoding" in respuesta.headers
+                or respuesta.mimetype not in TIPOS_COMPRIMIBLES):
+            return respuesta
+
+        codificacion = self._negociar()
+        cuerpo = respuesta.get_data()
+        if codificacion is None or len(cuerpo) < TAMANO_MINIMO:
+            return respuesta
+
+        try:
+            comprimido = _comprimir(cuerpo, codificacion)
+        except Exception as e:
+            logging.error(f"Error al comprimir la respuesta ({codificacion}): {e}")
+            return respuesta
+
+        respuesta.set_data(comprimido)
+        respuesta.headers["Content-Encoding"] = codificacion
+        respuesta.vary.add("Accept-Encoding")
+        if etag_base:
+            respuesta.set_etag(f"{etag_base}-{codificacion}")
+            self._guardar((etag_base, codificacion), comprimido)
+        return respuesta
@@ -0,0 +1,199 @@
+import logging
+from typing import TYPE_CHECKING, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from indice_catalogo import COLUMNAS_BANDAS, COLUMNAS_CLAVE, COLUMNAS_SIZE, IndiceCatalogo, ValorInvalido, indexar_columnas
+from utilidades import convertir_float, es_nan, safe_float
+
+if TYPE_CHECKING: # Solo los datos sintéticos de los benchmarks traen DataFrames
+    import pandas as pd
+
+NAN = float("nan")
+# Marcadores que pandas.read_excel convertía en NaN (na_values por defecto) y códigos de error de Excel
+VALORES_NULOS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA",
+    "NULL", "NaN", "None", "n/a", "nan", "null", "#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!",
+})
+
+
+class InformeCarga(NamedTuple):
+    """Resultado de tipar el libro al cargarlo: filas leídas y celdas numéricas que no se pudieron convertir."""
+    filas: int = 0
+    variantes: int = 0
+    tallas: int = 0
+    invalidos: Tuple[ValorInvalido, ...] = ()
+    filas_sin_clave: int = 0 # Filas con NAME/ANCHO/METAL/CARAT/GENERO incompleto (no entran al índice)
+
+    def resumen(self, maximo: int = 10) -> str:
+        lineas = [f"{self.filas} filas, {self.variantes} variantes, {self.tallas} tallas, {len(self.invalidos)} valores no numéricos, "
+                  f"{self.filas_sin_clave} filas sin clave completa"]
+        for v in self.invalidos[:maximo]:
+            lineas.append(f"  {v.hoja} fila {v.fila}, {v.columna}: {v.valor!r} -> 0.0")
+        if len(self.invalidos) > maximo:
+            lineas.append(f"  ... y {len(self.invalidos) - maximo} más")
+        return "\n".join(lineas)
+
+
+class DatosCatalogo(NamedTuple):
+    """Todo lo que la app necesita del libro Excel, ya limpio e indexado."""
+    df: Optional["pd.DataFrame"] # Solo en los datos sintéticos de los benchmarks; el catálogo leído del libro no los lleva
+    df_adicional: Optional["pd.DataFrame"]
+    costos_diamantes: Dict[str, float]
+    ct_cache: Mapping[str, float]
+    indice: IndiceCatalogo
+    informe: InformeCarga = InformeCarga()
+
+    def sin_dataframes(self) -> "DatosCatalogo":
+        """Solo el modelo tipado (índice, costos, CTs): lo que se sirve en las peticiones."""
+        return self._replace(df=None, df_adicional=None)
+
+
+def datos_vacios() -> DatosCatalogo:
+    return DatosCatalogo(None, None, {"laboratorio": 0.0, "natural": 0.0}, {}, IndiceCatalogo({}, {}))
+
+
+def catalogo_vacio(datos: DatosCatalogo) -> bool:
+    """Sin catálogo que mostrar. Sin DataFrames (catálogo publicado) cuenta su índice."""
+    return len(datos.indice) == 0 and (datos.df is None or datos.df.empty)
+
+
+class HojaLeida(NamedTuple):
+    """Columnas pedidas de una hoja, desde la fila siguiente a la de encabezados."""
+    columnas: Dict[str, List] # Nombre de columna -> valores en el orden del libro
+    filas: List[int] # Número de fila del libro de cada posición
+    celdas: Dict[Tuple[int, int], object] # (fila, columna) 1-based pedidas sueltas
+    n_filas: int # Filas hasta la última con datos (incluye encabezados), como len() del DataFrame crudo
+    ancho: int # Columnas hasta la última con datos, como el ancho del DataFrame crudo
+
+
+def _celda(valor):
+    """Valor de una celda como lo entregaba pandas.read_excel: enteros como int y vacíos/marcadores de nulo como NaN."""
+    if valor is None:
+        return NAN
+    if isinstance(valor, float):
+        return int(valor) if valor.is_integer() else valor
+    if isinstance(valor, str) and valor in VALORES_NULOS:
+        return NAN
+    return valor
+
+
+def _leer_hoja(hoja, fila_encabezados: int, nombres: Sequence[str], renombrar: Dict[str, str],
+               celdas: Sequence[Tuple[int, int]] = ()) -> HojaLeida:
+    """
+    Recorre la hoja una vez (modo read-only) y guarda solo las columnas `nombres`, ubicadas por la fila de
+    encabezados. Las filas vacías intermedias se conservan como filas de NaN y las finales se descartan,
+    igual que pandas. Los valores repetidos de cada columna (NAME, METAL, CARAT...) comparten un único objeto.
+    """
+    posiciones: Optional[Dict[str, int]] = None
+    columnas: Dict[str, List] = {nombre: [] for nombre in nombres}
+    unicos: Dict[str, Dict] = {nombre: {} for nombre in nombres}
+    filas: List[int] = []
+    celdas_leidas: Dict[Tuple[int, int], object] = {}
+    vacias: List[int] = [] # Filas vacías pendientes: solo cuentan si después hay datos
+    ultima, ancho = 0, 0
+    for numero, fila in enumerate(hoja.iter_rows(values_only=True), start=1):
+        largo = len(fila)
+        while largo and (fila[largo - 1] is None or fila[largo - 1] == ""):
+            largo -= 1
+        for fila_celda, columna in celdas:
+            if fila_celda == numero:
+                celdas_leidas[(fila_celda, columna)] = _celda(fila[columna - 1]) if columna <= largo else NAN
+        if numero == fila_encabezados:
+            encabezados = [renombrar.get(e, e) for e in (str(_celda(v)).strip().upper() for v in fila[:largo])]
+            posiciones = {}
+            for posicion, encabezado in enumerate(encabezados):
+                if encabezado in columnas:
+                    posiciones.setdefault(encabezado, posicion)
+        if not largo:
+            if numero > fila_encabezados:
+                vacias.append(numero)
+            continue
+        ultima, ancho = numero, max(ancho, largo)
+        if numero <= fila_encabezados:
+            continue
+        for vacia in vacias:
+            filas.append(vacia)
+            for nombre in posiciones:
+                columnas[nombre].append(NAN)
+        vacias.clear()
+        filas.append(numero)
+        for nombre, posicion in posiciones.items():
+            valor = _celda(fila[posicion]) if posicion < largo else NAN
+            columnas[nombre].append(unicos[nombre].setdefault((valor.__class__, valor), valor)) # Con el tipo: True no es 1
+    if posiciones is None or ultima < fila_encabezados:
+        raise ValueError(f"La hoja '{hoja.title}' no tiene la fila de encabezados {fila_encabezados}.")
+    return HojaLeida({nombre: columnas[nombre] for nombre in posiciones}, filas, celdas_leidas, ultima, ancho)
+
+
+def leer_excel(ruta_excel: str) -> DatosCatalogo:
+    """
+    Lee las hojas WEDDING BANDS y SIZE, extrae costos de diamante y construye CTs e índice. Lanza excepción si falla.
+    Abre el libro una sola vez en modo read-only y recorre cada hoja en streaming guardando solo las columnas
+    que usa el catálogo; no construye DataFrames.
+    """
+    from openpyxl import load_workbook
+
+    # 1. Un solo recorrido por hoja: WEDDING BANDS (encabezados en la fila 2) y SIZE (fila 1, costo natural en F2)
+    libro = load_workbook(ruta_excel, read_only=True, data_only=True, keep_links=False)
+    try:
+        bandas = _leer_hoja(libro["WEDDING BANDS"], 2, COLUMNAS_BANDAS, {"WIDTH": "ANCHO"})
+        size = _leer_hoja(libro["SIZE"], 1, COLUMNAS_SIZE, {"MONTO F3": "MONTO"}, celdas=[(2, 6)])
+    finally:
+        libro.close()
+
+    # 2. Costos de diamantes: MONTO de la 2ª fila de datos (laboratorio) y F2 (natural)
+    invalidos: List[ValorInvalido] = []
+
+    def costo(fila: int, columna: str, valor) -> float:
+        convertido, valido = convertir_float(valor)
+        if not valido:
+            invalidos.append(ValorInvalido("SIZE", fila, columna, str(valor)))
+        return convertido
+
+    costos_diamantes = {"laboratorio": 0.0, "natural": 0.0}
+    if "MONTO" in size.columnas and len(size.filas) > 1:
+        costos_diamantes["laboratorio"] = costo(size.filas[1], "MONTO", size.columnas["MONTO"][1])
+    if size.n_filas > 2 and size.ancho > 5:
+        costos_diamantes["natural"] = costo(2, "F", size.celdas.get((2, 6), NAN))
+
+    # 3. Limpieza y estandarización de los textos (las celdas vacías siguen como NaN)
+    def limpiar(valores: List, ancho: bool = False) -> List:
+        limpios: Dict = {} # Un valor limpio por valor distinto de la columna
+        resultado = []
+        for v in valores:
+            limpio = limpios.get((v.__class__, v))
+            if limpio is None:
+                limpio = v if es_nan(v) else str(v).strip()
+                if ancho and not es_nan(limpio):
+                    limpio = limpio.replace("MM", "").strip()
+                limpios[(v.__class__, v)] = limpio
+            resultado.append(limpio)
+        return resultado
+
+    columnas = bandas.columnas
+    for col in ("NAME", "METAL", "RUTA FOTO", "PESO", "GENERO", "CT", "ANCHO", "CARAT"):
+        if col in columnas:
+            columnas[col] = limpiar(columnas[col], ancho=col == "ANCHO")
+
+    # 4. CT por clave para decidir si mostrar el selector: primer CT no vacío de cada clave, en orden de clave
+    ct_cache: Dict[str, float] = {}
+    filas_sin_clave = 0
+    if all(col in columnas for col in COLUMNAS_CLAVE):
+        primeras: Dict[Tuple[str, ...], object] = {}
+        cts = columnas.get("CT", [NAN] * len(bandas.filas))
+        for clave, ct in zip(zip(*(columnas[col] for col in COLUMNAS_CLAVE)), cts):
+            faltan = sum(es_nan(v) for v in clave)
+            if faltan:
+                filas_sin_clave += faltan < len(clave) # Las filas del todo vacías no cuentan
+                continue
+            if es_nan(primeras.get(clave, NAN)):
+                primeras[clave] = ct
+        if "CT" in columnas:
+            ct_cache = {"|".join(clave).upper(): safe_float(primeras[clave]) for clave in sorted(primeras)}
+
+    # 5. Índice de búsqueda con valores ya tipados (PESO, PRICE COST, CT, ADICIONAL)
+    indice = indexar_columnas(columnas, bandas.filas, size.columnas, size.filas, invalidos)
+    informe = InformeCarga(len(bandas.filas), len(indice), len(indice.adicional_por_talla), tuple(invalidos), filas_sin_clave)
+    if invalidos:
+        logging.warning(f"Valores no numéricos en '{ruta_excel}' (se usa 0.0):\n{informe.resumen()}")
+
+    return DatosCatalogo(None, None, costos_diamantes, ct_cache, indice, informe)
@@ -0,0 +1,423 @@
+"""
+Catálogo compilado a un archivo de arrays que cada worker mapea en memoria de solo lectura.
+
+Las columnas numéricas (PESO, PRICE COST, CT) van en un array estructurado de NumPy ordenado por la
+clave de la variante, y los textos (NAME, METAL, ANCHO, CARAT, GENERO) en tablas de cadenas únicas
+ordenadas: cada variante guarda solo sus códigos, empaquetados en un uint64 que se busca por bisección.
+ADICIONAL por talla, los CT por clave y las cards del catálogo van en el mismo archivo. Abrirlo es leer
+una cabecera y hacer mmap: las páginas las comparte el kernel entre todos los procesos (no hay copia por
+worker ni objetos Python por fila), y se recompila cuando cambia el libro como el snapshot.
+
+Uso (desde la raíz del repo):
+    python catalogo_mapeado.py                  # compila "Formulario Catalogo.xlsm" -> archivo mapeado
+    python catalogo_mapeado.py --comparar       # compila y compara el tiempo de apertura con el snapshot
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections.abc import ItemsView, Mapping, ValuesView
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from catalogo import DatosCatalogo, InformeCarga
+from indice_catalogo import SIN_OPCIONES, ClaveVariante, EntradaVitrina, OpcionesModelo, RegistroVariante, ValorInvalido, _clave_numerica
+from snapshot_catalogo import _firma_excel, cargar_catalogo
+
+MAGIC = b"LSJMAP"
+VERSION_FORMATO = 3
+ALINEACION = 64
+
+CATALOGO_MAPEADO_PATH = os.getenv("CATALOGO_MAPEADO_PATH", "Formulario Catalogo.catmap") # Vacío: catálogo en memoria
+
+# (tabla, posición en ClaveVariante, desplazamiento, bits) de cada código dentro de la clave empaquetada.
+# NAME va en los bits altos: las variantes de un modelo (y de un modelo/metal) quedan contiguas.
+CAMPOS_CLAVE = (
+    ("nombres", 0, 40, 24),
+    ("metales", 2, 30, 10),
+    ("anchos", 1, 20, 10),
+    ("kilates", 3, 10, 10),
+    ("generos", 4, 0, 10),
+)
+DTYPE_VALORES = np.dtype([("peso", "<f8"), ("price_cost", "<f8"), ("ct", "<f8")])
+DTYPE_TARJETAS = np.dtype([("modelo", "<u4"), ("metal", "<u4"), ("ruta_foto", "<u4")])
+
+
+def _tabla_cadenas(valores) -> np.ndarray:
+    """Tabla de cadenas únicas (UTF-8) en orden de bytes, apta para np.searchsorted."""
+    codificados = sorted({str(v).encode("utf-8") for v in valores})
+    return np.array(codificados, dtype=f"S{max((len(v) for v in codificados), default=0) or 1}")
+
+
+def _codigos(tabla: np.ndarray, valores: List[bytes]) -> np.ndarray:
+    return np.searchsorted(tabla, np.array(valores, dtype=tabla.dtype)) if valores else np.zeros(0, dtype=np.int64)
+
+
+def _texto(valor: bytes) -> str:
+    return valor.decode("utf-8")
+
+
+# --- Escritura ---
+
+def escribir_catalogo_mapeado(datos: DatosCatalogo, ruta_excel: str, ruta: str):
+    """Compila los datos ya procesados al formato mapeado, de forma atómica (archivo temporal + os.replace)."""
+    indice = datos.indice
+    claves = list(indice.variantes)
+    registros = list(indice.variantes.values())
+
+    arrays: Dict[str, np.ndarray] = {}
+    empaquetadas = np.zeros(len(claves), dtype=np.uint64)
+    for tabla, posicion, desplazamiento, bits in CAMPOS_CLAVE:
+        arrays[tabla] = _tabla_cadenas(clave[posicion] for clave in claves)
+        if len(arrays[tabla]) > 1 << bits:
+            raise ValueError(f"Demasiados valores distintos en '{tabla}' ({len(arrays[tabla])}; máximo {1 << bits}).")
+        codigos = _codigos(arrays[tabla], [clave[posicion].encode("utf-8") for clave in claves])
+        empaquetadas |= codigos.astype(np.uint64) << np.uint64(desplazamiento)
+    orden = np.argsort(empaquetadas, kind="stable")
+    arrays["claves"] = empaquetadas[orden]
+    arrays["valores"] = np.array([tuple(r) for r in registros], dtype=DTYPE_VALORES)[orden] if registros else np.zeros(0, DTYPE_VALORES)
+
+    # ADICIONAL por talla en el orden del libro (primera fila de cada talla) y tallas en orden numérico
+    tallas = list(indice.adicional_por_talla)
+    ancho_talla = max((len(t.encode("utf-8")) for t in tallas), default=0) or 1
+    arrays["adicional"] = np.array([(t.encode("utf-8"), a) for t, a in indice.adicional_por_talla.items()],
+                                   dtype=[("talla", f"S{ancho_talla}"), ("adicional", "<f8")])
+    arrays["tallas"] = np.array([t.encode("utf-8") for t in indice.tallas], dtype=f"S{max((len(t.encode('utf-8')) for t in indice.tallas), default=0) or 1}")
+
+    # CT por clave "NAME|ANCHO|METAL|CARAT|GENERO" en mayúsculas (ct_cache), ordenado para bisección
+    ct_claves = sorted(datos.ct_cache, key=lambda k: k.encode("utf-8"))
+    arrays["ct_claves"] = _tabla_cadenas(ct_claves)
+    arrays["ct_valores"] = np.array([datos.ct_cache[k] for k in ct_claves], dtype="<f8")
+
+    # Cards del catálogo en el orden del libro; sus textos en una tabla aparte
+    entradas = indice.entradas_vitrina()
+    arrays["textos"] = _tabla_cadenas(texto for entrada in entradas for texto in entrada)
+    arrays["tarjetas"] = np.zeros(len(entradas), dtype=DTYPE_TARJETAS)
+    for campo in DTYPE_TARJETAS.names:
+        arrays["tarjetas"][campo] = _codigos(arrays["textos"], [getattr(e, campo).encode("utf-8") for e in entradas])
+
+    # Un modelo/metal ausente recibe las tallas solo si el índice tiene opciones (mismo criterio que IndiceCatalogo)
+    con_opciones = indice.opciones("\0", "\0") is not SIN_OPCIONES
+    descriptores, desplazamiento = {}, 0
+    for nombre, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[nombre] = array
+        descriptores[nombre] = {"dtype": array.dtype.descr if array.dtype.names else array.dtype.str,
+                                "n": len(array), "offset": desplazamiento}
+        desplazamiento += -(-array.nbytes // ALINEACION) * ALINEACION
+    cabecera = json.dumps({
+        "firma_excel": _firma_excel(ruta_excel), "costos_diamantes": datos.costos_diamantes,
+        "con_opciones": con_opciones, "informe": datos.informe, "arrays": descriptores,
+    }).encode("utf-8")
+    prefijo = MAGIC + bytes([VERSION_FORMATO]) + struct.pack("<Q", len(cabecera)) + cabecera
+    inicio_datos = -(-len(prefijo) // ALINEACION) * ALINEACION
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, ruta_tmp = tempfile.mkstemp(dir=directorio, prefix=".catmap-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(prefijo.ljust(inicio_datos, b"\0"))
+            for nombre, array in arrays.items():
+                f.seek(inicio_datos + descriptores[nombre]["offset"])
+                f.write(array.tobytes())
+            f.truncate(inicio_datos + desplazamiento)
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+
+# --- Lectura ---
+
+class CatalogoMapeado:
+    """
+    Sustituto de IndiceCatalogo sobre el archivo mapeado: mismas búsquedas (buscar, opciones,
+    variantes, tallas, adicional_por_talla) más las cards del catálogo, sin copiar los datos al proceso.
+    Solo guarda en Python los valores ya consultados de cada tabla de textos (acotado por su tamaño).
+    """
+
+    __slots__ = ("ruta", "firma_excel", "costos_diamantes", "informe", "adicional_por_talla", "tallas", "variantes",
+                 "_mapa", "_arrays", "_codigos", "_con_opciones", "_sin_anchos")
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapa[:len(MAGIC) + 1] != MAGIC + bytes([VERSION_FORMATO]):
+            raise ValueError(f"'{ruta}' no es un catálogo mapeado de la versión {VERSION_FORMATO}.")
+        inicio = len(MAGIC) + 1
+        (largo,) = struct.unpack_from("<Q", self._mapa, inicio)
+        cabecera = json.loads(self._mapa[inicio + 8:inicio + 8 + largo])
+        inicio_datos = -(-(inicio + 8 + largo) // ALINEACION) * ALINEACION
+
+        self._arrays: Dict[str, np.ndarray] = {}
+        for nombre, d in cabecera["arrays"].items():
+            dtype = np.dtype([tuple(c) for c in d["dtype"]]) if isinstance(d["dtype"], list) else np.dtype(d["dtype"])
+            self._arrays[nombre] = np.frombuffer(self._mapa, dtype=dtype, count=d["n"], offset=inicio_datos + d["offset"])
+
+        self.firma_excel = tuple(cabecera["firma_excel"] or ())
+        self.costos_diamantes: Dict[str, float] = cabecera["costos_diamantes"]
+        informe = InformeCarga(*cabecera["informe"])
+        self.informe = informe._replace(invalidos=tuple(ValorInvalido(*v) for v in informe.invalidos))
+        adicional = self._arrays["adicional"]
+        self.adicional_por_talla: Mapping[str, float] = MappingProxyType(
+            {_texto(t): float(a) for t, a in zip(adicional["talla"].tolist(), adicional["adicional"].tolist())}
+        )
+        self.tallas: Tuple[str, ...] = tuple(_texto(t) for t in self._arrays["tallas"].tolist())
+        self.variantes: Mapping[ClaveVariante, RegistroVariante] = VariantesMapeadas(self)
+        self._codigos: Dict[str, Dict[str, int]] = {tabla: {} for tabla, _, _, _ in CAMPOS_CLAVE}
+        self._con_opciones = bool(cabecera["con_opciones"])
+        self._sin_anchos = OpcionesModelo((), self.tallas, "", self.tallas[0] if self.tallas else "") if self._con_opciones else SIN_OPCIONES
+
+    def __reduce__(self):
+        # Otro proceso vuelve a mapear el mismo archivo en lugar de recibir una copia de los datos
+        return (CatalogoMapeado, (self.ruta,))
+
+    def __len__(self) -> int:
+        return len(self._arrays["claves"])
+
+    def datos(self) -> DatosCatalogo:
+        """DatosCatalogo servido desde el archivo (sin DataFrames, como el snapshot)."""
+        return DatosCatalogo(None, None, dict(self.costos_diamantes), CtMapeado(self), self, self.informe)
+
+    # --- Códigos ---
+
+    def _codigo(self, tabla: str, valor: str) -> int:
+        """Código de `valor` en la tabla de textos, o -1 si no está (solo se recuerdan los que existen)."""
+        conocidos = self._codigos[tabla]
+        codigo = conocidos.get(valor)
+        if codigo is not None:
+            return codigo
+        cadenas = self._arrays[tabla]
+        codificado = str(valor).encode("utf-8")
+        i = int(np.searchsorted(cadenas, codificado))
+        if i < len(cadenas) and cadenas[i] == codificado:
+            conocidos[valor] = i
+            return i
+        return -1
+
+    def _posicion(self, clave: ClaveVariante) -> int:
+        """Fila de la variante en los arrays, o -1 si no existe."""
+        empaquetada = 0
+        for tabla, posicion, desplazamiento, _ in CAMPOS_CLAVE:
+            codigo = self._codigo(tabla, clave[posicion])
+            if codigo < 0:
+                return -1
+            empaquetada |= codigo << desplazamiento
+        claves = self._arrays["claves"]
+        i = int(np.searchsorted(claves, np.uint64(empaquetada)))
+        return i if i < len(claves) and int(claves[i]) == empaquetada else -1
+
+    def _rango_prefijo(self, modelo: str, metal: Optional[str] = None) -> Tuple[int, int]:
+        """Filas [i, j) de un modelo (y metal): son contiguas porque NAME y METAL ocupan los bits altos."""
+        codigo_modelo = self._codigo("nombres", modelo)
+        codigo_metal = 0 if metal is None else self._codigo("metales", metal)
+        if codigo_modelo < 0 or codigo_metal < 0:
+            return 0, 0
+        desde = codigo_modelo << 40 | codigo_metal << 30
+        hasta = desde + (1 << (40 if metal is None else 30))
+        i, j = np.searchsorted(self._arrays["claves"], np.array([desde, hasta], dtype=np.uint64))
+        return int(i), int(j)
+
+    def _claves_de_filas(self, i: int, j: int) -> Iterator[ClaveVariante]:
+        """Decodifica las claves de las filas [i, j) en el orden de ClaveVariante."""
+        empaquetadas = self._arrays["claves"][i:j]
+        columnas: List[Optional[List[str]]] = [None] * 5
+        for tabla, posicion, desplazamiento, bits in CAMPOS_CLAVE:
+            textos = self._arrays[tabla]
+            codigos = ((empaquetadas >> np.uint64(desplazamiento)) & np.uint64((1 << bits) - 1)).astype(np.intp)
+            usados = np.unique(codigos)
+            decodificados = dict(zip(usados.tolist(), (_texto(t) for t in textos[usados].tolist())))
+            columnas[posicion] = [decodificados[c] for c in codigos.tolist()]
+        return zip(*columnas)
+
+    def _registros_de_filas(self, i: int, j: int) -> Iterator[RegistroVariante]:
+        return (RegistroVariante(*fila) for fila in self._arrays["valores"][i:j].tolist())
+
+    # --- Interfaz de IndiceCatalogo ---
+
+    def buscar(self, modelo: str, metal: str, ancho: str, kilates: str, talla: str, genero: str) -> Tuple[float, float, float, float]:
+        """Retorna (peso, price_cost, costo_adicional, ct); 0.0 en lo que no exista."""
+        fila = self._posicion((modelo, ancho, metal, kilates, genero))
+        cost_adicional = self.adicional_por_talla.get(talla, 0.0)
+        if fila < 0:
+            return 0.0, 0.0, cost_adicional, 0.0
+        peso, price_cost, ct = self._arrays["valores"][fila].tolist()
+        return peso, price_cost, cost_adicional, ct
+
+    def opciones(self, modelo: str, metal: str) -> OpcionesModelo:
+        """Anchos del modelo/metal y tallas del catálogo (orden numérico) con sus valores por defecto."""
+        if not self._con_opciones:
+            return SIN_OPCIONES
+        i, j = self._rango_prefijo(modelo, metal)
+        if i == j:
+            return self._sin_anchos
+        codigos = np.unique((self._arrays["claves"][i:j] >> np.uint64(20)) & np.uint64(0x3FF)).astype(np.intp)
+        anchos = tuple(sorted((_texto(t) for t in self._arrays["anchos"][codigos].tolist()), key=_clave_numerica))
+        return OpcionesModelo(anchos, self.tallas, anchos[0], self.tallas[0] if self.tallas else "")
+
+    def variantes_de_modelo(self, modelo: str) -> List[Tuple[ClaveVariante, RegistroVariante]]:
+        """Lista todas las variantes (ancho/metal/kilates/género) de un modelo, ordenadas por clave."""
+        i, j = self._rango_prefijo(modelo)
+        return list(zip(self._claves_de_filas(i, j), self._registros_de_filas(i, j)))
+
+    def entradas_vitrina(self) -> List[EntradaVitrina]:
+        """Cards del catálogo en el orden del libro (NAME/METAL/RUTA FOTO), listas para VitrinaCatalogo."""
+        textos = [_texto(t) for t in self._arrays["textos"].tolist()]
+        tarjetas = self._arrays["tarjetas"]
+        return [EntradaVitrina(textos[m], textos[me], textos[r])
+                for m, me, r in zip(tarjetas["modelo"].tolist(), tarjetas["metal"].tolist(), tarjetas["ruta_foto"].tolist())]
+
+    def ct(self, clave: str) -> Optional[float]:
+        """CT de una clave "NAME|ANCHO|METAL|CARAT|GENERO" en mayúsculas, o None si no existe."""
+        cadenas = self._arrays["ct_claves"]
+        codificada = clave.encode("utf-8")
+        i = int(np.searchsorted(cadenas, codificada))
+        if i < len(cadenas) and cadenas[i] == codificada:
+            return float(self._arrays["ct_valores"][i])
+        return None
+
+
+class VariantesMapeadas(Mapping):
+    """Vista de solo lectura ClaveVariante -> RegistroVariante sobre el archivo mapeado."""
+
+    __slots__ = ("_catalogo",)
+
+    def __init__(self, catalogo: CatalogoMapeado):
+        self._catalogo = catalogo
+
+    def __getitem__(self, clave: ClaveVariante) -> RegistroVariante:
+        fila = self._catalogo._posicion(clave) if len(clave) == 5 else -1
+        if fila < 0:
+            raise KeyError(clave)
+        return RegistroVariante(*self._catalogo._arrays["valores"][fila].tolist())
+
+    def __contains__(self, clave) -> bool:
+        return isinstance(clave, tuple) and len(clave) == 5 and self._catalogo._posicion(clave) >= 0
+
+    def __iter__(self) -> Iterator[ClaveVariante]:
+        return self._catalogo._claves_de_filas(0, len(self))
+
+    def __len__(self) -> int:
+        return len(self._catalogo)
+
+    # Recorridos completos (matriz de precios, facetas): decodifican por columnas en lugar de buscar clave a clave
+    def items(self):
+        return _ItemsMapeados(self)
+
+    def values(self):
+        return _ValoresMapeados(self)
+
+
+class _ItemsMapeados(ItemsView):
+    def __iter__(self):
+        catalogo = self._mapping._catalogo
+        return zip(catalogo._claves_de_filas(0, len(catalogo)), catalogo._registros_de_filas(0, len(catalogo)))
+
+
+class _ValoresMapeados(ValuesView):
+    def __iter__(self):
+        catalogo = self._mapping._catalogo
+        return catalogo._registros_de_filas(0, len(catalogo))
+
+
+class CtMapeado(Mapping):
+    """ct_cache sobre el archivo mapeado (clave "NAME|ANCHO|METAL|CARAT|GENERO" en mayúsculas -> CT)."""
+
+    __slots__ = ("_catalogo",)
+
+    def __init__(self, catalogo: CatalogoMapeado):
+        self._catalogo = catalogo
+
+    def __reduce__(self):
+        return (CtMapeado, (self._catalogo,))
+
+    def __getitem__(self, clave: str) -> float:
+        ct = self._catalogo.ct(clave) if isinstance(clave, str) else None
+        if ct is None:
+            raise KeyError(clave)
+        return ct
+
+    def __iter__(self) -> Iterator[str]:
+        return (_texto(c) for c in self._catalogo._arrays["ct_claves"].tolist())
+
+    def __len__(self) -> int:
+        return len(self._catalogo._arrays["ct_claves"])
+
+
+def abrir_catalogo_mapeado(ruta_excel: str, ruta: str) -> Optional[CatalogoMapeado]:
+    """Mapea el archivo, o None si falta, es de otro formato o es más viejo que el libro."""
+    try:
+        catalogo = CatalogoMapeado(ruta)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Catálogo mapeado '{ruta}' ilegible ({e}); se ignora.")
+        return None
+
+    firma_actual = _firma_excel(ruta_excel)
+    if firma_actual is not None and catalogo.firma_excel != firma_actual:
+        logging.info(f"Catálogo mapeado '{ruta}' desactualizado respecto a '{ruta_excel}'.")
+        return None
+    return catalogo
+
+
+def cargar_catalogo_mapeado(ruta_excel: str, ruta_snapshot: str, ruta: str) -> DatosCatalogo:
+    """Mapea el archivo si está vigente; si no, carga el catálogo (snapshot o Excel) y lo recompila."""
+    catalogo = abrir_catalogo_mapeado(ruta_excel, ruta)
+    if catalogo is not None:
+        return catalogo.datos()
+
+    datos = cargar_catalogo(ruta_excel, ruta_snapshot)
+    try:
+        escribir_catalogo_mapeado(datos, ruta_excel, ruta)
+        return CatalogoMapeado(ruta).datos()
+    except (OSError, ValueError) as e:
+        logging.warning(f"No se pudo escribir el catálogo mapeado '{ruta}': {e}; se sirve desde memoria.")
+        return datos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila el catálogo Excel a un archivo mapeable en memoria.")
+    parser.add_argument("--excel", default=os.getenv("EXCEL_PATH", "Formulario Catalogo.xlsm"))
+    parser.add_argument("--snapshot", default=os.getenv("SNAPSHOT_PATH", "Formulario Catalogo.snapshot"))
+    parser.add_argument("--salida", default=CATALOGO_MAPEADO_PATH or "Formulario Catalogo.catmap")
+    parser.add_argument("--comparar", action="store_true", help="Mide el tiempo de apertura mapeado vs snapshot.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    datos = cargar_catalogo(args.excel, args.snapshot)
+    escribir_catalogo_mapeado(datos, args.excel, args.salida)
+    t_compilar = time.perf_counter() - inicio
+    print(f"Catálogo mapeado escrito en '{args.salida}' ({os.path.getsize(args.salida):,} bytes, "
+          f"{len(datos.indice)} variantes) en {t_compilar:.3f}s")
+    print(datos.informe.resumen())
+
+    if args.comparar:
+        from snapshot_catalogo import leer_snapshot
+
+        def mejor_tiempo(funcion):
+            tiempos = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append(time.perf_counter() - inicio)
+            return min(tiempos)
+
+        t_snapshot = mejor_tiempo(lambda: leer_snapshot(args.excel, args.snapshot))
+        t_mapeado = mejor_tiempo(lambda: abrir_catalogo_mapeado(args.excel, args.salida))
+        print(f"Carga desde snapshot: {t_snapshot * 1000:10.2f} ms")
+        print(f"Apertura mapeada:     {t_mapeado * 1000:10.2f} ms")
+        print(f"Aceleración:          {t_snapshot / t_mapeado:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Cotizaciones guardadas con el botón "Guardar" del formulario, en SQLite: cliente (nombre y email), la
+configuración y el desglose de cada anillo, el precio del oro con su estado y los montos. La petición solo
+encola la cotización; un hilo por proceso la escribe después (write-behind), agrupando en una transacción
+todo lo que haya en cola, así que guardar no añade latencia de disco a la respuesta.
+
+Consultas por email del cliente y por fecha (índices (email, creada) y (creada)), paginadas por cursor
+del más reciente al más antiguo.
+
+Uso (desde la raíz del repo):
+    python cotizaciones_guardadas.py listar [--email cliente@ejemplo.com] [--desde 2025-03-01] [--hasta 2025-03-31]
+    python cotizaciones_guardadas.py contar
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+COTIZACIONES_PATH = os.getenv("COTIZACIONES_PATH", "cotizaciones.sqlite3") # Vacío desactiva el guardado
+MAX_COLA = int(os.getenv("COTIZACIONES_MAX_COLA", "10000")) # Con la cola llena se escribe en la propia petición
+MAX_LOTE = 500 # Cotizaciones por transacción
+ESPERA_REINTENTO = 1.0 # Segundos entre reintentos si SQLite falla (p. ej. bloqueado por otro worker)
+
+Cursor = Tuple[float, int] # (creada, id) de la última cotización de la página anterior
+
+
+class CotizacionGuardada(NamedTuple):
+    referencia: str # Identificador público; se asigna al encolar, antes de que exista la fila
+    creada: float # Epoch UTC en segundos
+    nombre_cliente: str
+    email_cliente: str
+    idioma: str
+    precio_onza: float
+    status_precio: str # live, stale o fallback, como se mostró al cliente
+    generacion_catalogo: int
+    anillos: List[Dict] # Configuración y desglose (CotizacionAnillo) de cada sección visible
+    monto_bruto: float
+    monto_total: float # Aproximado, el que ve el cliente
+    id: Optional[int] = None # Rowid; None hasta que se escribe
+
+    def fecha(self) -> str:
+        return datetime.fromtimestamp(self.creada, timezone.utc).isoformat(timespec="seconds")
+
+    def cursor(self) -> str:
+        return f"{self.creada!r}:{self.id}"
+
+    def huella(self) -> str:
+        """Identifica el contenido (cliente, anillos, precio y montos) sin la referencia ni la fecha: la misma cotización mostrada dos veces."""
+        contenido = [self.nombre_cliente, self.idioma, self.precio_onza, self.anillos, self.monto_bruto, self.monto_total]
+        return hashlib.sha256(json.dumps(contenido, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()).hexdigest()[:32]
+
+
+def nueva_cotizacion(nombre_cliente: str, email_cliente: str, idioma: str, precio_onza: float, status_precio: str,
+                     generacion_catalogo: int, anillos: List[Dict], monto_bruto: float, monto_total: float) -> CotizacionGuardada:
+    return CotizacionGuardada(secrets.token_urlsafe(9), time.time(), nombre_cliente.strip(), email_cliente.strip(), idioma,
+                              float(precio_onza), status_precio, generacion_catalogo, anillos, float(monto_bruto), float(monto_total))
+
+
+def cursor_desde_texto(texto: str) -> Cursor:
+    creada, _, id_ = texto.partition(":")
+    return float(creada), int(id_)
+
+
+COLUMNAS = ("referencia", "creada", "nombre_cliente", "email_cliente", "email", "idioma", "precio_onza", "status_precio",
+            "generacion_catalogo", "anillos", "monto_bruto", "monto_total")
+ESQUEMA = (
+    "CREATE TABLE IF NOT EXISTS cotizaciones ("
+    " id INTEGER PRIMARY KEY, referencia TEXT NOT NULL UNIQUE, creada REAL NOT NULL,"
+    " nombre_cliente TEXT NOT NULL, email_cliente TEXT NOT NULL, email TEXT NOT NULL, idioma TEXT NOT NULL,"
+    " precio_onza REAL NOT NULL, status_precio TEXT NOT NULL, generacion_catalogo INTEGER NOT NULL,"
+    " anillos TEXT NOT NULL, monto_bruto REAL NOT NULL, monto_total REAL NOT NULL)",
+    # El email normalizado va delante: el listado de un cliente recorre solo sus filas, ya en orden de fecha
+    "CREATE INDEX IF NOT EXISTS cotizaciones_email ON cotizaciones (email, creada)",
+    "CREATE INDEX IF NOT EXISTS cotizaciones_creada ON cotizaciones (creada)",
+)
+
+
+def _fila(cotizacion: CotizacionGuardada) -> tuple:
+    return (cotizacion.referencia, cotizacion.creada, cotizacion.nombre_cliente, cotizacion.email_cliente,
+            cotizacion.email_cliente.lower(), cotizacion.idioma, cotizacion.precio_onza, cotizacion.status_precio,
+            cotizacion.generacion_catalogo, json.dumps(cotizacion.anillos, ensure_ascii=False, separators=(",", ":")),
+            cotizacion.monto_bruto, cotizacion.monto_total)
+
+
+class AlmacenCotizaciones:
+    """
+    Cotizaciones en un archivo SQLite (WAL) que comparten los workers; una conexión por hilo y proceso.
+    `guardar` encola y retorna la referencia; el hilo de escritura (uno por proceso, se relanza tras un
+    fork) vacía la cola por lotes. Con `diferida=False` cada guardado se escribe en la llamada.
+    """
+
+    def __init__(self, ruta: str = COTIZACIONES_PATH, diferida: bool = True, max_cola: int = MAX_COLA):
+        self.ruta = ruta
+        self.diferida = diferida
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cola: "queue.Queue[CotizacionGuardada]" = queue.Queue(max_cola)
+        self._vacia = threading.Condition(self._lock)
+        self._pendientes = 0 # Encoladas y aún no confirmadas en disco
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.encoladas = 0
+        self.escritas = 0
+        self.lotes = 0
+        self.errores = 0
+        self.escrituras_directas = 0 # Cola llena o escritura no diferida
+        conexion = self._conexion()
+        for sentencia in ESQUEMA:
+            conexion.execute(sentencia)
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    # --- Escritura ---
+
+    def guardar(self, cotizacion: CotizacionGuardada) -> str:
+        """Encola la cotización para escribirla en segundo plano y retorna su referencia."""
+        if self.diferida:
+            self.iniciar()
+            with self._lock:
+                self._pendientes += 1
+            try:
+                self._cola.put_nowait(cotizacion)
+            except queue.Full: # El disco no da abasto: esta petición espera a su propia escritura
+                with self._vacia:
+                    self._pendientes -= 1
+                    self._vacia.notify_all()
+            else:
+                with self._lock:
+                    self.encoladas += 1
+                return cotizacion.referencia
+        self._escribir([cotizacion])
+        with self._lock:
+            self.escrituras_directas += 1
+        return cotizacion.referencia
+
+    def _escribir(self, lote: List[CotizacionGuardada]):
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            # OR IGNORE: reintentar un lote que sí llegó a confirmarse no duplica filas
+            conexion.executemany(f"INSERT OR IGNORE INTO cotizaciones ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})",
+                                 [_fila(c) for c in lote])
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.escritas += len(lote)
+            self.lotes += 1
+
+    def pendientes(self) -> int:
+        return self._pendientes
+
+    def vaciar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que lo encolado en este proceso esté en disco; False si vence `timeout`."""
+        with self._vacia:
+            return self._vacia.wait_for(lambda: self._pendientes == 0, timeout)
+
+    # --- Hilo de escritura ---
+
+    def iniciar(self):
+        """Arranca el hilo de escritura (una vez por proceso; se relanza tras un fork)."""
+        pid = os.getpid()
+        if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+                return
+            self._pid = pid
+            self._despertar = threading.Event()
+            self._hilo = threading.Thread(target=self._bucle, name="cotizaciones", daemon=True)
+            self._hilo.start()
+
+    def detener(self, timeout: float = 5.0):
+        """Escribe lo pendiente y detiene el hilo (al salir el proceso o antes del fork)."""
+        despertar, hilo = self._despertar, self._hilo
+        if hilo is not None and self._pid == os.getpid():
+            self.vaciar(timeout)
+        self._hilo = None
+        despertar.set()
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout=1)
+
+    def _bucle(self):
+        despertar = self._despertar
+        while not despertar.is_set():
+            try:
+                lote = [self._cola.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            # Lo que se acumuló mientras se escribía el lote anterior va en la misma transacción
+            while len(lote) < MAX_LOTE:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            while True:
+                try:
+                    self._escribir(lote)
+                    break
+                except sqlite3.Error as e:
+                    with self._lock:
+                        self.errores += 1
+                    logging.error(f"No se pudieron guardar {len(lote)} cotizaciones (se reintenta): {e}")
+                    time.sleep(ESPERA_REINTENTO)
+                except Exception as e: # Datos que no se pueden escribir: reintentar no serviría
+                    with self._lock:
+                        self.errores += 1
+                    logging.error(f"Se descartan {len(lote)} cotizaciones que no se pudieron guardar: {e}")
+                    break
+            with self._vacia:
+                self._pendientes -= len(lote)
+                self._vacia.notify_all()
+
+    # --- Consultas ---
+
+    def buscar(self, email: Optional[str] = None, desde: Optional[float] = None, hasta: Optional[float] = None,
+               despues_de: Optional[Cursor] = None, limite: int = 20) -> List[CotizacionGuardada]:
+        """
+        Cotizaciones de más reciente a más antigua, del cliente `email` (sin distinguir mayúsculas) y entre
+        `desde` y `hasta` (epoch, `hasta` excluido). `despues_de` es el cursor de la última de la página anterior.
+        """
+        condiciones, parametros = ["creada >= ?", "creada < ?"], [float("-inf") if desde is None else desde, float("inf") if hasta is None else hasta]
+        if email:
+            condiciones.append("email = ?")
+            parametros.append(email.strip().lower())
+        if despues_de is not None:
+            condiciones.append("(creada, id) < (?, ?)")
+            parametros.extend(despues_de)
+        filas = self._conexion().execute(
+            f"SELECT {', '.join(c for c in COLUMNAS if c != 'email')}, id FROM cotizaciones WHERE {' AND '.join(condiciones)}"
+            " ORDER BY creada DESC, id DESC LIMIT ?", (*parametros, limite),
+        ).fetchall()
+        return [_cotizacion(fila) for fila in filas]
+
+    def obtener(self, referencia: str) -> Optional[CotizacionGuardada]:
+        fila = self._conexion().execute(
+            f"SELECT {', '.join(c for c in COLUMNAS if c != 'email')}, id FROM cotizaciones WHERE referencia = ?", (referencia,)
+        ).fetchone()
+        return _cotizacion(fila) if fila else None
+
+    def __len__(self) -> int:
+        return self._conexion().execute("SELECT COUNT(*) FROM cotizaciones").fetchone()[0]
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"encoladas": self.encoladas, "escritas": self.escritas, "lotes": self.lotes,
+                    "errores": self.errores, "directas": self.escrituras_directas}
+
+
+def _cotizacion(fila: tuple) -> CotizacionGuardada:
+    *campos, anillos, monto_bruto, monto_total, id_ = fila
+    return CotizacionGuardada(*campos, json.loads(anillos), monto_bruto, monto_total, id_)
+
+
+def main():
+    from historial_precio_oro import instante_desde_texto
+
+    parser = argparse.ArgumentParser(description="Consulta las cotizaciones guardadas.")
+    parser.add_argument("comando", choices=["listar", "contar"])
+    parser.add_argument("--email")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--limite", type=int, default=50)
+    parser.add_argument("--ruta", default=COTIZACIONES_PATH or "cotizaciones.sqlite3")
+    args = parser.parse_args()
+
+    almacen = AlmacenCotizaciones(args.ruta, diferida=False)
+    if args.comando == "contar":
+        print(f"{len(almacen)} cotizaciones guardadas.")
+        return
+    cotizaciones = almacen.buscar(args.email, args.desde and instante_desde_texto(args.desde),
+                                  args.hasta and instante_desde_texto(args.hasta), limite=args.limite)
+    for c in cotizaciones:
+        modelos = ", ".join(f"{a['modelo']} {a['metal']} {a['kilates']}K" for a in c.anillos)
+        print(f"{c.fecha()}  {c.referencia}  {c.email_cliente or '-':<28} ${c.monto_total:>12,.2f}  {modelos}")
+    if not cotizaciones:
+        print("Sin cotizaciones guardadas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import bisect
+import re
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from indice_catalogo import IndiceCatalogo
+from precios import FACTOR_KILATES, GRAMOS_POR_ONZA
+
+# Facetas de la búsqueda del catálogo (nombre del parámetro); cada valor tiene su mapa de bits de variantes
+FACETAS_BUSQUEDA = ("metal", "kilates", "genero", "ancho", "diamantes")
+SEPARADOR_TOKENS = re.compile(r"[^0-9A-Z]+")
+TRAMOS_ALFANUMERICOS = re.compile(r"[A-Z]+|[0-9]+")
+_BITS_POR_BYTE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def empaquetar(mascara: np.ndarray) -> np.ndarray:
+    """Máscara booleana -> mapa de bits en palabras de 64 bits (bit i = posición i)."""
+    octetos = np.packbits(mascara, bitorder="little")
+    relleno = -len(octetos) % 8
+    if relleno:
+        octetos = np.concatenate([octetos, np.zeros(relleno, dtype=np.uint8)])
+    return octetos.view("<u8")
+
+
+def desempaquetar(bits: np.ndarray, n: int) -> np.ndarray:
+    return np.unpackbits(bits.view(np.uint8), count=n, bitorder="little").view(bool)
+
+
+def contar(bits: np.ndarray) -> int:
+    """Población del mapa de bits (popcount nativo en NumPy >= 2.0, tabla por byte si no)."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum())
+    return int(_BITS_POR_BYTE[bits.view(np.uint8)].sum(dtype=np.int64))
+
+
+def tokens_nombre(nombre: str) -> List[str]:
+    """Tokens buscables de un NAME: el nombre completo, sus partes y los tramos de letras/dígitos (LS0048 -> LS, 0048, 48)."""
+    nombre = nombre.upper()
+    tokens = {nombre}
+    for parte in SEPARADOR_TOKENS.split(nombre):
+        if not parte:
+            continue
+        tokens.add(parte)
+        for tramo in TRAMOS_ALFANUMERICOS.findall(parte):
+            tokens.add(tramo)
+            if tramo.isdigit() and tramo.lstrip("0"):
+                tokens.add(tramo.lstrip("0"))
+    return sorted(tokens)
+
+
+def _es_numero(valor: str) -> bool:
+    try:
+        float(valor)
+        return True
+    except ValueError:
+        return False
+
+
+class ConsultaFacetas(NamedTuple):
+    """Filtros de una búsqueda: dentro de una faceta los valores se combinan con OR y entre filtros con AND."""
+    facetas: Mapping[str, Tuple[str, ...]] = {}
+    texto: str = ""
+    ancho_min: Optional[float] = None
+    ancho_max: Optional[float] = None
+    precio_min: Optional[float] = None
+    precio_max: Optional[float] = None
+
+    def con_precio(self) -> bool:
+        return self.precio_min is not None or self.precio_max is not None
+
+    def clave(self) -> Tuple:
+        """Clave hashable (para cachear resultados)."""
+        return (tuple(sorted(self.facetas.items())),) + tuple(self[1:])
+
+
+class ResultadoFacetas(NamedTuple):
+    variantes: np.ndarray # Mapa de bits de las variantes que cumplen todos los filtros
+    tarjetas: np.ndarray # Máscara booleana sobre las cards (posiciones de la vitrina) con alguna variante que cumple
+    conteos: Dict[str, Dict[str, int]] # faceta -> valor -> variantes que cumplen el resto de filtros
+
+    @property
+    def total_variantes(self) -> int:
+        return contar(self.variantes)
+
+    @property
+    def total_tarjetas(self) -> int:
+        return int(np.count_nonzero(self.tarjetas))
+
+    def bits_tarjetas(self) -> int:
+        """Las cards que cumplen como mapa de bits (entero) para paginar con la vitrina."""
+        return int.from_bytes(np.packbits(self.tarjetas, bitorder="little").tobytes(), "little")
+
+
+class IndiceFacetas:
+    """
+    Índice invertido de las variantes con card (NAME, ANCHO, METAL, CARAT, GENERO), construido al cargar el
+    catálogo: un mapa de bits (palabras de 64 bits) por valor de faceta y, por token del NAME, las cards que lo
+    contienen. Las variantes se ordenan por card, así que las de una card ocupan bits contiguos.
+
+    Una consulta es una intersección de mapas de bits y cada conteo un popcount; el conteo de una faceta
+    ignora el filtro de esa misma faceta (cuántas variantes quedarían al elegir cada valor). El precio de cada
+    variante (talla base, diamantes de laboratorio) es lineal en el precio del oro, a·precio + b, así que el
+    filtro por precio sigue al precio actual sin reconstruir el índice.
+    """
+
+    def __init__(self, indice: IndiceCatalogo, costos_diamantes: Dict[str, float], posicion_tarjeta: Mapping[Tuple[str, str], int], n_tarjetas: int):
+        con_tarjeta = [(posicion_tarjeta[(c[0].upper(), c[2].upper())], c, r) for c, r in indice.variantes.items()
+                       if (c[0].upper(), c[2].upper()) in posicion_tarjeta]
+        con_tarjeta.sort(key=lambda v: v[0]) # Estable: dentro de una card se conserva el orden del libro
+        claves = [c for _, c, _ in con_tarjeta]
+        registros = [r for _, _, r in con_tarjeta]
+        n = len(claves)
+        self.n_tarjetas = n_tarjetas
+        self.tarjeta = np.array([t for t, _, _ in con_tarjeta], dtype=np.int32)
+        # Primer bit de cada card con variantes (para colapsar variantes -> cards con reduceat)
+        self._inicios = np.flatnonzero(np.r_[True, self.tarjeta[1:] != self.tarjeta[:-1]]) if n else np.zeros(0, dtype=np.intp)
+        self._tarjetas_con_variantes = self.tarjeta[self._inicios]
+        self._longitudes = np.diff(np.r_[self._inicios, n])
+
+        valores_por_faceta = {
+            "metal": [c[2].upper() for c in claves],
+            "kilates": [c[3] for c in claves],
+            "genero": [c[4].upper() for c in claves],
+            "ancho": [c[1] for c in claves],
+            "diamantes": ["SI" if r.ct > 0 else "NO" for r in registros],
+        }
+        self.mascaras: Dict[str, Dict[str, np.ndarray]] = {}
+        for faceta, valores in valores_por_faceta.items():
+            codigos, inversos = np.unique(np.array(valores, dtype=object), return_inverse=True) if n else ((), ())
+            self.mascaras[faceta] = {str(valor): empaquetar(inversos == i) for i, valor in enumerate(codigos)}
+
+        # Tokens del NAME -> cards, concatenadas en orden de token para resolver un prefijo con una sola rebanada
+        por_token: Dict[str, List[int]] = {}
+        for (modelo, _), posicion in posicion_tarjeta.items():
+            for token in tokens_nombre(modelo):
+                por_token.setdefault(token, []).append(posicion)
+        self.tokens: List[str] = sorted(por_token)
+        self._tarjetas_token = np.array([p for token in self.tokens for p in por_token[token]], dtype=np.int32)
+        self._desde_token = np.cumsum([0] + [len(por_token[token]) for token in self.tokens])
+
+        # Precio = a·precio_onza + b; nan si la variante no tiene peso o los kilates no son válidos
+        peso = np.array([r.peso for r in registros], dtype=np.float64)
+        factor = np.array([FACTOR_KILATES.get(c[3], 0.0) for c in claves], dtype=np.float64)
+        ct = np.array([r.ct for r in registros], dtype=np.float64)
+        laboratorio = costos_diamantes.get("laboratorio", 0.0)
+        adicional_base = indice.adicional_por_talla.get(indice.tallas[0], 0.0) if indice.tallas else 0.0
+        valido = (peso > 0) & (factor > 0)
+        self._a = np.where(valido, peso * factor / GRAMOS_POR_ONZA, np.nan)
+        self._b = np.array([r.price_cost for r in registros], dtype=np.float64) + adicional_base + np.where(
+            (ct > 0) & (laboratorio > 0), ct * laboratorio, 0.0)
+        self._precios: Tuple[Optional[float], Optional[np.ndarray]] = (None, None)
+
+        self._todas = empaquetar(np.ones(n, dtype=bool))
+        self._vacia = np.zeros_like(self._todas)
+
+    def __len__(self) -> int:
+        return len(self.tarjeta)
+
+    def valores(self, faceta: str) -> List[str]:
+        """Valores de una faceta en orden natural (para los selectores de filtro)."""
+        def clave(valor: str):
+            try: return (0, float(valor), valor)
+            except ValueError: return (1, 0.0, valor)
+        return sorted(self.mascaras[faceta], key=clave)
+
+    def precios(self, precio_onza: float) -> np.ndarray:
+        """Precio de cada variante al precio del oro dado (se recalcula solo si el precio cambió)."""
+        ultimo, precios = self._precios
+        if ultimo != precio_onza or precios is None:
+            precios = self._a * precio_onza + self._b
+            self._precios = (precio_onza, precios)
+        return precios
+
+    def _expandir(self, tarjetas: np.ndarray) -> np.ndarray:
+        """Máscara de cards -> mapa de bits de todas sus variantes."""
+        return empaquetar(np.repeat(tarjetas[self._tarjetas_con_variantes], self._longitudes))
+
+    def _mascara_texto(self, texto: str) -> Optional[np.ndarray]:
+        """Variantes cuyo NAME tiene, para cada palabra de la consulta, un token que empieza por ella."""
+        tarjetas = None
+        for palabra in SEPARADOR_TOKENS.split(texto.upper()):
+            if not palabra:
+                continue
+            inicio = bisect.bisect_left(self.tokens, palabra)
+            fin = bisect.bisect_left(self.tokens, palabra + "￿")
+            coincidencias = np.zeros(self.n_tarjetas, dtype=bool)
+            coincidencias[self._tarjetas_token[self._desde_token[inicio]:self._desde_token[fin]]] = True
+            tarjetas = coincidencias if tarjetas is None else tarjetas & coincidencias
+        return None if tarjetas is None else self._expandir(tarjetas)
+
+    def _mascara_valores(self, faceta: str, valores: Sequence[str]) -> np.ndarray:
+        por_valor = self.mascaras[faceta]
+        mascara = self._vacia
+        for valor in valores:
+            mascara = mascara | por_valor.get(valor, self._vacia)
+        return mascara
+
+    def buscar(self, consulta: ConsultaFacetas, precio_onza: float) -> ResultadoFacetas:
+        # Filtros que no son facetas (texto y rangos): restringen todos los conteos
+        base = self._todas
+        texto = self._mascara_texto(consulta.texto)
+        if texto is not None:
+            base = base & texto
+        if consulta.ancho_min is not None or consulta.ancho_max is not None:
+            minimo = -np.inf if consulta.ancho_min is None else consulta.ancho_min
+            maximo = np.inf if consulta.ancho_max is None else consulta.ancho_max
+            en_rango = [v for v in self.mascaras["ancho"] if _es_numero(v) and minimo <= float(v) <= maximo]
+            base = base & self._mascara_valores("ancho", en_rango)
+        if consulta.con_precio():
+            precios = self.precios(precio_onza)
+            minimo = -np.inf if consulta.precio_min is None else consulta.precio_min
+            maximo = np.inf if consulta.precio_max is None else consulta.precio_max
+            base = base & empaquetar((precios >= minimo) & (precios <= maximo))
+
+        por_faceta = {}
+        for faceta in FACETAS_BUSQUEDA:
+            valores = [v for v in consulta.facetas.get(faceta, ()) if v]
+            if valores:
+                por_faceta[faceta] = self._mascara_valores(faceta, valores)
+        variantes = base
+        for mascara in por_faceta.values():
+            variantes = variantes & mascara
+
+        conteos: Dict[str, Dict[str, int]] = {}
+        for faceta in FACETAS_BUSQUEDA:
+            resto = variantes
+            if faceta in por_faceta:
+                resto = base
+                for otra, mascara in por_faceta.items():
+                    if otra != faceta:
+                        resto = resto & mascara
+            conteos[faceta] = {valor: contar(resto & m) for valor, m in self.mascaras[faceta].items()}
+
+        tarjetas = np.zeros(self.n_tarjetas, dtype=bool)
+        if len(self):
+            tarjetas[self._tarjetas_con_variantes] = np.logical_or.reduceat(desempaquetar(variantes, len(self)), self._inicios)
+        return ResultadoFacetas(variantes, tarjetas, conteos)
+
+    def precio_desde(self, resultado: ResultadoFacetas, posiciones: Sequence[int], precio_onza: float) -> List[Optional[float]]:
+        """Precio mínimo, entre las variantes del resultado, de cada card pedida (None si no tiene precio)."""
+        variantes = desempaquetar(resultado.variantes, len(self))
+        precios = self.precios(precio_onza)
+        desde: List[Optional[float]] = []
+        for posicion in posiciones:
+            i = int(np.searchsorted(self._tarjetas_con_variantes, posicion))
+            if i == len(self._inicios) or self._tarjetas_con_variantes[i] != posicion:
+                desde.append(None)
+                continue
+            tramo = slice(self._inicios[i], self._inicios[i] + self._longitudes[i])
+            candidatos = precios[tramo][variantes[tramo]]
+            candidatos = candidatos[~np.isnan(candidatos)]
+            desde.append(float(candidatos.min()) if len(candidatos) else None)
+        return desde
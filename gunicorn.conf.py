@@ -0,0 +1,58 @@
+"""
+Configuración de gunicorn para producción (render.yaml: gunicorn -c gunicorn.conf.py Formulario:app).
+
+- preload: el maestro importa la app y la precalienta (catálogo desde el snapshot, índices, plantillas,
+  primera página del catálogo; precio del oro desde el historial) antes de hacer fork, así que los workers
+  comparten esas páginas de memoria copy-on-write y no hay primera petición en frío. gc.freeze() evita
+  que el recolector de cada worker toque (y copie) los objetos heredados.
+- workers y clase según las CPUs: un worker por CPU más uno y, como las peticiones esperan a SQLite
+  (sesiones) y a la red, hilos por worker (gthread).
+- /salud (healthCheckPath de Render) solo responde 200 con la app precalentada.
+
+Variables de entorno: PORT, WEB_CONCURRENCY (workers), GUNICORN_THREADS, GUNICORN_MAX_WORKERS,
+GUNICORN_PRELOAD=0 (cada worker carga y precalienta lo suyo, como antes), GUNICORN_TIMEOUT.
+"""
+import gc
+import os
+
+
+def _cpus() -> int:
+    """CPUs disponibles para el proceso (respeta la afinidad/cpuset del contenedor)."""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(_cpus() + 1, int(os.getenv("GUNICORN_MAX_WORKERS", "8"))))))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+# Reciclar workers acota el crecimiento de memoria; con preload el nuevo worker nace ya caliente
+max_requests = 2000
+max_requests_jitter = 200
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def when_ready(server):
+    """En el maestro, antes del primer fork: precalienta la app compartida."""
+    if not preload_app:
+        return
+    import Formulario
+    Formulario.precalentar(antes_de_fork=True)
+    gc.freeze()
+    server.log.info(f"App precalentada en el maestro; {workers} workers {worker_class} x {threads} hilos.")
+
+
+def post_worker_init(worker):
+    """Sin preload, cada worker precalienta su copia antes de aceptar peticiones."""
+    if preload_app:
+        return
+    import Formulario
+    Formulario.precalentar()
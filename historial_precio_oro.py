@@ -0,0 +1,169 @@
+"""
+Historial persistente del precio del oro en SQLite: cada precio obtenido del proveedor se anexa con su
+instante (epoch UTC). Sirve para arrancar los workers con el último precio conocido sin red y para
+consultar el precio vigente en un instante pasado (reproducir una cotización antigua).
+
+Uso (desde la raíz del repo):
+    python historial_precio_oro.py ultimo
+    python historial_precio_oro.py en 2025-03-01T12:00:00
+    python historial_precio_oro.py serie [--desde 2025-03-01] [--hasta 2025-03-31]
+    python historial_precio_oro.py compactar
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+
+HISTORIAL_PATH = os.getenv("PRECIO_ORO_HISTORIAL", "precio_oro.sqlite3") # Vacío desactiva el historial
+DETALLE_COMPLETO_DIAS = float(os.getenv("PRECIO_ORO_HISTORIAL_DETALLE_DIAS", "30")) # Más antiguo se reduce a un precio por hora
+RESOLUCION_COMPACTADA = 3600.0
+COMPACTAR_CADA = 288 # Registros entre compactaciones (un día al intervalo de 5 minutos)
+
+
+class PuntoPrecio(NamedTuple):
+    instante: float # Epoch UTC en segundos
+    precio: float
+
+    def fecha(self) -> str:
+        return datetime.fromtimestamp(self.instante, timezone.utc).isoformat(timespec="seconds")
+
+
+def instante_desde_texto(texto: str) -> float:
+    """Epoch en segundos desde un número o una fecha ISO 8601 (sin zona se asume UTC)."""
+    try:
+        return float(texto)
+    except ValueError:
+        pass
+    fecha = datetime.fromisoformat(texto.strip().replace("Z", "+00:00"))
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.timestamp()
+
+
+class HistorialPrecioOro:
+    """
+    Serie temporal del precio en un archivo SQLite (WAL) que comparten los workers. Una conexión por hilo y
+    proceso. La compactación es doble: de cada tramo con el mismo precio deja el primer y el último registro
+    (sin pérdida para `precio_en` ni para la edad de `ultimo`) y, en lo más antiguo que `detalle_dias`, deja el
+    primer precio de cada hora.
+    """
+
+    def __init__(self, ruta: str = HISTORIAL_PATH, detalle_dias: float = DETALLE_COMPLETO_DIAS):
+        self.ruta = ruta
+        self.detalle_dias = detalle_dias
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._registros_desde_compactar = 0
+        self._conexion().execute("CREATE TABLE IF NOT EXISTS precios (instante REAL PRIMARY KEY, precio REAL NOT NULL)")
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    # --- Escritura ---
+
+    def registrar(self, precio: float, instante: Optional[float] = None):
+        """Anexa un precio obtenido; cada COMPACTAR_CADA registros compacta el historial."""
+        instante = time.time() if instante is None else instante
+        self._conexion().execute("INSERT OR REPLACE INTO precios (instante, precio) VALUES (?, ?)", (instante, float(precio)))
+        with self._lock:
+            self._registros_desde_compactar += 1
+            compactar = self._registros_desde_compactar >= COMPACTAR_CADA
+            if compactar:
+                self._registros_desde_compactar = 0
+        if compactar:
+            try:
+                self.compactar()
+            except sqlite3.Error as e: # Otro worker compactando a la vez: se reintenta en la próxima vuelta
+                logging.warning(f"No se pudo compactar el historial del precio del oro: {e}")
+
+    def compactar(self, ahora: Optional[float] = None) -> int:
+        """Compacta el historial y retorna cuántos registros eliminó."""
+        limite = (time.time() if ahora is None else ahora) - self.detalle_dias * 86400
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            # Registros intermedios de un tramo con el mismo precio: precio_en() da el mismo resultado sin ellos.
+            # Se conservan el primero (desde cuándo rige) y el último (cuándo se confirmó por última vez, la edad
+            # que ultimo() da al arranque en caliente)
+            repetidos = conexion.execute(
+                "DELETE FROM precios WHERE instante IN (SELECT instante FROM ("
+                " SELECT instante, precio, LAG(precio) OVER (ORDER BY instante) AS anterior,"
+                " LEAD(precio) OVER (ORDER BY instante) AS siguiente FROM precios"
+                ") WHERE precio = anterior AND precio = siguiente)"
+            ).rowcount
+            # Fuera de la ventana de detalle, el primer precio de cada hora (y siempre el más reciente)
+            antiguos = conexion.execute(
+                "DELETE FROM precios WHERE instante < ? AND instante < (SELECT MAX(instante) FROM precios) AND instante NOT IN ("
+                " SELECT MIN(instante) FROM precios WHERE instante < ? GROUP BY CAST(instante / ? AS INTEGER))",
+                (limite, limite, RESOLUCION_COMPACTADA),
+            ).rowcount
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+        return repetidos + antiguos
+
+    # --- Consultas ---
+
+    def ultimo(self) -> Optional[PuntoPrecio]:
+        fila = self._conexion().execute("SELECT instante, precio FROM precios ORDER BY instante DESC LIMIT 1").fetchone()
+        return PuntoPrecio(*fila) if fila else None
+
+    def precio_en(self, instante: float) -> Optional[PuntoPrecio]:
+        """Último precio conocido en `instante` (el vigente entonces), o None si es anterior al historial."""
+        fila = self._conexion().execute(
+            "SELECT instante, precio FROM precios WHERE instante <= ? ORDER BY instante DESC LIMIT 1", (instante,)
+        ).fetchone()
+        return PuntoPrecio(*fila) if fila else None
+
+    def serie(self, desde: Optional[float] = None, hasta: Optional[float] = None, limite: int = 1000) -> List[PuntoPrecio]:
+        """Precios entre `desde` y `hasta` (incluidos), del más antiguo al más reciente."""
+        filas = self._conexion().execute(
+            "SELECT instante, precio FROM precios WHERE instante >= ? AND instante <= ? ORDER BY instante LIMIT ?",
+            (float("-inf") if desde is None else desde, float("inf") if hasta is None else hasta, limite),
+        ).fetchall()
+        return [PuntoPrecio(*fila) for fila in filas]
+
+    def __len__(self) -> int:
+        return self._conexion().execute("SELECT COUNT(*) FROM precios").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta y compacta el historial del precio del oro.")
+    parser.add_argument("comando", choices=["ultimo", "en", "serie", "compactar"])
+    parser.add_argument("instante", nargs="?", help="Fecha ISO 8601 o epoch (para 'en')")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--ruta", default=HISTORIAL_PATH or "precio_oro.sqlite3")
+    args = parser.parse_args()
+
+    historial = HistorialPrecioOro(args.ruta)
+    if args.comando == "compactar":
+        print(f"{historial.compactar()} registros eliminados; quedan {len(historial)}.")
+        return
+    if args.comando == "serie":
+        puntos = historial.serie(args.desde and instante_desde_texto(args.desde), args.hasta and instante_desde_texto(args.hasta), limite=-1)
+    elif args.comando == "en":
+        if not args.instante:
+            parser.error("'en' requiere un instante")
+        puntos = [p for p in (historial.precio_en(instante_desde_texto(args.instante)),) if p]
+    else:
+        puntos = [p for p in (historial.ultimo(),) if p]
+    for punto in puntos:
+        print(f"{punto.fecha()}  {punto.precio:,.2f}")
+    if not puntos:
+        print("Sin precios en el historial.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Pipeline de imágenes del catálogo: convierte las fotos originales de static/ (BMP/PNG/JPG)
+en versiones WebP y JPEG a varios anchos, con el hash del contenido en el nombre.
+
+Uso:
+    python imagenes.py                      # procesa solo lo que cambió
+    python imagenes.py --forzar             # regenera todo
+    python imagenes.py --reporte reporte.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIR_VERSIONES = "renditions" # Subcarpeta de static/ con las versiones generadas
+MANIFEST = "manifest.json"
+
+ANCHOS = (192, 384, 768)
+CALIDAD = {"webp": 80, "jpeg": 82}
+EXTENSIONES_ORIGEN = (".bmp", ".png", ".jpg", ".jpeg")
+EXCLUIDOS = {"logo.png"}
+
+# Cards del catálogo: 1 columna en móvil, hasta 4 en escritorio (max-w-7xl)
+SIZES_CATALOGO = "(min-width: 1024px) 300px, (min-width: 768px) 33vw, (min-width: 640px) 50vw, 100vw"
+
+
+def _hash_archivo(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _procesar(args) -> Dict:
+    """Genera las versiones de una imagen (se ejecuta en un proceso del pool)."""
+    nombre, ruta_origen, dir_destino, hash_origen = args
+    from PIL import Image
+
+    base = os.path.splitext(nombre)[0].replace(" ", "_")
+    versiones: Dict[str, List[Dict]] = {"webp": [], "jpeg": []}
+    with Image.open(ruta_origen) as img:
+        img.load()
+        ancho_original, alto_original = img.size
+        tiene_alfa = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        rgba = img.convert("RGBA") if tiene_alfa else img.convert("RGB")
+        # JPEG no admite transparencia: se aplana sobre fondo blanco (como el de las cards)
+        if tiene_alfa:
+            rgb = Image.new("RGB", rgba.size, (255, 255, 255))
+            rgb.paste(rgba, mask=rgba.split()[-1])
+        else:
+            rgb = rgba
+
+        anchos = sorted({min(a, ancho_original) for a in ANCHOS})
+        for ancho in anchos:
+            alto = max(1, round(alto_original * ancho / ancho_original))
+            for formato, fuente in (("webp", rgba), ("jpeg", rgb)):
+                redimensionada = fuente if ancho == ancho_original else fuente.resize((ancho, alto), Image.LANCZOS)
+                extension = "webp" if formato == "webp" else "jpg"
+                archivo = f"{base}-{ancho}w-{hash_origen[:10]}.{extension}"
+                ruta = os.path.join(dir_destino, archivo)
+                if not os.path.exists(ruta):
+                    ruta_tmp = ruta + ".tmp"
+                    redimensionada.save(ruta_tmp, format=formato.upper(), quality=CALIDAD[formato], optimize=True)
+                    os.replace(ruta_tmp, ruta)
+                versiones[formato].append({"ancho": ancho, "archivo": archivo, "bytes": os.path.getsize(ruta)})
+
+    return {
+        "nombre": nombre,
+        "hash": hash_origen,
+        "bytes_origen": os.path.getsize(ruta_origen),
+        "ancho": ancho_original,
+        "alto": alto_original,
+        "versiones": versiones,
+    }
+
+
+def _leer_manifest(ruta: str) -> Dict[str, Dict]:
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.warning(f"Manifest de imágenes ilegible ({e}); se regenera.")
+        return {}
+
+
+def _escribir_json(ruta: str, contenido):
+    fd, ruta_tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(ruta_tmp, ruta)
+
+
+def _versiones_presentes(entrada: Dict, dir_destino: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(dir_destino, v["archivo"]))
+        for lista in entrada.get("versiones", {}).values() for v in lista
+    )
+
+
+def procesar_imagenes(static_dir: str = STATIC_DIR, forzar: bool = False, procesos: Optional[int] = None) -> Dict[str, Dict]:
+    """Procesa en paralelo las imágenes nuevas o modificadas y actualiza el manifest. Retorna el manifest."""
+    dir_destino = os.path.join(static_dir, DIR_VERSIONES)
+    os.makedirs(dir_destino, exist_ok=True)
+    ruta_manifest = os.path.join(dir_destino, MANIFEST)
+    manifest = _leer_manifest(ruta_manifest)
+
+    pendientes = []
+    presentes = set()
+    for nombre in sorted(os.listdir(static_dir)):
+        ruta = os.path.join(static_dir, nombre)
+        if nombre in EXCLUIDOS or not os.path.isfile(ruta) or not nombre.lower().endswith(EXTENSIONES_ORIGEN):
+            continue
+        presentes.add(nombre)
+        hash_origen = _hash_archivo(ruta)
+        entrada = manifest.get(nombre)
+        if not forzar and entrada and entrada.get("hash") == hash_origen and _versiones_presentes(entrada, dir_destino):
+            continue
+        pendientes.append((nombre, ruta, dir_destino, hash_origen))
+
+    for nombre in set(manifest) - presentes:
+        del manifest[nombre]
+
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=procesos or os.cpu_count()) as pool:
+            for resultado in pool.map(_procesar, pendientes, chunksize=1):
+                manifest[resultado["nombre"]] = resultado
+                logging.info(f"Imagen procesada: {resultado['nombre']}")
+
+    # Borrar versiones huérfanas (de hashes anteriores o de imágenes eliminadas)
+    vigentes = {v["archivo"] for e in manifest.values() for lista in e["versiones"].values() for v in lista}
+    for archivo in os.listdir(dir_destino):
+        if archivo != MANIFEST and archivo not in vigentes and not archivo.endswith(".tmp"):
+            os.remove(os.path.join(dir_destino, archivo))
+
+    _escribir_json(ruta_manifest, manifest)
+    return manifest
+
+
+def reporte_ahorro(manifest: Dict[str, Dict]) -> List[Dict]:
+    """Bytes ahorrados por imagen: original frente a la versión WebP más grande servida."""
+    filas = []
+    for nombre, entrada in sorted(manifest.items()):
+        webp = entrada["versiones"]["webp"]
+        mayor = max(webp, key=lambda v: v["ancho"])["bytes"] if webp else entrada["bytes_origen"]
+        filas.append({
+            "imagen": nombre,
+            "bytes_origen": entrada["bytes_origen"],
+            "bytes_webp_mayor": mayor,
+            "bytes_ahorrados": entrada["bytes_origen"] - mayor,
+        })
+    return filas
+
+
+# --------------------- USO DESDE LA APP ---------------------
+
+class ManifestImagenes:
+    """Lee el manifest generado y construye los atributos srcset de cada foto. Se recarga si cambia el archivo."""
+
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.ruta = os.path.join(static_dir, DIR_VERSIONES, MANIFEST)
+        self._mtime = None
+        self._entradas: Dict[str, Dict] = {}
+
+    def entradas(self) -> Dict[str, Dict]:
+        try:
+            mtime = os.stat(self.ruta).st_mtime_ns
+        except OSError:
+            return {}
+        if mtime != self._mtime:
+            self._entradas = _leer_manifest(self.ruta)
+            self._mtime = mtime
+        return self._entradas
+
+    def version(self):
+        """Identificador del manifest vigente (para claves de caché)."""
+        self.entradas()
+        return self._mtime
+
+    def versiones(self, nombre_foto: str) -> Optional[Dict]:
+        """Rutas (relativas a static/) de las versiones de una foto, o None si no fue procesada."""
+        entrada = self.entradas().get(nombre_foto)
+        if not entrada:
+            return None
+        webp = entrada["versiones"]["webp"]
+        jpeg = entrada["versiones"]["jpeg"]
+        return {
+            "webp": [(f"{DIR_VERSIONES}/{v['archivo']}", v["ancho"]) for v in webp],
+            "jpeg": [(f"{DIR_VERSIONES}/{v['archivo']}", v["ancho"]) for v in jpeg],
+            "ancho": entrada["ancho"],
+            "alto": entrada["alto"],
+        }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Genera versiones WebP/JPEG responsivas de las fotos del catálogo.")
+    parser.add_argument("--static", default=STATIC_DIR)
+    parser.add_argument("--forzar", action="store_true", help="Regenera aunque el hash no haya cambiado.")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--reporte", help="Escribe el reporte de bytes ahorrados en este JSON.")
+    args = parser.parse_args()
+
+    manifest = procesar_imagenes(args.static, forzar=args.forzar, procesos=args.procesos)
+    filas = reporte_ahorro(manifest)
+    total_origen = sum(f["bytes_origen"] for f in filas)
+    total_ahorro = sum(f["bytes_ahorrados"] for f in filas)
+    for f in filas:
+        print(f"{f['imagen']:<50} {f['bytes_origen']:>12,} -> {f['bytes_webp_mayor']:>10,} bytes")
+    print(f"Total: {total_origen:,} bytes originales, {total_ahorro:,} bytes ahorrados")
+    if args.reporte:
+        with open(args.reporte, "w", encoding="utf-8") as f:
+            json.dump(filas, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from utilidades import convertir_float, es_nan
+
+if TYPE_CHECKING: # pandas solo se importa al leer el libro (catalogo.leer_excel)
+    import pandas as pd
+
+# Clave de variante: (NAME, ANCHO, METAL, CARAT, GENERO), ya normalizada como en cargar_datos()
+ClaveVariante = Tuple[str, str, str, str, str]
+COLUMNAS_CLAVE = ["NAME", "ANCHO", "METAL", "CARAT", "GENERO"]
+# Columnas del libro que usa el catálogo (el resto no se lee)
+COLUMNAS_BANDAS = ("NAME", "METAL", "RUTA FOTO", "PESO", "GENERO", "CT", "ANCHO", "CARAT", "PRICE COST")
+COLUMNAS_SIZE = ("SIZE", "ADICIONAL", "MONTO")
+
+
+class RegistroVariante(NamedTuple):
+    """Valores numéricos ya tipados de una fila de WEDDING BANDS."""
+    peso: float
+    price_cost: float
+    ct: float
+
+
+class EntradaVitrina(NamedTuple):
+    """Una card del catálogo: variante única NAME/METAL."""
+    modelo: str
+    metal: str
+    ruta_foto: str
+
+
+class ValorInvalido(NamedTuple):
+    """Celda numérica con texto que no se pudo convertir (se usa 0.0 en su lugar)."""
+    hoja: str
+    fila: int # Fila del libro (1 = primera)
+    columna: str
+    valor: str
+
+
+class OpcionesModelo(NamedTuple):
+    """Opciones de los selectores de un modelo/metal y los valores que se autoseleccionan."""
+    anchos: Tuple[str, ...]
+    tallas: Tuple[str, ...]
+    ancho_defecto: str
+    talla_defecto: str
+
+
+SIN_OPCIONES = OpcionesModelo((), (), "", "")
+
+
+def _clave_numerica(valor: str) -> float:
+    try: return float(valor)
+    except ValueError: return float('inf')
+
+
+class IndiceCatalogo:
+    """
+    Índice inmutable de búsquedas de precio construido una sola vez al cargar el Excel.
+    Sustituye los filtros booleanos sobre el DataFrame por accesos O(1) a diccionario.
+    """
+
+    __slots__ = ("variantes", "adicional_por_talla", "anchos_por_modelo", "tallas", "tarjetas", "_por_modelo", "_opciones", "_sin_anchos")
+
+    def __init__(self, variantes: Dict[ClaveVariante, RegistroVariante], adicional_por_talla: Dict[str, float],
+                 anchos_por_modelo: Optional[Dict[Tuple[str, str], Tuple[str, ...]]] = None, tallas: Tuple[str, ...] = (),
+                 tarjetas: Tuple[EntradaVitrina, ...] = ()):
+        por_modelo: Dict[str, List[ClaveVariante]] = {}
+        for clave in variantes:
+            por_modelo.setdefault(clave[0], []).append(clave)
+
+        self.variantes: Mapping[ClaveVariante, RegistroVariante] = MappingProxyType(variantes)
+        self.adicional_por_talla: Mapping[str, float] = MappingProxyType(adicional_por_talla)
+        self._por_modelo: Mapping[str, Tuple[ClaveVariante, ...]] = MappingProxyType(
+            {modelo: tuple(claves) for modelo, claves in por_modelo.items()}
+        )
+
+        # Opciones de los selectores por (NAME, METAL), ya ordenadas, con la autoselección resuelta
+        anchos_por_modelo = anchos_por_modelo or {}
+        self.anchos_por_modelo: Mapping[Tuple[str, str], Tuple[str, ...]] = MappingProxyType(anchos_por_modelo)
+        self.tallas: Tuple[str, ...] = tuple(tallas)
+        self.tarjetas: Tuple[EntradaVitrina, ...] = tuple(tarjetas)
+        self._opciones: Mapping[Tuple[str, str], OpcionesModelo] = MappingProxyType({
+            clave: OpcionesModelo(anchos, self.tallas, anchos[0] if anchos else "", self.tallas[0] if self.tallas else "")
+            for clave, anchos in anchos_por_modelo.items()
+        })
+        # Modelo/metal que no está en el libro: sin anchos, pero con las tallas (como el filtro original)
+        self._sin_anchos = OpcionesModelo((), self.tallas, "", self.tallas[0] if self.tallas else "") if anchos_por_modelo else SIN_OPCIONES
+
+    def __reduce__(self):
+        # MappingProxyType no es serializable: se reconstruye a partir de diccionarios planos
+        return (IndiceCatalogo, (dict(self.variantes), dict(self.adicional_por_talla), dict(self.anchos_por_modelo), self.tallas, self.tarjetas))
+
+    def __len__(self) -> int:
+        return len(self.variantes)
+
+    def buscar(self, modelo: str, metal: str, ancho: str, kilates: str, talla: str, genero: str) -> Tuple[float, float, float, float]:
+        """Retorna (peso, price_cost, costo_adicional, ct); 0.0 en lo que no exista."""
+        registro = self.variantes.get((modelo, ancho, metal, kilates, genero))
+        cost_adicional = self.adicional_por_talla.get(talla, 0.0)
+        if registro is None:
+            return 0.0, 0.0, cost_adicional, 0.0
+        return registro.peso, registro.price_cost, cost_adicional, registro.ct
+
+    def opciones(self, modelo: str, metal: str) -> OpcionesModelo:
+        """Anchos del modelo/metal y tallas del catálogo (orden numérico) con sus valores por defecto."""
+        return self._opciones.get((modelo, metal), self._sin_anchos)
+
+    def variantes_de_modelo(self, modelo: str) -> List[Tuple[ClaveVariante, RegistroVariante]]:
+        """Lista todas las variantes (ancho/metal/kilates/género) de un modelo."""
+        return [(clave, self.variantes[clave]) for clave in self._por_modelo.get(modelo, ())]
+
+    def entradas_vitrina(self) -> List[EntradaVitrina]:
+        """Cards del catálogo en el orden del libro (primera foto de cada NAME/METAL)."""
+        return list(self.tarjetas)
+
+
+def construir_indice(df: "pd.DataFrame", df_adicional: "pd.DataFrame", invalidos: Optional[List[ValorInvalido]] = None) -> IndiceCatalogo:
+    """Construye el índice a partir de DataFrames ya limpios (p. ej. los datos sintéticos de los benchmarks)."""
+    bandas = {col: df[col].tolist() for col in COLUMNAS_BANDAS if col in df.columns}
+    size = {col: df_adicional[col].tolist() for col in COLUMNAS_SIZE if col in df_adicional.columns}
+    return indexar_columnas(bandas, [int(i) + 1 for i in df.index], size, [int(i) + 1 for i in df_adicional.index], invalidos)
+
+
+def indexar_columnas(bandas: Mapping[str, Sequence], filas_bandas: Sequence[int], size: Mapping[str, Sequence],
+                     filas_size: Sequence[int], invalidos: Optional[List[ValorInvalido]] = None) -> IndiceCatalogo:
+    """
+    Construye el índice a partir de las columnas ya limpias de WEDDING BANDS y SIZE (listas por nombre de
+    columna, con el número de fila del libro de cada posición). Los valores numéricos se convierten aquí una
+    sola vez; los que no son números se anotan en `invalidos` (si se pasa).
+    """
+    invalidos = [] if invalidos is None else invalidos
+    n, n_size = len(filas_bandas), len(filas_size)
+
+    def numero(hoja: str, fila: int, columna: str, valor) -> float:
+        convertido, valido = convertir_float(valor)
+        if not valido:
+            invalidos.append(ValorInvalido(hoja, fila, columna, str(valor)))
+        return convertido
+
+    variantes: Dict[ClaveVariante, RegistroVariante] = {}
+    if n and all(col in bandas for col in COLUMNAS_CLAVE):
+        columnas = [bandas[col] for col in COLUMNAS_CLAVE]
+        pesos = bandas.get("PESO", [0] * n)
+        costos = bandas.get("PRICE COST", [0] * n)
+        cts = bandas.get("CT", [0] * n)
+        for fila, clave, peso, price_cost, ct in zip(filas_bandas, zip(*columnas), pesos, costos, cts):
+            # Igual que .iloc[0] del filtro original: gana la primera fila de cada clave. Sin clave completa
+            # la variante no se puede pedir desde el formulario: no entra al índice.
+            if clave not in variantes and not any(es_nan(v) for v in clave):
+                variantes[clave] = RegistroVariante(numero("WEDDING BANDS", fila, "PESO", peso),
+                                                    numero("WEDDING BANDS", fila, "PRICE COST", price_cost),
+                                                    numero("WEDDING BANDS", fila, "CT", ct))
+
+    adicional_por_talla: Dict[str, float] = {}
+    tallas_libro = [None if es_nan(talla) else str(talla).strip() for talla in size["SIZE"]] if n_size and "SIZE" in size else []
+    if tallas_libro and "ADICIONAL" in size:
+        for fila, talla, adicional in zip(filas_size, tallas_libro, size["ADICIONAL"]):
+            if talla is not None and talla not in adicional_por_talla:
+                adicional_por_talla[talla] = numero("SIZE", fila, "ADICIONAL", adicional)
+
+    # Opciones de los selectores: se calculan aquí una vez por versión del catálogo, no por petición
+    anchos_por_modelo: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+    tallas: Tuple[str, ...] = ()
+    if n and n_size and "NAME" in bandas and "METAL" in bandas:
+        tallas = tuple(sorted(dict.fromkeys(t for t in tallas_libro if t is not None), key=_clave_numerica))
+        anchos_vistos: Dict[Tuple[str, str], Dict[str, None]] = {}
+        anchos = [None if es_nan(ancho) else str(ancho).strip() for ancho in bandas["ANCHO"]] if "ANCHO" in bandas else [None] * n
+        for modelo, metal, ancho in zip(bandas["NAME"], bandas["METAL"], anchos):
+            if es_nan(modelo) or es_nan(metal):
+                continue
+            vistos = anchos_vistos.setdefault((modelo, metal), {})
+            if ancho is not None:
+                vistos[ancho] = None
+        anchos_por_modelo = {clave: tuple(sorted(vistos, key=_clave_numerica)) for clave, vistos in anchos_vistos.items()}
+
+    # Cards del catálogo: primera foto de cada NAME/METAL, en el orden del libro
+    tarjetas: Dict[Tuple[str, str], EntradaVitrina] = {}
+    if n and all(col in bandas for col in ("NAME", "METAL", "RUTA FOTO")):
+        for nombre, metal, ruta_foto in zip(bandas["NAME"], bandas["METAL"], bandas["RUTA FOTO"]):
+            if (nombre, metal) not in tarjetas and not any(es_nan(v) for v in (nombre, metal, ruta_foto)): # Como dropna()
+                tarjetas[(nombre, metal)] = EntradaVitrina(str(nombre).strip().upper(), str(metal).strip().upper(), str(ruta_foto).strip())
+
+    return IndiceCatalogo(variantes, adicional_por_talla, anchos_por_modelo, tallas, tuple(tarjetas.values()))
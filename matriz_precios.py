@@ -0,0 +1,153 @@
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from catalogo import DatosCatalogo
+from precios import FACTOR_KILATES, GRAMOS_POR_ONZA
+
+ORDEN_DIAMANTE = ("Laboratorio", "Natural") # i_diamante 0 y 1
+COLUMNAS_TEXTO = ["modelo", "metal", "ancho", "kilates", "genero", "talla", "tipo_diamante"]
+COLUMNAS_NUMERICAS = ["peso", "ct", "price_cost", "adicional", "costo_diamante", "monto_oro", "monto_diamantes", "monto", "monto_aproximado"]
+
+
+class MatrizPrecios:
+    """
+    Precio de todas las combinaciones (variante × talla × tipo de diamante) del catálogo en columnas NumPy.
+    Aplica la misma fórmula que precios.cotizar_anillo(); el término del oro se puede recalcular aparte
+    cuando cambia el precio de la onza, sin volver a expandir la matriz.
+    """
+
+    def __init__(self, columnas: Dict[str, np.ndarray], tablas: Dict[str, np.ndarray], precio_onza: float):
+        self.columnas = columnas # Una entrada por fila de la matriz
+        self.tablas = tablas # Textos por variante/talla/diamante, referenciados por los índices i_*
+        self.precio_onza = precio_onza
+
+    def __len__(self) -> int:
+        return len(self.columnas["peso"])
+
+    def __getitem__(self, columna: str) -> np.ndarray:
+        return self.columnas[columna]
+
+    @classmethod
+    def construir(cls, datos: DatosCatalogo, precio_onza: float) -> "MatrizPrecios":
+        indice = datos.indice
+        claves = list(indice.variantes)
+        registros = list(indice.variantes.values())
+        tallas = list(indice.adicional_por_talla)
+        n_var, n_tallas, n_diam = len(claves), len(tallas), len(ORDEN_DIAMANTE)
+
+        # Columnas por variante
+        if claves:
+            modelos, anchos, metales, kilates, generos = (np.array(c, dtype=object) for c in zip(*claves))
+        else:
+            modelos = anchos = metales = kilates = generos = np.array([], dtype=object)
+        peso_v = np.array([r.peso for r in registros], dtype=np.float64)
+        price_cost_v = np.array([r.price_cost for r in registros], dtype=np.float64)
+        ct_v = np.array([r.ct for r in registros], dtype=np.float64)
+        factor_v = np.array([FACTOR_KILATES.get(k, 0.0) for k in kilates], dtype=np.float64)
+
+        # Expansión: variante (más lenta) × talla × diamante (más rápida)
+        por_variante = n_tallas * n_diam
+        i_var = np.repeat(np.arange(n_var, dtype=np.int32), por_variante)
+        i_talla = np.tile(np.repeat(np.arange(n_tallas, dtype=np.int32), n_diam), n_var)
+        i_diam = np.tile(np.arange(n_diam, dtype=np.int8), n_var * n_tallas)
+
+        adicional_t = np.array([indice.adicional_por_talla[t] for t in tallas], dtype=np.float64)
+        costo_d = np.array([datos.costos_diamantes.get("laboratorio", 0.0), datos.costos_diamantes.get("natural", 0.0)], dtype=np.float64)
+
+        peso = peso_v[i_var]
+        ct = ct_v[i_var]
+        factor = factor_v[i_var]
+        valido = (peso > 0) & (factor > 0)
+        costo_diamante = np.where(valido, costo_d[i_diam], 0.0)
+        con_diamante = valido & (ct > 0) & (costo_diamante > 0)
+        monto_diamantes = np.where(con_diamante, ct * costo_diamante, 0.0)
+        # Sin diamantes el tipo efectivo se fuerza a Laboratorio, como en el formulario
+        diamante_efectivo = np.where(valido & ~con_diamante, 0, i_diam).astype(np.int8)
+        monto_fijo = np.where(valido, price_cost_v[i_var] + adicional_t[i_talla] + monto_diamantes, 0.0)
+
+        columnas = {
+            "i_variante": i_var,
+            "i_talla": i_talla,
+            "i_diamante": i_diam,
+            "i_diamante_efectivo": diamante_efectivo,
+            "peso": peso,
+            "factor": factor,
+            "ct": ct,
+            "price_cost": price_cost_v[i_var],
+            "adicional": adicional_t[i_talla],
+            "costo_diamante": costo_diamante,
+            "monto_diamantes": monto_diamantes,
+            "monto_fijo": monto_fijo,
+            "valido": valido,
+        }
+        tablas = {"modelo": modelos, "ancho": anchos, "metal": metales, "kilates": kilates, "genero": generos,
+                  "talla": np.array(tallas, dtype=object), "tipo_diamante": np.array(ORDEN_DIAMANTE, dtype=object)}
+        matriz = cls(columnas, tablas, precio_onza)
+        matriz.recalcular_oro(precio_onza)
+        return matriz
+
+    def recalcular_oro(self, precio_onza: float):
+        """Actualiza solo el término dependiente del oro (y los montos) para un nuevo precio de la onza."""
+        c = self.columnas
+        valor_gramo = precio_onza / GRAMOS_POR_ONZA if precio_onza > 0 else 0.0
+        c["monto_oro"] = np.where(c["valido"], c["peso"] * c["factor"] * valor_gramo, 0.0)
+        c["monto"] = np.where(c["valido"], c["monto_oro"] + c["monto_fijo"], 0.0)
+        c["monto_aproximado"] = np.where(c["monto"] > 0, np.ceil(c["monto"] / 10.0) * 10.0, 0.0)
+        self.precio_onza = precio_onza
+
+    # --- Consulta y exportación ---
+
+    def columna_texto(self, nombre: str) -> np.ndarray:
+        """Columna de texto expandida (modelo, ancho, metal, kilates, genero, talla, tipo_diamante)."""
+        if nombre == "talla":
+            return self.tablas["talla"][self.columnas["i_talla"]]
+        if nombre == "tipo_diamante":
+            return self.tablas["tipo_diamante"][self.columnas["i_diamante_efectivo"]]
+        return self.tablas[nombre][self.columnas["i_variante"]]
+
+    def mascara(self, modelo: Optional[str] = None, metal: Optional[str] = None, ancho: Optional[str] = None,
+                kilates: Optional[str] = None, genero: Optional[str] = None, talla: Optional[str] = None,
+                tipo_diamante: Optional[str] = None) -> np.ndarray:
+        """Máscara booleana de las filas que cumplen los filtros dados (comparando sobre las tablas, no fila a fila)."""
+        mascara = np.ones(len(self), dtype=bool)
+        por_variante = {"modelo": modelo, "metal": metal, "ancho": ancho, "kilates": kilates, "genero": genero}
+        filtro_var = None
+        for nombre, valor in por_variante.items():
+            if valor is not None:
+                f = self.tablas[nombre] == valor
+                filtro_var = f if filtro_var is None else filtro_var & f
+        if filtro_var is not None:
+            mascara &= filtro_var[self.columnas["i_variante"]]
+        if talla is not None:
+            mascara &= (self.tablas["talla"] == talla)[self.columnas["i_talla"]]
+        if tipo_diamante is not None:
+            mascara &= self.columnas["i_diamante"] == ORDEN_DIAMANTE.index(tipo_diamante)
+        return mascara
+
+    def a_dataframe(self, mascara: Optional[np.ndarray] = None, columnas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Exporta (opcionalmente filtrado) a DataFrame con columnas de texto legibles."""
+        sel = slice(None) if mascara is None else mascara
+        salida = {nombre: self.columna_texto(nombre)[sel] for nombre in COLUMNAS_TEXTO}
+        salida.update({nombre: self.columnas[nombre][sel] for nombre in (columnas or COLUMNAS_NUMERICAS)})
+        return pd.DataFrame(salida)
+
+    def a_csv(self, ruta: str, mascara: Optional[np.ndarray] = None):
+        self.a_dataframe(mascara).to_csv(ruta, index=False, float_format="%.2f")
+
+
+if __name__ == "__main__":
+    from snapshot_catalogo import cargar_catalogo
+
+    parser = argparse.ArgumentParser(description="Exporta la matriz completa de precios del catálogo a CSV.")
+    parser.add_argument("salida", help="Ruta del CSV a generar")
+    parser.add_argument("--precio", type=float, required=True, help="Precio de la onza de oro (USD)")
+    parser.add_argument("--excel", default="Formulario Catalogo.xlsm")
+    parser.add_argument("--snapshot", default="Formulario Catalogo.snapshot")
+    args = parser.parse_args()
+
+    matriz = MatrizPrecios.construir(cargar_catalogo(args.excel, args.snapshot), args.precio)
+    matriz.a_csv(args.salida)
+    print(f"{len(matriz)} combinaciones escritas en {args.salida}")
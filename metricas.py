@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from flask import Flask, Response, g, has_request_context, request
+
+# Límites (segundos) de los histogramas de latencia: de 0.1 ms a 10 s
+LIMITES_LATENCIA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+ValorMedidor = Union[float, Dict[Etiquetas, float]]
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas_texto(etiquetas: Etiquetas, extra: Etiquetas = ()) -> str:
+    partes = [f'{k}="{_escapar(v)}"' for k, v in etiquetas + extra]
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Histograma:
+    """Histograma acumulativo por combinación de etiquetas (formato Prometheus)."""
+
+    def __init__(self, nombre: str, ayuda: str, limites: Tuple[float, ...] = LIMITES_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = limites
+        self._series: Dict[Etiquetas, List] = {} # etiquetas -> [conteos por cubeta..., suma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, etiquetas: Etiquetas = ()):
+        i = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [0] * (len(self.limites) + 1) + [0.0, 0]
+            serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = {etiquetas: list(serie) for etiquetas, serie in self._series.items()}
+        for etiquetas, serie in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.limites + (float("inf"),), serie):
+                acumulado += conteo
+                lineas.append(f"{self.nombre}_bucket{_etiquetas_texto(etiquetas, (('le', _numero(limite)),))} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas_texto(etiquetas)} {serie[-2]!r}")
+            lineas.append(f"{self.nombre}_count{_etiquetas_texto(etiquetas)} {serie[-1]}")
+        return lineas
+
+
+class Contador:
+    """Contador monótono por combinación de etiquetas."""
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._valores: Dict[Etiquetas, float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, etiquetas: Etiquetas = (), cantidad: float = 1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + cantidad
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            valores = dict(self._valores)
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        lineas.extend(f"{self.nombre}{_etiquetas_texto(e)} {_numero(v)}" for e, v in sorted(valores.items()))
+        return lineas
+
+
+class Medidor:
+    """Valor leído en el momento de exponer (estado de cachés, del precio, del catálogo...)."""
+
+    def __init__(self, nombre: str, ayuda: str, funcion: Callable[[], ValorMedidor], tipo: str = "gauge"):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.tipo = tipo
+
+    def exponer(self) -> List[str]:
+        valor = self.funcion()
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        if isinstance(valor, dict):
+            lineas.extend(f"{self.nombre}{_etiquetas_texto(e)} {_numero(v)}" for e, v in sorted(valor.items()))
+        elif valor is not None:
+            lineas.append(f"{self.nombre} {_numero(valor)}")
+        return lineas
+
+
+class Metricas:
+    """
+    Instrumentación de la app:
+      - tramos (`tramo("nombre")`) que se suman por petición en la cabecera Server-Timing y en un histograma;
+      - latencia y conteo de peticiones por ruta y código;
+      - medidores registrados por la app, y todo expuesto en formato Prometheus por `exponer()`.
+    Las métricas son por proceso (cada worker de gunicorn expone las suyas).
+    """
+
+    def __init__(self, app: Optional[Flask] = None, prefijo: str = "lsj"):
+        self.prefijo = prefijo
+        self.tramos = Histograma(f"{prefijo}_tramo_segundos", "Duración de los tramos instrumentados de cada petición.")
+        self.peticiones = Histograma(f"{prefijo}_peticion_segundos", "Duración total de las peticiones por ruta.")
+        self.respuestas = Contador(f"{prefijo}_respuestas_total", "Respuestas por ruta y código HTTP.")
+        self._medidores: List[Medidor] = []
+        self._histogramas: List[Histograma] = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.before_request(self._antes_de_peticion)
+        app.after_request(self._despues_de_peticion)
+
+    def medidor(self, nombre: str, ayuda: str, funcion: Callable[[], ValorMedidor], tipo: str = "gauge"):
+        """Registra un valor a leer en cada exposición; `funcion` devuelve un número o {etiquetas: número}."""
+        self._medidores.append(Medidor(f"{self.prefijo}_{nombre}", ayuda, funcion, tipo))
+
+    def histograma(self, nombre: str, ayuda: str, limites: Tuple[float, ...] = LIMITES_LATENCIA) -> Histograma:
+        """Registra un histograma de la app (p. ej. latencias fuera de las peticiones) y lo retorna para observar en él."""
+        histograma = Histograma(f"{self.prefijo}_{nombre}", ayuda, limites)
+        self._histogramas.append(histograma)
+        return histograma
+
+    # --- Tramos ---
+
+    @contextmanager
+    def tramo(self, nombre: str) -> Iterator[None]:
+        """Mide un bloque; los tramos con el mismo nombre en una petición se acumulan."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.tramos.observar(duracion, (("tramo", nombre),))
+            if has_request_context():
+                tramos = g.setdefault("_tramos", {})
+                tramos[nombre] = tramos.get(nombre, 0.0) + duracion
+
+    # --- Hooks de Flask ---
+
+    def _antes_de_peticion(self):
+        g._inicio_peticion = time.perf_counter()
+
+    def _despues_de_peticion(self, respuesta: Response) -> Response:
+        inicio = g.pop("_inicio_peticion", None)
+        if inicio is None:
+            return respuesta
+        duracion = time.perf_counter() - inicio
+        ruta = request.endpoint or "desconocida"
+        self.peticiones.observar(duracion, (("ruta", ruta),))
+        self.respuestas.incrementar((("ruta", ruta), ("codigo", str(respuesta.status_code))))
+
+        partes = [f"{nombre};dur={segundos * 1000:.2f}" for nombre, segundos in g.pop("_tramos", {}).items()]
+        partes.append(f"total;dur={duracion * 1000:.2f}")
+        respuesta.headers["Server-Timing"] = ", ".join(partes)
+        return respuesta
+
+    # --- Exposición ---
+
+    def exponer(self) -> str:
+        lineas = self.peticiones.exponer() + self.respuestas.exponer() + self.tramos.exponer()
+        for histograma in self._histogramas:
+            lineas.extend(histograma.exponer())
+        for medidor in self._medidores:
+            try:
+                lineas.extend(medidor.exponer())
+            except Exception as e: # Un medidor roto no debe tumbar /metrics
+                lineas.append(f"# {medidor.nombre} no disponible: {e}")
+        return "\n".join(lineas) + "\n"
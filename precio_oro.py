@@ -0,0 +1,237 @@
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from historial_precio_oro import HistorialPrecioOro
+
+DEFAULT_GOLD_PRICE = 5600.00 # USD por Onza (Valor por defecto/fallback)
+
+GOLD_API_URL = "https://www.goldapi.io/api/XAU/USD"
+GOLD_API_KEY = os.getenv("GOLD_API_KEY", "goldapi-4g9e8p719mgvhodho-io")
+
+# Intervalos (segundos) configurables por entorno
+INTERVALO_REFRESCO = float(os.getenv("PRECIO_ORO_INTERVALO", "300"))
+TTL_PRECIO = float(os.getenv("PRECIO_ORO_TTL", "900"))
+TIMEOUT_API = float(os.getenv("PRECIO_ORO_TIMEOUT", "5"))
+UMBRAL_FALLOS = int(os.getenv("PRECIO_ORO_UMBRAL_FALLOS", "3"))
+ENFRIAMIENTO_CIRCUITO = float(os.getenv("PRECIO_ORO_ENFRIAMIENTO", "600"))
+
+
+@dataclass(frozen=True)
+class LecturaPrecio:
+    """Precio servido desde memoria: valor, estado (live/stale/fallback) y edad en segundos."""
+    precio: float
+    status: str
+    edad: Optional[float]
+
+
+# --------------------- PROVEEDORES ---------------------
+
+class ProveedorGoldApi:
+    """Consulta goldapi.io reutilizando una sesión HTTP con conexiones keep-alive."""
+
+    registrar_historial = True # Sus precios son reales: se anexan al historial persistente
+
+    def __init__(self, api_key: str = GOLD_API_KEY, url: str = GOLD_API_URL, timeout: float = TIMEOUT_API):
+        self.url = url
+        self.timeout = timeout
+        self.api_key = api_key
+        self._session = None
+
+    @property
+    def session(self):
+        """Sesión HTTP creada en la primera consulta (en el hilo de fondo): importar la app no carga requests."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.headers.update({"x-access-token": self.api_key, "Content-Type": "application/json"})
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def obtener(self) -> float:
+        response = self.session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        price = response.json().get("price")
+        if price is None or math.isnan(float(price)) or float(price) <= 0:
+            raise ValueError(f"Respuesta sin precio válido: {price!r}")
+        return float(price)
+
+
+class ProveedorFijo:
+    """Proveedor local (pruebas/benchmarks): devuelve un precio fijo o lanza el error configurado."""
+
+    registrar_historial = False
+
+    def __init__(self, precio: float = DEFAULT_GOLD_PRICE, error: Optional[Exception] = None):
+        self.precio = precio
+        self.error = error
+        self.llamadas = 0
+
+    def obtener(self) -> float:
+        self.llamadas += 1
+        if self.error is not None:
+            raise self.error
+        return float(self.precio)
+
+
+# --------------------- SERVICIO ---------------------
+
+class ServicioPrecioOro:
+    """
+    Mantiene en memoria el último precio bueno y lo refresca en un hilo de fondo.
+    Las peticiones solo leen la memoria; nunca esperan a la API externa.
+    Tras `umbral_fallos` errores seguidos el circuito se abre durante `enfriamiento` segundos.
+    Con `historial`, arranca con el último precio guardado (con su edad real, sin red) y anexa cada precio
+    nuevo; si el proveedor falla, adopta un precio más reciente que haya guardado otro worker.
+    """
+
+    def __init__(self, proveedor, intervalo: float = INTERVALO_REFRESCO, ttl: float = TTL_PRECIO,
+                 umbral_fallos: int = UMBRAL_FALLOS, enfriamiento: float = ENFRIAMIENTO_CIRCUITO,
+                 precio_defecto: float = DEFAULT_GOLD_PRICE, historial: Optional[HistorialPrecioOro] = None,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.proveedor = proveedor
+        self.intervalo = intervalo
+        self.ttl = ttl
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento = enfriamiento
+        self.precio_defecto = precio_defecto
+        self.historial = historial
+        self.reloj = reloj # Reloj monótono (inyectable en pruebas)
+
+        self._lock = threading.Lock()
+        self._precio: Optional[float] = None
+        self._obtenido_en: Optional[float] = None # self.reloj() de la última lectura buena
+        self._fallos_consecutivos = 0
+        self._circuito_abierto_hasta = 0.0
+        self.refrescos_ok = 0
+        self.refrescos_fallidos = 0
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._instante: Optional[float] = None # time.time() del precio en memoria (para compararlo con el historial)
+        self.cargar_historial()
+
+    # --- Lectura (ruta caliente) ---
+
+    def lectura(self) -> LecturaPrecio:
+        """Devuelve el precio en memoria con su estado y edad. No hace I/O."""
+        self.iniciar()
+        with self._lock:
+            precio, obtenido_en = self._precio, self._obtenido_en
+        if precio is None:
+            return LecturaPrecio(self.precio_defecto, "fallback", None)
+        edad = self.reloj() - obtenido_en
+        return LecturaPrecio(precio, "live" if edad <= self.ttl else "stale", edad)
+
+    def circuito_abierto(self) -> bool:
+        return self.reloj() < self._circuito_abierto_hasta
+
+    # --- Refresco ---
+
+    def refrescar(self) -> bool:
+        """Consulta al proveedor una vez (respetando el circuito). Retorna True si hubo precio nuevo."""
+        if self.circuito_abierto():
+            return False
+        try:
+            precio = self.proveedor.obtener()
+        except Exception as e:
+            with self._lock:
+                self.refrescos_fallidos += 1
+                self._fallos_consecutivos += 1
+                if self._fallos_consecutivos >= self.umbral_fallos:
+                    self._circuito_abierto_hasta = self.reloj() + self.enfriamiento
+                    logging.error(f"Circuito de precio del oro abierto por {self.enfriamiento:.0f}s tras {self._fallos_consecutivos} fallos.")
+            logging.error(f"Error al obtener precio del oro: {e}. Se mantiene el último precio conocido.")
+            self.cargar_historial()
+            return False
+
+        self.publicar(precio)
+        self.refrescos_ok += 1
+        if self.historial is not None and getattr(self.proveedor, "registrar_historial", False):
+            try:
+                self.historial.registrar(precio, self._instante)
+            except Exception as e: # El historial es un extra: nunca debe impedir servir el precio
+                logging.error(f"No se pudo guardar el precio del oro en el historial: {e}")
+        return True
+
+    def cargar_historial(self) -> bool:
+        """Publica el último precio del historial si es más reciente que el de memoria (no hace red)."""
+        if self.historial is None:
+            return False
+        try:
+            punto = self.historial.ultimo()
+        except Exception as e:
+            logging.error(f"No se pudo leer el historial del precio del oro: {e}")
+            return False
+        with self._lock:
+            if punto is None or (self._instante is not None and punto.instante <= self._instante):
+                return False
+        edad = max(time.time() - punto.instante, 0.0)
+        # Solo el precio y su edad: no cierra el circuito ni reinicia los fallos del proveedor
+        with self._lock:
+            self._precio = punto.precio
+            self._obtenido_en = self.reloj() - edad
+            self._instante = punto.instante
+        logging.info(f"Precio del oro desde el historial: {punto.precio:,.2f} ({edad:.0f}s de antigüedad).")
+        return True
+
+    def publicar(self, precio: float, obtenido_en: Optional[float] = None):
+        """Guarda un precio bueno en memoria y reinicia el contador de fallos."""
+        with self._lock:
+            self._precio = float(precio)
+            self._obtenido_en = self.reloj() if obtenido_en is None else obtenido_en
+            self._instante = time.time() - (self.reloj() - self._obtenido_en)
+            self._fallos_consecutivos = 0
+            self._circuito_abierto_hasta = 0.0
+
+    def cambiar_proveedor(self, proveedor, refrescar: bool = True):
+        """Sustituye el proveedor (p. ej. por un ProveedorFijo en pruebas)."""
+        with self._lock:
+            self.proveedor = proveedor
+            self._precio = None
+            self._obtenido_en = None
+            self._instante = None
+            self._fallos_consecutivos = 0
+            self._circuito_abierto_hasta = 0.0
+        if refrescar:
+            self.refrescar()
+
+    # --- Hilo de fondo ---
+
+    def iniciar(self):
+        """Arranca el hilo de refresco (una vez por proceso; se relanza tras un fork)."""
+        pid = os.getpid()
+        if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+                return
+            self._pid = pid
+            self._despertar = threading.Event()
+            self._hilo = threading.Thread(target=self._bucle, name="precio-oro", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        despertar, hilo = self._despertar, self._hilo
+        self._hilo = None
+        despertar.set()
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout=1)
+
+    def _bucle(self):
+        despertar = self._despertar
+        while not despertar.is_set():
+            self.refrescar()
+            espera = self.intervalo
+            if self.circuito_abierto():
+                espera = max(self._circuito_abierto_hasta - self.reloj(), 0.0)
+            despertar.wait(espera)
@@ -0,0 +1,155 @@
+import math
+from typing import Dict, List, NamedTuple, Tuple
+
+from indice_catalogo import IndiceCatalogo
+
+# Factores de pureza (Kilates / 24)
+FACTOR_KILATES = {"22": 0.9167, "18": 0.75, "14": 0.5833, "10": 0.4167}
+GRAMOS_POR_ONZA = 31.1035 # Onza Troy (31.1035 gramos)
+
+GENEROS = {"DAMA": "DAMA", "LADY": "DAMA", "CABALLERO": "CABALLERO", "CAB": "CABALLERO", "GENTLEMAN": "CABALLERO"}
+TIPOS_DIAMANTE = {"LABORATORIO": "Laboratorio", "LAB": "Laboratorio", "NATURAL": "Natural"}
+
+
+def calcular_valor_gramo(valor_onza: float, pureza_factor: float, peso_gramos: float) -> Tuple[float, float]:
+    """
+    Calcula el valor del gramo de la aleación y el monto total de oro de la joya.
+    """
+    if valor_onza <= 0 or peso_gramos <= 0 or pureza_factor <= 0:
+        return 0.0, 0.0
+
+    valor_gramo_puro = valor_onza / GRAMOS_POR_ONZA
+    valor_gramo_aleacion = valor_gramo_puro * pureza_factor
+    monto_total = valor_gramo_aleacion * peso_gramos
+
+    return valor_gramo_aleacion, monto_total
+
+def calcular_monto_aproximado(monto_bruto: float) -> float:
+    """Aproxima (redondea hacia arriba) el monto al múltiplo de 10 más cercano."""
+    if monto_bruto <= 0:
+        return 0.0
+    aproximado = math.ceil(monto_bruto / 10.0) * 10.0
+    return aproximado
+
+
+class CotizacionAnillo(NamedTuple):
+    """Desglose del precio de un anillo, tal como se muestra en el formulario."""
+    peso: float
+    cost_fijo: float
+    cost_adicional: float
+    ct: float
+    tipo_diamante: str # Se fuerza a "Laboratorio" si el modelo no lleva diamantes
+    costo_diamante: float # Costo por CT aplicado
+    monto_oro: float
+    monto_diamantes: float
+    monto: float # Monto bruto (oro + costo fijo + adicional por talla + diamantes)
+
+
+def buscar_variante(indice: IndiceCatalogo, modelo: str, metal: str, ancho: str, kilates: str, talla: str, genero: str) -> Tuple[float, float, float, float]:
+    """(peso, price_cost, costo_adicional, ct) de una configuración; ceros si falta algún dato."""
+    if not all([modelo, metal, ancho, kilates, talla, genero]):
+        return 0.0, 0.0, 0.0, 0.0
+    return indice.buscar(modelo, metal, ancho, kilates, talla, genero)
+
+
+def cotizar_anillo(precio_onza: float, costos_diamantes: Dict[str, float], kilates: str, tipo_diamante: str,
+                   peso: float, cost_fijo: float, cost_adicional: float, ct: float) -> CotizacionAnillo:
+    """Aplica la fórmula del formulario: oro por pureza + PRICE COST + ADICIONAL por talla + CT × costo del diamante."""
+    monto = 0.0
+    monto_oro = 0.0
+    monto_diamantes = 0.0
+    costo_diamante_final = 0.0
+
+    if peso > 0 and precio_onza is not None and kilates in FACTOR_KILATES:
+
+        factor_pureza = FACTOR_KILATES.get(kilates, 0.0)
+
+        if tipo_diamante == "Natural":
+            costo_diamante_final = costos_diamantes.get("natural", 0.0)
+        else:
+            costo_diamante_final = costos_diamantes.get("laboratorio", 0.0)
+
+        _, monto_oro = calcular_valor_gramo(precio_onza, factor_pureza, peso)
+
+        if ct > 0 and costo_diamante_final > 0:
+            monto_diamantes = ct * costo_diamante_final
+        else:
+            monto_diamantes = 0.0
+            tipo_diamante = "Laboratorio"
+
+        monto = monto_oro + cost_fijo + cost_adicional + monto_diamantes
+
+    return CotizacionAnillo(peso, cost_fijo, cost_adicional, ct, tipo_diamante, costo_diamante_final, monto_oro, monto_diamantes, monto)
+
+
+# --------------------- COTIZACIÓN EN LOTE (API) ---------------------
+
+def normalizar_configuracion(entrada: Dict) -> Dict[str, str]:
+    """Lleva una configuración recibida por la API al formato de las claves del catálogo. Lanza ValueError si es inválida."""
+    if not isinstance(entrada, dict):
+        raise ValueError("Cada configuración debe ser un objeto JSON.")
+
+    def texto(campo: str) -> str:
+        valor = entrada.get(campo, "")
+        return "" if valor is None else str(valor).strip()
+
+    genero = GENEROS.get(texto("genero").upper())
+    if genero is None:
+        raise ValueError(f"genero inválido: {texto('genero')!r} (use DAMA o CABALLERO).")
+    tipo_diamante = TIPOS_DIAMANTE.get((texto("tipo_diamante") or "Laboratorio").upper())
+    if tipo_diamante is None:
+        raise ValueError(f"tipo_diamante inválido: {texto('tipo_diamante')!r} (use Laboratorio o Natural).")
+
+    kilates = texto("kilates").upper().rstrip("K").strip()
+    if kilates not in FACTOR_KILATES:
+        raise ValueError(f"kilates inválido: {texto('kilates')!r} (opciones: {', '.join(FACTOR_KILATES)}).")
+
+    return {
+        "modelo": texto("modelo").upper(),
+        "metal": texto("metal").upper(),
+        "ancho": texto("ancho").upper().replace("MM", "").strip(),
+        "kilates": kilates,
+        "talla": texto("talla"),
+        "genero": genero,
+        "tipo_diamante": tipo_diamante,
+    }
+
+
+def cotizar_configuracion(indice: IndiceCatalogo, costos_diamantes: Dict[str, float], precio_onza: float,
+                          configuracion: Dict[str, str]) -> Tuple[Dict[str, str], CotizacionAnillo]:
+    """
+    Cotiza una configuración normalizada como una sección del formulario: sin ancho o talla se usan los que el
+    formulario autoselecciona para el modelo/metal. Retorna la configuración efectiva y su cotización. Lanza
+    ValueError si la talla no está en la hoja SIZE (se cotizaría sin su adicional, como una talla válida).
+    """
+    c = dict(configuracion)
+    if not c["ancho"] or not c["talla"]:
+        opciones = indice.opciones(c["modelo"], c["metal"])
+        c["ancho"] = c["ancho"] or opciones.ancho_defecto
+        c["talla"] = c["talla"] or opciones.talla_defecto
+    if c["talla"] not in indice.adicional_por_talla:
+        raise ValueError(f"talla inválida: {c['talla']!r} (no está en la hoja SIZE del catálogo).")
+    peso, cost_fijo, cost_adicional, ct = buscar_variante(indice, c["modelo"], c["metal"], c["ancho"], c["kilates"], c["talla"], c["genero"])
+    cotizacion = cotizar_anillo(precio_onza, costos_diamantes, c["kilates"], c["tipo_diamante"], peso, cost_fijo, cost_adicional, ct)
+    c["tipo_diamante"] = cotizacion.tipo_diamante
+    return c, cotizacion
+
+
+def cotizar_lote(indice: IndiceCatalogo, costos_diamantes: Dict[str, float], precio_onza: float, configuraciones: List[Dict]) -> List[Dict]:
+    """
+    Cotiza una lista de configuraciones como el formulario (con su autoselección de ancho y talla); cada
+    resultado lleva la configuración efectiva. Los errores de validación se devuelven por elemento.
+    """
+    resultados = []
+    for entrada in configuraciones:
+        try:
+            c, cotizacion = cotizar_configuracion(indice, costos_diamantes, precio_onza, normalizar_configuracion(entrada))
+        except ValueError as e:
+            resultados.append({"entrada": entrada, "error": str(e)})
+            continue
+
+        resultado = {"configuracion": c, "encontrado": cotizacion.peso > 0}
+        resultado.update(cotizacion._asdict())
+        resultado["monto_aproximado"] = calcular_monto_aproximado(cotizacion.monto)
+        resultados.append(resultado)
+    return resultados
@@ -0,0 +1,355 @@
+"""
+Presupuestos imprimibles en lote (ferias): un documento HTML (y PDF, con weasyprint instalado) por fila de
+un CSV, con la misma cotización que el formulario y un único precio del oro fijado para todo el lote.
+
+Las filas se reparten en tandas entre un pool de procesos; cada worker abre el catálogo (mapeado o
+snapshot, ya compilados por el proceso principal) y compila la plantilla una vez. La salida se puede
+reanudar: indice.csv registra cada fila terminada y, al volver a lanzar el mismo comando sobre la misma
+carpeta, solo se procesan las que faltan, con el precio y las referencias guardados en lote.json. Como las
+filas se reconocen por su número, reanudar con otro CSV (o el mismo editado) se rechaza por su huella.
+
+Columnas del CSV (separado por comas o punto y coma; cabeceras sin distinguir mayúsculas):
+    cliente, email, idioma (Español|English)
+    y un anillo:     modelo, metal, ancho, kilates, talla, genero, tipo_diamante
+    o dos secciones: dama_modelo, dama_metal, ..., cab_modelo, cab_metal, ...
+Como en el formulario, sin ancho o talla se usan los autoseleccionados y sin kilates, 14. Una talla que no
+está en la hoja SIZE es un error de la fila (columna error de indice.csv), no un presupuesto sin adicional.
+
+Uso (desde la raíz del repo):
+    python presupuestos_lote.py clientes.csv --salida presupuestos/ [--precio 2650] [--formato html|pdf|ambos]
+                                [--procesos 4] [--tanda 200]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from catalogo import DatosCatalogo
+from catalogo_mapeado import CATALOGO_MAPEADO_PATH, cargar_catalogo_mapeado
+from cotizaciones_guardadas import CotizacionGuardada, nueva_cotizacion
+from historial_precio_oro import HISTORIAL_PATH, HistorialPrecioOro
+from precios import calcular_monto_aproximado, cotizar_configuracion, normalizar_configuracion
+from snapshot_catalogo import cargar_catalogo
+
+try:
+    from weasyprint import HTML as DocumentoWeasy
+except ImportError: # Opcional: sin weasyprint solo se generan documentos HTML
+    DocumentoWeasy = None
+
+EXCEL_PATH = os.getenv("EXCEL_PATH", "Formulario Catalogo.xlsm")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "Formulario Catalogo.snapshot")
+PLANTILLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TANDA = 200 # Filas por tarea del pool: amortiza el envío entre procesos sin dejar workers ociosos al final
+COLUMNAS_INDICE = ["fila", "referencia", "archivo", "cliente", "email", "monto_total", "error"]
+SECCIONES = {"dama": "DAMA", "cab": "CABALLERO"}
+CAMPOS_ANILLO = ("modelo", "metal", "ancho", "kilates", "talla", "genero", "tipo_diamante")
+
+
+class ResultadoFila(NamedTuple):
+    fila: int
+    referencia: str
+    archivo: str # Sin extensión, relativo a la carpeta de salida; vacío si la fila tiene error
+    cliente: str
+    email: str
+    monto_total: float
+    error: str
+
+
+def textos_presupuesto(idioma: str) -> Dict[str, str]:
+    """Textos del documento en el idioma del cliente."""
+    t = {
+        "titulo": "PRESUPUESTO",
+        "cliente": "Cliente",
+        "fecha": "Fecha",
+        "referencia": "Referencia",
+        "anillo": "Anillo",
+        "dama": "Dama",
+        "cab": "Caballero",
+        "talla": "Talla",
+        "oro": "Oro",
+        "costo_fijo": "Costo fijo",
+        "adicional": "Adicional por talla",
+        "diamantes": "Diamantes",
+        "subtotal": "Subtotal",
+        "total": "Monto total del presupuesto",
+        "nota": "Calculado con el oro a ${precio} USD la onza. Los precios pueden variar con el precio del oro.",
+    }
+    if idioma != "Español":
+        t.update({
+            "titulo": "ESTIMATE",
+            "cliente": "Client",
+            "fecha": "Date",
+            "referencia": "Reference",
+            "anillo": "Ring",
+            "dama": "Lady",
+            "cab": "Gentleman",
+            "talla": "Size",
+            "oro": "Gold",
+            "costo_fijo": "Fixed cost",
+            "adicional": "Size surcharge",
+            "diamantes": "Diamonds",
+            "total": "Total estimate amount",
+            "nota": "Calculated with gold at ${precio} USD per ounce. Prices may change with the price of gold.",
+        })
+    return t
+
+
+# --------------------- COTIZACIÓN DE UNA FILA ---------------------
+
+def configuraciones_fila(fila: Dict[str, str]) -> List[Tuple[str, Dict[str, str]]]:
+    """(tipo de sección, configuración normalizada) de cada anillo de la fila. Lanza ValueError si la fila es inválida."""
+    def anillo(prefijo: str, genero: Optional[str] = None) -> Dict[str, str]:
+        entrada = {campo: fila.get(prefijo + campo, "") for campo in CAMPOS_ANILLO}
+        entrada["genero"] = genero or entrada["genero"]
+        entrada["kilates"] = entrada["kilates"] or "14"
+        return normalizar_configuracion(entrada)
+
+    anillos = [(tipo, anillo(f"{tipo}_", genero)) for tipo, genero in SECCIONES.items() if fila.get(f"{tipo}_modelo")]
+    if fila.get("modelo"):
+        c = anillo("")
+        anillos.append(("dama" if c["genero"] == "DAMA" else "cab", c))
+    if not anillos:
+        raise ValueError("La fila no tiene ningún modelo.")
+    return anillos
+
+
+def cotizar_fila(datos: DatosCatalogo, precio_onza: float, fila: Dict[str, str]) -> CotizacionGuardada:
+    """
+    La cotización que mostraría el formulario con esos anillos, al precio del lote. Lanza ValueError si alguno
+    no existe o su talla no está en la hoja SIZE (el presupuesto saldría sin el adicional por talla).
+    """
+    anillos = []
+    for tipo, configuracion in configuraciones_fila(fila):
+        try:
+            efectiva, cotizacion = cotizar_configuracion(datos.indice, datos.costos_diamantes, precio_onza, configuracion)
+        except ValueError as e:
+            raise ValueError(f"{configuracion['modelo']} {configuracion['metal']} {configuracion['genero']}: {e}") from None
+        if cotizacion.peso <= 0: # El formulario mostraría $0; un presupuesto impreso así no sirve
+            raise ValueError(f"{efectiva['modelo']} {efectiva['metal']} {efectiva['ancho']} mm {efectiva['kilates']}K "
+                             f"{efectiva['genero']} talla {efectiva['talla']} no está en el catálogo.")
+        anillos.append({"tipo": tipo, **efectiva, **cotizacion._asdict()})
+    monto_bruto = sum(a["monto"] for a in anillos)
+    idioma = "English" if fila.get("idioma", "").strip().lower() in ("english", "en", "inglés", "ingles") else "Español"
+    return nueva_cotizacion(fila.get("cliente", ""), fila.get("email", ""), idioma, precio_onza, "fijo", 0,
+                            anillos, monto_bruto, calcular_monto_aproximado(monto_bruto))
+
+
+def nombre_archivo(numero: int, cliente: str) -> str:
+    """'000123_ana-perez': número de fila (orden y unicidad) y cliente legible, solo ASCII."""
+    ascii_ = unicodedata.normalize("NFKD", cliente).encode("ascii", "ignore").decode()
+    return f"{numero:06d}_{re.sub(r'[^a-z0-9]+', '-', ascii_.lower()).strip('-')[:40]}".rstrip("_")
+
+
+def _escribir_atomico(ruta: str, contenido: bytes):
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+    os.replace(temporal, ruta) # Un archivo con su nombre final siempre está completo
+
+
+# --------------------- WORKERS DEL POOL ---------------------
+
+_worker: Dict = {}
+
+
+def _iniciar_worker(ruta_excel: str, ruta_snapshot: str, ruta_mapeado: str, precio_onza: float, salida: str,
+                    formatos: Tuple[str, ...], prefijo: str):
+    """Una vez por proceso: catálogo (ya compilado por el principal), plantilla y parámetros del lote."""
+    entorno = Environment(loader=FileSystemLoader(PLANTILLAS), autoescape=select_autoescape())
+    entorno.filters["dinero"] = lambda valor: f"{valor:,.2f}"
+    _worker.update(datos=cargar_datos(ruta_excel, ruta_snapshot, ruta_mapeado), plantilla=entorno.get_template("presupuesto.html"),
+                   precio_onza=precio_onza, salida=salida, formatos=formatos, prefijo=prefijo)
+
+
+def _procesar_tanda(tanda: List[Tuple[int, Dict[str, str]]]) -> List[ResultadoFila]:
+    datos, plantilla, salida = _worker["datos"], _worker["plantilla"], _worker["salida"]
+    resultados = []
+    for numero, fila in tanda:
+        referencia = f"{_worker['prefijo']}-{numero:06d}"
+        cliente, email = fila.get("cliente", "").strip(), fila.get("email", "").strip()
+        try:
+            cotizacion = cotizar_fila(datos, _worker["precio_onza"], fila)._replace(referencia=referencia)
+        except ValueError as e:
+            resultados.append(ResultadoFila(numero, referencia, "", cliente, email, 0.0, str(e)))
+            continue
+        archivo = nombre_archivo(numero, cliente)
+        html = plantilla.render(t=textos_presupuesto(cotizacion.idioma), c=cotizacion)
+        if "html" in _worker["formatos"]:
+            _escribir_atomico(os.path.join(salida, archivo + ".html"), html.encode("utf-8"))
+        if "pdf" in _worker["formatos"]:
+            _escribir_atomico(os.path.join(salida, archivo + ".pdf"), DocumentoWeasy(string=html, base_url=PLANTILLAS).write_pdf())
+        resultados.append(ResultadoFila(numero, referencia, archivo, cliente, email, cotizacion.monto_total, ""))
+    return resultados
+
+
+# --------------------- LOTE ---------------------
+
+def cargar_datos(ruta_excel: str, ruta_snapshot: str, ruta_mapeado: str) -> DatosCatalogo:
+    """El catálogo como lo carga la app: archivo mapeado si está configurado, si no el snapshot (compilándolos si hace falta)."""
+    if ruta_mapeado:
+        return cargar_catalogo_mapeado(ruta_excel, ruta_snapshot, ruta_mapeado)
+    return cargar_catalogo(ruta_excel, ruta_snapshot)
+
+
+def leer_filas(ruta_csv: str) -> List[Dict[str, str]]:
+    with open(ruta_csv, newline="", encoding="utf-8-sig") as f:
+        muestra = f.read(8192)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.DictReader(f, dialect=dialecto)
+        return [{(k or "").strip().lower(): (v or "").strip() for k, v in fila.items()} for fila in lector]
+
+
+def huella_csv(ruta_csv: str) -> str:
+    """SHA-256 del contenido del CSV: reanudar solo tiene sentido con las mismas filas en el mismo orden."""
+    huella = hashlib.sha256()
+    with open(ruta_csv, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+def preparar_salida(salida: str, precio_onza: Optional[float], formatos: Tuple[str, ...], ruta_csv: str) -> Dict:
+    """Crea la carpeta y lote.json, o lee el de una ejecución anterior para reanudarla con el mismo CSV y precio."""
+    os.makedirs(salida, exist_ok=True)
+    ruta = os.path.join(salida, "lote.json")
+    huella = huella_csv(ruta_csv)
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            lote = json.load(f)
+        # Lotes anteriores a la huella: al menos la misma ruta
+        if lote.get("csv_sha256", huella) != huella or ("csv_sha256" not in lote and lote["csv"] != os.path.abspath(ruta_csv)):
+            raise SystemExit(f"'{salida}' se generó con otro CSV ({lote['csv']}) o con una versión distinta de ese archivo; "
+                             "use otra carpeta para otro CSV.")
+        if precio_onza is not None and precio_onza != lote["precio_onza"]:
+            raise SystemExit(f"'{salida}' se generó con el oro a {lote['precio_onza']}; use otra carpeta para otro precio.")
+        if tuple(lote["formatos"]) != formatos:
+            raise SystemExit(f"'{salida}' se generó en formato {'+'.join(lote['formatos'])}; use otra carpeta para otro formato.")
+        return lote
+    if precio_onza is None:
+        ultimo = HistorialPrecioOro(HISTORIAL_PATH).ultimo() if HISTORIAL_PATH else None
+        if ultimo is None:
+            raise SystemExit("No hay precio del oro en el historial; indíquelo con --precio.")
+        precio_onza = ultimo.precio
+    lote = {"precio_onza": precio_onza, "formatos": list(formatos), "prefijo": secrets.token_hex(3).upper(),
+            "csv": os.path.abspath(ruta_csv), "csv_sha256": huella, "creado": time.time()}
+    _escribir_atomico(ruta, json.dumps(lote, indent=2).encode("utf-8"))
+    return lote
+
+
+def filas_hechas(salida: str) -> Set[int]:
+    """Filas registradas en indice.csv; una línea cortada por una interrupción no cuenta."""
+    ruta = os.path.join(salida, "indice.csv")
+    if not os.path.exists(ruta):
+        return set()
+    with open(ruta, newline="", encoding="utf-8") as f:
+        return {int(fila["fila"]) for fila in csv.DictReader(f) if fila.get("fila", "").isdigit() and fila.get("error") is not None}
+
+
+def tandas(pendientes: List[Tuple[int, Dict[str, str]]], tamano: int) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    for inicio in range(0, len(pendientes), tamano):
+        yield pendientes[inicio:inicio + tamano]
+
+
+class Progreso:
+    """Línea de progreso en stderr, como mucho una vez por segundo."""
+
+    def __init__(self, total: int, ya_hechas: int):
+        self.total = total
+        self.hechas = ya_hechas
+        self.errores = 0
+        self._inicio = time.perf_counter()
+        self._nuevas = 0
+        self._ultimo = 0.0
+
+    def avanzar(self, resultados: List[ResultadoFila], final: bool = False):
+        self.hechas += len(resultados)
+        self._nuevas += len(resultados)
+        self.errores += sum(1 for r in resultados if r.error)
+        ahora = time.perf_counter()
+        if not final and ahora - self._ultimo < 1.0:
+            return
+        self._ultimo = ahora
+        tasa = self._nuevas / max(ahora - self._inicio, 1e-9)
+        restante = (self.total - self.hechas) / tasa if tasa else 0.0
+        print(f"\r{self.hechas}/{self.total} ({self.hechas * 100 / max(self.total, 1):.0f}%) · {tasa:.0f}/s · "
+              f"quedan ~{restante:.0f}s · {self.errores} con error ", end="\n" if final else "", file=sys.stderr, flush=True)
+
+
+def generar(ruta_csv: str, salida: str, precio_onza: Optional[float] = None, formatos: Tuple[str, ...] = ("html",),
+            procesos: Optional[int] = None, tamano_tanda: int = TANDA, ruta_excel: str = EXCEL_PATH,
+            ruta_snapshot: str = SNAPSHOT_PATH, ruta_mapeado: str = CATALOGO_MAPEADO_PATH) -> Progreso:
+    if "pdf" in formatos and DocumentoWeasy is None:
+        raise SystemExit("Para generar PDF instale weasyprint (pip install weasyprint).")
+    filas = leer_filas(ruta_csv)
+    lote = preparar_salida(salida, precio_onza, formatos, ruta_csv)
+    hechas = filas_hechas(salida)
+    pendientes = [(numero, fila) for numero, fila in enumerate(filas, 1) if numero not in hechas]
+    progreso = Progreso(len(filas), len(filas) - len(pendientes))
+    if not pendientes:
+        progreso.avanzar([], final=True)
+        return progreso
+
+    # Compila el snapshot/archivo mapeado una vez aquí para que los workers solo lo abran
+    cargar_datos(ruta_excel, ruta_snapshot, ruta_mapeado)
+    ruta_indice = os.path.join(salida, "indice.csv")
+    nuevo = not os.path.exists(ruta_indice)
+    if not nuevo:
+        with open(ruta_indice, "rb+") as f: # Una interrupción pudo dejar la última línea a medias
+            f.seek(0, os.SEEK_END)
+            if f.tell() and (f.seek(-1, os.SEEK_END), f.read(1))[1] != b"\n":
+                f.write(b"\n")
+    with open(ruta_indice, "a", newline="", encoding="utf-8") as indice, ProcessPoolExecutor(
+            procesos, initializer=_iniciar_worker,
+            initargs=(ruta_excel, ruta_snapshot, ruta_mapeado, lote["precio_onza"], salida, tuple(lote["formatos"]), lote["prefijo"])) as pool:
+        escritor = csv.writer(indice)
+        if nuevo:
+            escritor.writerow(COLUMNAS_INDICE)
+        futuros = [pool.submit(_procesar_tanda, tanda) for tanda in tandas(pendientes, tamano_tanda)]
+        for futuro in as_completed(futuros):
+            resultados = futuro.result()
+            # Solo tras escribir sus documentos una fila entra en el índice (y no se repite al reanudar)
+            escritor.writerows([r.fila, r.referencia, r.archivo, r.cliente, r.email, f"{r.monto_total:.2f}", r.error] for r in resultados)
+            indice.flush()
+            progreso.avanzar(resultados)
+    progreso.avanzar([], final=True)
+    return progreso
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Genera un presupuesto imprimible por fila de un CSV.")
+    parser.add_argument("csv")
+    parser.add_argument("--salida", required=True, help="Carpeta de salida; relanzar sobre la misma carpeta reanuda el lote")
+    parser.add_argument("--precio", type=float, help="Precio de la onza para todo el lote (por defecto, el último del historial)")
+    parser.add_argument("--formato", choices=["html", "pdf", "ambos"], default="html")
+    parser.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument("--tanda", type=int, default=TANDA, help="Filas por tarea del pool")
+    parser.add_argument("--excel", default=EXCEL_PATH)
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH)
+    parser.add_argument("--mapeado", default=CATALOGO_MAPEADO_PATH)
+    args = parser.parse_args()
+
+    formatos = ("html", "pdf") if args.formato == "ambos" else (args.formato,)
+    inicio = time.perf_counter()
+    progreso = generar(args.csv, args.salida, args.precio, formatos, args.procesos, args.tanda, args.excel, args.snapshot, args.mapeado)
+    print(f"{progreso.hechas} filas en '{args.salida}' ({progreso.errores} con error en esta ejecución, ver indice.csv) "
+          f"en {time.perf_counter() - inicio:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
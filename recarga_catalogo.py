@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from catalogo import DatosCatalogo, datos_vacios
+from catalogo_mapeado import cargar_catalogo_mapeado
+from snapshot_catalogo import cargar_catalogo
+
+INTERVALO_RECARGA = float(os.getenv("CATALOGO_INTERVALO_RECARGA", "30"))
+
+# (mtime_ns, tamaño, sha1) del libro Excel; None si no existe
+FirmaLibro = Optional[Tuple[int, int, str]]
+
+
+@dataclass(frozen=True)
+class CatalogoVersionado:
+    """Versión inmutable del catálogo. Se publica completa con un único cambio de referencia."""
+    generacion: int
+    datos: DatosCatalogo
+    firma: FirmaLibro
+    cargado_en: float
+
+
+def _hash_archivo(ruta: str) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class RecargadorCatalogo:
+    """
+    Vigila el libro Excel (mtime y, si cambió, su hash) y recarga el catálogo en segundo plano.
+    Un fallo conserva la versión anterior y queda recordado para no reintentar en cada petición.
+    Con `ruta_mapeado` cada versión se sirve desde el catálogo mapeado en memoria (catalogo_mapeado.py).
+    """
+
+    def __init__(self, ruta_excel: str, ruta_snapshot: str, intervalo: float = INTERVALO_RECARGA,
+                 ruta_mapeado: Optional[str] = None):
+        self.ruta_excel = ruta_excel
+        self.ruta_snapshot = ruta_snapshot
+        self.ruta_mapeado = ruta_mapeado
+        self.intervalo = intervalo
+
+        self._actual: Optional[CatalogoVersionado] = None
+        self._firma_fallida: FirmaLibro = None
+        self._hay_fallo = False
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._suscriptores: List[Callable[["CatalogoVersionado"], None]] = []
+
+    def suscribir(self, funcion: Callable[["CatalogoVersionado"], None]):
+        """Registra una función a llamar cada vez que se publica una nueva generación (p. ej. invalidar cachés)."""
+        self._suscriptores.append(funcion)
+
+    # --- Lectura (ruta caliente) ---
+
+    def actual(self) -> CatalogoVersionado:
+        """Versión publicada del catálogo; la primera llamada la carga de forma síncrona."""
+        actual = self._actual
+        if actual is None:
+            self.comprobar()
+            actual = self._actual
+        self.iniciar()
+        return actual
+
+    @property
+    def generacion(self) -> int:
+        return self.actual().generacion
+
+    # --- Recarga ---
+
+    def _firma(self, anterior: FirmaLibro) -> FirmaLibro:
+        """Firma actual del libro; solo recalcula el hash si cambió mtime o tamaño."""
+        try:
+            st = os.stat(self.ruta_excel)
+        except OSError:
+            return None
+        if anterior is not None and anterior[:2] == (st.st_mtime_ns, st.st_size):
+            return anterior
+        return st.st_mtime_ns, st.st_size, _hash_archivo(self.ruta_excel)
+
+    def comprobar(self, forzar: bool = False) -> bool:
+        """Recarga si el libro cambió. Retorna True si se publicó una nueva generación."""
+        with self._lock:
+            actual = self._actual
+            referencia = self._firma_fallida if self._hay_fallo else (actual.firma if actual else None)
+            try:
+                firma = self._firma(referencia)
+            except OSError as e:
+                logging.error(f"No se pudo leer la firma de '{self.ruta_excel}': {e}")
+                return False
+
+            if not forzar and actual is not None:
+                if self._hay_fallo and firma == self._firma_fallida:
+                    return False
+                if not self._hay_fallo and firma == actual.firma:
+                    return False
+                if not self._hay_fallo and firma is not None and actual.firma is not None and firma[2] == actual.firma[2]:
+                    if firma != actual.firma:
+                        # Solo cambió el mtime (mismo contenido): se actualiza la firma sin recargar
+                        self._actual = CatalogoVersionado(actual.generacion, actual.datos, firma, actual.cargado_en)
+                    return False
+
+            try:
+                if self.ruta_mapeado:
+                    datos = cargar_catalogo_mapeado(self.ruta_excel, self.ruta_snapshot, self.ruta_mapeado)
+                else:
+                    datos = cargar_catalogo(self.ruta_excel, self.ruta_snapshot)
+            except Exception as e:
+                logging.error(f"Error CRÍTICO al leer el archivo Excel: {e}")
+                self._firma_fallida = firma
+                self._hay_fallo = True
+                if actual is None:
+                    # Sin versión previa: se publica un catálogo vacío para no reintentar por petición
+                    self._actual = CatalogoVersionado(0, datos_vacios(), None, time.time())
+                return False
+
+            publicado = self._publicar(datos, firma)
+            logging.info(f"Catálogo cargado (generación {publicado.generacion}, {len(datos.indice)} variantes).")
+
+        self._notificar(publicado)
+        return True
+
+    def publicar(self, datos: DatosCatalogo, firma: FirmaLibro = None) -> CatalogoVersionado:
+        """Publica datos ya cargados como nueva generación (p. ej. un catálogo sintético en benchmarks)."""
+        with self._lock:
+            publicado = self._publicar(datos, firma)
+        self._notificar(publicado)
+        return publicado
+
+    def _publicar(self, datos: DatosCatalogo, firma: FirmaLibro) -> CatalogoVersionado:
+        actual = self._actual
+        generacion = actual.generacion + 1 if actual is not None else 1
+        self._actual = CatalogoVersionado(generacion, datos, firma, time.time())
+        self._firma_fallida = None
+        self._hay_fallo = False
+        return self._actual
+
+    def _notificar(self, publicado: CatalogoVersionado):
+        for funcion in self._suscriptores:
+            try:
+                funcion(publicado)
+            except Exception as e:
+                logging.error(f"Error notificando la recarga del catálogo: {e}")
+
+    # --- Hilo de fondo ---
+
+    def iniciar(self):
+        """Arranca el hilo de vigilancia (una vez por proceso; se relanza tras un fork)."""
+        pid = os.getpid()
+        if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._pid == pid and self._hilo.is_alive():
+                return
+            self._pid = pid
+            self._despertar = threading.Event()
+            self._hilo = threading.Thread(target=self._bucle, name="recarga-catalogo", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        despertar, hilo = self._despertar, self._hilo
+        self._hilo = None
+        despertar.set()
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout=1)
+
+    def _bucle(self):
+        despertar = self._despertar
+        while not despertar.wait(self.intervalo):
+            try:
+                self.comprobar()
+            except Exception as e:
+                logging.error(f"Error en la recarga del catálogo: {e}")
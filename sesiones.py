@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, Request, Response
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# Configuración por entorno: sqlite (varios workers), memoria (un solo proceso) o cookie (sesión firmada de Flask)
+SESION_BACKEND = os.getenv("SESION_BACKEND", "sqlite")
+SESIONES_PATH = os.getenv("SESIONES_PATH", "sesiones.sqlite3")
+MAX_SESIONES_MEMORIA = int(os.getenv("SESION_MAX_MEMORIA", "10000"))
+PURGA_CADA = 500 # Escrituras entre purgas de sesiones caducadas en SQLite
+
+Datos = Dict[str, object]
+
+
+class SesionServidor(CallbackDict, SessionMixin):
+    """Sesión cuyo contenido vive en el servidor; recuerda lo leído para escribir solo si cambia."""
+
+    def __init__(self, datos: Optional[Datos] = None, sid: Optional[str] = None):
+        super().__init__(datos or {}, lambda _sesion: setattr(self, "modified", True))
+        self.sid = sid
+        self.nueva = sid is None
+        self.original: Datos = dict(datos or {})
+        self.modified = False
+
+    def cambio(self) -> bool:
+        """Los valores difieren de los leídos (reasignar el mismo valor no cuenta)."""
+        return self.modified and dict(self) != self.original
+
+
+# --------------------- ALMACENES ---------------------
+
+class AlmacenMemoria:
+    """LRU acotada en memoria con caducidad; solo sirve con un proceso (cada worker tendría la suya)."""
+
+    def __init__(self, ttl: float, max_entradas: int = MAX_SESIONES_MEMORIA):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, Tuple[Datos, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.lecturas = 0
+        self.escrituras = 0
+
+    def leer(self, sid: str) -> Optional[Datos]:
+        ahora = time.time()
+        with self._lock:
+            self.lecturas += 1
+            entrada = self._entradas.get(sid)
+            if entrada is None:
+                return None
+            datos, expira = entrada
+            if expira <= ahora:
+                del self._entradas[sid]
+                return None
+            # Leer renueva la caducidad (deslizante) y la posición en la LRU
+            self._entradas[sid] = (datos, ahora + self.ttl)
+            self._entradas.move_to_end(sid)
+            return dict(datos)
+
+    def guardar(self, sid: str, datos: Datos):
+        with self._lock:
+            self.escrituras += 1
+            self._entradas[sid] = (dict(datos), time.time() + self.ttl)
+            self._entradas.move_to_end(sid)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def borrar(self, sid: str):
+        with self._lock:
+            self._entradas.pop(sid, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+
+class AlmacenSqlite:
+    """
+    Sesiones en un archivo SQLite (WAL) compartido por todos los workers del host. Una conexión por hilo y
+    proceso (las de antes de un fork no se reutilizan). La caducidad se renueva al leer solo cuando ha pasado
+    la mitad del TTL, así que una sesión que no cambia no escribe en cada petición. El archivo se abre (y se
+    crea) en la primera operación, no al importar la app.
+    """
+
+    def __init__(self, ruta: str, ttl: float):
+        self.ruta = ruta
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.lecturas = 0
+        self.escrituras = 0
+        self._escrituras_desde_purga = 0
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute("CREATE TABLE IF NOT EXISTS sesiones (id TEXT PRIMARY KEY, datos TEXT NOT NULL, expira REAL NOT NULL)")
+            conexion.execute("CREATE INDEX IF NOT EXISTS sesiones_expira ON sesiones (expira)")
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    def leer(self, sid: str) -> Optional[Datos]:
+        ahora = time.time()
+        with self._lock:
+            self.lecturas += 1
+        fila = self._conexion().execute("SELECT datos, expira FROM sesiones WHERE id = ?", (sid,)).fetchone()
+        if fila is None or fila[1] <= ahora:
+            return None
+        if fila[1] - ahora < self.ttl / 2:
+            self._conexion().execute("UPDATE sesiones SET expira = ? WHERE id = ?", (ahora + self.ttl, sid))
+        return json.loads(fila[0])
+
+    def guardar(self, sid: str, datos: Datos):
+        conexion = self._conexion()
+        conexion.execute("INSERT OR REPLACE INTO sesiones (id, datos, expira) VALUES (?, ?, ?)",
+                         (sid, json.dumps(datos, separators=(",", ":"), ensure_ascii=False), time.time() + self.ttl))
+        with self._lock:
+            self.escrituras += 1
+            self._escrituras_desde_purga += 1
+            purgar = self._escrituras_desde_purga >= PURGA_CADA
+            if purgar:
+                self._escrituras_desde_purga = 0
+        if purgar:
+            self.purgar()
+
+    def purgar(self) -> int:
+        """Borra las sesiones caducadas; retorna cuántas."""
+        return self._conexion().execute("DELETE FROM sesiones WHERE expira <= ?", (time.time(),)).rowcount
+
+    def borrar(self, sid: str):
+        self._conexion().execute("DELETE FROM sesiones WHERE id = ?", (sid,))
+
+    def __len__(self) -> int:
+        return self._conexion().execute("SELECT COUNT(*) FROM sesiones WHERE expira > ?", (time.time(),)).fetchone()[0]
+
+
+# --------------------- INTERFAZ DE FLASK ---------------------
+
+class InterfazSesionServidor(SessionInterface):
+    """
+    Sesión de Flask guardada en un almacén (memoria o SQLite): la cookie solo lleva un identificador
+    aleatorio opaco, los datos del cliente no viajan en ella y solo se escribe cuando algo cambió.
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self.omitidas = 0 # Peticiones que tocaron la sesión sin cambiarla (escrituras ahorradas)
+
+    def open_session(self, app: Flask, request: Request) -> SesionServidor:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            datos = self.almacen.leer(sid)
+            if datos is not None:
+                return SesionServidor(datos, sid)
+        return SesionServidor()
+
+    def save_session(self, app: Flask, session: SesionServidor, response: Response):
+        nombre = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        ruta = self.get_cookie_path(app)
+
+        if not session:
+            # Sesión vaciada: se borra del almacén y del navegador
+            if session.modified and not session.nueva:
+                self.almacen.borrar(session.sid)
+                response.delete_cookie(nombre, domain=dominio, path=ruta)
+            return
+
+        if not session.cambio():
+            if session.modified:
+                self.omitidas += 1
+            return
+
+        if session.nueva:
+            session.sid = secrets.token_urlsafe(24)
+        self.almacen.guardar(session.sid, dict(session))
+        if session.nueva or session.permanent:
+            response.set_cookie(
+                nombre, session.sid, expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app), domain=dominio, path=ruta,
+                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app),
+            )
+        session.nueva = False
+        session.original = dict(session)
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            "lecturas": self.almacen.lecturas,
+            "escrituras": self.almacen.escrituras,
+            "omitidas": self.omitidas,
+        }
+
+
+def crear_interfaz_sesion(app: Flask, backend: str = SESION_BACKEND, ruta: str = SESIONES_PATH) -> SessionInterface:
+    """Interfaz de sesión según el backend configurado; la caducidad es app.permanent_session_lifetime."""
+    ttl = app.permanent_session_lifetime.total_seconds()
+    if backend == "cookie":
+        return SecureCookieSessionInterface()
+    if backend == "memoria":
+        return InterfazSesionServidor(AlmacenMemoria(ttl))
+    if backend != "sqlite":
+        logging.warning(f"SESION_BACKEND desconocido ({backend}); se usa sqlite.")
+    return InterfazSesionServidor(AlmacenSqlite(ruta, ttl))
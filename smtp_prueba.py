@@ -0,0 +1,152 @@
+"""
+Servidor SMTP local de prueba para la bandeja de salida: acepta los correos sin entregarlos, los guarda en
+memoria y los muestra por consola. Sustituye al DebuggingServer de smtpd (retirado de Python 3.12). Puede
+responder con error temporal (451) a los primeros envíos para ver los reintentos, rechazar (550) ciertos
+destinatarios para ver los fallos definitivos y tardar en aceptar cada mensaje, como un servidor lento.
+
+Uso (desde la raíz del repo), con la app apuntando a él:
+    python smtp_prueba.py [--puerto 1025] [--fallar 2] [--rechazar rebota@ejemplo.com] [--demora 0.5]
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_SEGURIDAD=ninguna python Formulario.py
+"""
+import argparse
+import email
+import email.policy
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+from typing import Iterable, List, Optional
+
+
+class _Sesion(socketserver.StreamRequestHandler):
+    """Diálogo SMTP mínimo: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP y QUIT."""
+
+    def responder(self, linea: str):
+        self.wfile.write(linea.encode() + b"\r\n")
+
+    def handle(self):
+        servidor: "ServidorSmtpPrueba" = self.server.prueba
+        remitente, destinatarios = None, []
+        self.responder("220 smtp-prueba listo")
+        for bruta in self.rfile:
+            linea = bruta.decode("utf-8", "replace").rstrip("\r\n")
+            comando = linea[:4].upper()
+            if comando in ("EHLO", "HELO"):
+                self.responder("250 smtp-prueba")
+            elif comando == "MAIL":
+                remitente, destinatarios = linea.split(":", 1)[1].strip(), []
+                self.responder("250 OK")
+            elif comando == "RCPT":
+                direccion = linea.split(":", 1)[1].strip().strip("<>")
+                if direccion.lower() in servidor.rechazar:
+                    self.responder("550 Buzón inexistente")
+                else:
+                    destinatarios.append(direccion)
+                    self.responder("250 OK")
+            elif comando == "DATA":
+                if remitente is None or not destinatarios:
+                    self.responder("503 Falta MAIL o RCPT")
+                    continue
+                self.responder("354 Termine con <CRLF>.<CRLF>")
+                datos = []
+                for bruta in self.rfile:
+                    if bruta in (b".\r\n", b".\n"):
+                        break
+                    datos.append(bruta[1:] if bruta.startswith(b"..") else bruta)
+                if servidor.demora:
+                    time.sleep(servidor.demora)
+                if servidor.reservar_fallo():
+                    self.responder("451 Error temporal de prueba")
+                else:
+                    servidor.recibir(email.message_from_bytes(b"".join(datos), policy=email.policy.default), destinatarios)
+                    self.responder("250 Aceptado")
+                remitente, destinatarios = None, []
+            elif comando == "RSET":
+                remitente, destinatarios = None, []
+                self.responder("250 OK")
+            elif comando == "NOOP":
+                self.responder("250 OK")
+            elif comando == "QUIT":
+                self.responder("221 Adiós")
+                return
+            else:
+                self.responder("502 Comando no implementado")
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ServidorSmtpPrueba:
+    """Servidor en un hilo; `recibidos` guarda (mensaje, destinatarios) en orden de llegada."""
+
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 0, fallar: int = 0, rechazar: Iterable[str] = (), mostrar: bool = False,
+                 demora: float = 0.0):
+        self.fallar = fallar
+        self.demora = demora
+        self.rechazar = {d.lower() for d in rechazar}
+        self.mostrar = mostrar
+        self.recibidos: List[tuple] = []
+        self._lock = threading.Condition()
+        self._servidor = _Servidor((host, puerto), _Sesion)
+        self._servidor.prueba = self
+        self.host, self.puerto = self._servidor.server_address[:2]
+        self._hilo: Optional[threading.Thread] = None
+
+    def reservar_fallo(self) -> bool:
+        with self._lock:
+            if self.fallar > 0:
+                self.fallar -= 1
+                return True
+            return False
+
+    def recibir(self, mensaje: EmailMessage, destinatarios: List[str]):
+        with self._lock:
+            self.recibidos.append((mensaje, destinatarios))
+            self._lock.notify_all()
+        if self.mostrar:
+            print(f"---------- {', '.join(destinatarios)} ----------")
+            print(mensaje.as_string(), flush=True)
+
+    def esperar(self, cantidad: int, timeout: float = 10.0) -> bool:
+        """Espera a haber recibido `cantidad` correos; False si vence `timeout`."""
+        with self._lock:
+            return self._lock.wait_for(lambda: len(self.recibidos) >= cantidad, timeout)
+
+    def servir(self):
+        """Atiende conexiones hasta `detener` (bloquea)."""
+        self._servidor.serve_forever()
+
+    def iniciar(self) -> "ServidorSmtpPrueba":
+        """Atiende conexiones en un hilo de fondo."""
+        self._hilo = threading.Thread(target=self.servir, name="smtp-prueba", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP local que muestra los correos en lugar de entregarlos.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=1025)
+    parser.add_argument("--fallar", type=int, default=0, help="Responder 451 a los primeros N envíos")
+    parser.add_argument("--rechazar", action="append", default=[], help="Destinatario a rechazar con 550 (repetible)")
+    parser.add_argument("--demora", type=float, default=0.0, help="Segundos antes de aceptar cada mensaje")
+    args = parser.parse_args()
+
+    servidor = ServidorSmtpPrueba(args.host, args.puerto, args.fallar, args.rechazar, mostrar=True, demora=args.demora)
+    print(f"SMTP de prueba en {servidor.host}:{servidor.puerto} (Ctrl+C para salir)")
+    try:
+        servidor.servir()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
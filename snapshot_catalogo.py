@@ -0,0 +1,125 @@
+"""
+Snapshot binario compilado del catálogo Excel.
+
+Uso:
+    python snapshot_catalogo.py                 # compila "Formulario Catalogo.xlsm" -> snapshot
+    python snapshot_catalogo.py --comparar      # compila y compara tiempos de arranque Excel vs snapshot
+"""
+import argparse
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Optional
+
+from catalogo import DatosCatalogo, leer_excel
+
+MAGIC = b"LSJCAT"
+VERSION_FORMATO = 4 # 3: sin DataFrames, con el informe de carga; 4: lector en streaming
+
+
+def _firma_excel(ruta_excel: str) -> Optional[tuple]:
+    """(mtime_ns, tamaño) del libro, o None si no existe."""
+    try:
+        st = os.stat(ruta_excel)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def escribir_snapshot(datos: DatosCatalogo, ruta_excel: str, ruta_snapshot: str):
+    """Serializa el modelo tipado (sin DataFrames) de forma atómica (archivo temporal + os.replace)."""
+    cuerpo = pickle.dumps(
+        {"firma_excel": _firma_excel(ruta_excel), "datos": tuple(datos.sin_dataframes())},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    directorio = os.path.dirname(os.path.abspath(ruta_snapshot))
+    fd, ruta_tmp = tempfile.mkstemp(dir=directorio, prefix=".snapshot-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + bytes([VERSION_FORMATO]))
+            f.write(cuerpo)
+        os.replace(ruta_tmp, ruta_snapshot)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+
+def leer_snapshot(ruta_excel: str, ruta_snapshot: str) -> Optional[DatosCatalogo]:
+    """Devuelve los datos del snapshot, o None si falta, es de otro formato o es más viejo que el libro."""
+    try:
+        with open(ruta_snapshot, "rb") as f:
+            cabecera = f.read(len(MAGIC) + 1)
+            if cabecera != MAGIC + bytes([VERSION_FORMATO]):
+                logging.warning(f"Snapshot '{ruta_snapshot}' con formato desconocido; se ignora.")
+                return None
+            contenido = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Snapshot '{ruta_snapshot}' ilegible ({e}); se ignora.")
+        return None
+
+    firma_actual = _firma_excel(ruta_excel)
+    if firma_actual is not None and tuple(contenido.get("firma_excel") or ()) != firma_actual:
+        logging.info(f"Snapshot '{ruta_snapshot}' desactualizado respecto a '{ruta_excel}'.")
+        return None
+    return DatosCatalogo(*contenido["datos"])
+
+
+def compilar(ruta_excel: str, ruta_snapshot: str) -> DatosCatalogo:
+    """Lee el libro Excel y escribe su snapshot."""
+    datos = leer_excel(ruta_excel)
+    escribir_snapshot(datos, ruta_excel, ruta_snapshot)
+    return datos
+
+
+def cargar_catalogo(ruta_excel: str, ruta_snapshot: str) -> DatosCatalogo:
+    """Carga desde el snapshot si está vigente; si no, lee el Excel y regenera el snapshot. Sin DataFrames."""
+    datos = leer_snapshot(ruta_excel, ruta_snapshot)
+    if datos is not None:
+        return datos
+
+    datos = leer_excel(ruta_excel)
+    try:
+        escribir_snapshot(datos, ruta_excel, ruta_snapshot)
+    except OSError as e:
+        logging.warning(f"No se pudo escribir el snapshot '{ruta_snapshot}': {e}")
+    return datos.sin_dataframes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila el catálogo Excel a un snapshot binario.")
+    parser.add_argument("--excel", default=os.getenv("EXCEL_PATH", "Formulario Catalogo.xlsm"))
+    parser.add_argument("--snapshot", default=os.getenv("SNAPSHOT_PATH", "Formulario Catalogo.snapshot"))
+    parser.add_argument("--comparar", action="store_true", help="Mide el tiempo de carga Excel vs snapshot.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    datos = compilar(args.excel, args.snapshot)
+    t_compilar = time.perf_counter() - inicio
+    print(f"Snapshot escrito en '{args.snapshot}' ({os.path.getsize(args.snapshot):,} bytes, "
+          f"{datos.informe.filas} filas, {len(datos.indice)} variantes) en {t_compilar:.3f}s")
+    print(datos.informe.resumen())
+
+    if args.comparar:
+        def mejor_tiempo(funcion):
+            tiempos = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append(time.perf_counter() - inicio)
+            return min(tiempos)
+
+        t_excel = mejor_tiempo(lambda: leer_excel(args.excel))
+        t_snapshot = mejor_tiempo(lambda: leer_snapshot(args.excel, args.snapshot))
+        print(f"Carga desde Excel:    {t_excel * 1000:10.1f} ms")
+        print(f"Carga desde snapshot: {t_snapshot * 1000:10.1f} ms")
+        print(f"Aceleración:          {t_excel / t_snapshot:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
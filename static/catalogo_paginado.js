@@ -0,0 +1,39 @@
+// Scroll infinito del catálogo: al acercarse al enlace "Cargar más" se pide el fragmento de la página
+// siguiente a /catalogo/pagina y se añaden sus cards a la cuadrícula. Sin JavaScript el enlace sigue funcionando.
+(function () {
+    const grid = document.getElementById('catalogo_grid');
+    if (!grid || !window.fetch || !('IntersectionObserver' in window)) return;
+    let cargando = false;
+
+    async function cargar(mas) {
+        if (cargando) return;
+        cargando = true;
+        try {
+            const respuesta = await fetch(mas.dataset.fragmento, { credentials: 'same-origin' });
+            if (!respuesta.ok) throw new Error(respuesta.status);
+            const plantilla = document.createElement('template');
+            plantilla.innerHTML = await respuesta.text();
+            const siguiente = plantilla.content.getElementById('catalogo_mas');
+            if (siguiente) siguiente.remove();
+            grid.append(plantilla.content);
+            mas.replaceWith(siguiente || '');
+            if (siguiente) observador.observe(siguiente);
+        } catch (error) {
+            observador.disconnect(); // Queda el enlace normal
+        } finally {
+            cargando = false;
+        }
+    }
+
+    const observador = new IntersectionObserver((entradas) => {
+        entradas.forEach((entrada) => {
+            if (entrada.isIntersecting) {
+                observador.unobserve(entrada.target);
+                cargar(entrada.target);
+            }
+        });
+    }, { rootMargin: '600px' });
+
+    const mas = document.getElementById('catalogo_mas');
+    if (mas) observador.observe(mas);
+})();
@@ -0,0 +1,50 @@
+// Actualización parcial del formulario: al cambiar un selector de Dama/Caballero se pide solo esa
+// sección a /api/seccion/<tipo> y se reemplaza en la página. Sin JavaScript, o si la petición falla,
+// el formulario se envía completo como siempre.
+(function () {
+    const form = document.querySelector('form[data-parcial-url]');
+    if (!form || !window.fetch || !window.FormData) return;
+    const total = document.getElementById('monto_total');
+    const ultimaPeticion = {};
+
+    // Los selectores traen onchange="this.form.submit()" como respaldo; aquí se reemplaza por la versión parcial
+    function quitarEnvioCompleto(seccion) {
+        seccion.querySelectorAll('select').forEach((select) => {
+            select.onchange = null;
+            select.removeAttribute('onchange');
+        });
+    }
+    form.querySelectorAll('[data-seccion]').forEach(quitarEnvioCompleto);
+
+    form.addEventListener('change', async (evento) => {
+        const select = evento.target;
+        const seccion = select.closest('[data-seccion]');
+        if (!seccion || select.tagName !== 'SELECT') return;
+
+        const tipo = seccion.dataset.seccion;
+        const datos = new FormData();
+        seccion.querySelectorAll('select, input[type=hidden]').forEach((campo) => datos.append(campo.name, campo.value));
+        const numero = (ultimaPeticion[tipo] || 0) + 1;
+        ultimaPeticion[tipo] = numero;
+
+        try {
+            const respuesta = await fetch(form.dataset.parcialUrl.replace('__tipo__', tipo), {
+                method: 'POST', body: datos, credentials: 'same-origin', headers: { 'Accept': 'application/json' },
+            });
+            if (!respuesta.ok) throw new Error(respuesta.status);
+            const resultado = await respuesta.json();
+            if (ultimaPeticion[tipo] !== numero) return; // Llegó una respuesta más reciente
+
+            const plantilla = document.createElement('template');
+            plantilla.innerHTML = resultado.html.trim();
+            const nueva = plantilla.content.firstElementChild;
+            if (nueva) {
+                quitarEnvioCompleto(nueva);
+                seccion.replaceWith(nueva);
+            }
+            if (total) total.textContent = resultado.monto_total_texto;
+        } catch (error) {
+            form.submit();
+        }
+    });
+})();
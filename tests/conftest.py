@@ -0,0 +1,13 @@
+"""
+Los tests importan los módulos de la raíz del repo y los datos sintéticos de benchmarks/, como los benchmarks.
+La app se importa sin archivos locales: sesiones en memoria, sin historial, sin guardado ni catálogo mapeado.
+"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RAIZ, os.path.join(RAIZ, "benchmarks")]
+
+for variable, valor in {"SESION_BACKEND": "memoria", "PRECIO_ORO_HISTORIAL": "", "COTIZACIONES_PATH": "",
+                        "CATALOGO_MAPEADO_PATH": "", "SMTP_HOST": ""}.items():
+    os.environ.setdefault(variable, valor)
@@ -0,0 +1,91 @@
+"""/api/quote (cotizar_lote) cotiza como el formulario, también con ancho y talla autoseleccionados."""
+import pytest
+from sintetico import datos_sinteticos
+
+from precios import cotizar_configuracion, cotizar_lote, normalizar_configuracion
+
+PRECIO = 2650.0
+
+
+@pytest.fixture(scope="module")
+def datos():
+    return datos_sinteticos(144)
+
+
+@pytest.fixture(scope="module")
+def app(datos):
+    import Formulario
+    from precio_oro import ProveedorFijo
+
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(PRECIO), refrescar=False)
+    Formulario.servicio_precio_oro.publicar(PRECIO)
+    Formulario.recargador_catalogo.publicar(datos)
+    yield Formulario
+    Formulario.servicio_precio_oro.detener()
+
+
+def test_cotizar_lote_autoselecciona_ancho_y_talla(datos):
+    modelo, ancho, metal, kilates, genero = next(iter(datos.indice.variantes))
+    opciones = datos.indice.opciones(modelo, metal)
+    sin_medidas = {"modelo": modelo, "metal": metal, "kilates": kilates, "genero": genero}
+    [resultado] = cotizar_lote(datos.indice, datos.costos_diamantes, PRECIO, [sin_medidas])
+    [explicito] = cotizar_lote(datos.indice, datos.costos_diamantes, PRECIO,
+                               [dict(sin_medidas, ancho=opciones.ancho_defecto, talla=opciones.talla_defecto)])
+
+    assert resultado["encontrado"] and resultado["monto"] > 0
+    assert resultado["configuracion"]["ancho"] == opciones.ancho_defecto
+    assert resultado["configuracion"]["talla"] == opciones.talla_defecto
+    assert resultado == explicito
+
+    efectiva, cotizacion = cotizar_configuracion(datos.indice, datos.costos_diamantes, PRECIO, normalizar_configuracion(sin_medidas))
+    assert resultado["configuracion"] == efectiva
+    assert resultado["monto"] == cotizacion.monto
+
+
+def test_api_y_formulario_cotizan_igual(app, datos):
+    Formulario = app
+    cliente = Formulario.app.test_client()
+    vistos = set()
+    for modelo, _, metal, kilates, genero in datos.indice.variantes:
+        tipo = "dama" if genero == "DAMA" else "cab"
+        if (modelo, metal, genero) in vistos:
+            continue
+        vistos.add((modelo, metal, genero))
+        configuracion = {"modelo": modelo, "metal": metal, "kilates": kilates, "genero": genero, "tipo_diamante": "Natural"}
+        respuesta = cliente.post("/api/quote", json={"configuraciones": [configuracion]})
+        assert respuesta.status_code == 200, respuesta.data
+        [resultado] = respuesta.get_json()["resultados"]
+
+        with Formulario.app.test_request_context("/", method="POST", data={f"kilates_{tipo}": kilates, f"tipo_diamante_{tipo}": "Natural"}):
+            Formulario.session[f"modelo_{tipo}"], Formulario.session[f"metal_{tipo}"] = modelo, metal
+            t = Formulario.textos_formulario("Español")
+            valores = Formulario.leer_valores_seccion(tipo, t)
+            seccion = Formulario.calcular_seccion(tipo, datos, PRECIO, t, valores)
+
+        assert resultado["configuracion"]["ancho"] == valores["ancho"]
+        assert resultado["configuracion"]["talla"] == valores["talla"]
+        assert resultado["configuracion"]["tipo_diamante"] == valores["tipo_diamante"]
+        assert resultado["monto"] == pytest.approx(seccion["monto"])
+        assert resultado["encontrado"] == (seccion["monto"] > 0)
+
+
+@pytest.mark.parametrize("talla", ["99", "abc", "6.25"])
+def test_talla_fuera_de_la_hoja_size_es_un_error(datos, talla):
+    modelo, ancho, metal, kilates, genero = next(iter(datos.indice.variantes))
+    valida = {"modelo": modelo, "metal": metal, "ancho": ancho, "kilates": kilates, "genero": genero}
+    resultados = cotizar_lote(datos.indice, datos.costos_diamantes, PRECIO, [dict(valida, talla=talla), valida])
+
+    assert "talla" in resultados[0]["error"] and talla in resultados[0]["error"]
+    assert "monto" not in resultados[0]
+    assert resultados[1]["encontrado"] # Los demás elementos del lote se cotizan igual
+    with pytest.raises(ValueError):
+        cotizar_configuracion(datos.indice, datos.costos_diamantes, PRECIO, normalizar_configuracion(dict(valida, talla=talla)))
+
+
+def test_api_talla_inexistente(app, datos):
+    modelo, ancho, metal, kilates, genero = next(iter(datos.indice.variantes))
+    respuesta = app.app.test_client().post("/api/quote", json={"modelo": modelo, "metal": metal, "ancho": ancho, "kilates": kilates,
+                                                                "genero": genero, "talla": "99"})
+    assert respuesta.status_code == 200
+    [resultado] = respuesta.get_json()["resultados"]
+    assert "error" in resultado and "encontrado" not in resultado
@@ -0,0 +1,230 @@
+"""
+Bandeja de salida de correos: admisión (direcciones, duplicados y límites por sesión e IP) y entrega
+contra el servidor SMTP local de smtp_prueba.py (reintentos con espera, fallos definitivos y reservas vencidas).
+"""
+import smtplib
+import sqlite3
+import time
+
+import pytest
+
+import bandeja_salida
+from bandeja_salida import (DUPLICADO, ENVIADO, FALLIDO, LIMITE, PENDIENTE, BandejaSalida, EnviadorSmtp, EnvioRechazado,
+                            direccion_valida, error_permanente, espera_reintento)
+from smtp_prueba import ServidorSmtpPrueba
+
+
+@pytest.fixture
+def bandeja(tmp_path):
+    bandeja = BandejaSalida(str(tmp_path / "bandeja.sqlite3"), segundo_plano=False, max_por_sesion=3, max_por_ip=5)
+    yield bandeja
+    bandeja.detener()
+
+
+@pytest.mark.parametrize("texto", ["ana@ejemplo.com", "  Ana.Perez+ferias@correo.ejemplo.com.mx ", "a_b-c@sub-dominio.ejemplo.io"])
+def test_direcciones_simples(texto):
+    assert direccion_valida(texto) == texto.strip()
+
+
+@pytest.mark.parametrize("texto", [
+    "", "ana", "ana@ejemplo", "@ejemplo.com", "ana@@ejemplo.com", "ana@b@ejemplo.com", "ana@ejemplo..com", "ana@-ejemplo.com",
+    "Ana <ana@ejemplo.com>", '"Ana" <ana@ejemplo.com>', "ana@ejemplo.com (Ana)", "ana@ejemplo.com, otro@ejemplo.com",
+    "ana@ejemplo.com,otro@ejemplo.com", "ana@ejemplo.com;otro@ejemplo.com", '"ana lopez"@ejemplo.com',
+    "ana@ejemplo.com\r\nBcc: otro@ejemplo.com", "ana@ejemplo.com\nSubject: x", "ana lopez@ejemplo.com", "añа@ejemplo.com",
+    "a" * 250 + "@ejemplo.com",
+])
+def test_direcciones_rechazadas(texto):
+    assert direccion_valida(texto) is None
+
+
+def test_encolar_rechaza_destinatario_invalido(bandeja):
+    with pytest.raises(ValueError):
+        bandeja.encolar("ana@ejemplo.com, otro@ejemplo.com", "Asunto", "Texto")
+    assert bandeja.conteos()["pendiente"] == 0
+
+
+def test_mismo_presupuesto_al_mismo_destinatario_una_vez(bandeja):
+    id_ = bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto", huella="h1", sesion="s1", ip="10.0.0.1")
+    with pytest.raises(EnvioRechazado) as rechazo:
+        bandeja.encolar(" ANA@Ejemplo.com ", "Asunto", "Texto", huella="h1", sesion="s2", ip="10.0.0.2")
+    assert rechazo.value.motivo == DUPLICADO
+    assert rechazo.value.correo_id == id_
+    bandeja.encolar("otra@ejemplo.com", "Asunto", "Texto", huella="h1", sesion="s1", ip="10.0.0.1") # Otro destinatario
+    bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto", huella="h2", sesion="s1", ip="10.0.0.1") # Otro presupuesto
+    assert bandeja.conteos()["pendiente"] == 3
+
+
+def test_limites_por_sesion_e_ip(bandeja):
+    for i in range(3):
+        bandeja.encolar(f"c{i}@ejemplo.com", "Asunto", "Texto", huella=f"s{i}", sesion="s1", ip="10.0.0.1")
+    with pytest.raises(EnvioRechazado) as rechazo:
+        bandeja.encolar("c3@ejemplo.com", "Asunto", "Texto", huella="s3", sesion="s1", ip="10.0.0.1")
+    assert rechazo.value.motivo == LIMITE
+
+    # Otra sesión (cookie nueva) desde la misma IP: la IP también tiene límite
+    for i in range(2):
+        bandeja.encolar(f"d{i}@ejemplo.com", "Asunto", "Texto", huella=f"d{i}", sesion="s2", ip="10.0.0.1")
+    with pytest.raises(EnvioRechazado) as rechazo:
+        bandeja.encolar("d2@ejemplo.com", "Asunto", "Texto", huella="d2", sesion="s3", ip="10.0.0.1")
+    assert rechazo.value.motivo == LIMITE
+    bandeja.encolar("e0@ejemplo.com", "Asunto", "Texto", huella="e0", sesion="s3", ip="10.0.0.2")
+    assert bandeja.conteos()["pendiente"] == 6
+
+
+def test_el_limite_se_libera_al_pasar_la_ventana(tmp_path):
+    bandeja = BandejaSalida(str(tmp_path / "bandeja.sqlite3"), segundo_plano=False, max_por_sesion=1, ventana=0.2)
+    bandeja.encolar("a@ejemplo.com", "Asunto", "Texto", sesion="s1")
+    with pytest.raises(EnvioRechazado):
+        bandeja.encolar("b@ejemplo.com", "Asunto", "Texto", sesion="s1")
+    time.sleep(0.3)
+    bandeja.encolar("b@ejemplo.com", "Asunto", "Texto", sesion="s1")
+
+
+def test_agrega_las_columnas_a_una_bandeja_existente(tmp_path):
+    ruta = str(tmp_path / "bandeja.sqlite3")
+    with sqlite3.connect(ruta) as conexion:
+        conexion.execute(
+            "CREATE TABLE correos (id INTEGER PRIMARY KEY, creado REAL NOT NULL, referencia TEXT NOT NULL, destinatario TEXT NOT NULL,"
+            " asunto TEXT NOT NULL, mensaje_id TEXT NOT NULL, texto TEXT NOT NULL, html TEXT, estado TEXT NOT NULL,"
+            " intentos INTEGER NOT NULL DEFAULT 0, proximo_intento REAL NOT NULL, enviado REAL, ultimo_error TEXT)")
+    bandeja = BandejaSalida(ruta, segundo_plano=False)
+    id_ = bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto", huella="h1", sesion="s1", ip="10.0.0.1")
+    assert bandeja.correo(id_).destinatario == "ana@ejemplo.com"
+
+
+def test_formulario_no_reenvia_ni_supera_el_limite(tmp_path):
+    import Formulario
+
+    anterior = Formulario.bandeja_salida
+    Formulario.bandeja_salida = BandejaSalida(str(tmp_path / "bandeja.sqlite3"), segundo_plano=False, max_por_sesion=2, max_por_ip=100)
+    try:
+        cliente = Formulario.app.test_client()
+
+        def enviar(nombre: str, email: str = "ana@ejemplo.com") -> str:
+            respuesta = cliente.post("/", data={"nombre_cliente": nombre, "email_cliente": email, "enviar_btn": "1"})
+            assert respuesta.status_code == 302
+            return respuesta.headers["Location"]
+
+        assert "correo=" not in enviar("Ana")
+        assert "correo=duplicado" in enviar("Ana") # El mismo presupuesto otra vez
+        assert "correo=sin_email" in enviar("Ana", "Ana <ana@ejemplo.com>")
+        assert "correo=sin_email" in enviar("Ana", "ana@ejemplo.com\r\nBcc: otro@ejemplo.com")
+        assert "correo=" not in enviar("Ana López")
+        assert "correo=limite" in enviar("Ana María") # Tercer envío de la sesión
+        assert Formulario.bandeja_salida.conteos()["pendiente"] == 2
+
+        pagina = cliente.get("/?correo=limite").get_data(as_text=True)
+        assert "límite de envíos" in pagina
+        assert 'id="estado_correo"' in pagina # Sigue mostrando el último envío admitido
+    finally:
+        Formulario.bandeja_salida.detener()
+        Formulario.bandeja_salida = anterior
+
+
+# --- Entrega ---
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorSmtpPrueba().iniciar()
+    yield servidor
+    servidor.detener()
+
+
+def bandeja_con_servidor(tmp_path, servidor, **opciones) -> BandejaSalida:
+    enviador = EnviadorSmtp(servidor.host, servidor.puerto, seguridad="ninguna", remitente="presupuestos@ejemplo.com", timeout=5)
+    return BandejaSalida(str(tmp_path / "bandeja.sqlite3"), enviador, segundo_plano=False, **opciones)
+
+
+def test_espera_reintento_exponencial_con_tope():
+    for intentos, base in [(1, 30.0), (2, 60.0), (5, 480.0), (8, 3600.0), (20, 3600.0)]:
+        for _ in range(20):
+            assert base * 0.8 <= espera_reintento(intentos) <= base * 1.2
+
+
+def test_errores_permanentes():
+    assert error_permanente(smtplib.SMTPRecipientsRefused({"a@ejemplo.com": (550, b"No existe")}))
+    assert not error_permanente(smtplib.SMTPRecipientsRefused({"a@ejemplo.com": (450, b"Ocupado")}))
+    assert error_permanente(smtplib.SMTPDataError(554, b"Rechazado"))
+    assert not error_permanente(smtplib.SMTPDataError(451, b"Temporal"))
+    assert not error_permanente(smtplib.SMTPAuthenticationError(535, b"Credenciales"))
+    assert not error_permanente(ConnectionRefusedError())
+
+
+def test_entrega_por_smtp(tmp_path, servidor):
+    entregas = []
+    bandeja = bandeja_con_servidor(tmp_path, servidor, al_entregar=entregas.append)
+    id_ = bandeja.encolar("ana@ejemplo.com", "Su presupuesto", "Texto", html="<p>Texto</p>", referencia="C-1")
+
+    assert bandeja.procesar() == 1
+    assert servidor.esperar(1, timeout=5)
+    mensaje, destinatarios = servidor.recibidos[0]
+    assert destinatarios == ["ana@ejemplo.com"]
+    assert (mensaje["From"], mensaje["Subject"]) == ("presupuestos@ejemplo.com", "Su presupuesto")
+    assert mensaje.get_body(("html",)).get_content().strip() == "<p>Texto</p>"
+
+    correo = bandeja.correo(id_)
+    assert (correo.estado, correo.intentos, correo.ultimo_error) == (ENVIADO, 1, None)
+    assert len(entregas) == 1 and entregas[0] >= 0
+    assert bandeja.procesar() == 0 # Ya no queda nada listo
+
+
+def test_error_temporal_reprograma_con_espera(tmp_path, servidor):
+    servidor.fallar = 1 # 451 al primer DATA
+    bandeja = bandeja_con_servidor(tmp_path, servidor)
+    id_ = bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto")
+
+    antes = time.time()
+    assert bandeja.procesar() == 1
+    correo = bandeja.correo(id_)
+    assert (correo.estado, correo.intentos, correo.estado_visible()) == (PENDIENTE, 1, "reintentando")
+    assert correo.ultimo_error.startswith("451")
+    assert antes + 30 * 0.8 <= correo.proximo_intento <= time.time() + 30 * 1.2
+    assert bandeja.procesar() == 0 # No se reintenta antes de tiempo
+    assert servidor.recibidos == []
+
+    with sqlite3.connect(bandeja.ruta) as conexion:
+        conexion.execute("UPDATE correos SET proximo_intento = 0 WHERE id = ?", (id_,))
+    assert bandeja.procesar() == 1
+    assert servidor.esperar(1, timeout=5)
+    assert (bandeja.correo(id_).estado, bandeja.correo(id_).intentos) == (ENVIADO, 2)
+    assert bandeja.estadisticas() == {"enviado": 1, "reintento": 1, "fallido": 0}
+
+
+def test_rechazo_definitivo_marca_fallido(tmp_path, servidor):
+    servidor.rechazar = {"rebota@ejemplo.com"}
+    bandeja = bandeja_con_servidor(tmp_path, servidor)
+    rebota = bandeja.encolar("rebota@ejemplo.com", "Asunto", "Texto")
+    llega = bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto")
+
+    assert bandeja.procesar() == 2 # Misma conexión: el rechazo de uno no impide el otro
+    correo = bandeja.correo(rebota)
+    assert (correo.estado, correo.intentos) == (FALLIDO, 1)
+    assert "550" in correo.ultimo_error
+    assert bandeja.correo(llega).estado == ENVIADO
+    assert bandeja.conteos() == {"pendiente": 0, "reintentando": 0, "fallido": 1}
+
+
+def test_max_intentos_descarta_el_correo(tmp_path, servidor, monkeypatch):
+    monkeypatch.setattr(bandeja_salida, "espera_reintento", lambda intentos: 0.0)
+    servidor.fallar = 10
+    bandeja = bandeja_con_servidor(tmp_path, servidor, max_intentos=3)
+    id_ = bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto")
+
+    for intentos, estado in [(1, PENDIENTE), (2, PENDIENTE), (3, FALLIDO)]:
+        assert bandeja.procesar() == 1
+        assert (bandeja.correo(id_).estado, bandeja.correo(id_).intentos) == (estado, intentos)
+    assert bandeja.procesar() == 0
+    assert bandeja.estadisticas() == {"enviado": 0, "reintento": 2, "fallido": 1}
+
+
+def test_reserva_vencida_vuelve_a_estar_lista(tmp_path, servidor, monkeypatch):
+    monkeypatch.setattr(bandeja_salida, "RESERVA", 0.2)
+    bandeja = bandeja_con_servidor(tmp_path, servidor)
+    id_ = bandeja.encolar("ana@ejemplo.com", "Asunto", "Texto")
+
+    assert [c.id for c in bandeja._reservar(10)] == [id_] # Un worker la reserva y muere sin enviarla
+    assert bandeja.procesar() == 0 # Reservada: ningún otro worker la toma
+    time.sleep(0.3)
+    assert bandeja.procesar() == 1
+    assert servidor.esperar(1, timeout=5)
+    assert (bandeja.correo(id_).estado, bandeja.correo(id_).intentos) == (ENVIADO, 1)
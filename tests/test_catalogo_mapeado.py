@@ -0,0 +1,121 @@
+"""
+CatalogoMapeado frente al IndiceCatalogo del que se compiló (mismas búsquedas sobre un catálogo sintético)
+y el rechazo de archivos desactualizados o de otra versión en abrir_catalogo_mapeado.
+"""
+import os
+import pickle
+
+import pytest
+from sintetico import TALLAS, datos_sinteticos
+
+import catalogo_mapeado
+from catalogo_mapeado import MAGIC, VERSION_FORMATO, CatalogoMapeado, abrir_catalogo_mapeado, escribir_catalogo_mapeado
+
+
+@pytest.fixture(scope="module")
+def datos():
+    return datos_sinteticos(3000)
+
+
+@pytest.fixture(scope="module")
+def excel(tmp_path_factory):
+    ruta = str(tmp_path_factory.mktemp("libro") / "catalogo.xlsm")
+    with open(ruta, "wb") as f:
+        f.write(b"libro") # Solo cuenta su firma (mtime y tamaño)
+    return ruta
+
+
+@pytest.fixture(scope="module")
+def mapeado(datos, excel, tmp_path_factory):
+    ruta = str(tmp_path_factory.mktemp("mapeado") / "catalogo.catmap")
+    escribir_catalogo_mapeado(datos, excel, ruta)
+    return CatalogoMapeado(ruta)
+
+
+def _claves_ausentes(indice):
+    (modelo, ancho, metal, kilates, genero) = next(iter(indice.variantes))
+    return [
+        ("NOEXISTE", ancho, metal, kilates, genero), (modelo, "99", metal, kilates, genero), (modelo, ancho, "PLATINO", kilates, genero),
+        (modelo, ancho, metal, "24", genero), (modelo, ancho, metal, kilates, "OTRO"), ("", "", "", "", ""),
+        (modelo.lower(), ancho, metal, kilates, genero), # Las claves distinguen mayúsculas, como el diccionario
+    ]
+
+
+def test_variantes(datos, mapeado):
+    indice = datos.indice
+    assert len(mapeado) == len(mapeado.variantes) == len(indice.variantes)
+    assert dict(mapeado.variantes.items()) == dict(indice.variantes)
+    assert sorted(mapeado.variantes) == sorted(indice.variantes)
+    for clave in _claves_ausentes(indice):
+        assert clave not in mapeado.variantes
+        assert mapeado.variantes.get(clave) is None
+    assert mapeado.tallas == indice.tallas
+    assert dict(mapeado.adicional_por_talla) == dict(indice.adicional_por_talla)
+
+
+def test_buscar(datos, mapeado):
+    indice = datos.indice
+    tallas = TALLAS[::5] + ["99", ""]
+    claves = list(indice.variantes) + _claves_ausentes(indice)
+    for i, (modelo, ancho, metal, kilates, genero) in enumerate(claves):
+        talla = tallas[i % len(tallas)]
+        assert mapeado.buscar(modelo, metal, ancho, kilates, talla, genero) == indice.buscar(modelo, metal, ancho, kilates, talla, genero)
+
+
+def test_opciones_y_variantes_de_modelo(datos, mapeado):
+    indice = datos.indice
+    modelos = sorted({c[0] for c in indice.variantes})
+    metales = sorted({c[2] for c in indice.variantes}) + ["PLATINO"]
+    for modelo in modelos + ["NOEXISTE", ""]:
+        for metal in metales:
+            assert mapeado.opciones(modelo, metal) == indice.opciones(modelo, metal)
+        # Las mismas variantes; el archivo las devuelve por clave y el índice en el orden del libro
+        assert sorted(mapeado.variantes_de_modelo(modelo)) == sorted(indice.variantes_de_modelo(modelo))
+
+
+def test_entradas_vitrina_y_ct(datos, mapeado):
+    assert mapeado.entradas_vitrina() == datos.indice.entradas_vitrina()
+    servidos = mapeado.datos()
+    assert dict(servidos.ct_cache) == datos.ct_cache
+    assert servidos.ct_cache.get("NOEXISTE|4|ROSA|18|DAMA") is None
+    assert servidos.costos_diamantes == datos.costos_diamantes
+
+
+def test_se_pasa_a_otro_proceso_sin_copiar_los_datos(mapeado):
+    copia = pickle.loads(pickle.dumps(mapeado))
+    assert copia.ruta == mapeado.ruta
+    assert dict(copia.variantes.items()) == dict(mapeado.variantes.items())
+
+
+def test_rechaza_archivo_desactualizado(datos, tmp_path):
+    excel = str(tmp_path / "catalogo.xlsm")
+    ruta = str(tmp_path / "catalogo.catmap")
+    with open(excel, "wb") as f:
+        f.write(b"libro")
+    escribir_catalogo_mapeado(datos, excel, ruta)
+    assert abrir_catalogo_mapeado(excel, ruta) is not None
+
+    with open(excel, "ab") as f:
+        f.write(b" editado") # El libro cambió después de compilar
+    assert abrir_catalogo_mapeado(excel, ruta) is None
+
+    os.remove(excel) # Sin libro no hay con qué comparar: se sirve lo compilado
+    assert abrir_catalogo_mapeado(excel, ruta) is not None
+    assert abrir_catalogo_mapeado(excel, str(tmp_path / "no-existe.catmap")) is None
+
+
+def test_rechaza_otra_version_o_archivo_ajeno(datos, excel, tmp_path, monkeypatch):
+    ruta = str(tmp_path / "catalogo.catmap")
+    monkeypatch.setattr(catalogo_mapeado, "VERSION_FORMATO", VERSION_FORMATO - 1)
+    escribir_catalogo_mapeado(datos, excel, ruta)
+    monkeypatch.undo()
+    with open(ruta, "rb") as f:
+        assert f.read(len(MAGIC) + 1) == MAGIC + bytes([VERSION_FORMATO - 1])
+
+    with pytest.raises(ValueError):
+        CatalogoMapeado(ruta)
+    assert abrir_catalogo_mapeado(excel, ruta) is None
+
+    ajeno = tmp_path / "ajeno.catmap"
+    ajeno.write_bytes(b"no es un catalogo mapeado")
+    assert abrir_catalogo_mapeado(excel, str(ajeno)) is None
@@ -0,0 +1,64 @@
+"""Elegir un anillo en el catálogo conserva los filtros activos y el cursor de la página en la que se eligió."""
+import html
+import re
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from sintetico import datos_sinteticos
+
+PRECIO = 2650.0
+ACCIONES = re.compile(r'<form method="POST" action="([^"]*)" class="w-full">')
+SELECCIONES = re.compile(r'name="seleccion" value="([^"]*)"')
+
+
+@pytest.fixture(scope="module")
+def app():
+    import Formulario
+    from precio_oro import ProveedorFijo
+
+    Formulario.servicio_precio_oro.cambiar_proveedor(ProveedorFijo(PRECIO), refrescar=False)
+    Formulario.servicio_precio_oro.publicar(PRECIO)
+    Formulario.recargador_catalogo.publicar(datos_sinteticos(3000))
+    yield Formulario
+    Formulario.servicio_precio_oro.detener()
+
+
+def _acciones(pagina: str):
+    return {html.unescape(accion) for accion in ACCIONES.findall(pagina)}
+
+
+def test_las_cards_llevan_la_consulta_en_el_action(app):
+    cliente = app.app.test_client()
+    pagina = cliente.get("/catalogo?metal=rosa&kilates=18K&q=LS").get_data(as_text=True)
+    [accion] = _acciones(pagina)
+    ruta, consulta = urlsplit(accion).path, parse_qs(urlsplit(accion).query)
+    assert ruta == "/catalogo"
+    assert consulta == {"metal": ["ROSA"], "kilates": ["18"], "q": ["LS"]}
+
+    sin_filtros = cliente.get("/catalogo").get_data(as_text=True)
+    assert _acciones(sin_filtros) == {"/catalogo"}
+
+
+def test_elegir_en_una_pagina_siguiente_conserva_filtros_y_cursor(app):
+    cliente = app.app.test_client()
+    primera = cliente.get("/catalogo?metal=ROSA").get_data(as_text=True)
+    [siguiente] = re.findall(r'data-fragmento="([^"]*)"', primera)
+    fragmento = cliente.get(html.unescape(siguiente)).get_data(as_text=True)
+    [accion] = _acciones(fragmento)
+    assert parse_qs(urlsplit(accion).query) == {"metal": ["ROSA"], "cursor": parse_qs(urlsplit(html.unescape(siguiente)).query)["cursor"]}
+
+    seleccion = SELECCIONES.findall(fragmento)[0]
+    respuesta = cliente.post(accion, data={"seleccion": seleccion, "tipo": "dama"})
+    pagina = respuesta.get_data(as_text=True)
+    assert respuesta.status_code == 200
+    assert "guardado" in pagina
+    # La misma página filtrada: solo cards ROSA, a partir del cursor, y sus forms siguen apuntando a ella
+    assert seleccion in SELECCIONES.findall(pagina)
+    assert all(valor.endswith(";ROSA") for valor in SELECCIONES.findall(pagina))
+    assert SELECCIONES.findall(pagina) == SELECCIONES.findall(fragmento)
+    assert _acciones(pagina) == {accion}
+    assert 'relative selected-dama"' in pagina # La card elegida ya aparece marcada
+
+    with cliente.session_transaction() as sesion:
+        modelo, metal = seleccion.split(";")
+        assert (sesion["modelo_dama"], sesion["metal_dama"]) == (modelo, metal)
@@ -0,0 +1,121 @@
+"""Guardados concurrentes por la cola de escritura diferida de AlmacenCotizaciones y acceso al listado /cotizaciones."""
+import base64
+import threading
+
+import pytest
+
+from cotizaciones_guardadas import AlmacenCotizaciones, cursor_desde_texto, nueva_cotizacion
+
+HILOS = 8
+POR_HILO = 250
+CLIENTES = 10
+
+
+def _guardar_en_paralelo(almacen: AlmacenCotizaciones):
+    referencias, lock = [], threading.Lock()
+    inicio = threading.Barrier(HILOS)
+
+    def peticiones(hilo: int):
+        propias = []
+        inicio.wait()
+        for i in range(POR_HILO):
+            n = hilo * POR_HILO + i
+            email = f"Cliente{n % CLIENTES}@Ejemplo.com" if n % 2 else f"cliente{n % CLIENTES}@ejemplo.com"
+            anillos = [{"tipo": "dama", "modelo": "LS141", "metal": "ROSA", "monto": 1000.0 + n}]
+            propias.append(almacen.guardar(nueva_cotizacion(f"Cliente {n}", email, "Español", 2650.0, "live", 1, anillos, 1000.0 + n, 1010.0)))
+        with lock:
+            referencias.extend(propias)
+
+    trabajadores = [threading.Thread(target=peticiones, args=(h,)) for h in range(HILOS)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return referencias
+
+
+@pytest.mark.parametrize("max_cola", [10000, 16]) # Con la cola chica, parte se escribe en la propia petición
+def test_guardados_concurrentes_llegan_todos(tmp_path, max_cola):
+    ruta = str(tmp_path / "cotizaciones.sqlite3")
+    almacen = AlmacenCotizaciones(ruta, max_cola=max_cola)
+    referencias = _guardar_en_paralelo(almacen)
+    almacen.detener()
+
+    total = HILOS * POR_HILO
+    assert len(set(referencias)) == total
+    assert almacen.pendientes() == 0
+    estadisticas = almacen.estadisticas()
+    assert estadisticas["errores"] == 0
+    assert estadisticas["escritas"] == total
+    assert estadisticas["encoladas"] + estadisticas["directas"] == total
+    if max_cola == 10000:
+        assert estadisticas["lotes"] < total # La cola agrupa escrituras
+
+    # Otra conexión (otro worker) ve todo lo guardado
+    lector = AlmacenCotizaciones(ruta, diferida=False)
+    assert len(lector) == total
+    assert all(lector.obtener(r) is not None for r in referencias[::97])
+    for cliente in range(CLIENTES):
+        email = f"CLIENTE{cliente}@ejemplo.com"
+        vistas, pagina = [], lector.buscar(email, limite=100)
+        while pagina:
+            vistas.extend(pagina)
+            pagina = lector.buscar(email, despues_de=cursor_desde_texto(pagina[-1].cursor()), limite=100)
+        assert len(vistas) == total // CLIENTES
+        assert {c.email_cliente.lower() for c in vistas} == {email.lower()}
+        orden = [(c.creada, c.id) for c in vistas]
+        assert orden == sorted(orden, reverse=True) and len(set(orden)) == len(orden) # Sin saltos ni repeticiones entre páginas
+
+
+# --- /cotizaciones solo con la credencial de administración: lista datos de clientes ---
+ANILLO = {"tipo": "dama", "modelo": "LS141", "metal": "ROSA", "kilates": "18", "ancho": "4", "talla": "6", "tipo_diamante": "Laboratorio",
+          "monto_oro": 819.85, "cost_fijo": 300.0, "cost_adicional": 0.0, "monto_diamantes": 0.0, "monto": 1119.85}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    import Formulario
+
+    almacen = AlmacenCotizaciones(str(tmp_path / "cotizaciones.sqlite3"), diferida=False)
+    almacen.guardar(nueva_cotizacion("Ana Secreta", "ana.secreta@ejemplo.com", "Español", 2650.0, "live", 1,
+                                     [ANILLO],
+                                     1119.85, 1120.0))
+    monkeypatch.setattr(Formulario, "cotizaciones_guardadas", almacen)
+    monkeypatch.setattr(Formulario, "ADMIN_TOKEN", "clave-admin")
+    return Formulario.app.test_client()
+
+
+def _basic(usuario: str, clave: str) -> dict:
+    return {"Authorization": "Basic " + base64.b64encode(f"{usuario}:{clave}".encode()).decode()}
+
+
+def test_anonimo_no_ve_las_cotizaciones(app):
+    for ruta in ("/cotizaciones", "/cotizaciones?email=ana.secreta@ejemplo.com"):
+        respuesta = app.get(ruta)
+        assert respuesta.status_code == 401
+        assert respuesta.headers["WWW-Authenticate"].startswith("Basic")
+        assert b"ana.secreta" not in respuesta.data and b"Ana Secreta" not in respuesta.data
+
+
+def test_credencial_incorrecta(app):
+    for cabeceras in (_basic("admin", "otra"), {"Authorization": "Bearer otra"}, {"X-Admin": "clave-admin"}):
+        respuesta = app.get("/cotizaciones", headers=cabeceras)
+        assert respuesta.status_code == 401
+        assert b"Ana Secreta" not in respuesta.data
+
+
+def test_con_credencial(app):
+    for cabeceras in (_basic("admin", "clave-admin"), {"Authorization": "Bearer clave-admin"}):
+        respuesta = app.get("/cotizaciones?email=ana.secreta@ejemplo.com", headers=cabeceras)
+        assert respuesta.status_code == 200
+        assert b"Ana Secreta" in respuesta.data
+
+
+def test_sin_credencial_configurada_no_existe(app, monkeypatch):
+    import Formulario
+
+    monkeypatch.setattr(Formulario, "ADMIN_TOKEN", "")
+    for cabeceras in ({}, _basic("admin", ""), {"Authorization": "Bearer "}):
+        respuesta = app.get("/cotizaciones", headers=cabeceras)
+        assert respuesta.status_code == 404
+        assert b"Ana Secreta" not in respuesta.data
@@ -0,0 +1,134 @@
+"""
+Búsqueda facetada (mapas de bits) frente a filtrar a fuerza bruta las variantes de indice.variantes, con el
+precio de cada una cotizado como en el formulario (talla base, diamante de laboratorio).
+"""
+import math
+
+import pytest
+from sintetico import datos_sinteticos
+
+from facetas_catalogo import FACETAS_BUSQUEDA, ConsultaFacetas, tokens_nombre
+from precios import buscar_variante, cotizar_anillo
+from vitrina_catalogo import construir_vitrina
+
+PRECIOS_ORO = (2650.0, 5600.0)
+
+
+@pytest.fixture(scope="module")
+def catalogo():
+    datos = datos_sinteticos(3000)
+    vitrina = construir_vitrina(datos)
+    posiciones = {}
+    for posicion, entrada in enumerate(vitrina.entradas):
+        posiciones.setdefault((entrada.modelo, entrada.metal), posicion)
+    return datos, vitrina, posiciones
+
+
+def _variantes(datos, posiciones, precio_onza):
+    """(card, valores de faceta, precio o None) de cada variante con card, cotizada una por una."""
+    indice = datos.indice
+    talla_base = indice.tallas[0]
+    variantes = []
+    for (modelo, ancho, metal, kilates, genero), registro in indice.variantes.items():
+        tarjeta = posiciones.get((modelo.upper(), metal.upper()))
+        if tarjeta is None:
+            continue
+        peso, cost_fijo, cost_adicional, ct = buscar_variante(indice, modelo, metal, ancho, kilates, talla_base, genero)
+        cotizacion = cotizar_anillo(precio_onza, datos.costos_diamantes, kilates, "Laboratorio", peso, cost_fijo, cost_adicional, ct)
+        valores = {"metal": metal.upper(), "kilates": kilates, "genero": genero.upper(), "ancho": ancho,
+                   "diamantes": "SI" if registro.ct > 0 else "NO"}
+        variantes.append((tarjeta, modelo, valores, cotizacion.monto if cotizacion.monto > 0 else None))
+    return variantes
+
+
+def _cumple(variante, consulta: ConsultaFacetas, ignorar: str = "") -> bool:
+    _, modelo, valores, precio = variante
+    for faceta, elegidos in consulta.facetas.items():
+        if faceta != ignorar and elegidos and valores[faceta] not in elegidos:
+            return False
+    tokens = tokens_nombre(modelo)
+    for palabra in consulta.texto.upper().split():
+        if not any(token.startswith(palabra) for token in tokens):
+            return False
+    ancho = float(valores["ancho"])
+    if consulta.ancho_min is not None and ancho < consulta.ancho_min or consulta.ancho_max is not None and ancho > consulta.ancho_max:
+        return False
+    if consulta.con_precio():
+        # Margen mínimo: la fórmula del índice (a·precio + b) y la del formulario redondean distinto
+        if precio is None:
+            return False
+        if consulta.precio_min is not None and precio < consulta.precio_min - 1e-6:
+            return False
+        if consulta.precio_max is not None and precio > consulta.precio_max + 1e-6:
+            return False
+    return True
+
+
+def _consultas(variantes):
+    precios = sorted(p for _, _, _, p in variantes if p is not None)
+    # Límites exactamente en el precio de alguna variante: los rangos son cerrados
+    bajo, alto = precios[len(precios) // 4], precios[3 * len(precios) // 4]
+    return [
+        ConsultaFacetas(),
+        ConsultaFacetas({"metal": ("ROSA",)}),
+        ConsultaFacetas({"metal": ("ROSA", "BLANCO"), "kilates": ("14", "18")}),
+        ConsultaFacetas({"metal": ("ROSA",), "kilates": ("18",), "diamantes": ("SI",)}, ancho_min=4, ancho_max=6),
+        ConsultaFacetas({"genero": ("DAMA",), "ancho": ("2", "8")}),
+        ConsultaFacetas({"metal": ("PLATINO",)}), # Valor inexistente: nada cumple
+        ConsultaFacetas(texto="LS00"),
+        ConsultaFacetas(texto="ls 12"),
+        ConsultaFacetas(precio_max=alto),
+        ConsultaFacetas(precio_min=bajo),
+        ConsultaFacetas(precio_min=bajo, precio_max=bajo),
+        ConsultaFacetas({"metal": ("ROSA", "BLANCO"), "kilates": ("14", "18"), "genero": ("DAMA",), "diamantes": ("SI",)},
+                        texto="LS", ancho_min=4, ancho_max=6, precio_min=bajo, precio_max=alto),
+    ]
+
+
+@pytest.mark.parametrize("precio_onza", PRECIOS_ORO)
+def test_precios_de_las_variantes(catalogo, precio_onza):
+    datos, vitrina, posiciones = catalogo
+    variantes = _variantes(datos, posiciones, precio_onza)
+    precios = vitrina.facetas.precios(precio_onza)
+    # Las variantes del índice van ordenadas por card conservando el orden del libro dentro de cada una
+    esperados = [p for _, _, _, p in sorted(variantes, key=lambda v: v[0])]
+    assert len(precios) == len(esperados)
+    for precio, esperado in zip(precios, esperados):
+        if esperado is None:
+            assert math.isnan(precio)
+        else:
+            assert precio == pytest.approx(esperado, abs=1e-6)
+
+
+@pytest.mark.parametrize("precio_onza", PRECIOS_ORO)
+def test_busqueda_igual_a_fuerza_bruta(catalogo, precio_onza):
+    datos, vitrina, posiciones = catalogo
+    facetas = vitrina.facetas
+    variantes = _variantes(datos, posiciones, precio_onza)
+    for consulta in _consultas(variantes):
+        resultado = facetas.buscar(consulta, precio_onza)
+        cumplen = [v for v in variantes if _cumple(v, consulta)]
+
+        assert resultado.total_variantes == len(cumplen), consulta
+        assert set(resultado.tarjetas.nonzero()[0]) == {v[0] for v in cumplen}, consulta
+        for faceta in FACETAS_BUSQUEDA:
+            otros = [v for v in variantes if _cumple(v, consulta, ignorar=faceta)]
+            for valor, conteo in resultado.conteos[faceta].items():
+                assert conteo == sum(v[2][faceta] == valor for v in otros), (consulta, faceta, valor)
+
+        posiciones_pagina = sorted({v[0] for v in variantes})[:40]
+        for posicion, desde in zip(posiciones_pagina, facetas.precio_desde(resultado, posiciones_pagina, precio_onza)):
+            precios = [v[3] for v in cumplen if v[0] == posicion and v[3] is not None]
+            if precios:
+                assert desde == pytest.approx(min(precios), abs=1e-6)
+            else:
+                assert desde is None
+
+
+def test_limites_de_precio_inclusivos(catalogo):
+    datos, vitrina, posiciones = catalogo
+    precio_onza = PRECIOS_ORO[0]
+    precios = vitrina.facetas.precios(precio_onza)
+    exacto = float(sorted(p for p in precios if not math.isnan(p))[len(precios) // 2])
+    resultado = vitrina.facetas.buscar(ConsultaFacetas(precio_min=exacto, precio_max=exacto), precio_onza)
+    assert resultado.total_variantes == int((precios == exacto).sum()) >= 1
@@ -0,0 +1,55 @@
+"""Compactación del historial del precio del oro y arranque en caliente de ServicioPrecioOro desde él."""
+import time
+
+from historial_precio_oro import HistorialPrecioOro
+from precio_oro import ProveedorFijo, ServicioPrecioOro
+
+
+def test_compactar_conserva_la_ultima_confirmacion(tmp_path):
+    historial = HistorialPrecioOro(str(tmp_path / "precio.sqlite3"))
+    ahora = time.time()
+    # Tres horas con el mismo precio, confirmado cada 5 minutos hasta hace un minuto
+    instantes = [ahora - 3 * 3600 + i * 300 for i in range(36)] + [ahora - 60]
+    for instante in instantes:
+        historial.registrar(2650.0, instante)
+
+    assert historial.compactar(ahora) == len(instantes) - 2
+    assert historial.ultimo().instante == ahora - 60
+    assert historial.precio_en(ahora - 2 * 3600).precio == 2650.0
+    assert historial.precio_en(instantes[0]).instante == instantes[0] # Desde cuándo rige el precio
+
+    # Arranque sin red: el proveedor falla y el servicio solo tiene lo que leyó del historial
+    servicio = ServicioPrecioOro(ProveedorFijo(error=ConnectionError("sin red")), historial=historial, ttl=900)
+    try:
+        lectura = servicio.lectura()
+    finally:
+        servicio.detener()
+    assert lectura.precio == 2650.0
+    assert lectura.status == "live"
+    assert 55 <= lectura.edad <= 120
+
+
+def test_compactar_conserva_los_cambios_de_precio(tmp_path):
+    historial = HistorialPrecioOro(str(tmp_path / "precio.sqlite3"))
+    ahora = time.time()
+    precios = [2600.0, 2600.0, 2600.0, 2610.0, 2610.0, 2600.0, 2620.0, 2620.0, 2620.0]
+    for i, precio in enumerate(precios):
+        historial.registrar(precio, ahora - 3600 + i * 300)
+
+    historial.compactar(ahora)
+    assert [p.precio for p in historial.serie()] == [2600.0, 2600.0, 2610.0, 2610.0, 2600.0, 2620.0, 2620.0]
+    for i, precio in enumerate(precios):
+        assert historial.precio_en(ahora - 3600 + i * 300 + 1).precio == precio
+    assert historial.compactar(ahora) == 0 # Idempotente
+
+
+def test_compactar_fuera_de_la_ventana_conserva_el_mas_reciente(tmp_path):
+    historial = HistorialPrecioOro(str(tmp_path / "precio.sqlite3"), detalle_dias=1)
+    ahora = time.time()
+    hora = (ahora - 3 * 86400) // 3600 * 3600
+    for i in range(6): # Una hora de precios distintos, hace tres días, y ninguno después
+        historial.registrar(2600.0 + i, hora + i * 600)
+
+    historial.compactar(ahora)
+    assert [p.instante for p in historial.serie()] == [hora, hora + 3000]
+    assert historial.ultimo().precio == 2605.0
@@ -0,0 +1,114 @@
+"""
+El índice de IndiceCatalogo frente a la búsqueda original con filtros booleanos sobre el DataFrame
+(obtener_peso_y_costo antes del índice), sobre un libro sintético con celdas vacías, claves repetidas y
+filas sin clave completa.
+"""
+import math
+from itertools import product
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from sintetico import ANCHOS, GENEROS, KILATES, METALES, TALLAS, escribir_libro
+
+from catalogo import leer_excel
+from precios import buscar_variante
+from utilidades import safe_float
+
+
+def _cargar_dataframes(ruta: str):
+    """WEDDING BANDS y SIZE como los cargaba cargar_datos() antes del índice."""
+    df_raw = pd.read_excel(ruta, sheet_name="WEDDING BANDS", engine="openpyxl", header=None)
+    df = df_raw.iloc[2:].copy()
+    df.columns = df_raw.iloc[1].astype(str).str.strip().str.upper()
+    df.rename(columns={"WIDTH": "ANCHO"}, inplace=True)
+    df_adicional_raw = pd.read_excel(ruta, sheet_name="SIZE", engine="openpyxl", header=None)
+    df_adicional = df_adicional_raw.iloc[1:].copy()
+    df_adicional.columns = df_adicional_raw.iloc[0].astype(str).str.strip().str.upper()
+    for col in ["NAME", "METAL", "RUTA FOTO", "PESO", "GENERO", "CT", "ANCHO", "CARAT"]:
+        df[col] = df[col].astype(str).str.strip()
+    df["ANCHO"] = df["ANCHO"].str.replace("MM", "", regex=False).str.strip()
+    return df, df_adicional
+
+
+def _peso_y_costo_dataframe(df, df_adicional, modelo, metal, ancho, kilates, talla, genero):
+    """La búsqueda original: primera fila que cumple cada filtro (.iloc[0])."""
+    if not all([modelo, metal, ancho, kilates, talla, genero]):
+        return 0.0, 0.0, 0.0, 0.0
+    filtro_base = (df["NAME"] == modelo) & (df["ANCHO"] == ancho) & (df["METAL"] == metal) & \
+                  (df["CARAT"] == kilates) & (df["GENERO"] == genero)
+    peso = price_cost = ct = cost_adicional = 0.0
+    if not df.loc[filtro_base].empty:
+        base_fila = df.loc[filtro_base].iloc[0]
+        peso = safe_float(base_fila.get("PESO", 0))
+        price_cost = safe_float(base_fila.get("PRICE COST", 0))
+        ct = safe_float(base_fila.get("CT", 0))
+    filtro_adicional = df_adicional["SIZE"].astype(str).str.strip() == talla
+    if not df_adicional.loc[filtro_adicional].empty:
+        cost_adicional = safe_float(df_adicional.loc[filtro_adicional].iloc[0].get("ADICIONAL"))
+    return peso, price_cost, cost_adicional, ct
+
+
+def _sin_nan(valores):
+    # Una celda vacía pasada a texto ("nan") daba NaN en el DataFrame; el índice la guarda como 0.0.
+    # Para el formulario es lo mismo: cotizar_anillo no cotiza un peso que no sea > 0.
+    return tuple(0.0 if math.isnan(v) else v for v in valores)
+
+
+@pytest.fixture(scope="module")
+def libro(tmp_path_factory):
+    """Dos modelos sintéticos con casos del libro real: celdas vacías, clave repetida y filas sin clave."""
+    ruta = str(tmp_path_factory.mktemp("catalogo") / "catalogo.xlsx")
+    escribir_libro(ruta, 144)
+    wb = load_workbook(ruta)
+    bandas, size = wb["WEDDING BANDS"], wb["SIZE"]
+    bandas["D3"] = None # PESO vacío
+    bandas["I4"] = None # PRICE COST vacío
+    bandas["F5"] = None # CT vacío
+    bandas["D6"] = "n/d" # PESO con texto
+    primera = [c.value for c in bandas[7]]
+    bandas.append([primera[0], primera[1], primera[2], 99.0, primera[4], 9, primera[6], primera[7], 999]) # Repetida: gana la primera
+    bandas.append([None, primera[1], None, 50.0, primera[4], 1, primera[6], primera[7], 500]) # Sin NAME
+    bandas.append([primera[0], primera[1], None, 50.0, primera[4], 1, None, primera[7], 500]) # Sin ANCHO
+    size["B4"] = None # ADICIONAL vacío
+    size.append([TALLAS[5], 777, None, 800, None, None]) # Talla repetida: gana la primera
+    size.append([None, 5, None, 800, None, None]) # Sin talla
+    wb.save(ruta)
+    df, df_adicional = _cargar_dataframes(ruta)
+    return df, df_adicional, leer_excel(ruta).indice
+
+
+def test_variantes_coinciden_con_el_dataframe(libro):
+    df, df_adicional, indice = libro
+    modelos = sorted(set(df["NAME"].dropna()) - {"nan"}) + ["NO-EXISTE"] # Según la versión de pandas, vacío es NaN o "nan"
+    talla = TALLAS[0]
+    for modelo, metal, ancho, kilates, genero in product(modelos, METALES + ["PLATINO"], ANCHOS + ["9"], KILATES, GENEROS):
+        esperado = _sin_nan(_peso_y_costo_dataframe(df, df_adicional, modelo, metal, ancho, kilates, talla, genero))
+        assert buscar_variante(indice, modelo, metal, ancho, kilates, talla, genero) == esperado, (modelo, metal, ancho, kilates, genero)
+
+
+def test_adicional_por_talla_coincide_con_el_dataframe(libro):
+    df, df_adicional, indice = libro
+    modelo, ancho, metal, kilates, genero = next(iter(indice.variantes))
+    for talla in TALLAS + ["14", "3.0", "nan"]:
+        esperado = _sin_nan(_peso_y_costo_dataframe(df, df_adicional, modelo, metal, ancho, kilates, talla, genero))
+        assert buscar_variante(indice, modelo, metal, ancho, kilates, talla, genero) == esperado, talla
+        assert indice.adicional_por_talla.get(talla, 0.0) == esperado[2], talla
+
+
+def test_datos_incompletos_no_cotizan(libro):
+    df, df_adicional, indice = libro
+    modelo, ancho, metal, kilates, genero = next(iter(indice.variantes))
+    configuracion = [modelo, metal, ancho, kilates, TALLAS[0], genero]
+    for i in range(len(configuracion)):
+        incompleta = configuracion[:i] + [""] + configuracion[i + 1:]
+        assert buscar_variante(indice, *incompleta) == _peso_y_costo_dataframe(df, df_adicional, *incompleta) == (0.0, 0.0, 0.0, 0.0)
+
+
+def test_casos_del_libro_estan_cubiertos(libro):
+    """El libro de prueba tiene de verdad celdas vacías, claves repetidas y valores no numéricos."""
+    _, _, indice = libro
+    assert 0.0 in {r.peso for r in indice.variantes.values()}
+    assert 0.0 in {r.price_cost for r in indice.variantes.values()}
+    assert indice.adicional_por_talla[TALLAS[5]] != 777
+    assert not any(r.peso == 99.0 or r.peso == 50.0 for r in indice.variantes.values())
@@ -0,0 +1,19 @@
+"""/metrics expone el tráfico y los internos de la app: solo con la credencial de administración."""
+
+
+def test_metrics_requiere_credencial(monkeypatch):
+    import Formulario
+
+    cliente = Formulario.app.test_client()
+    monkeypatch.setattr(Formulario, "ADMIN_TOKEN", "")
+    assert cliente.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(Formulario, "ADMIN_TOKEN", "clave-admin")
+    anonima = cliente.get("/metrics")
+    assert anonima.status_code == 401
+    assert b"# TYPE" not in anonima.data
+    assert cliente.get("/metrics", headers={"Authorization": "Bearer otra"}).status_code == 401
+
+    respuesta = cliente.get("/metrics", headers={"Authorization": "Bearer clave-admin"})
+    assert respuesta.status_code == 200
+    assert b"# TYPE" in respuesta.data
@@ -0,0 +1,120 @@
+"""Estados live/stale/fallback de ServicioPrecioOro y su circuito, con un reloj manual y sin hilo de fondo."""
+import pytest
+
+from precio_oro import DEFAULT_GOLD_PRICE, ProveedorFijo, ServicioPrecioOro
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj():
+    return Reloj()
+
+
+def servicio_de_prueba(proveedor, reloj, monkeypatch, **opciones):
+    servicio = ServicioPrecioOro(proveedor, intervalo=60, ttl=900, umbral_fallos=3, enfriamiento=600,
+                                 reloj=reloj, **opciones)
+    monkeypatch.setattr(servicio, "iniciar", lambda: None) # Los refrescos los dispara el test
+    return servicio
+
+
+def test_sin_precio_sirve_el_fallback(reloj, monkeypatch):
+    servicio = servicio_de_prueba(ProveedorFijo(error=ConnectionError("sin red")), reloj, monkeypatch)
+
+    assert servicio.refrescar() is False
+    lectura = servicio.lectura()
+    assert (lectura.precio, lectura.status, lectura.edad) == (DEFAULT_GOLD_PRICE, "fallback", None)
+
+
+def test_live_pasa_a_stale_y_se_conserva_si_el_proveedor_falla(reloj, monkeypatch):
+    proveedor = ProveedorFijo(2650.0)
+    servicio = servicio_de_prueba(proveedor, reloj, monkeypatch)
+
+    assert servicio.refrescar() is True
+    reloj.avanzar(120)
+    lectura = servicio.lectura()
+    assert (lectura.precio, lectura.status, lectura.edad) == (2650.0, "live", 120)
+
+    proveedor.error = ConnectionError("sin red")
+    reloj.avanzar(780)
+    assert servicio.refrescar() is False
+    assert servicio.lectura().status == "live" # Edad == ttl: todavía vigente
+
+    reloj.avanzar(1)
+    lectura = servicio.lectura()
+    assert (lectura.precio, lectura.status, lectura.edad) == (2650.0, "stale", 901)
+
+    proveedor.error = None
+    proveedor.precio = 2700.0
+    assert servicio.refrescar() is True
+    lectura = servicio.lectura()
+    assert (lectura.precio, lectura.status, lectura.edad) == (2700.0, "live", 0)
+
+
+def test_cambiar_proveedor_sin_precio_vuelve_al_fallback(reloj, monkeypatch):
+    servicio = servicio_de_prueba(ProveedorFijo(2650.0), reloj, monkeypatch)
+    servicio.refrescar()
+
+    servicio.cambiar_proveedor(ProveedorFijo(error=ConnectionError("sin red")))
+    assert servicio.lectura().status == "fallback"
+
+
+def test_circuito_se_abre_tras_el_umbral_y_se_cierra_tras_el_enfriamiento(reloj, monkeypatch):
+    proveedor = ProveedorFijo(error=ConnectionError("sin red"))
+    servicio = servicio_de_prueba(proveedor, reloj, monkeypatch)
+
+    for _ in range(2):
+        servicio.refrescar()
+    assert not servicio.circuito_abierto()
+    servicio.refrescar()
+    assert servicio.circuito_abierto()
+    assert (proveedor.llamadas, servicio.refrescos_fallidos) == (3, 3)
+
+    # Abierto: no se consulta al proveedor hasta que pase el enfriamiento
+    reloj.avanzar(599)
+    assert servicio.refrescar() is False
+    assert proveedor.llamadas == 3
+
+    reloj.avanzar(1)
+    assert not servicio.circuito_abierto()
+    proveedor.error = None
+    assert servicio.refrescar() is True
+    assert proveedor.llamadas == 4
+    assert servicio.lectura().status == "live"
+
+
+def test_un_exito_reinicia_el_contador_de_fallos(reloj, monkeypatch):
+    proveedor = ProveedorFijo(error=ConnectionError("sin red"))
+    servicio = servicio_de_prueba(proveedor, reloj, monkeypatch)
+
+    servicio.refrescar()
+    servicio.refrescar()
+    proveedor.error = None
+    servicio.refrescar()
+    proveedor.error = ConnectionError("sin red")
+    servicio.refrescar()
+    servicio.refrescar()
+    assert not servicio.circuito_abierto()
+    servicio.refrescar()
+    assert servicio.circuito_abierto()
+
+
+def test_circuito_abierto_reintenta_tras_un_fallo_en_semiabierto(reloj, monkeypatch):
+    proveedor = ProveedorFijo(error=ConnectionError("sin red"))
+    servicio = servicio_de_prueba(proveedor, reloj, monkeypatch)
+    for _ in range(3):
+        servicio.refrescar()
+
+    reloj.avanzar(600)
+    assert servicio.refrescar() is False # Primer intento tras el enfriamiento: vuelve a fallar
+    assert proveedor.llamadas == 4
+    assert servicio.circuito_abierto() # Los fallos siguen acumulados: se reabre de inmediato
@@ -0,0 +1,161 @@
+"""Presupuestos en lote: filas del CSV, cotización como el formulario, reanudación y rechazos de lote.json."""
+import csv
+import os
+
+import pytest
+from sintetico import datos_sinteticos
+
+from catalogo_mapeado import escribir_catalogo_mapeado
+from precios import calcular_monto_aproximado, cotizar_configuracion
+from presupuestos_lote import configuraciones_fila, cotizar_fila, generar, preparar_salida
+
+PRECIO = 2650.0
+COLUMNAS = ["cliente", "email", "idioma", "modelo", "metal", "ancho", "kilates", "talla", "genero", "tipo_diamante"]
+
+
+@pytest.fixture(scope="module")
+def datos():
+    return datos_sinteticos(144)
+
+
+@pytest.fixture(scope="module")
+def catalogo(datos, tmp_path_factory):
+    """Catálogo mapeado sin libro (sin libro no se comprueba la firma), como en bench_presupuestos_lote."""
+    directorio = tmp_path_factory.mktemp("catalogo")
+    excel, mapeado = str(directorio / "no-existe.xlsm"), str(directorio / "catalogo.catmap")
+    escribir_catalogo_mapeado(datos, excel, mapeado)
+    return excel, mapeado
+
+
+def _escribir_csv(ruta, datos, filas: int, talla_invalida_en: int = 0):
+    claves = list(datos.indice.variantes)
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS)
+        for i in range(1, filas + 1):
+            modelo, ancho, metal, kilates, genero = claves[i % len(claves)]
+            talla = "99" if i == talla_invalida_en else ""
+            escritor.writerow([f"Cliente {i}", f"c{i}@ejemplo.com", "English" if i % 2 else "Español", modelo, metal, ancho, kilates,
+                               talla, genero, "Natural"])
+
+
+def _generar(ruta_csv, salida, catalogo, precio=PRECIO, formatos=("html",)):
+    excel, mapeado = catalogo
+    return generar(str(ruta_csv), str(salida), precio, formatos, 1, 4, excel, excel + ".snapshot", mapeado)
+
+
+def _indice(salida):
+    with open(os.path.join(salida, "indice.csv"), newline="", encoding="utf-8") as f:
+        return [fila for fila in csv.DictReader(f) if fila.get("error") is not None]
+
+
+# --- Filas del CSV ---
+
+def test_un_anillo_por_fila():
+    [(tipo, c)] = configuraciones_fila({"modelo": "ls141", "metal": "rosa", "ancho": "4mm", "talla": "6", "genero": "Lady"})
+    assert tipo == "dama"
+    assert c == {"modelo": "LS141", "metal": "ROSA", "ancho": "4", "kilates": "14", "talla": "6", "genero": "DAMA", "tipo_diamante": "Laboratorio"}
+    [(tipo, c)] = configuraciones_fila({"modelo": "LS141", "metal": "ROSA", "kilates": "18K", "genero": "CABALLERO"})
+    assert tipo == "cab" and c["kilates"] == "18" and c["ancho"] == "" and c["talla"] == ""
+
+
+def test_secciones_dama_y_caballero():
+    fila = {"dama_modelo": "LS141", "dama_metal": "ROSA", "dama_kilates": "18", "dama_genero": "CABALLERO",
+            "cab_modelo": "LS200", "cab_metal": "BLANCO", "cab_talla": "10"}
+    anillos = configuraciones_fila(fila)
+    assert [tipo for tipo, _ in anillos] == ["dama", "cab"]
+    assert anillos[0][1]["genero"] == "DAMA" # La sección manda sobre la columna genero
+    assert anillos[0][1]["kilates"] == "18"
+    assert anillos[1][1] == {"modelo": "LS200", "metal": "BLANCO", "ancho": "", "kilates": "14", "talla": "10", "genero": "CABALLERO",
+                             "tipo_diamante": "Laboratorio"}
+
+
+def test_fila_sin_modelo_o_invalida():
+    with pytest.raises(ValueError):
+        configuraciones_fila({"cliente": "Ana"})
+    with pytest.raises(ValueError):
+        configuraciones_fila({"modelo": "LS141", "metal": "ROSA", "genero": "OTRO"})
+
+
+# --- Cotización ---
+
+def test_cotizar_fila_como_cotizar_configuracion(datos):
+    claves = list(datos.indice.variantes)
+    dama = next(c for c in claves if c[4] == "DAMA")
+    cab = next(c for c in claves if c[4] == "CABALLERO")
+    fila = {"cliente": "Ana y Luis", "email": "ana@ejemplo.com", "idioma": "en",
+            "dama_modelo": dama[0], "dama_metal": dama[2], "dama_kilates": dama[3], "dama_tipo_diamante": "Natural",
+            "cab_modelo": cab[0], "cab_metal": cab[2], "cab_ancho": cab[1], "cab_kilates": cab[3]}
+    cotizacion = cotizar_fila(datos, PRECIO, fila)
+
+    esperados = [cotizar_configuracion(datos.indice, datos.costos_diamantes, PRECIO, c) for _, c in configuraciones_fila(fila)]
+    assert [a["tipo"] for a in cotizacion.anillos] == ["dama", "cab"]
+    for anillo, (efectiva, esperada) in zip(cotizacion.anillos, esperados):
+        assert {k: anillo[k] for k in efectiva} == efectiva
+        assert {k: anillo[k] for k in esperada._fields} == esperada._asdict()
+    assert cotizacion.monto_bruto == pytest.approx(sum(e.monto for _, e in esperados))
+    assert cotizacion.monto_total == calcular_monto_aproximado(cotizacion.monto_bruto)
+    assert cotizacion.idioma == "English" and cotizacion.precio_onza == PRECIO and cotizacion.status_precio == "fijo"
+
+
+def test_cotizar_fila_rechaza_variante_o_talla_inexistente(datos):
+    modelo, ancho, metal, kilates, genero = next(iter(datos.indice.variantes))
+    fila = {"modelo": modelo, "metal": metal, "ancho": ancho, "kilates": kilates, "genero": genero}
+    with pytest.raises(ValueError, match="talla"):
+        cotizar_fila(datos, PRECIO, dict(fila, talla="99"))
+    with pytest.raises(ValueError, match="no está en el catálogo"):
+        cotizar_fila(datos, PRECIO, dict(fila, modelo="NO-EXISTE"))
+
+
+# --- Lote: salida, reanudación y rechazos ---
+
+def test_generar_y_reanudar(datos, catalogo, tmp_path):
+    ruta_csv, salida = tmp_path / "clientes.csv", tmp_path / "salida"
+    _escribir_csv(ruta_csv, datos, 30, talla_invalida_en=7)
+    progreso = _generar(ruta_csv, salida, catalogo)
+    assert progreso.hechas == 30 and progreso.errores == 1
+
+    filas = _indice(salida)
+    assert sorted(int(f["fila"]) for f in filas) == list(range(1, 31))
+    [con_error] = [f for f in filas if f["error"]]
+    assert con_error["fila"] == "7" and "talla" in con_error["error"] and con_error["archivo"] == ""
+    documentos = sorted(n for n in os.listdir(salida) if n.endswith(".html"))
+    assert len(documentos) == 29 and not any(n.startswith("000007_") for n in documentos)
+
+    # Interrupción: el índice queda con 12 filas completas y la 13.ª a medias
+    ruta_indice = os.path.join(salida, "indice.csv")
+    with open(ruta_indice, encoding="utf-8") as f:
+        lineas = f.read().splitlines(keepends=True)
+    cortadas = {int(linea.split(",", 1)[0]) for linea in lineas[13:]}
+    with open(ruta_indice, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lineas[:13])
+        f.write(lineas[13][:len(lineas[13]) // 2])
+    conservado = os.path.join(salida, next(n for n in documentos if int(n[:6]) not in cortadas))
+    os.utime(conservado, (0, 0))
+
+    progreso = _generar(ruta_csv, salida, catalogo)
+    assert progreso.hechas == 30
+    filas = _indice(salida)
+    assert sorted(int(f["fila"]) for f in filas) == list(range(1, 31)) # Cada fila una vez; la línea cortada no cuenta
+    assert os.stat(conservado).st_mtime == 0 # Lo terminado no se regenera
+
+    # Sin nada pendiente no se toca nada
+    assert _generar(ruta_csv, salida, catalogo).hechas == 30
+    assert len(_indice(salida)) == 30
+
+
+def test_reanudar_rechaza_otro_precio_formato_o_csv(datos, catalogo, tmp_path):
+    ruta_csv, salida = tmp_path / "clientes.csv", tmp_path / "salida"
+    _escribir_csv(ruta_csv, datos, 5)
+    _generar(ruta_csv, salida, catalogo)
+
+    with pytest.raises(SystemExit, match="oro"):
+        _generar(ruta_csv, salida, catalogo, precio=PRECIO + 10)
+    with pytest.raises(SystemExit, match="formato"): # Directo: generar PDF pide weasyprint antes de mirar la carpeta
+        preparar_salida(str(salida), PRECIO, ("html", "pdf"), str(ruta_csv))
+    _escribir_csv(ruta_csv, datos, 6) # El mismo archivo, editado
+    with pytest.raises(SystemExit, match="CSV"):
+        _generar(ruta_csv, salida, catalogo)
+    otro = tmp_path / "otro.csv"
+    _escribir_csv(otro, datos, 5)
+    _generar(otro, salida, catalogo) # Mismo contenido en otra ruta: mismas filas, se puede reanudar
@@ -0,0 +1,143 @@
+"""Sesiones del lado del servidor: almacenes en memoria y SQLite, y la interfaz de Flask que solo escribe si algo cambió."""
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from flask import Flask, session
+
+from sesiones import AlmacenMemoria, AlmacenSqlite, InterfazSesionServidor, crear_interfaz_sesion
+
+
+def _app(almacen) -> Flask:
+    app = Flask(__name__)
+    app.secret_key = "clave-de-prueba"
+    app.session_interface = InterfazSesionServidor(almacen)
+
+    @app.route("/poner/<valor>")
+    def poner(valor):
+        session["idioma"] = valor
+        return "ok"
+
+    @app.route("/leer")
+    def leer():
+        return session.get("idioma", "-")
+
+    @app.route("/vaciar")
+    def vaciar():
+        session.clear()
+        return "ok"
+
+    return app
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def almacen(request, tmp_path):
+    if request.param == "memoria":
+        return AlmacenMemoria(ttl=3600)
+    return AlmacenSqlite(str(tmp_path / "sesiones.sqlite3"), ttl=3600)
+
+
+def test_la_cookie_solo_lleva_el_identificador(almacen):
+    cliente = _app(almacen).test_client()
+    respuesta = cliente.get("/poner/English")
+    cookie = cliente.get_cookie("session")
+
+    assert "English" not in respuesta.headers["Set-Cookie"]
+    assert almacen.leer(cookie.value) == {"idioma": "English"}
+    assert len(cookie.value) >= 32 and "." not in cookie.value # Token aleatorio, no una cookie firmada con datos
+    assert cliente.get("/leer").get_data(as_text=True) == "English"
+
+
+def test_solo_escribe_cuando_cambia_un_valor(almacen):
+    app = _app(almacen)
+    cliente = app.test_client()
+    cliente.get("/poner/Español") # Sin cookie todavía: no lee el almacén
+    assert almacen.escrituras == 1
+
+    cliente.get("/leer")
+    respuesta = cliente.get("/poner/Español") # Reasignar el mismo valor no es un cambio
+    assert almacen.escrituras == 1
+    assert "Set-Cookie" not in respuesta.headers
+    assert app.session_interface.omitidas == 1
+
+    cliente.get("/poner/English")
+    assert almacen.escrituras == 2
+    assert app.session_interface.estadisticas() == {"lecturas": 3, "escrituras": 2, "omitidas": 1}
+
+
+def test_sesion_vaciada_se_borra(almacen):
+    cliente = _app(almacen).test_client()
+    cliente.get("/poner/English")
+    sid = cliente.get_cookie("session").value
+
+    cliente.get("/vaciar")
+    assert almacen.leer(sid) is None
+    assert cliente.get_cookie("session") is None
+    assert cliente.get("/leer").get_data(as_text=True) == "-"
+
+
+def test_cookie_desconocida_abre_una_sesion_nueva(almacen):
+    cliente = _app(almacen).test_client()
+    cliente.set_cookie("session", "inventada")
+    cliente.get("/poner/English")
+    sid = cliente.get_cookie("session").value
+    assert sid != "inventada"
+    assert almacen.leer("inventada") is None
+
+
+def test_memoria_caduca_tras_el_ttl():
+    almacen = AlmacenMemoria(ttl=0.3)
+    almacen.guardar("a", {"idioma": "English"})
+    almacen.guardar("b", {"idioma": "Español"})
+    time.sleep(0.2)
+    assert almacen.leer("a") == {"idioma": "English"} # Leer renueva la caducidad
+    time.sleep(0.2)
+    assert almacen.leer("a") == {"idioma": "English"}
+    assert almacen.leer("b") is None
+    assert len(almacen) == 1
+
+
+def test_memoria_descarta_la_menos_usada():
+    almacen = AlmacenMemoria(ttl=3600, max_entradas=2)
+    almacen.guardar("a", {"n": 1})
+    almacen.guardar("b", {"n": 2})
+    almacen.leer("a")
+    almacen.guardar("c", {"n": 3})
+    assert almacen.leer("b") is None
+    assert almacen.leer("a") == {"n": 1} and almacen.leer("c") == {"n": 3}
+
+
+def test_sqlite_ida_y_vuelta_entre_instancias(tmp_path):
+    ruta = str(tmp_path / "sesiones.sqlite3")
+    datos = {"idioma": "Español", "ultima": {"modelo": "LS0001", "kilates": "18"}, "n": 3, "ok": True}
+    AlmacenSqlite(ruta, ttl=3600).guardar("sid", datos)
+
+    otro_worker = AlmacenSqlite(ruta, ttl=3600)
+    assert otro_worker.leer("sid") == datos
+    otro_worker.borrar("sid")
+    assert AlmacenSqlite(ruta, ttl=3600).leer("sid") is None
+
+
+def test_sqlite_caducidad_y_purga(tmp_path):
+    almacen = AlmacenSqlite(str(tmp_path / "sesiones.sqlite3"), ttl=0.2)
+    almacen.guardar("vieja", {"n": 1})
+    time.sleep(0.25)
+    almacen.guardar("nueva", {"n": 2})
+
+    assert almacen.leer("vieja") is None
+    assert len(almacen) == 1
+    assert almacen.purgar() == 1
+    assert almacen.purgar() == 0
+    assert almacen.leer("nueva") == {"n": 2}
+
+
+def test_sqlite_no_crea_el_archivo_hasta_usarse(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = Flask(__name__)
+    app.permanent_session_lifetime = timedelta(hours=1)
+    interfaz = crear_interfaz_sesion(app, "sqlite", "sesiones.sqlite3")
+    assert not os.path.exists("sesiones.sqlite3")
+
+    interfaz.almacen.guardar("sid", {"n": 1})
+    assert os.path.exists("sesiones.sqlite3")
@@ -0,0 +1,34 @@
+import math
+from typing import Tuple
+
+
+def es_nulo(value) -> bool:
+    """None, NaN (también NaT/NA de pandas) o texto vacío; sin importar pandas."""
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    if type(value).__name__ in ("NaTType", "NAType"):
+        return True
+    return not str(value).strip()
+
+
+def es_nan(value) -> bool:
+    """Celda vacía del libro (None o NaN); a diferencia de es_nulo, el texto vacío sí es un valor."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def convertir_float(value) -> Tuple[float, bool]:
+    """(valor, válido): como safe_float, pero indica si un valor no vacío no se pudo convertir."""
+    if es_nulo(value):
+        return 0.0, True
+    try:
+        return float(str(value).strip()), True
+    except (TypeError, ValueError):
+        return 0.0, False
+
+
+def safe_float(value) -> float:
+    """Intenta convertir un valor a float de manera segura, retornando 0.0 en caso de error."""
+    return convertir_float(value)[0]
+
@@ -0,0 +1,52 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from catalogo import DatosCatalogo
+from facetas_catalogo import IndiceFacetas
+from indice_catalogo import EntradaVitrina
+
+
+class PaginaVitrina(NamedTuple):
+    posiciones: Tuple[int, ...] # Índices en VitrinaCatalogo.entradas, en el orden del catálogo
+    siguiente: Optional[int] # Cursor de la página siguiente; None si es la última
+    total: int # Entradas que cumplen los filtros
+
+
+class VitrinaCatalogo:
+    """
+    Orden fijo de las cards del catálogo y el índice de facetas de sus variantes, construidos una vez por
+    versión del catálogo. Las búsquedas devuelven un mapa de bits de posiciones de cards y paginar
+    recorre solo los bits a partir del cursor, así que el coste no depende de rescanear el DataFrame.
+    """
+
+    __slots__ = ("entradas", "facetas", "_todas")
+
+    def __init__(self, entradas: List[EntradaVitrina], facetas: IndiceFacetas):
+        self.entradas: Tuple[EntradaVitrina, ...] = tuple(entradas)
+        self.facetas = facetas
+        self._todas = (1 << len(entradas)) - 1
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def pagina(self, bits: Optional[int] = None, cursor: int = 0, limite: int = 24) -> PaginaVitrina:
+        """Hasta `limite` entradas del mapa de bits `bits` (todas si es None) a partir de la posición `cursor` (incluida)."""
+        bits = self._todas if bits is None else bits & self._todas
+        total = bits.bit_count()
+        restantes = bits >> cursor
+        posiciones = []
+        while restantes and len(posiciones) < limite:
+            menor = restantes & -restantes
+            desplazamiento = menor.bit_length() - 1
+            posiciones.append(cursor + desplazamiento)
+            cursor += desplazamiento + 1
+            restantes >>= desplazamiento + 1
+        return PaginaVitrina(tuple(posiciones), cursor if restantes else None, total)
+
+
+def construir_vitrina(datos: DatosCatalogo) -> VitrinaCatalogo:
+    """Cards del catálogo (ya extraídas por el índice al cargar) y sus facetas."""
+    entradas = datos.indice.entradas_vitrina()
+    posiciones = {}
+    for posicion, entrada in enumerate(entradas):
+        posiciones.setdefault((entrada.modelo, entrada.metal), posicion)
+    return VitrinaCatalogo(entradas, IndiceFacetas(datos.indice, datos.costos_diamantes, posiciones, len(entradas)))